@@ -0,0 +1,262 @@
+"""
+Trip blogs: map-reduce over a trip's recording transcripts.
+
+  media_assets (trip, transcribed) ──► group by local recorded_at date ──► trip day
+                                                                              │
+            ┌─────────────────────────────────────────────────────────────────┘
+            ▼                                         ≤ BLOG_MAP_CONCURRENCY at once
+  map:    day clips ──► input hash ──┬─ same as trip_day_summaries ──► cached summary
+                                     └─ changed ──► CLAUDE_FAST ──► DaySummary (stored)
+            │
+            ▼
+  reduce: every day's summary ──► CLAUDE_PRIMARY + blog_writer.txt ──► content_drafts 'blog'
+
+A 10-day trip can carry hundreds of clips: too many for one prompt and too
+slow to read serially. The map step condenses each day on its own, so the
+days run in parallel on the fast model and the primary model only reads a
+few hundred words per day.
+
+A day's input hash covers its clips (id, time, tag, transcript), the
+itinerary day title and MAP_VERSION. Editing, adding or deleting one day's
+clips re-runs that day's map only. The reduce step is skipped too when no
+summary changed since the latest blog draft, unless the caller forces a new
+version.
+
+A day over BLOG_DAY_MAX_INPUT_TOKENS keeps its best-scored clips (ai_score),
+still in the order they were recorded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from pydantic import ValidationError
+
+from app.agents.caption_agent import estimate_tokens
+from app.agents.itinerary_agent import PROMPTS_DIR
+from app.core import metrics
+from app.core.config import get_settings
+from app.models.content import BlogPost, DaySummary
+from app.services import llm
+
+log = logging.getLogger(__name__)
+
+# Bump when blog_day_summary.txt or DaySummary changes: every cached summary is redone
+MAP_VERSION = 1
+MAP_MAX_TOKENS = 1200
+REDUCE_MAX_TOKENS = 8192
+
+
+class NothingToWrite(Exception):
+    """The trip has no transcribed recordings yet."""
+
+
+def _loads(raw: str) -> dict:
+    return json.loads(re.sub(r"```(?:json)?|```", "", raw).strip())
+
+
+def _prompt(name: str) -> str:
+    return (PROMPTS_DIR / name).read_text()
+
+
+# ── Grouping ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class TripDay:
+    number: int
+    date: date
+    title: str | None = None
+    clips: list[dict] = field(default_factory=list)
+
+    def input_hash(self) -> str:
+        h = hashlib.sha256(f"v{MAP_VERSION}\x1e{self.title or ''}".encode())
+        for clip in self.clips:
+            h.update("\x1e".join((
+                clip["id"], clip["recorded_at"].isoformat(), clip.get("context_tag") or "", clip["transcript"],
+            )).encode())
+        return h.hexdigest()
+
+
+def group_days(assets: list[dict], start: date, end: date, tz: ZoneInfo, titles: dict[int, str]) -> list[TripDay]:
+    """Clips by trip day (1-based) of their local recording date; strays go to the first or last day."""
+    last = max(1, (end - start).days + 1)
+    days: dict[int, TripDay] = {}
+    for asset in sorted(assets, key=lambda a: a["recorded_at"]):
+        local: datetime = asset["recorded_at"].astimezone(tz)
+        number = min(max(1, (local.date() - start).days + 1), last)
+        day = days.get(number)
+        if day is None:
+            day = days[number] = TripDay(number, local.date(), titles.get(number))
+        day.clips.append(asset)
+    return [days[n] for n in sorted(days)]
+
+
+def select_clips(clips: list[dict], budget_tokens: int) -> list[dict]:
+    """The best-scored clips that fit the budget, in recording order."""
+    if sum(estimate_tokens(c["transcript"]) for c in clips) <= budget_tokens:
+        return clips
+    ranked = sorted(range(len(clips)), key=lambda i: -(clips[i].get("ai_score") or 0))
+    keep, used = set(), 0
+    for i in ranked:
+        cost = estimate_tokens(clips[i]["transcript"])
+        if used + cost <= budget_tokens:
+            keep.add(i)
+            used += cost
+    return [c for i, c in enumerate(clips) if i in keep]
+
+
+# ── Prompts ────────────────────────────────────────────────────────────────────
+
+def _trip_header(trip: dict) -> str:
+    parts = [
+        f"Trip: {trip.get('title') or trip['destination']}",
+        f"Destination: {trip['destination']}" + (f" (from {trip['origin']})" if trip.get("origin") else ""),
+        f"Dates: {trip['start_date']:%d %b %Y} – {trip['end_date']:%d %b %Y}",
+    ]
+    if trip.get("travel_style") or trip.get("trip_type"):
+        parts.append(f"Style: {trip.get('travel_style') or '-'} · {trip.get('trip_type') or '-'}"
+                     f" · {trip.get('num_travelers') or 1} traveler(s)")
+    return "\n".join(parts)
+
+
+def day_prompt(trip: dict, day: TripDay, tz: ZoneInfo, budget_tokens: int) -> str:
+    clips = select_clips(day.clips, budget_tokens)
+    lines = [_trip_header(trip), f"Day {day.number} — {day.date:%a %d %b}" + (f": {day.title}" if day.title else "")]
+    if len(clips) < len(day.clips):
+        lines.append(f"({len(day.clips) - len(clips)} lower-rated clips left out)")
+    for clip in clips:
+        meta = " · ".join(str(v) for v in (
+            clip["recorded_at"].astimezone(tz).strftime("%H:%M"),
+            clip.get("context_tag") or clip.get("recording_mode"),
+            f"{clip['duration_sec']} s" if clip.get("duration_sec") else None,
+        ) if v)
+        lines.append(f"\n[{meta}]\n{clip['transcript'].strip()}")
+    return "\n".join(lines)
+
+
+def blog_prompt(trip: dict, days: list[TripDay], summaries: dict[int, DaySummary]) -> str:
+    lines = [
+        "Write the full trip post (1500–2500 words) from these day-by-day notes, one section per day "
+        "in the body. The notes come from the traveler's own voice notes; keep their quotes.",
+        "",
+        _trip_header(trip),
+    ]
+    for day in days:
+        notes = summaries[day.number].model_dump(exclude_defaults=True)
+        lines.append(f"\nDay {day.number} ({day.date:%d %b}): {json.dumps(notes, ensure_ascii=False)}")
+    return "\n".join(lines)
+
+
+def reduce_hash(trip: dict, days: list[TripDay], hashes: dict[int, str]) -> str:
+    h = hashlib.sha256(_trip_header(trip).encode())
+    for day in days:
+        h.update(f"\x1e{day.number}:{hashes[day.number]}".encode())
+    return h.hexdigest()
+
+
+# ── Pipeline ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class BlogRun:
+    draft_id: str
+    version: int
+    title: str | None
+    days: int
+    days_summarised: int
+    days_cached: int
+    reused: bool = False
+
+
+async def summarise_day(trip: dict, day: TripDay, tz: ZoneInfo) -> DaySummary:
+    raw = await llm.complete_json(
+        day_prompt(trip, day, tz, get_settings().blog_day_max_input_tokens),
+        system=_prompt("blog_day_summary.txt"),
+        model=llm.CLAUDE_FAST,
+        max_tokens=MAP_MAX_TOKENS,
+    )
+    return DaySummary.model_validate(_loads(raw))
+
+
+async def write_blog(user_id: str, trip: dict, force: bool = False) -> BlogRun:
+    """Map changed days, reduce into a new blog draft version (or return the unchanged latest one)."""
+    from app.db.content import blog_inputs, save_blog_draft, save_day_summaries
+
+    s = get_settings()
+    tz = ZoneInfo(s.blog_timezone)
+    trip_id = str(trip["id"])
+    inputs = await blog_inputs(user_id, trip_id)
+    if not inputs["assets"]:
+        raise NothingToWrite(trip_id)
+
+    titles = {n: d["title"] for n, d in inputs["days"].items()}
+    days = group_days(inputs["assets"], trip["start_date"], trip["end_date"], tz, titles)
+    hashes = {day.number: day.input_hash() for day in days}
+
+    summaries: dict[int, DaySummary] = {}
+    stale: list[TripDay] = []
+    for day in days:
+        cached = inputs["summaries"].get(day.number)
+        hit = cached is not None and cached["input_hash"] == hashes[day.number]
+        metrics.cache_hit("blog_day_summary", hit)
+        if hit:
+            try:
+                summaries[day.number] = DaySummary.model_validate(cached["summary"])
+                continue
+            except ValidationError:
+                pass
+        stale.append(day)
+
+    latest = inputs["latest"]
+    input_hash = reduce_hash(trip, days, hashes)
+    if not stale and not force and latest and latest["input_hash"] == input_hash:
+        return BlogRun(latest["id"], latest["version"], latest["title"], len(days), 0, len(days), reused=True)
+
+    limit = asyncio.Semaphore(max(1, s.blog_map_concurrency))
+
+    async def map_day(day: TripDay) -> DaySummary:
+        async with limit:
+            with metrics.BLOG_STAGE_SECONDS.labels("map").time():
+                return await summarise_day(trip, day, tz)
+
+    mapped = await asyncio.gather(*(map_day(day) for day in stale), return_exceptions=True)
+    # Keep the days that did finish, so a retry only redoes the ones that failed
+    fresh = [(day, m) for day, m in zip(stale, mapped) if isinstance(m, DaySummary)]
+    if fresh:
+        await save_day_summaries(
+            user_id, trip_id, [(day.number, hashes[day.number], m.model_dump()) for day, m in fresh], llm.CLAUDE_FAST,
+        )
+    errors = [m for m in mapped if isinstance(m, BaseException)]
+    if errors:
+        log.warning("blog map failed for %d of %d days of trip %s", len(errors), len(stale), trip_id)
+        raise errors[0]
+    summaries.update((day.number, m) for day, m in fresh)
+
+    with metrics.BLOG_STAGE_SECONDS.labels("reduce").time():
+        raw = await llm.complete_json(
+            blog_prompt(trip, days, summaries),
+            system=_prompt("blog_writer.txt"),
+            model=llm.CLAUDE_PRIMARY,
+            max_tokens=REDUCE_MAX_TOKENS,
+        )
+    post = BlogPost.model_validate(_loads(raw))
+
+    metadata = {
+        "meta_description": post.meta_description,
+        "key_takeaways": post.key_takeaways,
+        "word_count": len(post.body.split()),
+        "days": len(days),
+        "model": llm.CLAUDE_PRIMARY,
+        "input_hash": input_hash,
+    }
+    draft_id, version = await save_blog_draft(
+        user_id, trip_id, [a["id"] for a in inputs["assets"]], post.title, post.body, metadata,
+    )
+    log.info("blog v%d for trip %s: %d days, %d summarised", version, trip_id, len(days), len(fresh))
+    return BlogRun(draft_id, version, post.title, len(days), len(fresh), len(days) - len(stale))
@@ -0,0 +1,273 @@
+"""
+Caption generation for ContentPilot drafts: many transcripts per fast-model call.
+
+  media_assets (transcribed) ──► claim ('drafting') ──► pack per user
+                                                          │ ≤ CAPTION_PACK_INPUT_TOKENS
+                                                          │ ≤ CAPTION_PACK_MAX_ITEMS
+            ┌─────────────────────────────────────────────┘
+            ▼                                  ≤ CAPTION_CONCURRENCY calls at once
+  CLAUDE_FAST, one call per pack ──► validate each item (CaptionSet)
+            │                           └─ invalid ──► retried once on its own
+            ▼
+  content_drafts (4 rows per recording) + media_assets status, one transaction
+
+One transcript per call would resend the ~400-token caption_generator system
+prompt every time and pay a round trip for a ~700-token answer. Packing
+several recordings into one prompt amortises both; the batch wrapper
+(prompts/caption_batch.txt) asks for one caption set per `<item id>`.
+
+Packs never mix users: one traveler's recordings must not be able to leak
+into another's captions. Token counts are estimated from characters
+(CHARS_PER_TOKEN) — close enough for packing, with headroom in the budget —
+and transcripts beyond CAPTION_MAX_TRANSCRIPT_TOKENS are cut.
+
+Outcomes per recording:
+
+  drafted    valid captions saved              → 'drafted'
+  failed     still invalid after the retry     → 'failed'
+  released   the LLM call itself failed        → back to 'transcribed' for the next run
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass, field
+
+from pydantic import ValidationError
+
+from app.agents.itinerary_agent import PROMPTS_DIR
+from app.core import metrics
+from app.core.config import get_settings
+from app.models.content import CaptionSet
+from app.services import llm
+
+log = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+OUTPUT_TOKENS_PER_ITEM = 900     # a full caption set runs 500–800 tokens
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _system_prompt() -> str:
+    return "\n\n".join((PROMPTS_DIR / name).read_text() for name in ("caption_generator.txt", "caption_batch.txt"))
+
+
+# ── Packing ────────────────────────────────────────────────────────────────────
+
+def render_item(item_id: str, asset: dict, max_transcript_tokens: int) -> str:
+    transcript = asset["transcript"].strip()
+    limit = max_transcript_tokens * CHARS_PER_TOKEN
+    if len(transcript) > limit:
+        transcript = transcript[:limit].rsplit(" ", 1)[0] + " …"
+    details = [
+        f"Destination: {asset['destination']}" if asset.get("destination") else None,
+        f"Recording: {asset['recording_mode']}" if asset.get("recording_mode") else None,
+        f"Tag: {asset['context_tag']}" if asset.get("context_tag") else None,
+        f"Length: {asset['duration_sec']} s" if asset.get("duration_sec") else None,
+    ]
+    lines = [f'<item id="{item_id}">', *(d for d in details if d), "Transcript:", transcript, "</item>"]
+    return "\n".join(lines)
+
+
+def pack(assets: list[dict], input_budget: int, max_items: int, max_transcript_tokens: int) -> list[list[dict]]:
+    """Greedy packs of one user's assets each, in claim order, within the token budget and item cap."""
+    by_user: dict[str, list[dict]] = {}
+    for asset in assets:
+        by_user.setdefault(asset["user_id"], []).append(asset)
+
+    packs: list[list[dict]] = []
+    for user_assets in by_user.values():
+        current: list[dict] = []
+        used = 0
+        for asset in user_assets:
+            cost = estimate_tokens(render_item("00", asset, max_transcript_tokens))
+            if current and (used + cost > input_budget or len(current) >= max_items):
+                packs.append(current)
+                current, used = [], 0
+            current.append(asset)
+            used += cost
+        if current:
+            packs.append(current)
+    return packs
+
+
+def build_batch_prompt(assets: list[dict], max_transcript_tokens: int) -> str:
+    items = "\n\n".join(render_item(str(n), a, max_transcript_tokens) for n, a in enumerate(assets, 1))
+    return f"Write captions for each of these {len(assets)} recordings.\n\n{items}"
+
+
+def parse_batch(raw: str, count: int) -> dict[int, CaptionSet]:
+    """Valid caption sets by 0-based position; missing, duplicate or malformed items are left out."""
+    try:
+        data = json.loads(re.sub(r"```(?:json)?|```", "", raw).strip())
+    except json.JSONDecodeError:
+        return {}
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return {}
+
+    out: dict[int, CaptionSet] = {}
+    seen: set[int] = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            position = int(item.get("id")) - 1
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= position < count:
+            continue
+        if position in seen:   # answered twice: trust neither
+            out.pop(position, None)
+            continue
+        seen.add(position)
+        try:
+            out[position] = CaptionSet.model_validate(item)
+        except ValidationError:
+            pass
+    return out
+
+
+# ── Generation ─────────────────────────────────────────────────────────────────
+
+@dataclass
+class CaptionResults:
+    captions: dict[str, CaptionSet] = field(default_factory=dict)
+    failed: list[str] = field(default_factory=list)
+    released: list[str] = field(default_factory=list)
+    llm_calls: int = 0
+
+
+async def caption_assets(assets: list[dict]) -> CaptionResults:
+    s = get_settings()
+    system = _system_prompt()
+    limit = asyncio.Semaphore(max(1, s.caption_concurrency))
+    results = CaptionResults()
+
+    async def call(group: list[dict]) -> dict[int, CaptionSet] | None:
+        async with limit:
+            results.llm_calls += 1
+            try:
+                raw = await llm.complete_json(
+                    build_batch_prompt(group, s.caption_max_transcript_tokens),
+                    system=system,
+                    model=llm.CLAUDE_FAST,
+                    max_tokens=OUTPUT_TOKENS_PER_ITEM * len(group),
+                )
+            except Exception as e:
+                log.warning("caption call for %d recordings failed: %s", len(group), e)
+                results.released.extend(a["id"] for a in group)
+                return None
+        return parse_batch(raw, len(group))
+
+    async def run(group: list[dict], retry: bool) -> None:
+        metrics.CAPTION_PACK_ITEMS.observe(len(group))
+        parsed = await call(group)
+        if parsed is None:
+            return
+        retries = []
+        for n, asset in enumerate(group):
+            if n in parsed:
+                results.captions[asset["id"]] = parsed[n]
+            elif retry:
+                retries.append(asset)
+            else:
+                results.failed.append(asset["id"])
+        if retries:
+            metrics.CAPTION_ITEMS.labels("retried").inc(len(retries))
+            # On its own, so one confusing transcript cannot derail the rest again
+            await asyncio.gather(*(run([asset], retry=False) for asset in retries))
+
+    packs = pack(assets, s.caption_pack_input_tokens, s.caption_pack_max_items, s.caption_max_transcript_tokens)
+    await asyncio.gather(*(run(group, retry=True) for group in packs))
+    return results
+
+
+def draft_rows(asset: dict, captions: CaptionSet) -> list[dict]:
+    """content_drafts rows for one recording: Instagram, X/Twitter, WhatsApp and YouTube."""
+    base = {"trip_id": asset["trip_id"], "user_id": asset["user_id"], "asset_id": asset["id"], "title": None}
+    instagram = captions.instagram
+    platforms = (
+        ("caption_instagram", instagram.caption, "instagram", {
+            "hashtags_caption": instagram.hashtags_caption,
+            "hashtags_first_comment": instagram.hashtags_first_comment,
+        }),
+        ("caption_twitter", captions.twitter_hook, "twitter", {}),
+        ("whatsapp_summary", captions.whatsapp_summary, "whatsapp", {}),
+        ("youtube_description", captions.youtube_description, "youtube", {}),
+    )
+    return [
+        {**base, "draft_type": draft_type, "content": content,
+         "metadata": {"platform": platform, "word_count": len(content.split()), "model": llm.CLAUDE_FAST, **extra}}
+        for draft_type, content, platform, extra in platforms
+    ]
+
+
+# ── Runs ───────────────────────────────────────────────────────────────────────
+
+@dataclass
+class CaptionRun:
+    assets: int = 0
+    drafted: int = 0
+    failed: int = 0
+    released: int = 0
+    llm_calls: int = 0
+    draft_ids: list[str] = field(default_factory=list)
+
+
+async def run_pending(limit: int, user_id: str | None = None, asset_ids: list[str] | None = None) -> CaptionRun:
+    """Claim up to `limit` transcribed recordings (optionally one user's, or specific ones) and draft captions."""
+    from app.db.content import claim_transcribed, save_caption_drafts
+
+    started = time.perf_counter()
+    assets = await claim_transcribed(limit, get_settings().caption_claim_ttl_s, user_id, asset_ids)
+    if not assets:
+        return CaptionRun()
+
+    try:
+        results = await caption_assets(assets)
+    except BaseException:
+        # Cancelled or crashed mid-run: hand the claims back rather than wait out the TTL
+        await asyncio.shield(save_caption_drafts([], [], [], [a["id"] for a in assets]))
+        raise
+
+    by_id = {a["id"]: a for a in assets}
+    rows = [row for asset_id, captions in results.captions.items() for row in draft_rows(by_id[asset_id], captions)]
+    draft_ids = await save_caption_drafts(rows, list(results.captions), results.failed, results.released)
+
+    for outcome, count in (("drafted", len(results.captions)), ("failed", len(results.failed)),
+                           ("released", len(results.released))):
+        if count:
+            metrics.CAPTION_ITEMS.labels(outcome).inc(count)
+    metrics.CAPTION_RUN_SECONDS.observe(time.perf_counter() - started)
+    log.info("captioned %d recordings in %d calls: %d drafted, %d failed, %d released",
+             len(assets), results.llm_calls, len(results.captions), len(results.failed), len(results.released))
+    return CaptionRun(len(assets), len(results.captions), len(results.failed), len(results.released),
+                      results.llm_calls, draft_ids)
+
+
+async def caption_loop() -> None:
+    """
+    Lifespan task: caption what was transcribed every CAPTION_POLL_S, again at
+    once while claims come back full. A run that released recordings (the LLM
+    call failed) waits for the next poll: they are claimable again at once, so
+    an outage would otherwise be a tight loop of claims and failing calls.
+    """
+    s = get_settings()
+    while True:
+        await asyncio.sleep(s.caption_poll_s)
+        try:
+            while True:
+                run = await run_pending(s.caption_claim_limit)
+                if run.assets < s.caption_claim_limit or run.released:
+                    break
+        except Exception as e:
+            log.warning("caption run failed: %s", e)
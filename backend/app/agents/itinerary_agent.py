@@ -2,10 +2,16 @@
 ItineraryAgent — converts a traveler's intent into a fully enriched itinerary.
 
 Pipeline:
-  1. LLM call (Claude) — generates day-by-day plan with accommodation_suggestions
-  2. Accommodation API search — runs in parallel with step 1 for destinations we
-     already know from the request; then enriches per-day overnight locations
-     discovered in the LLM response
+  0. Recall — a near-identical past request (itinerary_recall.py) is re-dated,
+     optionally touched up by CLAUDE_FAST, and goes straight to step 2
+  1. LLM — two stages when the trip fits a skeleton bucket (itinerary_skeleton.py):
+       a. destination skeleton (CLAUDE_PRIMARY, cached per destination / month /
+          length, seeded from `destinations`)
+       b. personalisation (CLAUDE_FAST): picks skeleton activities by ref and
+          writes only what is specific to the traveler; assembled in code
+     otherwise one CLAUDE_PRIMARY call writes the whole plan
+  2. Accommodation API search — enriches per-day overnight locations
+     discovered in the plan
   3. Merge — attach live AccommodationOption results to each ItineraryDay
 
 The accommodation layer is injected via AccommodationService, so swapping
@@ -18,9 +24,15 @@ import asyncio
 import json
 import logging
 import re
-from datetime import date, timedelta
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
+from app.agents.itinerary_skeleton import MONTHS, Skeleton, SkeletonKey, get_skeleton_cache, skeleton_key
+from app.core import deadline, metrics, tracing
+from app.core.config import get_settings
+from app.core.upstream import Priority, upstream_priority
 from app.models.trip import (
     AccommodationOption,
     AccommodationSuggestion,
@@ -35,10 +47,12 @@ from app.services.accommodation import (
     AccomType,
     get_accommodation_service,
 )
-from app.services.llm import CLAUDE_PRIMARY, complete_json
+from app.services.llm import CLAUDE_FAST, CLAUDE_PRIMARY, complete_json
 
 log = logging.getLogger(__name__)
 PROMPTS_DIR = Path(__file__).parent.parent.parent.parent / "prompts"
+MAX_TOKENS = 8192
+PERSONALISE_MAX_TOKENS = 3072
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
@@ -116,9 +130,15 @@ def _parse_suggestions(raw: list[dict]) -> list[AccommodationSuggestion]:
     return out
 
 
+def _loads(raw: str) -> dict:
+    return json.loads(re.sub(r"```(?:json)?|```", "", raw).strip())
+
+
 def _parse_llm_response(raw: str, req: ItineraryRequest) -> ItineraryResponse:
-    raw = re.sub(r"```(?:json)?|```", "", raw).strip()
-    data = json.loads(raw)
+    return _itinerary_from_data(_loads(raw), req)
+
+
+def _itinerary_from_data(data: dict, req: ItineraryRequest) -> ItineraryResponse:
     duration = (req.end_date - req.start_date).days + 1
 
     days: list[ItineraryDay] = []
@@ -214,49 +234,358 @@ async def _enrich_with_live_options(
     per_night_budget = _per_night_budget(req)
     preferred_types = _preferred_accom_types(req)
 
-    # search_multi queries all locations concurrently
-    results_by_location = await service.search_multi(
-        locations=locations,
-        check_in=req.start_date,
-        check_out=req.end_date,
-        num_guests=req.num_travelers,
-        budget_per_night_max_inr=per_night_budget,
-        preferred_types=preferred_types or None,
-    )
+    # search_multi queries all locations concurrently, returning at the deadline
+    with tracing.span("itinerary.enrich", locations=len(locations)) as span, \
+            deadline.deadline_scope(get_settings().enrich_deadline_s):
+        results = await service.search_multi(
+            locations=locations,
+            check_in=req.start_date,
+            check_out=req.end_date,
+            num_guests=req.num_travelers,
+            budget_per_night_max_inr=per_night_budget,
+            preferred_types=preferred_types or None,
+        )
+        span.set("pending", len(results.pending))
 
     # Attach results to each day
     for day in itinerary.days:
         loc = (day.overnight_location or "").strip()
-        if loc and loc in results_by_location:
+        if loc and loc in results.options:
             day.accommodation_options = [
-                _map_accom_option(o) for o in results_by_location[loc]
+                _map_accom_option(o) for o in results.options[loc]
             ]
+            day.accommodation_status = "pending" if loc in results.pending else None
 
     return itinerary
 
 
-# ── Public entry point ─────────────────────────────────────────────────────────
-
-async def generate_itinerary(req: ItineraryRequest) -> ItineraryResponse:
+async def refresh_pending_accommodation(itinerary: ItineraryResponse, req: ItineraryRequest) -> bool:
     """
-    Full pipeline:
-      LLM generation  ──┐
-                         ├─► merge ──► ItineraryResponse
-      (runs after LLM)  Accommodation search
+    Re-run the searches a deadline cut short, without one (background work).
+    Returns whether any day changed.
     """
-    system_prompt = _load_prompt("itinerary_builder.txt")
-    user_message = _build_user_message(req)
+    pending = [day for day in itinerary.days if day.accommodation_status == "pending"]
+    if not pending:
+        return False
+    with deadline.deadline_scope(None), upstream_priority(Priority.BACKGROUND):
+        results = await get_accommodation_service().search_multi(
+            locations=_unique_overnight_locations(pending),
+            check_in=req.start_date,
+            check_out=req.end_date,
+            num_guests=req.num_travelers,
+            budget_per_night_max_inr=_per_night_budget(req),
+            preferred_types=_preferred_accom_types(req) or None,
+        )
+    for day in pending:
+        options = results.options.get((day.overnight_location or "").strip())
+        if options:
+            day.accommodation_options = [_map_accom_option(o) for o in options]
+            day.accommodation_status = None
+    return any(day.accommodation_status is None for day in pending)
+
+
+# ── Two-stage generation ───────────────────────────────────────────────────────
+
+# Stay tiers shown per travel style (the skeleton carries all of them)
+STAY_TIERS = {
+    "budget": ("budget",),
+    "luxury": ("mid", "premium", "luxury"),
+}
+DEFAULT_STAY_TIERS = ("budget", "mid", "premium")
+
+
+def _skeleton_message(key: SkeletonKey, facts: dict | None) -> str:
+    lines = [
+        f"Destination: {key.destination}",
+        f"Month: {MONTHS[key.month - 1]}",
+        f"Trip length: {key.days} days",
+    ]
+    if facts:
+        lines.append("\nKnown facts from our catalogue (trust these):")
+        if facts.get("state"):
+            lines.append(f"- State: {facts['state']}")
+        if facts.get("description"):
+            lines.append(f"- About: {facts['description']}")
+        if facts.get("best_months"):
+            lines.append(f"- Best months: {', '.join(MONTHS[m - 1] for m in facts['best_months'] if 1 <= m <= 12)}")
+        if facts.get("difficulty"):
+            lines.append(f"- Difficulty: {facts['difficulty']}")
+        if facts.get("permits_required"):
+            lines.append(f"- Permits: {facts.get('permit_info') or 'required'}")
+        if facts.get("avg_budget_low") and facts.get("avg_budget_high"):
+            lines.append(f"- Typical spend: INR {facts['avg_budget_low']:,}–{facts['avg_budget_high']:,} per person per day")
+        if facts.get("tags"):
+            lines.append(f"- Known for: {', '.join(facts['tags'])}")
+    lines.append("\nReturn the destination skeleton JSON.")
+    return "\n".join(lines)
+
+
+async def _build_skeleton(key: SkeletonKey) -> Skeleton:
+    from app.db import is_configured
+
+    facts = None
+    if is_configured():
+        from app.db.destinations import destination_facts
+
+        try:
+            facts = await destination_facts(key.destination)
+        except Exception as e:
+            log.warning("destination facts lookup failed for '%s': %s", key.destination, e)
+
+    with tracing.span("itinerary.skeleton.build", destination=key.destination, month=key.month, days=key.days):
+        raw = await complete_json(
+            prompt=_skeleton_message(key, facts),
+            system=_load_prompt("itinerary_skeleton.txt"),
+            model=CLAUDE_PRIMARY,
+            max_tokens=MAX_TOKENS,
+        )
+    return Skeleton(key, _loads(raw), CLAUDE_PRIMARY)
+
+
+def _personalise_message(skeleton: Skeleton, req: ItineraryRequest) -> str:
+    duration = (req.end_date - req.start_date).days + 1
+    return (
+        _build_user_message(req).split("\nReturn a JSON object")[0]
+        + f"\n\nDESTINATION PLAN ({skeleton.key.days} plan days for a {duration}-day trip):\n"
+        + skeleton.compact()
+        + f"\n\nReturn the personalised itinerary JSON with exactly {duration} days."
+    )
+
+
+def _assemble(skeleton: Skeleton, personal: dict, req: ItineraryRequest) -> dict:
+    """Expand the fast model's refs against the skeleton into the single-stage JSON shape."""
+    tiers = STAY_TIERS.get(req.travel_style.value, DEFAULT_STAY_TIERS)
+    plan_days = skeleton.days
+    days = []
+    for i, day in enumerate(personal.get("days", [])):
+        from_day = day.get("from_day")
+        base = plan_days[from_day - 1] if isinstance(from_day, int) and 1 <= from_day <= len(plan_days) else {}
+
+        activities = []
+        for a in day.get("activities", []):
+            ref = a.get("ref")
+            if ref is None:
+                activities.append(a)
+            elif ref in skeleton.activities:
+                merged = {**skeleton.activities[ref], **a}
+                merged.pop("ref")
+                activities.append(merged)
+
+        overnight = day["overnight_location"] if "overnight_location" in day else base.get("overnight_location")
+        days.append({
+            "day_number": i + 1,
+            "title": day.get("title") or base.get("title"),
+            "summary": day.get("summary") or base.get("summary", ""),
+            "transport_for_day": day.get("transport_for_day") or base.get("transport_for_day"),
+            "overnight_location": overnight,
+            "estimated_cost_inr": day.get("estimated_cost_inr", base.get("estimated_cost_inr")),
+            "weather_note": day.get("weather_note") or base.get("weather_note"),
+            "activities": activities,
+            "accommodation_suggestions": [s for s in skeleton.stays(overnight) if s.get("tier") in tiers],
+        })
+
+    packing = list(skeleton.data.get("packing_list") or [])
+    have = {str(p.get("item", "")).lower() for p in packing}
+    packing += [p for p in personal.get("packing_extra") or [] if str(p.get("item", "")).lower() not in have]
+    return {
+        "summary": personal.get("summary") or skeleton.data.get("overview", ""),
+        "total_estimated_cost_inr": personal.get("total_estimated_cost_inr"),
+        "best_time_note": personal.get("best_time_note") or skeleton.data.get("best_time_note"),
+        "days": days,
+        "packing_list": packing,
+        "key_tips": personal.get("key_tips") or (skeleton.data.get("key_tips") or [])[:5],
+    }
+
+
+async def _personalised(req: ItineraryRequest, key: SkeletonKey, span) -> ItineraryResponse:
+    started = time.perf_counter()
+    skeleton = await get_skeleton_cache().get(key, _build_skeleton)
+    skeleton_done = time.perf_counter()
 
+    raw = await complete_json(
+        prompt=_personalise_message(skeleton, req),
+        system=_load_prompt("itinerary_personalise.txt"),
+        model=CLAUDE_FAST,
+        max_tokens=PERSONALISE_MAX_TOKENS,
+    )
+    llm_done = time.perf_counter()
+
+    with tracing.span("itinerary.parse", raw_chars=len(raw)), metrics.PARSE_SECONDS.time():
+        itinerary = _itinerary_from_data(_assemble(skeleton, _loads(raw), req), req)
+        itinerary._raw_llm_response = raw
+    span.set("skeleton", key.describe())
+
+    metrics.ITINERARY_STAGE_SECONDS.labels("skeleton").observe(skeleton_done - started)
+    metrics.ITINERARY_STAGE_SECONDS.labels("personalise").observe(llm_done - skeleton_done)
+    metrics.ITINERARY_STAGE_SECONDS.labels("parse").observe(time.perf_counter() - llm_done)
+    return itinerary
+
+
+async def _from_scratch(req: ItineraryRequest) -> ItineraryResponse:
+    system_prompt, user_message = build_prompt(req)
+    started = time.perf_counter()
     raw = await complete_json(
         prompt=user_message,
         system=system_prompt,
         model=CLAUDE_PRIMARY,
-        max_tokens=8192,
+        max_tokens=MAX_TOKENS,
     )
+    llm_done = time.perf_counter()
+
+    with tracing.span("itinerary.parse", raw_chars=len(raw)), metrics.PARSE_SECONDS.time():
+        itinerary = _parse_llm_response(raw, req)
+        itinerary._raw_llm_response = raw
+
+    metrics.ITINERARY_STAGE_SECONDS.labels("llm").observe(llm_done - started)
+    metrics.ITINERARY_STAGE_SECONDS.labels("parse").observe(time.perf_counter() - llm_done)
+    return itinerary
+
 
-    itinerary = _parse_llm_response(raw, req)
+# ── Recall ─────────────────────────────────────────────────────────────────────
+
+def _touch_up_message(itinerary: ItineraryResponse, req: ItineraryRequest) -> str:
+    lines = [
+        _build_user_message(req).split("\nReturn a JSON object")[0],
+        f"\nEXISTING ITINERARY (written for a {itinerary.travel_style.value} {itinerary.trip_type.value} "
+        f"trip from {itinerary.origin}):",
+        f"Summary: {itinerary.summary}",
+        f"Total per person: INR {itinerary.total_estimated_cost_inr}",
+    ]
+    for day in itinerary.days:
+        lines.append(f"Day {day.day_number}: {day.title} — {day.transport_for_day or '-'}; "
+                     f"INR {day.estimated_cost_inr}; {day.weather_note or '-'}")
+    lines.append("\nReturn the adjustments JSON.")
+    return "\n".join(lines)
 
-    # Enrich with live accommodation options (async, provider-agnostic)
-    itinerary = await _enrich_with_live_options(itinerary, req)
 
+def _apply_touch_up(itinerary: ItineraryResponse, data: dict) -> None:
+    days = {day.day_number: day for day in itinerary.days}
+    for change in data.get("days") or []:
+        day = days.get(change.get("day_number"))
+        if day is None:
+            continue
+        for name in ("transport_for_day", "estimated_cost_inr", "weather_note"):
+            if change.get(name) is not None:
+                setattr(day, name, change[name])
+    if data.get("summary"):
+        itinerary.summary = data["summary"]
+    if data.get("total_estimated_cost_inr") is not None:
+        itinerary.total_estimated_cost_inr = data["total_estimated_cost_inr"]
+    if data.get("key_tips"):
+        itinerary.key_tips = data["key_tips"]
+
+
+async def _recalled(req: ItineraryRequest, user_id: str, span) -> ItineraryResponse | None:
+    """A re-dated copy of the closest past generation, or None below the threshold."""
+    from app.agents.itinerary_recall import get_recall_index
+
+    settings = get_settings()
+    recalled = get_recall_index().nearest(req, settings.itinerary_recall_threshold, user_id)
+    metrics.cache_hit("itinerary_recall", recalled is not None)
+    if recalled is None:
+        return None
+    span.set("recall_similarity", round(recalled.similarity, 3))
+
+    source = recalled.itinerary
+    itinerary = source.model_copy(update={
+        "itinerary_id": str(uuid.uuid4()),
+        "destination": req.destination,
+        "origin": req.origin,
+        "start_date": req.start_date,
+        "end_date": req.end_date,
+        "trip_type": req.trip_type,
+        "travel_style": req.travel_style,
+        "generated_at": datetime.now(timezone.utc),
+        "days": [
+            day.model_copy(update={"date": req.start_date + timedelta(days=i), "accommodation_options": []})
+            for i, day in enumerate(source.days)
+        ],
+    })
+
+    if settings.itinerary_recall_touch_up:
+        try:
+            raw = await complete_json(
+                prompt=_touch_up_message(source, req),
+                system=_load_prompt("itinerary_touch_up.txt"),
+                model=CLAUDE_FAST,
+                max_tokens=PERSONALISE_MAX_TOKENS,
+            )
+            _apply_touch_up(itinerary, _loads(raw))
+            itinerary._raw_llm_response = raw
+        except Exception as e:
+            # The recalled plan already fits within the threshold: serve it untouched
+            log.warning("itinerary touch-up failed, serving the recalled plan as is: %s", e)
+    return itinerary
+
+
+def _remember(req: ItineraryRequest, itinerary: ItineraryResponse, user_id: str) -> None:
+    from app.agents.itinerary_recall import get_recall_index
+
+    try:
+        get_recall_index().insert(req, itinerary, user_id)
+    except Exception as e:
+        log.warning("recall index insert failed: %s", e)
+
+
+# ── Public entry point ─────────────────────────────────────────────────────────
+
+def build_prompt(req: ItineraryRequest) -> tuple[str, str]:
+    """(system prompt, user message) for the itinerary LLM call."""
+    return _load_prompt("itinerary_builder.txt"), _build_user_message(req)
+
+
+async def itinerary_from_llm(raw: str, req: ItineraryRequest) -> ItineraryResponse:
+    """
+    The pipeline after the LLM call: parse + accommodation enrichment. Used when
+    the completion was produced elsewhere (offline Message Batches).
+    """
+    with tracing.span("itinerary.parse", raw_chars=len(raw)), metrics.PARSE_SECONDS.time():
+        itinerary = _parse_llm_response(raw, req)
+        itinerary._raw_llm_response = raw
+    return await _enrich_with_live_options(itinerary, req)
+
+
+async def generate_itinerary(req: ItineraryRequest, user_id: str | None = None) -> ItineraryResponse:
+    """
+    Full pipeline:
+      recalled near-duplicate ────────────┐
+        or: skeleton ──► personalise ─────┼─► accommodation search ──► ItineraryResponse
+        or: single LLM call ──────────────┘
+
+    A personalisation that can't be assembled (malformed JSON, bad refs) falls
+    back to the single call; LLM errors propagate as before. Recall needs the
+    verified `user_id`: a signed-in user's fresh generations are indexed and
+    recalled for that user only; recalled ones are not indexed. Anonymous
+    requests always generate.
+    """
+    settings = get_settings()
+    with tracing.span("itinerary.generate", destination=req.destination) as span:
+        started = time.perf_counter()
+        recall = settings.itinerary_recall and user_id is not None
+        itinerary = await _recalled(req, user_id, span) if recall else None
+        if itinerary is not None:
+            span.set("pipeline", "recall")
+            metrics.ITINERARY_STAGE_SECONDS.labels("recall").observe(time.perf_counter() - started)
+        else:
+            key = skeleton_key(req) if settings.itinerary_two_stage else None
+            if key is not None:
+                try:
+                    itinerary = await _personalised(req, key, span)
+                    span.set("pipeline", "two_stage")
+                except (ValueError, KeyError, TypeError) as e:   # JSONDecodeError and ValidationError are ValueErrors
+                    log.warning("two-stage itinerary for %s failed, generating from scratch: %s", key.describe(), e)
+            if itinerary is None:
+                itinerary = await _from_scratch(req)
+                span.set("pipeline", "single")
+            if recall:
+                _remember(req, itinerary, user_id)
+        parsed = time.perf_counter()
+        span.set("days", len(itinerary.days))
+
+        # Enrich with live accommodation options (async, provider-agnostic)
+        itinerary = await _enrich_with_live_options(itinerary, req)
+        finished = time.perf_counter()
+
+    metrics.ITINERARY_STAGE_SECONDS.labels("enrich").observe(finished - parsed)
+    metrics.ITINERARY_STAGE_SECONDS.labels("total").observe(finished - started)
     return itinerary
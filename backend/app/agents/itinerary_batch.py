@@ -0,0 +1,188 @@
+"""
+Batch itinerary generation: many variants of a trip in one request.
+
+  items ──► group identical requests ──► one generation per group
+                                           │
+            ┌──────────────────────────────┘   ≤ ITINERARY_BATCH_CONCURRENCY at once
+            ▼
+  admission slot ──► generate_itinerary ──► yield every item of the group
+            accommodation searches shared across the whole batch, queued
+            behind interactive ones at each provider host (Priority.BATCH)
+
+Online: each unique item takes an admission slot like a single /generate does,
+so it sits in the same fair queue at the caller's tier weight. Only
+ITINERARY_BATCH_CONCURRENCY items of a batch hold or wait for a slot at any
+time, so a 50-item batch cannot crowd out interactive users. Results are
+yielded as they complete, not in request order.
+
+Offline: the prompts go to the Message Batches API. The requests are stored so
+the results can be parsed and enriched when they are collected. Enrichment
+shares searches the same way.
+
+Requests that differ only in trip_id are identical for generation. Each copy
+gets its own itinerary_id so it can be saved to its own trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from app.agents.itinerary_agent import MAX_TOKENS, build_prompt, generate_itinerary, itinerary_from_llm
+from app.core import metrics
+from app.core.admission import DEFAULT_TIER, AdmissionRejected, get_admission_controller
+from app.core.config import get_settings
+from app.core.upstream import Priority, upstream_priority
+from app.models.trip import ItineraryRequest, ItineraryResponse
+from app.services import llm
+from app.services.accommodation import get_accommodation_service
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItemResult:
+    index: int
+    request: ItineraryRequest
+    itinerary: ItineraryResponse | None = None
+    error: str | None = None
+    duplicate_of: int | None = None
+
+
+def group_items(items: list[ItineraryRequest]) -> list[list[int]]:
+    """Indices of identical requests (ignoring trip_id), in first-seen order."""
+    groups: dict[str, list[int]] = {}
+    for i, req in enumerate(items):
+        groups.setdefault(req.model_dump_json(exclude={"trip_id"}), []).append(i)
+    return list(groups.values())
+
+
+def _error(e: Exception) -> str:
+    if isinstance(e, json.JSONDecodeError):
+        return f"AI returned malformed JSON: {e}"
+    return str(e) or type(e).__name__
+
+
+def _fan_out(
+    group: list[int], items: list[ItineraryRequest], itinerary: ItineraryResponse | None, error: str | None, mode: str,
+) -> list[BatchItemResult]:
+    out = []
+    for n, index in enumerate(group):
+        copy = itinerary
+        if itinerary is not None and n:
+            copy = itinerary.model_copy(deep=True, update={"itinerary_id": str(uuid.uuid4())})
+        out.append(BatchItemResult(index, items[index], copy, error, group[0] if n else None))
+        metrics.BATCH_ITEMS.labels(mode, "duplicate" if n else ("error" if error else "ok")).inc()
+    return out
+
+
+# ── Online ─────────────────────────────────────────────────────────────────────
+
+async def _generate_with_slot(req: ItineraryRequest, key: str, tier: str, user_id: str | None) -> ItineraryResponse:
+    controller = get_admission_controller()
+    retries = get_settings().itinerary_batch_admission_retries
+    attempt = 0
+    while True:
+        try:
+            async with controller.slot(key, tier):
+                return await generate_itinerary(req, user_id)
+        except AdmissionRejected as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            # Batches are not interactive: wait out the backlog instead of failing the item
+            await asyncio.sleep(e.retry_after_s)
+
+
+async def generate_batch(
+    items: list[ItineraryRequest], key: str, tier: str = DEFAULT_TIER, user_id: str | None = None,
+) -> AsyncIterator[BatchItemResult]:
+    """
+    Yield one result per item as generations finish. Cancels the remaining work when closed early.
+    `user_id` scopes itinerary recall (see generate_itinerary).
+    """
+    groups = group_items(items)
+    limit = asyncio.Semaphore(max(1, get_settings().itinerary_batch_concurrency))
+    memo: dict = {}
+
+    async def run(group: list[int]) -> list[BatchItemResult]:
+        get_accommodation_service().share_searches(memo)   # this task's context only
+        itinerary, error = None, None
+        async with limit:
+            try:
+                with upstream_priority(Priority.BATCH):
+                    itinerary = await _generate_with_slot(items[group[0]], key, tier, user_id)
+            except Exception as e:
+                log.warning("batch item %d failed: %s", group[0], e)
+                error = _error(e)
+        return _fan_out(group, items, itinerary, error, "online")
+
+    tasks = [asyncio.create_task(run(group)) for group in groups]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for result in await finished:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# ── Offline (Message Batches) ──────────────────────────────────────────────────
+
+def _custom_id(index: int) -> str:
+    return f"item-{index}"
+
+
+def _index(custom_id: str) -> int:
+    return int(custom_id.removeprefix("item-"))
+
+
+async def submit_offline(items: list[ItineraryRequest]) -> tuple[str, int]:
+    """Submit one prompt per unique item; returns (Message Batches id, unique items)."""
+    groups = group_items(items)
+    system = build_prompt(items[0])[0]
+    prompts = {_custom_id(group[0]): build_prompt(items[group[0]])[1] for group in groups}
+    batch_id = await llm.submit_json_batch(prompts, system=system, model=llm.CLAUDE_PRIMARY, max_tokens=MAX_TOKENS)
+    log.info("submitted offline itinerary batch %s: %d items, %d unique", batch_id, len(items), len(groups))
+    return batch_id, len(groups)
+
+
+async def collect_offline(batch_id: str, items: list[ItineraryRequest]) -> AsyncIterator[BatchItemResult]:
+    """Parse and enrich an ended batch's results; yields as each item is ready."""
+    groups = {group[0]: group for group in group_items(items)}
+    limit = asyncio.Semaphore(max(1, get_settings().itinerary_batch_concurrency))
+    memo: dict = {}
+
+    async def finish(result: llm.BatchResult) -> list[BatchItemResult]:
+        get_accommodation_service().share_searches(memo)
+        group = groups[_index(result.custom_id)]
+        itinerary, error = None, result.error
+        if result.text is not None:
+            async with limit:
+                try:
+                    with upstream_priority(Priority.BATCH):
+                        itinerary = await itinerary_from_llm(result.text, items[group[0]])
+                except Exception as e:
+                    error = _error(e)
+        return _fan_out(group, items, itinerary, error, "offline")
+
+    tasks = []
+    seen: set[int] = set()
+    try:
+        async for result in llm.batch_results(batch_id):
+            tasks.append(asyncio.create_task(finish(result)))
+            seen.add(_index(result.custom_id))
+        for finished in asyncio.as_completed(tasks):
+            for item in await finished:
+                yield item
+        for lead, group in groups.items():
+            if lead not in seen:   # expired or never returned
+                for item in _fan_out(group, items, None, "no result in batch", "offline"):
+                    yield item
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,252 @@
+"""
+Near-duplicate recall: reuse a past generation for a request that is almost the same.
+
+  request ──► features ──► RecallIndex.nearest ──┬─ score ≥ ITINERARY_RECALL_THRESHOLD
+                           same user, destination │    └─► adapt: re-date, re-enrich,
+                           and trip length; month │        optional CLAUDE_FAST touch-up
+                           within one             └─ below ──► generate (and insert)
+
+Exact-key caches miss "Manali, 5 days, couple, leisure, INR 40k" against the
+same trip at INR 45k. Here every fresh generation is indexed by its request's
+features, and a lookup scores all candidates at once:
+
+  travel style, trip type, stay type   equality
+  origin                               equality (gazetteer-resolved)
+  budget per person per day            exp(-|log ratio| / BUDGET_SCALE)
+  travelers                            exp(-|log ratio|)
+  month                                cosine of the angle between months
+  interests, avoid, transport          TF-IDF cosine over hashed tokens
+
+The user, the destination (resolved through the autocomplete gazetteer) and
+the trip length are filters, not features, and so is the month to within one
+either side: a plan is only ever re-dated, never stretched, moved somewhere
+else or into another season. A re-dated plan keeps its packing list,
+activities and best-time note, so a January plan must not come back for July
+however close the rest scores. Plans are only recalled for the signed-in user
+they were generated for; their summary and tips can carry what that traveler
+asked for.
+
+Storage is columnar NumPy, one array per feature. Inserts grow the arrays by
+doubling up to ITINERARY_RECALL_MAX_ENTRIES, after which the oldest slot is
+overwritten. Itineraries are kept zlib-compressed (a few KB each). Document
+frequencies are updated incrementally, so IDF weights follow what has been
+indexed. Only fresh generations are inserted: an adapted itinerary is never
+recalled again, so errors do not compound across copies.
+
+Like the destination index this is single-threaded: it is only touched from the
+event loop and nothing here awaits.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from app.agents.itinerary_skeleton import canonical_destination
+from app.core.config import get_settings
+from app.models.trip import ItineraryRequest, ItineraryResponse, TravelStyle, TripType
+
+TEXT_DIMS = 256
+BUDGET_SCALE = 0.5
+INITIAL_CAPACITY = 64
+
+WEIGHTS = {
+    "travel_style": 0.20,
+    "budget": 0.20,
+    "text": 0.20,
+    "trip_type": 0.15,
+    "season": 0.10,
+    "origin": 0.05,
+    "accommodation_type": 0.05,
+    "travelers": 0.05,
+}
+
+_STYLES = {s: i for i, s in enumerate(TravelStyle)}
+_TRIP_TYPES = {t: i for i, t in enumerate(TripType)}
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _hash(value: str) -> int:
+    # crc32, not hash(): stable across processes and PYTHONHASHSEED
+    return zlib.crc32(value.encode())
+
+
+def _tokens(req: ItineraryRequest) -> list[str]:
+    tokens = [w for phrase in req.interests or [] for w in _WORD.findall(phrase.lower())]
+    tokens += ["-" + w for phrase in req.avoid or [] for w in _WORD.findall(phrase.lower())]
+    tokens += ["transport:" + t.value for t in req.preferred_transport or []]
+    return tokens
+
+
+def _season(month: int) -> np.ndarray:
+    angle = 2 * math.pi * month / 12
+    return np.array([math.cos(angle), math.sin(angle)], dtype=np.float32)
+
+
+@dataclass(frozen=True)
+class Features:
+    destination: int
+    days: int
+    month: int             # 0-11
+    style: int
+    trip_type: int
+    accommodation_type: int
+    origin: int
+    budget: float          # log INR per person per day; nan when the request has none
+    travelers: float       # log
+    text: np.ndarray       # term counts over TEXT_DIMS hashed buckets
+
+    @classmethod
+    def of(cls, req: ItineraryRequest) -> Features:
+        days = (req.end_date - req.start_date).days + 1
+        text = np.zeros(TEXT_DIMS, dtype=np.float32)
+        for token in _tokens(req):
+            text[_hash(token) % TEXT_DIMS] += 1
+        per_day = req.budget_inr / (days * req.num_travelers) if req.budget_inr else None
+        return cls(
+            destination=_hash(canonical_destination(req.destination).lower()),
+            days=days,
+            month=req.start_date.month - 1,
+            style=_STYLES[req.travel_style],
+            trip_type=_TRIP_TYPES[req.trip_type],
+            accommodation_type=_hash(req.accommodation_type.value) if req.accommodation_type else 0,
+            origin=_hash(canonical_destination(req.origin).lower()),
+            budget=math.log(per_day) if per_day else math.nan,
+            travelers=math.log(req.num_travelers),
+            text=text,
+        )
+
+
+@dataclass
+class Recalled:
+    itinerary: ItineraryResponse
+    similarity: float
+
+
+class RecallIndex:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._size = 0
+        self._next = 0          # slot the next insert writes once the index is full
+        self._alloc(min(INITIAL_CAPACITY, max_entries))
+        self._df = np.zeros(TEXT_DIMS, dtype=np.int64)
+        self._payloads: list[bytes | None] = [None] * len(self._days)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _alloc(self, capacity: int) -> None:
+        self._destination = np.zeros(capacity, dtype=np.uint32)
+        self._days = np.zeros(capacity, dtype=np.int32)
+        self._owner = np.zeros(capacity, dtype=np.uint32)
+        self._month = np.zeros(capacity, dtype=np.int8)
+        self._season = np.zeros((capacity, 2), dtype=np.float32)
+        self._style = np.zeros(capacity, dtype=np.int8)
+        self._trip_type = np.zeros(capacity, dtype=np.int8)
+        self._accommodation_type = np.zeros(capacity, dtype=np.uint32)
+        self._origin = np.zeros(capacity, dtype=np.uint32)
+        self._budget = np.zeros(capacity, dtype=np.float32)
+        self._travelers = np.zeros(capacity, dtype=np.float32)
+        self._text = np.zeros((capacity, TEXT_DIMS), dtype=np.float32)
+
+    def _grow(self) -> None:
+        columns = ("_destination", "_days", "_owner", "_month", "_season", "_style", "_trip_type",
+                   "_accommodation_type", "_origin", "_budget", "_travelers", "_text")
+        old = {name: getattr(self, name) for name in columns}
+        self._alloc(min(2 * len(self._days), self.max_entries))
+        for name, values in old.items():
+            getattr(self, name)[:len(values)] = values
+        self._payloads.extend([None] * (len(self._days) - len(self._payloads)))
+
+    def insert(self, req: ItineraryRequest, itinerary: ItineraryResponse, owner: str) -> None:
+        """Index a fresh generation for `owner` (a user id)."""
+        f = Features.of(req)
+        if self._size < self.max_entries:
+            if self._size == len(self._days):
+                self._grow()
+            slot = self._size
+            self._size += 1
+        else:
+            slot = self._next
+            self._next = (self._next + 1) % self.max_entries
+            self._df -= self._text[slot] > 0
+
+        self._destination[slot] = f.destination
+        self._days[slot] = f.days
+        self._owner[slot] = _hash(owner)
+        self._month[slot] = f.month
+        self._season[slot] = _season(f.month)
+        self._style[slot] = f.style
+        self._trip_type[slot] = f.trip_type
+        self._accommodation_type[slot] = f.accommodation_type
+        self._origin[slot] = f.origin
+        self._budget[slot] = f.budget
+        self._travelers[slot] = f.travelers
+        self._text[slot] = f.text
+        self._df += f.text > 0
+        self._payloads[slot] = zlib.compress(itinerary.model_dump_json().encode(), 6)
+
+    def scores(self, req: ItineraryRequest, owner: str) -> tuple[np.ndarray, np.ndarray]:
+        """(slots, similarity in [0, 1]) of `owner`'s entries for the same destination, trip length and season."""
+        f = Features.of(req)
+        n = self._size
+        slots = np.flatnonzero(
+            (self._owner[:n] == _hash(owner))
+            & (self._destination[:n] == f.destination)
+            & (self._days[:n] == f.days)
+            & np.isin((self._month[:n] - f.month) % 12, (0, 1, 11))
+        )
+        if not len(slots):
+            return slots, np.zeros(0, dtype=np.float32)
+
+        season = (1 + self._season[slots] @ _season(f.month)) / 2
+
+        budget = self._budget[slots]
+        if math.isnan(f.budget):
+            budget_sim = np.where(np.isnan(budget), 1.0, 0.5)
+        else:
+            budget_sim = np.where(np.isnan(budget), 0.5, np.exp(-np.abs(budget - f.budget) / BUDGET_SCALE))
+
+        # TF-IDF cosine; two requests without any interests are a perfect match
+        idf = np.log((1 + n) / (1 + self._df)) + 1
+        rows = self._text[slots] * idf
+        query = f.text * idf
+        row_norms = np.linalg.norm(rows, axis=1)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            text = (row_norms == 0).astype(np.float32)
+        else:
+            text = (rows @ query) / np.maximum(row_norms * query_norm, 1e-9)
+
+        score = (
+            WEIGHTS["travel_style"] * (self._style[slots] == f.style)
+            + WEIGHTS["trip_type"] * (self._trip_type[slots] == f.trip_type)
+            + WEIGHTS["accommodation_type"] * (self._accommodation_type[slots] == f.accommodation_type)
+            + WEIGHTS["origin"] * (self._origin[slots] == f.origin)
+            + WEIGHTS["budget"] * budget_sim
+            + WEIGHTS["travelers"] * np.exp(-np.abs(self._travelers[slots] - f.travelers))
+            + WEIGHTS["season"] * season
+            + WEIGHTS["text"] * text
+        )
+        return slots, score
+
+    def nearest(self, req: ItineraryRequest, threshold: float, owner: str) -> Recalled | None:
+        slots, score = self.scores(req, owner)
+        if not len(slots):
+            return None
+        best = int(np.argmax(score))
+        if score[best] < threshold:
+            return None
+        payload = self._payloads[slots[best]]
+        itinerary = ItineraryResponse.model_validate_json(zlib.decompress(payload))
+        return Recalled(itinerary, float(score[best]))
+
+
+@lru_cache
+def get_recall_index() -> RecallIndex:
+    return RecallIndex(get_settings().itinerary_recall_max_entries)
@@ -0,0 +1,208 @@
+"""
+Destination skeletons: the part of an itinerary that does not depend on the traveler.
+
+  (destination, month, duration bucket)
+      ──► in-process LRU ──► destination_skeletons (Postgres) ──► CLAUDE_PRIMARY
+                                                                  seeded from `destinations`
+
+A skeleton is the researched plan: days with 4–6 candidate activities each,
+overnight stops, named stays across tiers, seasonal notes, permits and a
+packing base. It is generated once per key with the primary model. Each
+request then only pays for a CLAUDE_FAST personalisation pass, which picks
+activities by ref, re-times and re-prices them, and writes the text specific
+to the traveler (see itinerary_agent._personalised). Prose the traveler reuses
+is never regenerated, so it is not re-tokenised either.
+
+Durations are bucketed (a 4-day trip uses the 5-day skeleton) so a handful of
+skeletons cover a destination's whole month. Concurrent misses for one key
+share a single generation (SingleFlight), so a batch of 20 Spiti variants
+waits on one primary-model call.
+
+The cache only stores and hands out skeletons; itinerary_agent builds them.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.core import background, metrics
+from app.core.config import get_settings
+from app.core.singleflight import SingleFlight
+from app.models.trip import ItineraryRequest
+
+log = logging.getLogger(__name__)
+
+# Bump when the skeleton prompt or schema changes: stored rows of older versions are ignored
+SKELETON_VERSION = 1
+
+# A trip uses the smallest bucket that covers it; longer trips are generated from scratch
+DURATION_BUCKETS = (3, 5, 7, 10, 14)
+
+MONTHS = ("January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December")
+
+
+def duration_bucket(days: int) -> int | None:
+    return next((b for b in DURATION_BUCKETS if days <= b), None)
+
+
+def canonical_destination(name: str) -> str:
+    """The autocomplete index's display name, so 'spiti', 'Spiti Valley, HP' and 'Kaza' share skeletons."""
+    from app.services.destinations import get_destination_index
+
+    index = get_destination_index()
+    for candidate in (name, name.split(",")[0]):
+        entry_id = index.find(candidate)
+        if entry_id is not None:
+            return index.get(entry_id).name
+    return name.split(",")[0].strip()
+
+
+@dataclass(frozen=True)
+class SkeletonKey:
+    destination: str
+    month: int
+    days: int
+
+    def describe(self) -> str:
+        return f"{self.destination} / {MONTHS[self.month - 1]} / {self.days}d"
+
+
+def skeleton_key(req: ItineraryRequest) -> SkeletonKey | None:
+    bucket = duration_bucket((req.end_date - req.start_date).days + 1)
+    if bucket is None:
+        return None
+    return SkeletonKey(canonical_destination(req.destination), req.start_date.month, bucket)
+
+
+@dataclass
+class Skeleton:
+    key: SkeletonKey
+    data: dict
+    model: str = ""
+    activities: dict[str, dict] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Refs are assigned here, not by the model, so they are always unique and dense
+        self.activities = {}
+        for day in self.data.get("days", []):
+            for activity in day.get("activities", []):
+                ref = activity["ref"] = f"a{len(self.activities) + 1}"
+                self.activities[ref] = activity
+        if not self.activities:
+            raise ValueError(f"skeleton for {self.key.describe()} has no activities")
+
+    @property
+    def days(self) -> list[dict]:
+        return self.data.get("days", [])
+
+    def stays(self, location: str | None) -> list[dict]:
+        if not location:
+            return []
+        stays = self.data.get("stays") or {}
+        wanted = location.strip().lower()
+        return next((v for k, v in stays.items() if k.strip().lower() == wanted), [])
+
+    def compact(self) -> str:
+        """The plan as the personalisation prompt sees it: refs and facts, no prose."""
+        lines = [f"Overview: {self.data.get('overview', '')}",
+                 f"Season: {self.data.get('best_time_note', '')}"]
+        for day in self.days:
+            lines.append(f"\nPlan day {day.get('day_number')}: {day.get('title', '')} "
+                         f"— sleeps in {day.get('overnight_location') or '-'}; {day.get('transport_for_day') or ''}")
+            for a in day.get("activities", []):
+                cost = a.get("cost_inr")
+                lines.append(f"  {a['ref']} {a.get('time', '')} {a.get('title', '')} @ {a.get('location') or '-'}"
+                             f" · {a.get('duration_minutes') or '?'} min · "
+                             f"{'free' if cost == 0 else f'INR {cost}' if cost else 'cost n/a'}")
+        stays = self.data.get("stays") or {}
+        if stays:
+            lines.append("\nStays: " + "; ".join(
+                f"{place} ({', '.join(s.get('tier', '?') for s in options)})" for place, options in stays.items()
+            ))
+        tips = self.data.get("key_tips") or []
+        if tips:
+            lines.append("Destination tips: " + " | ".join(tips))
+        return "\n".join(lines)
+
+
+class SkeletonCache:
+    """LRU of skeletons in front of destination_skeletons, with single-flight builds."""
+
+    def __init__(self, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[SkeletonKey, tuple[float, Skeleton]] = OrderedDict()
+        self._flights: SingleFlight[Skeleton] = SingleFlight("itinerary_skeleton")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key: SkeletonKey) -> Skeleton | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, skeleton: Skeleton) -> None:
+        self._entries[skeleton.key] = (time.monotonic() + self.ttl_s, skeleton)
+        self._entries.move_to_end(skeleton.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: SkeletonKey, build: Callable[[SkeletonKey], Awaitable[Skeleton]]) -> Skeleton:
+        skeleton = self.peek(key)
+        metrics.cache_hit("itinerary_skeleton", skeleton is not None)
+        if skeleton is not None:
+            return skeleton
+        return await self._flights.do(key, lambda: self._load_or_build(key, build))
+
+    async def _load_or_build(self, key: SkeletonKey, build: Callable[[SkeletonKey], Awaitable[Skeleton]]) -> Skeleton:
+        skeleton = await _load_stored(key, self.ttl_s)
+        metrics.cache_hit("itinerary_skeleton_db", skeleton is not None)
+        if skeleton is None:
+            skeleton = await build(key)
+            background.spawn(_store(skeleton), name=f"store-skeleton-{key.describe()}")
+        self.put(skeleton)
+        return skeleton
+
+
+async def _load_stored(key: SkeletonKey, ttl_s: float) -> Skeleton | None:
+    from app.db import is_configured
+
+    if not is_configured():
+        return None
+    from app.db.destinations import load_skeleton
+
+    try:
+        row = await load_skeleton(key.destination, key.month, key.days, SKELETON_VERSION, ttl_s)
+    except Exception as e:
+        log.warning("skeleton lookup failed for %s: %s", key.describe(), e)
+        return None
+    return Skeleton(key, row["payload"], row["model"]) if row else None
+
+
+async def _store(skeleton: Skeleton) -> None:
+    from app.db import is_configured
+
+    if not is_configured():
+        return
+    from app.db.destinations import save_skeleton
+
+    key = skeleton.key
+    try:
+        await save_skeleton(key.destination, key.month, key.days, SKELETON_VERSION, skeleton.data, skeleton.model)
+    except Exception as e:
+        log.warning("skeleton store failed for %s: %s", key.describe(), e)
+
+
+@lru_cache
+def get_skeleton_cache() -> SkeletonCache:
+    s = get_settings()
+    return SkeletonCache(s.skeleton_cache_max_entries, s.skeleton_ttl_days * 86400)
@@ -0,0 +1,290 @@
+"""
+NudgeAgent: golden-hour and crowd-window nudges from precomputed sun tables.
+
+  active trips (keyset pages of NUDGE_PLAN_PAGE_SIZE) ──► itinerary days in
+  [today, today + NUDGE_HORIZON_DAYS], with activities
+        │
+        ▼
+  one point per day (where the traveler ends up), one for its dawn (where
+  the night before ended) + one per timed activity
+        │
+        ▼
+  SolarTable.events ──► every point's sun events in one NumPy pass,
+        │                cached per (SOLAR_CELL_DEG cell, day)
+        ▼
+  golden hour: the day's golden_pm, at the activity closest to it when one
+  is planned within MATCH_WINDOW_S; crowd window: dawn to golden_am_end at
+  the dawn point
+        │
+        ▼
+  nudge_queue upsert (send_at) ──► deliver pass every NUDGE_POLL_S ──► nudge_log
+
+Nothing here calls an LLM or a sun API per trip. The sun maths are
+vectorised over every trip day in a page. Trips in the same town on the same
+day share one table row, so a planning pass over 100k trips costs about as
+much as the distinct (town, day) pairs plus building the messages.
+
+A day's place is its last activity with coordinates, else the trip
+destination's coordinates from the destinations table. Days with neither get
+no nudges. Dawn happens where the traveler spent the night, so the crowd
+window is taken at the previous day's place; the first day of a trip has
+none and uses its own. Activity times ("18:30") and the times in messages are
+on the destination country's clock (NUDGE_TIMEZONES). Days in a country not
+listed there get no nudges rather than times on the wrong clock. Nudges whose
+window has already started are not queued. Re-planning is idempotent, so a
+changed itinerary moves its unsent nudges.
+
+Planning runs on one worker at a time (an advisory lock); delivery claims
+with `skip locked`, so every worker may deliver.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.lazy import once
+
+log = logging.getLogger(__name__)
+
+MATCH_WINDOW_S = 90 * 60   # an activity this close to golden hour becomes the nudge's place
+
+_TIME = re.compile(r"^\s*(\d{1,2})[:.](\d{2})\s*([ap]\.?m\.?)?", re.IGNORECASE)
+
+
+@dataclass
+class NudgePlan:
+    trips: int = 0
+    days: int = 0
+    golden_hour: int = 0
+    crowd_window: int = 0
+
+
+def _minutes(value: str | None) -> int | None:
+    """Minutes after midnight for "18:30" / "6:30 pm", else None."""
+    match = _TIME.match(value or "")
+    if not match:
+        return None
+    hour, minute = int(match[1]), int(match[2])
+    if match[3]:
+        hour = hour % 12 + (12 if match[3][0].lower() == "p" else 0)
+    return hour * 60 + minute if hour < 24 and minute < 60 else None
+
+
+def _located(item: dict) -> bool:
+    return item.get("lat") is not None and item.get("lng") is not None
+
+
+def build_nudges(
+    days: list[dict], table, now: datetime, first_day: date | None = None,
+) -> tuple[list[tuple], NudgePlan]:
+    """
+    Queue rows for a page of trip days (see db.nudges.trip_days), in trip and
+    day order. Days before `first_day` only say where the night before it was
+    spent. Vectorised over the page; Python only gathers the points and
+    formats the messages.
+    """
+    import numpy as np
+
+    from app.services.solar import BLUE_AM, BLUE_PM, GOLDEN_AM_END, GOLDEN_PM, SUNRISE, SUNSET
+
+    s = get_settings()
+    plan = NudgePlan(trips=len({d["trip_id"] for d in days}))
+
+    # Where each day ends up and where its dawn is, and every activity with coordinates and a time
+    placed, zones, day_points, dawn_points, act_points, act_day, act_min, act_title = [], [], [], [], [], [], [], []
+    evening: dict[str, tuple[date, tuple]] = {}   # trip → its latest placed day and where it ended
+    for row in days:
+        located = [a for a in row["activities"] if _located(a)]
+        if located:
+            point = (located[-1]["lat"], located[-1]["lng"])
+        elif row.get("destination_lat") is not None and row.get("destination_lng") is not None:
+            point = (row["destination_lat"], row["destination_lng"])
+        else:
+            continue
+        night = evening.get(row["trip_id"])
+        evening[row["trip_id"]] = (row["day"], point)
+        zone = s.nudge_timezones.get(row.get("destination_country") or "")
+        if zone is None or (first_day is not None and row["day"] < first_day):
+            continue
+        for activity in located:
+            minute = _minutes(activity.get("time"))
+            if minute is not None:
+                act_day.append(len(placed))
+                act_min.append(minute)
+                act_title.append(activity["title"])
+                act_points.append((activity["lat"], activity["lng"]))
+        placed.append(row)
+        zones.append(zone)
+        day_points.append(point)
+        slept_here = night is not None and night[0] == row["day"] - timedelta(days=1)
+        dawn_points.append(night[1] if slept_here else point)
+    plan.days = len(placed)
+    if not placed:
+        return [], plan
+
+    n = len(placed)
+    day_of_point = np.array([d["day"] for d in placed] * 2 + [placed[i]["day"] for i in act_day],
+                            dtype="datetime64[D]")
+    coords = np.array(day_points + dawn_points + act_points, dtype=np.float64)   # days, dawns, then activities
+    events = table.events(coords[:, 0], coords[:, 1], day_of_point)
+    day_events, dawn_events, act_events = events[:n], events[n:2 * n], events[2 * n:]
+
+    # UTC offset of each day's local clock (at midday, so DST edges do not matter)
+    offsets = {}
+    for zone, d in zip(zones, placed):
+        if (zone, d["day"]) not in offsets:
+            midday = datetime.combine(d["day"], datetime.min.time()) + timedelta(hours=12)
+            offsets[zone, d["day"]] = ZoneInfo(zone).utcoffset(midday).total_seconds()
+    offset_s = np.array([offsets[zone, d["day"]] for zone, d in zip(zones, placed)])
+
+    # Golden hour: the closest timed activity within MATCH_WINDOW_S of its own golden_pm, per day
+    golden_start, golden_end = day_events[:, GOLDEN_PM].copy(), day_events[:, BLUE_PM].copy()
+    sunset = day_events[:, SUNSET].copy()
+    golden_at = np.full(n, -1, dtype=np.int64)
+    if act_day:
+        act_day_a = np.array(act_day, dtype=np.int64)
+        midnight = day_of_point[2 * n:].astype(np.int64) * 86400.0
+        act_at = midnight + np.array(act_min, dtype=np.float64) * 60.0 - offset_s[act_day_a]
+        gap = np.abs(act_at - act_events[:, GOLDEN_PM])
+        near = np.flatnonzero(gap <= MATCH_WINDOW_S)   # NaN compares False
+        if near.size:
+            near = near[np.lexsort((gap[near], act_day_a[near]))]
+            first = near[np.r_[True, act_day_a[near][1:] != act_day_a[near][:-1]]]
+            days_hit = act_day_a[first]
+            golden_at[days_hit] = first
+            golden_start[days_hit] = act_events[first, GOLDEN_PM]
+            golden_end[days_hit] = act_events[first, BLUE_PM]
+            sunset[days_hit] = act_events[first, SUNSET]
+
+    now_s = now.timestamp()
+    golden_send = golden_start - s.nudge_golden_lead_s
+    golden_ok = ~np.isnan(golden_start) & (golden_start > now_s)
+    crowd_start, crowd_end = dawn_events[:, BLUE_AM], dawn_events[:, GOLDEN_AM_END]
+    crowd_send = crowd_start - s.nudge_crowd_notice_s
+    crowd_ok = ~np.isnan(crowd_start) & (crowd_start > now_s)
+
+    def clock(values) -> list[str]:
+        local = ((np.nan_to_num(values) + offset_s) % 86400 // 60).astype(np.int64)
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in local.tolist()]
+
+    g_start, g_end, g_sunset = clock(golden_start), clock(golden_end), clock(sunset)
+    c_start, c_sunrise, c_end = clock(crowd_start), clock(dawn_events[:, SUNRISE]), clock(crowd_end)
+
+    rows = []
+    for i in np.flatnonzero(golden_ok).tolist():
+        day = placed[i]
+        activity = int(golden_at[i])
+        where, point = (act_title[activity], 2 * n + activity) if activity >= 0 else (day["destination"], i)
+        message = (f"Golden hour at {where} today: {g_start[i]}–{g_end[i]}, sunset {g_sunset[i]}. "
+                   f"Be in place by {g_start[i]} for the warm light.")
+        payload = {"place": where, "lat": float(coords[point, 0]), "lng": float(coords[point, 1]),
+                   "start": _iso(golden_start[i]), "end": _iso(golden_end[i]), "sunset": _iso(sunset[i])}
+        rows.append(_row(day, "golden_hour", golden_send[i], message, payload))
+    for i in np.flatnonzero(crowd_ok).tolist():
+        day = placed[i]
+        message = (f"Beat the crowds at {day['destination']} on {day['day']:%a %d %b}: first light {c_start[i]}, "
+                   f"sunrise {c_sunrise[i]}, golden light until {c_end[i]}. Early starts have the place to themselves.")
+        payload = {"place": day["destination"], "lat": float(coords[n + i, 0]), "lng": float(coords[n + i, 1]),
+                   "start": _iso(crowd_start[i]), "sunrise": _iso(dawn_events[i, SUNRISE]), "end": _iso(crowd_end[i])}
+        rows.append(_row(day, "crowd_window", crowd_send[i], message, payload))
+
+    plan.golden_hour = int(golden_ok.sum())
+    plan.crowd_window = int(crowd_ok.sum())
+    return rows, plan
+
+
+def _iso(epoch_s: float) -> str:
+    return datetime.fromtimestamp(float(epoch_s), timezone.utc).isoformat()
+
+
+def _row(day: dict, nudge_type: str, send_s: float, message: str, payload: dict) -> tuple:
+    return (day["user_id"], day["trip_id"], nudge_type, day["day"], datetime.fromtimestamp(float(send_s), timezone.utc),
+            message, json.dumps(payload))
+
+
+# Sun tables live as long as the process: the same towns come up every pass
+@once
+def _solar_table():
+    from app.services.solar import SolarTable
+
+    return SolarTable(get_settings().solar_cell_deg)
+
+
+async def plan(start: date, end: date) -> NudgePlan:
+    """Queue nudges for every active trip's days in [start, end], a page of trips at a time."""
+    from app.db.nudges import active_trip_ids, enqueue, trip_days
+
+    s = get_settings()
+    started = time.perf_counter()
+    total = NudgePlan()
+    after = None
+    while True:
+        ids = await active_trip_ids(start, end, after, s.nudge_plan_page_size)
+        if not ids:
+            break
+        after = ids[-1]
+        # From the day before: where its night was spent is the first day's dawn
+        days = await trip_days(ids, start - timedelta(days=1), end)
+        rows, page = build_nudges(days, _solar_table(), datetime.now(timezone.utc), first_day=start)
+        await enqueue(rows)
+        total.trips += page.trips
+        total.days += page.days
+        total.golden_hour += page.golden_hour
+        total.crowd_window += page.crowd_window
+        if len(ids) < s.nudge_plan_page_size:
+            break
+
+    metrics.NUDGES_PLANNED.labels("golden_hour").inc(total.golden_hour)
+    metrics.NUDGES_PLANNED.labels("crowd_window").inc(total.crowd_window)
+    metrics.NUDGE_PLAN_SECONDS.observe(time.perf_counter() - started)
+    log.info("nudges: %d golden-hour and %d crowd-window queued for %d days of %d trips",
+             total.golden_hour, total.crowd_window, total.days, total.trips)
+    return total
+
+
+async def run_plan() -> NudgePlan | None:
+    """Plan today and the horizon ahead (local dates), unless another worker is already planning."""
+    from app.db.nudges import planner_lock
+
+    s = get_settings()
+    today = datetime.now(ZoneInfo(s.nudge_timezone)).date()
+    async with planner_lock() as held:
+        if not held:
+            return None
+        return await plan(today, today + timedelta(days=s.nudge_horizon_days))
+
+
+async def deliver(limit: int) -> int:
+    """Send up to `limit` due nudges; returns how many were claimed."""
+    from app.db.nudges import deliver_due
+
+    claimed, delivered = await deliver_due(limit, get_settings().nudge_deliver_grace_s)
+    if claimed:
+        metrics.NUDGES_DELIVERED.labels("sent").inc(delivered)
+        metrics.NUDGES_DELIVERED.labels("dropped").inc(claimed - delivered)
+    return claimed
+
+
+async def nudge_loop() -> None:
+    """Lifespan task: deliver due nudges every NUDGE_POLL_S, re-plan every NUDGE_PLAN_S."""
+    s = get_settings()
+    next_plan = 0.0
+    while True:
+        try:
+            if time.monotonic() >= next_plan:
+                await run_plan()
+                next_plan = time.monotonic() + s.nudge_plan_s
+            while await deliver(s.nudge_deliver_limit) == s.nudge_deliver_limit:
+                pass
+        except Exception as e:
+            log.warning("nudge run failed: %s", e)
+        await asyncio.sleep(s.nudge_poll_s)
@@ -0,0 +1,47 @@
+"""
+Shared route dependencies.
+
+Identity is the `sub` of a verified Supabase access token (Authorization:
+Bearer, see core/auth.py), never a client-supplied id. AdmissionMiddleware
+keys its per-user queues on the same identity. Reads go through
+user_scope(), which sets auth.uid() to it, so RLS confines a caller to their
+own rows.
+"""
+
+import uuid
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.auth import user_id_from_authorization
+from app.db import is_configured
+
+
+def _valid_uuid(value: Optional[str]) -> Optional[str]:
+    try:
+        return str(uuid.UUID(value)) if value else None
+    except ValueError:
+        return None
+
+
+def optional_user_id(authorization: Optional[str] = Header(None)) -> Optional[str]:
+    """The verified caller's profile id, or None when anonymous, the token is invalid or there is no database."""
+    return user_id_from_authorization(authorization) if is_configured() else None
+
+
+def require_user_id(authorization: Optional[str] = Header(None)) -> str:
+    if not is_configured():
+        raise HTTPException(status_code=503, detail="Trip storage is not configured")
+    user_id = user_id_from_authorization(authorization)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="A valid access token is required",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return user_id
+
+
+def valid_id(value: str) -> str:
+    """Path ids are UUIDs; anything else can't exist, so 404 without a query."""
+    parsed = _valid_uuid(value)
+    if parsed is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return parsed
@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_user_id
+from app.models.analytics import AnalyticsOverview, IngestResponse, SnapshotBatch
+from app.services.analytics import ingest_snapshots, overview
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.post("/snapshots", response_model=IngestResponse)
+async def ingest(body: SnapshotBatch, user_id: str = Depends(require_user_id)):
+    """
+    Record fetched counters for the caller's published posts.
+
+    Every snapshot is kept in post_analytics; the rollups behind
+    GET /analytics/overview and the persona's peak post times move by what
+    changed since each post's previous snapshot. Snapshots for posts that
+    are not the caller's are dropped and counted in `unknown_posts`.
+    """
+    result = await ingest_snapshots(body.snapshots, user_id=user_id)
+    return IngestResponse(
+        received=len(body.snapshots), stored=len(result.snapshots), unknown_posts=result.unknown_posts,
+        posts_updated=len(result.latest), stale=result.stale,
+    )
+
+
+@router.get("/overview", response_model=AnalyticsOverview)
+async def get_overview(platform: Optional[str] = None, user_id: str = Depends(require_user_id)):
+    """
+    Per-platform totals, the best hours of the week to post and content types
+    ranked by average engagement. Read from precomputed rollups, so the cost
+    does not grow with post history.
+    """
+    return await overview(user_id, platform)
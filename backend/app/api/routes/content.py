@@ -0,0 +1,58 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import ValidationError
+
+from app.agents.blog_agent import NothingToWrite, write_blog
+from app.agents.caption_agent import run_pending
+from app.api.deps import require_user_id, valid_id
+from app.db.trips import get_trip
+from app.models.content import BlogRunRequest, BlogRunResponse, CaptionRunRequest, CaptionRunResponse
+
+router = APIRouter(prefix="/content", tags=["content"])
+
+
+@router.post("/captions", response_model=CaptionRunResponse)
+async def generate_captions(body: CaptionRunRequest, user_id: str = Depends(require_user_id)):
+    """
+    Draft captions now for the caller's transcribed recordings.
+
+    The background loop (CAPTION_POLL_S) does the same for everyone; this is
+    for a creator who wants drafts straight after uploading. Recordings are
+    packed several to a fast-model call; each gets Instagram, X/Twitter,
+    WhatsApp and YouTube drafts in content_drafts. Recordings already being
+    drafted by another run are skipped, not waited for.
+    """
+    asset_ids = [valid_id(a) for a in body.asset_ids] if body.asset_ids else None
+    run = await run_pending(body.limit, user_id=user_id, asset_ids=asset_ids)
+    return CaptionRunResponse(
+        assets=run.assets, drafted=run.drafted, failed=run.failed, released=run.released,
+        llm_calls=run.llm_calls, draft_ids=run.draft_ids,
+    )
+
+
+@router.post("/trips/{trip_id}/blog", response_model=BlogRunResponse)
+async def generate_blog(
+    trip_id: str, body: BlogRunRequest = BlogRunRequest(), user_id: str = Depends(require_user_id),
+):
+    """
+    Write (or rewrite) the trip's blog post from its recording transcripts.
+
+    Each trip day is summarised once and cached; a re-run only re-summarises
+    the days whose clips changed, then writes a new blog draft version. With
+    nothing changed, the latest draft comes back as is (`reused`) unless
+    `force` is set.
+    """
+    trip = await get_trip(user_id, valid_id(trip_id))
+    if trip is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    try:
+        run = await write_blog(user_id, trip, force=body.force)
+    except NothingToWrite:
+        raise HTTPException(status_code=409, detail="No transcribed recordings for this trip yet")
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise HTTPException(status_code=502, detail=f"AI returned an unusable blog: {e}")
+    return BlogRunResponse(
+        draft_id=run.draft_id, version=run.version, title=run.title, days=run.days,
+        days_summarised=run.days_summarised, days_cached=run.days_cached, reused=run.reused,
+    )
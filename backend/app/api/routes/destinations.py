@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Query
+
+from app.models.destination import DestinationSuggestion, DestinationSuggestResponse
+from app.services.destinations import get_destination_index
+
+router = APIRouter(prefix="/destinations", tags=["destinations"])
+
+
+@router.get("/suggest", response_model=DestinationSuggestResponse)
+async def suggest_destinations(
+    q: str = Query(..., max_length=64, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """
+    Autocomplete for the "where to?" box — called on every keystroke.
+
+    Served from the in-process index (services/destinations.py); never touches
+    the database. Prefix matches on names, words and aliases ("bombay", "kutch"),
+    typo-tolerant fallback, ranked by popularity and whether it's in season.
+    """
+    suggestions = [
+        DestinationSuggestion(
+            id=s.destination.destination_id,
+            name=s.destination.name,
+            state=s.destination.state,
+            lat=s.destination.lat,
+            lng=s.destination.lng,
+            in_season=s.in_season,
+            match=s.match,
+        )
+        for s in get_destination_index().suggest(q, limit=limit)
+    ]
+    return DestinationSuggestResponse(query=q, suggestions=suggestions)
@@ -1,26 +1,302 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
 import json
 
-from app.models.trip import ItineraryRequest, ItineraryResponse
-from app.agents.itinerary_agent import generate_itinerary
+from app.models.trip import (
+    ItineraryBatchItem,
+    ItineraryBatchRequest,
+    ItineraryBatchStatus,
+    ItineraryChanges,
+    ItineraryRequest,
+    ItineraryResponse,
+)
+from app.agents import itinerary_batch
+from app.agents.itinerary_agent import generate_itinerary, refresh_pending_accommodation
+from app.api.deps import optional_user_id, require_user_id, valid_id
+from app.core import background, deadline, encoding, jsonpatch
+from app.core.admission import resolve_caller
+from app.core.config import get_settings
+from app.core.disconnect import CLIENT_CLOSED_REQUEST, ClientDisconnected, cancel_on_disconnect
+from app.core.http_cache import etag_matches, get_response_cache, make_etag, not_modified, respond
+from app.core.projection import FieldTree, InvalidFields, fields_key, include_spec, parse_fields, project
+from app.db import batches, queries, user_scope
+from app.db.itineraries import (
+    existing_itinerary_id,
+    load_itinerary,
+    load_itinerary_json,
+    load_snapshots,
+    persist_generated_itinerary,
+)
+from app.services import llm
 
 router = APIRouter(prefix="/itinerary", tags=["itinerary"])
 
+FIELDS_DESCRIPTION = (
+    "Comma-separated dotted paths to return instead of the whole itinerary, "
+    "e.g. summary,days.title,days.activities.title"
+)
+
+
+def _projection(fields: Optional[str]) -> Optional[FieldTree]:
+    try:
+        return parse_fields(fields, ItineraryResponse)
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=f"fields: {e}")
+
 
 @router.post("/generate", response_model=ItineraryResponse, status_code=201)
-async def create_itinerary(req: ItineraryRequest):
+async def create_itinerary(
+    req: ItineraryRequest,
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    user_id: Optional[str] = Depends(optional_user_id),
+):
     """
     Generate an AI-powered day-by-day travel itinerary.
 
     - Calls Claude via ItineraryAgent
     - Returns structured JSON with activities, cost estimates, packing list,
       and ContentPilot shot suggestions for each activity
+    - For signed-in users (a verified Supabase access token in Authorization:
+      Bearer) the itinerary is saved to Postgres after
+      the response is sent; regenerating a trip_id keeps its itinerary_id
+    - `fields` trims the response (persistence always stores the whole plan);
+      Accept / Accept-Encoding select MessagePack and br/gzip
+    - A client that disconnects cancels the generation (LLM stream and
+      accommodation searches); nothing is saved
+    - Answers within X-Deadline-Ms (else ITINERARY_DEADLINE_S): accommodation
+      still searching at the deadline comes back `accommodation_status:
+      "pending"`, refreshed into the saved itinerary's next version; 504 when
+      the plan itself isn't ready in time
     """
+    tree = _projection(fields)
+    settings = get_settings()
+    budget = deadline.from_header(request.headers.get(deadline.DEADLINE_HEADER),
+                                  settings.itinerary_deadline_s, settings.itinerary_deadline_max_s)
     try:
-        itinerary = await generate_itinerary(req)
-        return itinerary
+        with deadline.deadline_scope(budget):
+            async with asyncio.timeout(budget):
+                itinerary = await cancel_on_disconnect(request, generate_itinerary(req, user_id))
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Itinerary not ready within its {budget:g}s deadline")
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=502, detail=f"AI returned malformed JSON: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    if user_id:
+        await _persist_later(itinerary, req, user_id)
+    include = include_spec(tree, ItineraryResponse) if tree else None
+    return respond(request, itinerary.model_dump_json(include=include).encode(), status_code=201)
+
+
+async def _persist_later(itinerary: ItineraryResponse, req: ItineraryRequest, user_id: str) -> None:
+    """Save after the response is sent; a regenerated trip keeps its itinerary_id."""
+    if req.trip_id:
+        try:
+            itinerary.itinerary_id = await existing_itinerary_id(req.trip_id, user_id) or itinerary.itinerary_id
+        except Exception:
+            pass   # persistence is best-effort; the response must not depend on it
+    background.spawn(_persist_and_refresh(itinerary, req, user_id), name=f"persist-itinerary-{itinerary.itinerary_id}")
+
+
+async def _persist_and_refresh(itinerary: ItineraryResponse, req: ItineraryRequest, user_id: str) -> None:
+    saved = await persist_generated_itinerary(itinerary, req, user_id)
+    if saved is None or not get_settings().accommodation_refresh_pending:
+        return
+    # Deadline-cut searches finish here; the app picks them up through /changes
+    refreshed = itinerary.model_copy(deep=True)
+    if await refresh_pending_accommodation(refreshed, req):
+        await persist_generated_itinerary(refreshed, req.model_copy(update={"trip_id": saved.trip_id}), user_id)
+
+
+# ── Batch generation ───────────────────────────────────────────────────────────
+
+NDJSON = "application/x-ndjson"
+
+
+async def _ndjson(results, user_id: Optional[str], persist: bool):
+    async for result in results:
+        if result.itinerary is not None and persist and user_id:
+            await _persist_later(result.itinerary, result.request, user_id)
+        line = ItineraryBatchItem(
+            index=result.index,
+            status="ok" if result.itinerary is not None else "error",
+            itinerary=result.itinerary,
+            error=result.error,
+            duplicate_of=result.duplicate_of,
+        )
+        yield line.model_dump_json(exclude_none=True).encode() + b"\n"
+
+
+@router.post(
+    "/generate:batch",
+    response_model=None,
+    responses={
+        200: {"content": {NDJSON: {}}, "description": "One ItineraryBatchItem per line, in completion order"},
+        202: {"model": ItineraryBatchStatus, "description": "Offline batch submitted"},
+    },
+)
+async def create_itinerary_batch(
+    batch: ItineraryBatchRequest,
+    request: Request,
+    user_id: Optional[str] = Depends(optional_user_id),
+):
+    """
+    Generate itineraries for many variants at once (expedition legs, origins,
+    budgets, catalogue trips).
+
+    Identical items (ignoring trip_id) are generated once, and accommodation
+    searches are shared across the batch. Each unique item takes an admission
+    slot, at most ITINERARY_BATCH_CONCURRENCY at a time. Results stream as
+    NDJSON as they complete; signed-in callers' items are saved like /generate.
+
+    mode=offline submits to the Message Batches API instead and returns 202
+    with a batch id; collect via GET /itinerary/batches/{batch_id}. Offline
+    batches belong to the verified caller and need an access token.
+    """
+    authorization = request.headers.get("authorization")
+    if batch.mode == "offline":
+        owner = require_user_id(authorization)
+        batch_id, unique = await itinerary_batch.submit_offline(batch.items)
+        await batches.save_batch(batch_id, owner, [item.model_dump(mode="json") for item in batch.items])
+        status = ItineraryBatchStatus(batch_id=batch_id, status="in_progress",
+                                      items=len(batch.items), unique_items=unique)
+        return Response(status.model_dump_json(), status_code=202, media_type="application/json")
+
+    client_host = request.client.host if request.client else None
+    key, tier = resolve_caller(user_id, client_host)
+    results = itinerary_batch.generate_batch(batch.items, key, tier, user_id)
+    return StreamingResponse(_ndjson(results, user_id, persist=True), media_type=NDJSON)
+
+
+@router.get(
+    "/batches/{batch_id}",
+    response_model=ItineraryBatchStatus,
+    responses={200: {"content": {NDJSON: {}}, "description": "NDJSON results once the batch has ended"}},
+)
+async def read_itinerary_batch(batch_id: str, user_id: str = Depends(require_user_id)):
+    """
+    An offline batch: its status while in progress; once ended, the parsed and
+    enriched results as NDJSON (same lines as generate:batch). Results are
+    saved on the first collection only, so collecting again is read-only.
+    """
+    stored = await batches.load_batch(batch_id, user_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    items = [ItineraryRequest(**item) for item in stored["items"]]
+
+    status, counts = await llm.batch_status(batch_id)
+    if status != "ended":
+        return ItineraryBatchStatus(batch_id=batch_id, status=status, items=len(items),
+                                    unique_items=len(itinerary_batch.group_items(items)), request_counts=counts)
+
+    persist = stored["collected_at"] is None and await batches.claim_collection(batch_id, user_id)
+    results = itinerary_batch.collect_offline(batch_id, items)
+    return StreamingResponse(_ndjson(results, user_id, persist=persist), media_type=NDJSON)
+
+
+@router.get("/{itinerary_id}", response_model=ItineraryResponse, responses={304: {"description": "Not modified"}})
+async def read_itinerary(
+    itinerary_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    user_id: str = Depends(require_user_id),
+):
+    """
+    A stored itinerary. Strong ETag from itineraries.version, which is also
+    returned as X-Itinerary-Version for GET /{id}/changes?since_version=.
+
+    If-None-Match → 304 after a single version lookup — the model is never
+    rebuilt or reserialised. Otherwise the serialized bytes for (id, version)
+    come from the response cache; a cold miss reads the stored snapshot, and
+    only itineraries saved before snapshots existed are rebuilt from rows.
+
+    `fields` projections are cut from those cached bytes and cached in turn
+    under their own key and ETag.
+    """
+    itinerary_id = valid_id(itinerary_id)
+    tree = _projection(fields)
+    projection = fields_key(tree)
+    async with user_scope(user_id, isolation="repeatable_read") as conn:
+        version = await queries.fetchval(conn, queries.ITINERARY_VERSION, itinerary_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Itinerary not found")
+
+        etag = make_etag("itin", itinerary_id, f"v{version}", *([f"f{projection}"] if projection else []))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+
+        cache = get_response_cache()
+        key = ("itin", itinerary_id, version, projection)
+        body = cache.get(key)
+        if body is None:
+            full = cache.get(("itin", itinerary_id, version, ""))
+            if full is None:
+                full = await load_itinerary_json(conn, itinerary_id, version)
+                cache.put(("itin", itinerary_id, version, ""), full)
+            body = encoding.dumps(project(encoding.loads(full), tree)) if tree else full
+            cache.put(key, body)
+    return respond(request, body, etag=etag, key=key, headers={"X-Itinerary-Version": str(version)})
+
+
+# A patch this close to the full document saves nothing and costs the client more work
+PATCH_MAX_RATIO = 0.8
+
+
+def _envelope(head: dict, field: str, raw_json: bytes) -> bytes:
+    """ItineraryChanges JSON with already-serialized `field`, without a parse/dump round trip."""
+    return encoding.dumps(head)[:-1] + b',"' + field.encode() + b'":' + raw_json + b"}"
+
+
+@router.get("/{itinerary_id}/changes", response_model=ItineraryChanges, responses={304: {"description": "Not modified"}})
+async def itinerary_changes(
+    itinerary_id: str,
+    request: Request,
+    since_version: int = Query(..., ge=1, description="Version the client holds (X-Itinerary-Version)"),
+    user_id: str = Depends(require_user_id),
+):
+    """
+    What changed since `since_version`, as an RFC 6902 JSON Patch against the
+    document GET /{id} returned for that version.
+
+    Falls back to the full itinerary when the patch would be nearly as large,
+    or when `since_version` is no longer stored (ITINERARY_VERSIONS_KEPT).
+    Results are cached per (id, since_version, current version).
+    """
+    itinerary_id = valid_id(itinerary_id)
+    async with user_scope(user_id, isolation="repeatable_read") as conn:
+        version = await queries.fetchval(conn, queries.ITINERARY_VERSION, itinerary_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Itinerary not found")
+
+        etag = make_etag("itin", itinerary_id, f"v{since_version}", f"v{version}")
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+
+        cache = get_response_cache()
+        key = ("itin-changes", itinerary_id, since_version, version)
+        body = cache.get(key)
+        if body is None:
+            head = {"itinerary_id": itinerary_id, "from_version": since_version, "to_version": version}
+            if since_version == version:
+                body = encoding.dumps({**head, "patch": []})
+            else:
+                snapshots = await load_snapshots(conn, itinerary_id, [since_version, version])
+                current = snapshots.get(version)
+                if current is None:
+                    current = (await load_itinerary(conn, itinerary_id)).model_dump_json().encode()
+                body = None
+                if since_version in snapshots:
+                    patch = jsonpatch.diff(encoding.loads(snapshots[since_version]), encoding.loads(current))
+                    patch_json = encoding.dumps(patch)
+                    if len(patch_json) < PATCH_MAX_RATIO * len(current):
+                        body = _envelope(head, "patch", patch_json)
+                if body is None:
+                    body = _envelope(head, "itinerary", current)
+            cache.put(key, body)
+    return respond(request, body, etag=etag, key=key, headers={"X-Itinerary-Version": str(version)})
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from starlette.requests import ClientDisconnect
+
+from app.api.deps import require_user_id, valid_id
+from app.core.disconnect import CLIENT_CLOSED_REQUEST
+from app.db.media import get_upload
+from app.db.trips import get_trip
+from app.models.media import MediaUploadCreate, MediaUploadProgress, MediaUploadSession
+from app.services import media_upload
+from app.services.media_upload import UploadConflict, UploadTooLarge
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+def _session(row: dict) -> MediaUploadSession:
+    return MediaUploadSession(
+        upload_id=row["id"], size_bytes=row["size_bytes"], part_size=row["part_size"],
+        received_bytes=row["received_bytes"],
+    )
+
+
+async def _owned_upload(upload_id: str, user_id: str) -> dict:
+    row = await get_upload(user_id, valid_id(upload_id))
+    if row is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return row
+
+
+@router.post("/uploads", response_model=MediaUploadSession, status_code=201)
+async def create_upload(body: MediaUploadCreate, user_id: str = Depends(require_user_id)):
+    """
+    Start a resumable upload of a recording.
+
+    Then PUT the file's bytes to /media/uploads/{upload_id} with an
+    Upload-Offset header (0 at first). After a dropped connection, GET the
+    upload and resume from `received_bytes`.
+    """
+    if body.trip_id is not None:
+        body.trip_id = valid_id(body.trip_id)
+        if await get_trip(user_id, body.trip_id) is None:
+            raise HTTPException(status_code=404, detail="Trip not found")
+    try:
+        row = await media_upload.start_upload(user_id, body)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return _session(row)
+
+
+@router.get("/uploads/{upload_id}", response_model=MediaUploadSession)
+async def read_upload(upload_id: str, user_id: str = Depends(require_user_id)):
+    return _session(await _owned_upload(upload_id, user_id))
+
+
+@router.put("/uploads/{upload_id}", response_model=MediaUploadProgress)
+async def upload_bytes(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0, description="Byte of the file this body starts at"),
+    user_id: str = Depends(require_user_id),
+):
+    """
+    Stream file bytes from Upload-Offset on; the body is never held whole.
+
+    Whole parts are committed as they reach storage. When the last byte is
+    in, the file is assembled and its media_assets row written (`asset_id`).
+    A mismatched Upload-Offset gets 409 with the offset to resume from.
+    """
+    session = await _owned_upload(upload_id, user_id)
+    try:
+        progress = await media_upload.receive(session, upload_offset, request.stream())
+    except UploadConflict as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.received_bytes)})
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ClientDisconnect:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    return MediaUploadProgress(
+        received_bytes=progress.received_bytes, size_bytes=progress.size_bytes, complete=progress.complete,
+        asset_id=progress.asset_id, storage_url=progress.storage_url, sha256=progress.sha256,
+    )
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str, user_id: str = Depends(require_user_id)):
+    await media_upload.abort_upload(await _owned_upload(upload_id, user_id))
+    return Response(status_code=204)
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from app.api.deps import require_user_id, valid_id
+from app.core import encoding
+from app.core.http_cache import etag_matches, get_response_cache, make_etag, not_modified, respond
+from app.db import queries, user_scope
+from app.db.destinations import place_names, shot_guides_for
+from app.db.itineraries import load_itinerary_json
+from app.db.trips import get_trip, list_trips
+from app.models.trip import TripResponse
+from app.services import offline_bundle
+
+router = APIRouter(prefix="/trips", tags=["trips"])
+
+
+def _trip_response(row: dict) -> TripResponse:
+    return TripResponse(**{
+        **row,
+        "id": str(row["id"]),
+        "user_id": str(row["user_id"]),
+        "itinerary_id": str(row["itinerary_id"]) if row.get("itinerary_id") else None,
+    })
+
+
+@router.get("", response_model=list[TripResponse])
+async def my_trips(limit: int = Query(50, ge=1, le=200), user_id: str = Depends(require_user_id)):
+    """The caller's trips, most recent start date first."""
+    return [_trip_response(row) for row in await list_trips(user_id, limit)]
+
+
+@router.get("/{trip_id}", response_model=TripResponse, responses={304: {"description": "Not modified"}})
+async def read_trip(trip_id: str, request: Request, user_id: str = Depends(require_user_id)):
+    """
+    One trip plus its itinerary pointer.
+
+    The ETag changes when the trip row is updated or its itinerary is
+    regenerated (itineraries.version); send it back as If-None-Match to get a
+    bodiless 304 instead of the payload.
+    """
+    row = await get_trip(user_id, valid_id(trip_id))
+    if row is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+
+    version, stamp = row["itinerary_version"] or 0, int(row["updated_at"].timestamp() * 1e6)
+    key = ("trip", str(row["id"]), version, stamp)
+    etag = make_etag("trip", row["id"], f"v{version}", stamp)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    cache = get_response_cache()
+    body = cache.get(key)
+    if body is None:
+        body = _trip_response(row).model_dump_json().encode()
+        cache.put(key, body)
+    return respond(request, body, etag=etag, key=key)
+
+
+@router.get(
+    "/{trip_id}/offline-bundle",
+    response_class=Response,
+    responses={
+        200: {"content": {offline_bundle.MEDIA_TYPE: {}}, "description": "Binary bundle (app/services/offline_bundle.py)"},
+        304: {"description": "Not modified"},
+    },
+)
+async def read_offline_bundle(trip_id: str, request: Request, user_id: str = Depends(require_user_id)):
+    """
+    The trip's itinerary, accommodation, activity coordinates and shot guides
+    as one binary file the app stores and reads in place while offline.
+
+    Built once per (itinerary version, trip update) and then served from the
+    response cache; the ETag lets the app skip re-downloading an unchanged
+    bundle. Send Accept-Encoding: br or gzip: the file itself is uncompressed
+    so it can be memory-mapped.
+    """
+    trip_id = valid_id(trip_id)
+    async with user_scope(user_id, isolation="repeatable_read") as conn:
+        row = await queries.fetchrow(conn, queries.TRIP_BY_ID, trip_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Trip not found")
+        if row["itinerary_id"] is None:
+            raise HTTPException(status_code=404, detail="Trip has no itinerary yet")
+
+        itinerary_id, version = str(row["itinerary_id"]), row["itinerary_version"]
+        stamp = int(row["updated_at"].timestamp() * 1e6)
+        etag = make_etag("bundle", itinerary_id, f"v{version}", stamp, f"f{offline_bundle.FORMAT_VERSION}")
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+
+        cache = get_response_cache()
+        key = ("bundle", itinerary_id, version, stamp, offline_bundle.FORMAT_VERSION)
+        body = cache.get(key)
+        if body is None:
+            full = cache.get(("itin", itinerary_id, version, "")) or await load_itinerary_json(conn, itinerary_id, version)
+            itinerary = encoding.loads(full)
+            places = place_names(row["destination"], *(d.get("overnight_location") for d in itinerary["days"]))
+            body = offline_bundle.encode_bundle(
+                itinerary, version,
+                trip={"id": str(row["id"]), "title": row["title"]},
+                shot_guides=await shot_guides_for(conn, places),
+            )
+            cache.put(key, body)
+    return respond(
+        request, body, etag=etag, key=key, media_type=offline_bundle.MEDIA_TYPE,
+        headers={
+            "X-Itinerary-Version": str(version),
+            "Content-Disposition": f'attachment; filename="trip-{trip_id}-v{version}.xpb"',
+        },
+    )
@@ -0,0 +1,374 @@
+"""
+Admission control for LLM-backed routes.
+
+Claude concurrency is the scarcest resource we have, so itinerary generation is
+gated by a per-worker AdmissionController:
+
+  request ──► resolve caller (verified access token → profiles.subscription)
+          ──► free slot and empty queue?  ──► run immediately
+          ──► queue / per-user queue full? ──► 429 + Retry-After (fast reject)
+          ──► otherwise wait in a weighted fair queue until a slot frees up
+
+Fairness uses virtual finish tags (WFQ): each waiter's tag is
+max(virtual_time, caller's last tag) + 1/weight, and the lowest tag is admitted
+first. A caller firing 20 requests therefore spaces its own tags out and cannot
+push well-behaved callers to the back of the line. Paid tiers get larger weights,
+so they advance faster under contention but never starve free users.
+
+Identity is the verified Supabase access token (core/auth.py), never a
+client-supplied id. Anonymous callers are keyed by client IP and treated as
+'free'. A user's tier is looked up in the background the first time they are
+seen; until it arrives they queue as 'free', so a tier lookup never delays
+admission.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.core import background, metrics
+from app.core.auth import user_id_from_authorization
+from app.core.config import get_settings
+
+log = logging.getLogger(__name__)
+
+# profiles.subscription → scheduling weight
+TIER_WEIGHTS: dict[str, float] = {
+    "free": 1.0,
+    "creator": 2.0,
+    "pro": 4.0,
+}
+DEFAULT_TIER = "free"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be queued (or waited too long)."""
+
+    def __init__(self, reason: str, retry_after_s: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    seq: int
+    key: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class AdmissionStats:
+    """Cumulative counters; queue_wait_* feed the queue-time metrics."""
+
+    admitted: int = 0
+    queued: int = 0
+    rejected: dict[str, int] = field(default_factory=dict)
+    queue_wait_sum_s: float = 0.0
+    queue_wait_max_s: float = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "queue_wait_sum_s": round(self.queue_wait_sum_s, 6),
+            "queue_wait_max_s": round(self.queue_wait_max_s, 6),
+        }
+
+
+class AdmissionController:
+    """
+    Bounded-concurrency gate with weighted fair queueing.
+
+    Usage:
+        async with controller.slot(key="user-123", tier="pro") as waited_s:
+            ...
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        max_queue_per_user: int,
+        queue_timeout_s: float,
+        tier_weights: dict[str, float] = TIER_WEIGHTS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.queue_timeout_s = queue_timeout_s
+        self._weights = tier_weights
+
+        self._in_flight = 0
+        self._heap: list[_Waiter] = []
+        self._queued = 0
+        self._queued_by_key: dict[str, int] = {}
+        self._last_tag: dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        # EWMA of slot hold time — drives the Retry-After estimate
+        self._service_time_s = 10.0
+        self.stats = AdmissionStats()
+
+    # ── Introspection ──────────────────────────────────────────────────────────
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def retry_after_s(self) -> int:
+        """Rough time until a newly queued request would be admitted."""
+        backlog = self.queue_depth + 1
+        estimate = self._service_time_s * backlog / max(self.max_concurrency, 1)
+        return max(1, math.ceil(estimate))
+
+    # ── Acquire / release ──────────────────────────────────────────────────────
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.stats.rejected[reason] = self.stats.rejected.get(reason, 0) + 1
+        metrics.ADMISSION_REJECTED.labels(reason).inc()
+        return AdmissionRejected(reason, self.retry_after_s())
+
+    async def acquire(self, key: str, tier: str = DEFAULT_TIER) -> float:
+        """Wait for a slot. Returns seconds spent queued; raises AdmissionRejected."""
+        if self._in_flight < self.max_concurrency and not self._queued:
+            self._in_flight += 1
+            self.stats.admitted += 1
+            metrics.ADMISSION_QUEUE_SECONDS.labels(tier).observe(0.0)
+            self._publish_gauges()
+            return 0.0
+
+        if self.queue_depth >= self.max_queue:
+            raise self._reject("queue_full")
+        if self._queued_by_key.get(key, 0) >= self.max_queue_per_user:
+            raise self._reject("user_queue_full")
+
+        weight = self._weights.get(tier, self._weights[DEFAULT_TIER])
+        start_tag = max(self._virtual_time, self._last_tag.get(key, 0.0))
+        finish_tag = start_tag + 1.0 / weight
+        self._last_tag[key] = finish_tag
+
+        waiter = _Waiter(finish_tag, next(self._seq), key, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._heap, waiter)
+        self._queued += 1
+        self._queued_by_key[key] = self._queued_by_key.get(key, 0) + 1
+        self.stats.queued += 1
+        enqueued_at = time.monotonic()
+        self._dispatch()   # slots may be free if earlier waiters gave up
+        self._publish_gauges()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                raise self._reject("queue_timeout") from None
+        except asyncio.CancelledError:
+            # Client went away while queued. If the slot was granted in the same
+            # tick, hand it straight to the next waiter instead of leaking it.
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release_slot()
+            else:
+                waiter.future.cancel()
+            raise
+        finally:
+            self._dequeue_key(key)
+
+        waited = time.monotonic() - enqueued_at
+        self.stats.admitted += 1
+        self.stats.queue_wait_sum_s += waited
+        self.stats.queue_wait_max_s = max(self.stats.queue_wait_max_s, waited)
+        metrics.ADMISSION_QUEUE_SECONDS.labels(tier).observe(waited)
+        return waited
+
+    def release(self, held_s: float | None = None) -> None:
+        if held_s is not None:
+            self._service_time_s = 0.8 * self._service_time_s + 0.2 * held_s
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+        self._publish_gauges()
+
+    def _dispatch(self) -> None:
+        while self._heap and self._in_flight < self.max_concurrency:
+            waiter = heapq.heappop(self._heap)
+            if waiter.future.done():   # cancelled or timed out while queued
+                continue
+            self._virtual_time = max(self._virtual_time, waiter.finish_tag)
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    def _publish_gauges(self) -> None:
+        metrics.ADMISSION_IN_FLIGHT.set(self._in_flight)
+        metrics.ADMISSION_QUEUE_DEPTH.set(self._queued)
+
+    def _dequeue_key(self, key: str) -> None:
+        self._queued -= 1
+        metrics.ADMISSION_QUEUE_DEPTH.set(self._queued)
+        remaining = self._queued_by_key.get(key, 1) - 1
+        if remaining > 0:
+            self._queued_by_key[key] = remaining
+            return
+        self._queued_by_key.pop(key, None)
+        # Forget idle callers so the tag map doesn't grow without bound
+        if self._last_tag.get(key, 0.0) <= self._virtual_time:
+            self._last_tag.pop(key, None)
+
+    @asynccontextmanager
+    async def slot(self, key: str, tier: str = DEFAULT_TIER) -> AsyncIterator[float]:
+        """Hold a slot for the body of the block; yields seconds spent queued."""
+        waited = await self.acquire(key, tier)
+        admitted_at = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - admitted_at)
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    s = get_settings()
+    return AdmissionController(
+        max_concurrency=s.admission_max_concurrency,
+        max_queue=s.admission_max_queue,
+        max_queue_per_user=s.admission_max_queue_per_user,
+        queue_timeout_s=s.admission_queue_timeout_s,
+    )
+
+
+# ── Tier resolution ────────────────────────────────────────────────────────────
+# Verified user id → (tier, expires at), least recently used first
+_tier_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+_tier_lookups: set[str] = set()
+
+
+def _fetch_subscription(user_id: str) -> str:
+    from app.services.supabase_client import get_supabase
+
+    rows = (
+        get_supabase()
+        .table("profiles")
+        .select("subscription")
+        .eq("id", user_id)
+        .limit(1)
+        .execute()
+        .data
+    )
+    return rows[0]["subscription"] if rows else DEFAULT_TIER
+
+
+async def _refresh_tier(user_id: str) -> None:
+    s = get_settings()
+    try:
+        tier = await asyncio.to_thread(_fetch_subscription, user_id)
+    except Exception as e:
+        log.warning("admission: tier lookup failed for '%s': %s", user_id, e)
+        tier = DEFAULT_TIER
+    finally:
+        _tier_lookups.discard(user_id)
+    if tier not in TIER_WEIGHTS:
+        tier = DEFAULT_TIER
+    _tier_cache[user_id] = (tier, time.monotonic() + s.admission_tier_cache_ttl_s)
+    _tier_cache.move_to_end(user_id)
+    while len(_tier_cache) > s.admission_tier_cache_max:
+        _tier_cache.popitem(last=False)
+
+
+def resolve_tier(user_id: str) -> str:
+    """
+    profiles.subscription for a verified user id, from the cache. A user not
+    cached yet is 'free' for this request, and an expired entry keeps its tier,
+    while the lookup runs in the background.
+    """
+    entry = _tier_cache.get(user_id)
+    if entry is not None:
+        _tier_cache.move_to_end(user_id)
+        if entry[1] > time.monotonic():
+            return entry[0]
+    if user_id not in _tier_lookups and len(_tier_lookups) < get_settings().admission_tier_cache_max:
+        _tier_lookups.add(user_id)
+        background.spawn(_refresh_tier(user_id), name="admission_tier_lookup")
+    return entry[0] if entry is not None else DEFAULT_TIER
+
+
+def resolve_caller(user_id: str | None, client_host: str | None) -> tuple[str, str]:
+    """(queue key, tier) for a request: the verified user when there is one, else the client IP as 'free'."""
+    if user_id:
+        return user_id, resolve_tier(user_id)
+    return f"ip:{client_host or 'unknown'}", DEFAULT_TIER
+
+
+# ── ASGI middleware ────────────────────────────────────────────────────────────
+
+class AdmissionMiddleware:
+    """
+    Gates POST requests under `path_prefix` through the AdmissionController.
+
+    Reads (GET) are never queued — only expensive generation calls. The queue
+    wait is stored in scope["state"]["admission_wait_s"] for downstream logging.
+    `exempt` paths gate their own work (batch generation takes a slot per item).
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/v1/itinerary", exempt: tuple[str, ...] = ()):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path_prefix)
+            or scope["path"] in self.exempt
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        client = scope.get("client") or ("unknown", 0)
+        user_id = user_id_from_authorization(headers.get(b"authorization", b"").decode("latin-1"))
+        key, tier = resolve_caller(user_id, client[0])
+
+        controller = get_admission_controller()
+        try:
+            async with controller.slot(key, tier) as waited:
+                scope.setdefault("state", {})["admission_wait_s"] = waited
+                await self.app(scope, receive, send)
+        except AdmissionRejected as e:
+            log.info("admission: rejected '%s' (%s) — %s", key, tier, e.reason)
+            await _send_429(send, e)
+
+
+async def _send_429(send, err: AdmissionRejected) -> None:
+    body = json.dumps(
+        {"detail": f"Too many itinerary requests ({err.reason}). Retry in {err.retry_after_s}s."}
+    ).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(err.retry_after_s).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,50 @@
+"""
+Caller identity from Supabase access tokens.
+
+  Authorization: Bearer <JWT> ──► HS256 signature (SUPABASE_JWT_SECRET),
+                                  exp, aud = "authenticated"
+                               ──► sub (a profiles.id UUID)
+
+Supabase signs its access tokens with the project's JWT secret (Settings →
+API → JWT Secret). A token that fails any check identifies nobody; the
+caller is treated as anonymous, and routes that need a user answer 401.
+Without SUPABASE_JWT_SECRET no caller is ever identified. Persistence and
+per-user tiers are then off.
+
+Nothing here trusts a client-supplied user id header.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+
+from app.core.config import get_settings
+
+log = logging.getLogger(__name__)
+
+AUDIENCE = "authenticated"
+
+
+def user_id_from_authorization(authorization: str | None) -> str | None:
+    """The verified `sub` of a "Bearer <token>" header value, or None."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return user_id_from_token(token.strip())
+
+
+def user_id_from_token(token: str) -> str | None:
+    """The `sub` of a valid Supabase access token as a canonical UUID, or None."""
+    import jwt
+
+    secret = get_settings().supabase_jwt_secret
+    if not secret:
+        return None
+    try:
+        claims = jwt.decode(token, secret, algorithms=["HS256"], audience=AUDIENCE,
+                            options={"require": ["exp", "sub"]})
+        return str(uuid.UUID(claims["sub"]))
+    except (jwt.PyJWTError, ValueError, TypeError) as e:
+        log.debug("auth: rejected token: %s", e)
+        return None
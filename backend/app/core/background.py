@@ -0,0 +1,47 @@
+"""
+Fire-and-forget tasks that outlive the request that started them.
+
+Starlette's BackgroundTasks run inside the request's ASGI call, so anything
+wrapping it (admission slot, tracing root span) stays held until they finish.
+spawn() detaches the work instead: the task keeps a strong reference here until
+it completes, and drain() gives pending work a bounded grace period on shutdown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Coroutine
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+_tasks: set[asyncio.Task] = set()
+
+
+def _done(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("background task %s failed: %s", task.get_name(), task.exception())
+
+
+def spawn(coro: Coroutine[Any, Any, Any], name: str | None = None) -> asyncio.Task:
+    task = asyncio.get_running_loop().create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_done)
+    return task
+
+
+def pending() -> int:
+    return len(_tasks)
+
+
+async def drain(timeout_s: float = 10.0) -> None:
+    """Wait for in-flight background work; cancel whatever is left after timeout_s."""
+    if not _tasks:
+        return
+    _, still_running = await asyncio.wait(set(_tasks), timeout=timeout_s)
+    for task in still_running:
+        task.cancel()
+    if still_running:
+        log.warning("cancelled %d background tasks at shutdown", len(still_running))
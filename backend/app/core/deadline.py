@@ -0,0 +1,72 @@
+"""
+Request-scoped deadlines.
+
+    with deadline_scope(8.0):                # 8 s from now, or sooner if already set
+        ...
+        remaining()                          # seconds left, None when unbounded
+        clamp(15)                            # a 15 s timeout, cut to what's left
+
+The deadline lives in a ContextVar, so it follows the request into every task
+started under it (search_multi's fan-out, SingleFlight leaders). Code that
+waits clamps its own timeouts instead of taking a deadline argument:
+app.core.http.async_client clamps every outbound HTTP timeout, so providers
+respect the deadline without knowing about it. Scopes only ever tighten.
+deadline_scope(None) lifts the deadline for work that outlives the request
+(background refreshes).
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Relative budget in ms the client is willing to wait, e.g. X-Deadline-Ms: 20000
+DEADLINE_HEADER = "x-deadline-ms"
+
+# An HTTP timeout is never clamped below this: a zero timeout fails before connecting
+MIN_TIMEOUT_S = 0.05
+
+_deadline: ContextVar[float | None] = ContextVar("xplor_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    current = _deadline.get()
+    if seconds is None:
+        deadline = None
+    else:
+        deadline = time.monotonic() + seconds
+        if current is not None:
+            deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def clamp(timeout: float) -> float:
+    """`timeout`, cut to the time left before the deadline."""
+    left = remaining()
+    return timeout if left is None else max(MIN_TIMEOUT_S, min(timeout, left))
+
+
+def from_header(value: str | None, default: float, maximum: float) -> float:
+    """Seconds for a request: the client's X-Deadline-Ms when valid, capped at `maximum`."""
+    try:
+        seconds = int(value) / 1000
+    except (TypeError, ValueError):
+        return default
+    return min(seconds, maximum) if seconds > 0 else default
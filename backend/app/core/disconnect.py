@@ -0,0 +1,72 @@
+"""
+Cancel a handler's work when its client goes away.
+
+    itinerary = await cancel_on_disconnect(request, generate_itinerary(req))
+
+Starlette keeps running a handler after the client disconnects, so a closed tab
+still pays for the LLM call and every accommodation search behind it. Here the
+work runs as a task next to a watcher on the ASGI receive channel. When the
+watcher sees http.disconnect first, the work is cancelled and
+ClientDisconnected is raised. Cancellation then unwinds through the whole task
+tree:
+
+  generate_itinerary ──► complete() ──► Anthropic stream closed mid-response
+                    └──► search_multi ──► each search ──► httpx requests aborted
+
+Work other requests are waiting on is left alone: SingleFlight only cancels a
+shared call once its last caller has gone (and the skeleton cache never does).
+
+Only for handlers that have already read their body: the watcher consumes
+receive() messages. StreamingResponse needs none of this, because Starlette
+already cancels the stream on disconnect.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable
+from typing import TypeVar
+
+from starlette.requests import Request
+
+from app.core import metrics
+
+T = TypeVar("T")
+
+# nginx's convention for "client went away"; nobody reads it, but access logs and traces do
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _disconnected(request: Request) -> None:
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """Await `work`; raise ClientDisconnected (after cancelling it) if the client leaves first."""
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.create_task(_disconnected(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if task.done():
+        return task.result()
+    if watcher.exception() is not None:      # can't watch: just finish the work
+        return await task
+
+    task.cancel()
+    metrics.CANCELLED_WORK.labels("generation").inc()
+    # Let the cancellation unwind (streams closed, spans ended) before the handler returns
+    await asyncio.gather(task, return_exceptions=True)
+    raise ClientDisconnected()
@@ -0,0 +1,110 @@
+"""
+Response representations: serializer, media type and content-coding.
+
+    JSON bytes ──► Accept: application/msgpack? ──► msgpack ─┐
+        │                                                    ├─► br | gzip | identity
+        └───────────────────────────────────────── json ─────┘   (Accept-Encoding,
+                                                                  bodies ≥ MIN_COMPRESS_BYTES)
+
+JSON is always the canonical form — it is what snapshots store and what the
+response cache holds — and every other representation is derived from it, so
+they can be cached next to it under the same versioned key.
+
+orjson, brotli and msgpack are optional: without them we fall back to the
+stdlib json encoder, gzip, and JSON only.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:   # pragma: no cover
+    orjson = None
+
+try:
+    import brotli
+except ImportError:   # pragma: no cover
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:   # pragma: no cover
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+IDENTITY = "identity"
+
+# Below this, compression overhead (headers, CPU on both ends) outweighs the savings
+MIN_COMPRESS_BYTES = 1024
+
+# Tuned for per-response latency rather than ratio; the result is cached anyway
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes; orjson when installed (several times faster than json)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _accepted(header: str | None) -> dict[str, float]:
+    """'br;q=1.0, gzip;q=0.5' → {'br': 1.0, 'gzip': 0.5}."""
+    out: dict[str, float] = {}
+    for item in (header or "").split(","):
+        token, _, params = item.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        out[token.strip().lower()] = q
+    return out
+
+
+def supported_codings() -> tuple[str, ...]:
+    """Server preference order."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept: str | None, accept_encoding: str | None, size: int) -> tuple[str, str]:
+    """(media type, content-coding) for a JSON body of `size` bytes."""
+    media = JSON
+    if msgpack is not None:
+        types = _accepted(accept)
+        if types.get(MSGPACK, types.get("application/x-msgpack", 0.0)) > types.get(JSON, 0.0):
+            media = MSGPACK
+
+    coding = IDENTITY
+    if size >= MIN_COMPRESS_BYTES:
+        codings = _accepted(accept_encoding)
+        wildcard = codings.get("*", 0.0)
+        for candidate in supported_codings():
+            if codings.get(candidate, wildcard) > 0:
+                coding = candidate
+                break
+    return media, coding
+
+
+def encode(json_body: bytes, media: str, coding: str) -> bytes:
+    body = msgpack.packb(loads(json_body)) if media == MSGPACK else json_body
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if coding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
@@ -0,0 +1,49 @@
+"""
+Shared helpers for outbound HTTP.
+
+Providers create clients through async_client() instead of httpx.AsyncClient()
+directly, so every upstream call gets a tracing span (method, host, path,
+status) without the provider knowing about it, every timeout is clamped to the
+request's deadline (app.core.deadline), and every request waits its turn in
+its host's limiter (app.core.upstream).
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import httpx
+
+from app.core import deadline, tracing, upstream
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps a transport: each request waits for its host's limiter, then is sent.
+    Records one `http <METHOD> <host>` span per request; upstream.queue_ms is
+    the part of it spent waiting.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport | None = None):
+        self._inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = upstream.get_host_limiter(request.url.host)
+        # Only host + path: query strings carry API keys (OpenTripMap `apikey=`)
+        with tracing.span(
+            f"http {request.method} {request.url.host}",
+            **{"http.method": request.method, "http.host": request.url.host, "http.path": request.url.path},
+        ) as s:
+            async with limiter.slot(upstream.queue_timeout()) as waited:
+                s.set("upstream.queue_ms", round(waited * 1000, 1))
+                response = await self._inner.handle_async_request(request)
+            s.set("http.status_code", response.status_code)
+            return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def async_client(timeout: float, **kwargs: Any) -> httpx.AsyncClient:
+    """httpx.AsyncClient with tracing and a deadline-clamped timeout; accepts the usual AsyncClient kwargs."""
+    return httpx.AsyncClient(timeout=deadline.clamp(timeout), transport=TracingTransport(), **kwargs)
@@ -0,0 +1,143 @@
+"""
+Conditional GET and serialized-response caching.
+
+Read endpoints whose payload is fully determined by a row version work like:
+
+    etag = make_etag("itin", itinerary_id, version)        # cheap version lookup
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)                           # no build, no body
+    body = responses.get(("itin", itinerary_id, version))  # shared bytes cache
+    if body is None:
+        body = build().model_dump_json().encode()
+        responses.put(("itin", itinerary_id, version), body)
+    return respond(request, body, etag=etag, key=("itin", itinerary_id, version))
+
+respond() negotiates the representation (MessagePack and br/gzip, see
+app.core.encoding) and caches each derived encoding next to the JSON under
+the same key, so a warm hit never re-compresses. Derived representations carry
+a weak ETag (W/) — the same semantic version, different bytes — which
+If-None-Match still matches by weak comparison.
+
+Keys carry the version, so entries never need invalidating — superseded
+versions simply age out of the LRU. Authorisation must happen before the cache
+lookup (the version query runs under user_scope / RLS); cached bytes are shared
+across users.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from functools import lru_cache
+
+from fastapi import Request, Response
+
+from app.core import encoding, metrics
+from app.core.config import get_settings
+
+# Revalidate every time (cheap: a version lookup + 304), never share across users
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Strong validator built from identifiers that change whenever the payload does."""
+    return '"' + "-".join(str(p) for p in parts) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """RFC 9110 If-None-Match: weak comparison against a list of tags, or `*`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL,
+                                              "Vary": "Accept, Accept-Encoding"})
+
+
+def respond(
+    request: Request,
+    body: bytes,
+    *,
+    etag: str | None = None,
+    key: tuple | None = None,
+    headers: dict[str, str] | None = None,
+    status_code: int = 200,
+    media_type: str = encoding.JSON,
+) -> Response:
+    """
+    Send `body` in the representation the client negotiated.
+
+    `key` is the response-cache key `body` is stored under; encoded variants
+    are cached as (*key, media type, coding). Omit it for one-off bodies.
+    Bodies that are not JSON are only ever content-coded.
+    """
+    media, coding = encoding.negotiate(request.headers.get("accept"), request.headers.get("accept-encoding"), len(body))
+    if media_type != encoding.JSON:
+        media = media_type
+    out = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if etag:
+        derived = (media, coding) != (media_type, encoding.IDENTITY)
+        out["ETag"] = "W/" + etag.removeprefix("W/") if derived else etag
+        out["Cache-Control"] = CACHE_CONTROL
+    if coding != encoding.IDENTITY:
+        out["Content-Encoding"] = coding
+
+    if (media, coding) != (media_type, encoding.IDENTITY):
+        cache = get_response_cache() if key is not None else None
+        encoded = cache.get((*key, media, coding)) if cache else None
+        if encoded is None:
+            encoded = encoding.encode(body, media, coding)
+            if cache:
+                cache.put((*key, media, coding), encoded)
+        body = encoded
+    return Response(body, status_code=status_code, media_type=media, headers=out)
+
+
+class BytesLRU:
+    """Size-bounded LRU of serialized responses (bytes), thread-safe."""
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            body = self._data.get(key)
+            if body is not None:
+                self._data.move_to_end(key)
+        metrics.cache_hit(self.name, body is not None)
+        return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._data[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+
+@lru_cache
+def get_response_cache() -> BytesLRU:
+    return BytesLRU("response_bytes", get_settings().response_cache_max_bytes)
@@ -0,0 +1,130 @@
+"""
+RFC 6902 JSON Patch — diff and apply for plain JSON values.
+
+diff() emits only add / remove / replace, which is all a client needs to
+implement (see mobile/store/tripStore.ts). Lists are compared position by
+position, then grown or shrunk at the end: itinerary days and activities are
+ordered, and a regenerated day usually keeps its position, so this produces
+small patches without an LCS pass.
+
+    patch = diff(old, new)
+    assert apply(old, patch) == new
+"""
+
+from __future__ import annotations
+
+import copy
+import re
+from typing import Any
+
+# RFC 6901 array index: no sign, no leading zeros
+_ARRAY_INDEX = re.compile(r"0|[1-9][0-9]*")
+
+
+def _escape(token: str | int) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def diff(old: Any, new: Any, path: str = "") -> list[dict]:
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+
+    if isinstance(old, dict):
+        ops: list[dict] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            elif old[key] != value:
+                ops.extend(diff(old[key], value, child))
+        return ops
+
+    if isinstance(old, list):
+        ops = []
+        common = min(len(old), len(new))
+        for i in range(common):
+            if old[i] != new[i]:
+                ops.extend(diff(old[i], new[i], f"{path}/{i}"))
+        for i in range(len(old) - 1, common - 1, -1):     # from the end, so indices stay valid
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        for value in new[common:]:
+            ops.append({"op": "add", "path": f"{path}/-", "value": value})
+        return ops
+
+    return [] if old == new else [{"op": "replace", "path": path, "value": new}]
+
+
+class PatchError(ValueError):
+    pass
+
+
+def _index(token: str) -> int:
+    if not _ARRAY_INDEX.fullmatch(token):
+        raise PatchError(f"bad index {token!r}")
+    return int(token)
+
+
+def _resolve(doc: Any, tokens: list[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, list):
+            try:
+                doc = doc[_index(token)]
+            except IndexError as e:
+                raise PatchError(f"bad index {token!r}") from e
+        elif isinstance(doc, dict) and token in doc:
+            doc = doc[token]
+        else:
+            raise PatchError(f"missing member {token!r}")
+    return doc
+
+
+def apply(doc: Any, patch: list[dict]) -> Any:
+    """Return a patched deep copy of `doc` (add / remove / replace)."""
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        path = op["path"]
+        if path == "":
+            if op["op"] == "remove":
+                raise PatchError("cannot remove the document root")
+            doc = copy.deepcopy(op["value"])
+            continue
+        tokens = [_unescape(t) for t in path.split("/")[1:]]
+        parent = _resolve(doc, tokens[:-1])
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            try:
+                index = len(parent) if last == "-" else _index(last)
+                if op["op"] == "add":
+                    if not 0 <= index <= len(parent):
+                        raise IndexError(index)
+                    parent.insert(index, copy.deepcopy(op["value"]))
+                elif op["op"] == "remove":
+                    del parent[index]
+                elif op["op"] == "replace":
+                    parent[index] = copy.deepcopy(op["value"])
+                else:
+                    raise PatchError(f"unsupported op {op['op']!r}")
+            except PatchError:
+                raise
+            except (ValueError, IndexError) as e:
+                raise PatchError(f"bad index {last!r} in {path}") from e
+        else:
+            if op["op"] in ("add", "replace"):
+                if op["op"] == "replace" and last not in parent:
+                    raise PatchError(f"missing member {last!r}")
+                parent[last] = copy.deepcopy(op["value"])
+            elif op["op"] == "remove":
+                if last not in parent:
+                    raise PatchError(f"missing member {last!r}")
+                del parent[last]
+            else:
+                raise PatchError(f"unsupported op {op['op']!r}")
+    return doc
@@ -0,0 +1,43 @@
+"""
+Build-once getters that are safe across threads.
+
+functools.lru_cache does not stop two threads that miss at the same moment
+from both running the function. The lifespan prewarm (a worker thread) and
+the first request (the event loop) could then each build an SDK client.
+`once` serialises the first call and caches its result; every later call is
+a plain read.
+
+    @once
+    def get_client() -> Client:
+        import sdk
+        return sdk.Client(...)
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+from collections.abc import Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+_UNSET = object()
+
+
+def once(fn: Callable[[], T]) -> Callable[[], T]:
+    lock = threading.Lock()
+    result: list = [_UNSET]
+
+    @functools.wraps(fn)
+    def get() -> T:
+        value = result[0]
+        if value is _UNSET:
+            with lock:
+                if result[0] is _UNSET:
+                    result[0] = fn()
+                value = result[0]
+        return value
+
+    get.cache_clear = lambda: result.__setitem__(0, _UNSET)   # type: ignore[attr-defined]
+    return get
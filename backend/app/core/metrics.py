@@ -0,0 +1,325 @@
+"""
+Prometheus instrumentation.
+
+Every metric the API exposes is declared here so names, labels and buckets stay
+consistent across modules. Call sites only import the metric objects and record:
+
+    with metrics.PARSE_SECONDS.time():
+        ...
+    metrics.PROVIDER_RESULTS.labels(provider.name).observe(len(results))
+
+Recording is a lock + a few float adds, so it is safe on the hot path. Label
+values must come from small fixed sets (model IDs, provider names, stages) —
+never from user input.
+
+Exposed at GET /metrics (see api/routes/metrics.py). When running several
+uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR so the endpoint
+aggregates across processes.
+"""
+
+from __future__ import annotations
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# Latency buckets sized for our workload: LLM calls run 5–90 s, provider calls
+# 0.05–20 s, parsing and cache lookups well under 100 ms.
+LLM_BUCKETS = (0.5, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+UPSTREAM_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+TOKEN_BUCKETS = (64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+# ── LLM ────────────────────────────────────────────────────────────────────────
+LLM_TTFT_SECONDS = Histogram(
+    "xplor_llm_time_to_first_token_seconds",
+    "Time from request to first streamed token",
+    ["model"], buckets=LLM_BUCKETS,
+)
+LLM_DURATION_SECONDS = Histogram(
+    "xplor_llm_duration_seconds",
+    "Total LLM call duration",
+    ["model"], buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Histogram(
+    "xplor_llm_tokens",
+    "Tokens per LLM call by kind (input/output/cache_read/cache_write)",
+    ["model", "kind"], buckets=TOKEN_BUCKETS,
+)
+LLM_ERRORS = Counter(
+    "xplor_llm_errors_total",
+    "LLM calls that raised",
+    ["model"],
+)
+
+# ── Itinerary pipeline ─────────────────────────────────────────────────────────
+ITINERARY_STAGE_SECONDS = Histogram(
+    "xplor_itinerary_stage_seconds",
+    "generate_itinerary duration per stage (llm/parse/enrich/total)",
+    ["stage"], buckets=LLM_BUCKETS,
+)
+PARSE_SECONDS = Histogram(
+    "xplor_itinerary_parse_seconds",
+    "_parse_llm_response duration",
+    buckets=FAST_BUCKETS,
+)
+
+# ── Accommodation ──────────────────────────────────────────────────────────────
+PROVIDER_SEARCH_SECONDS = Histogram(
+    "xplor_accommodation_provider_seconds",
+    "AccommodationProvider.search latency",
+    ["provider", "outcome"], buckets=UPSTREAM_BUCKETS,
+)
+PROVIDER_SEARCHES = Counter(
+    "xplor_accommodation_provider_searches_total",
+    "Provider searches by outcome (ok/empty/error/skipped/deadline)",
+    ["provider", "outcome"],
+)
+PROVIDER_RESULTS = Histogram(
+    "xplor_accommodation_provider_results",
+    "Options returned per successful provider search",
+    ["provider"], buckets=COUNT_BUCKETS,
+)
+SEARCH_MULTI_FANOUT = Histogram(
+    "xplor_accommodation_search_multi_fanout",
+    "Locations searched concurrently per search_multi call",
+    buckets=COUNT_BUCKETS,
+)
+SEARCH_MULTI_PENDING = Counter(
+    "xplor_accommodation_search_multi_pending_total",
+    "Locations search_multi returned as pending because the request deadline passed",
+)
+
+# ── Upstream HTTP limits ───────────────────────────────────────────────────────
+UPSTREAM_QUEUE_SECONDS = Histogram(
+    "xplor_upstream_queue_seconds",
+    "Time an outbound request waited for its host's limiter (slot + rate spacing)",
+    ["host", "priority"], buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAM_QUEUE_DEPTH = Gauge(
+    "xplor_upstream_queue_depth",
+    "Outbound requests waiting for a slot, per host and priority",
+    ["host", "priority"], multiprocess_mode="livesum",
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "xplor_upstream_in_flight",
+    "Outbound requests holding a slot, per host",
+    ["host"], multiprocess_mode="livesum",
+)
+UPSTREAM_REJECTED = Counter(
+    "xplor_upstream_rejected_total",
+    "Outbound requests that gave up waiting for a slot",
+    ["host"],
+)
+
+# ── Caches ─────────────────────────────────────────────────────────────────────
+CACHE_REQUESTS = Counter(
+    "xplor_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+
+SINGLEFLIGHT_CALLS = Counter(
+    "xplor_singleflight_calls_total",
+    "Calls through a SingleFlight group: 'leader' started the work, 'shared' joined it",
+    ["group", "role"],
+)
+
+# ── Cancellation ───────────────────────────────────────────────────────────────
+CANCELLED_WORK = Counter(
+    "xplor_cancelled_work_total",
+    "Work abandoned before completion because nobody was waiting for it any more: "
+    "'generation' (client disconnected), 'llm' (stream aborted), or a SingleFlight group",
+    ["kind"],
+)
+
+# ── Batch generation ───────────────────────────────────────────────────────────
+BATCH_ITEMS = Counter(
+    "xplor_itinerary_batch_items_total",
+    "Batch generation items by outcome (ok/error/duplicate)",
+    ["mode", "outcome"],
+)
+
+# ── Captions ───────────────────────────────────────────────────────────────────
+CAPTION_ITEMS = Counter(
+    "xplor_caption_items_total",
+    "Recordings through caption generation by outcome (drafted/failed/released/retried)",
+    ["outcome"],
+)
+CAPTION_PACK_ITEMS = Histogram(
+    "xplor_caption_pack_items",
+    "Recordings packed into one caption call",
+    buckets=COUNT_BUCKETS,
+)
+CAPTION_RUN_SECONDS = Histogram(
+    "xplor_caption_run_seconds",
+    "Wall time of one caption run, claim to saved drafts",
+    buckets=LLM_BUCKETS,
+)
+BLOG_STAGE_SECONDS = Histogram(
+    "xplor_blog_stage_seconds",
+    "Blog generation time per stage: 'map' (one day's summary) or 'reduce' (the post)",
+    ["stage"], buckets=LLM_BUCKETS,
+)
+
+# ── Media uploads ──────────────────────────────────────────────────────────────
+MEDIA_UPLOAD_BYTES = Counter(
+    "xplor_media_upload_bytes_total",
+    "Bytes committed to object storage by media uploads",
+)
+MEDIA_UPLOAD_PART_SECONDS = Histogram(
+    "xplor_media_upload_part_seconds",
+    "Hashing and uploading one multipart part",
+    buckets=UPSTREAM_BUCKETS,
+)
+MEDIA_UPLOADS = Counter(
+    "xplor_media_uploads_total",
+    "Upload requests by outcome (completed/interrupted/conflict/aborted)",
+    ["outcome"],
+)
+
+# ── Scheduled publishing ───────────────────────────────────────────────────────
+PUBLISH_SCHEDULED = Gauge(
+    "xplor_publish_scheduled",
+    "Posts in the dispatcher's in-memory window",
+    multiprocess_mode="livesum",
+)
+PUBLISH_LAG_SECONDS = Histogram(
+    "xplor_publish_lag_seconds",
+    "Time from a post's due time to its publish call starting (includes platform rate limiting)",
+    ["platform"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 15, 60, 300),
+)
+PUBLISH_ATTEMPTS = Counter(
+    "xplor_publish_attempts_total",
+    "Publish attempts by platform and outcome (published/retry/failed)",
+    ["platform", "outcome"],
+)
+
+# ── Post analytics ─────────────────────────────────────────────────────────────
+ANALYTICS_SNAPSHOTS = Counter(
+    "xplor_analytics_snapshots_total",
+    "Post analytics snapshots ingested: 'stored', or 'unknown_post' (dropped)",
+    ["outcome"],
+)
+ANALYTICS_INGEST_SECONDS = Histogram(
+    "xplor_analytics_ingest_seconds",
+    "One ingest transaction: lock posts, fold, write snapshots and rollups",
+    buckets=UPSTREAM_BUCKETS,
+)
+
+# ── Fares ──────────────────────────────────────────────────────────────────────
+FARE_LOOKUPS = Counter(
+    "xplor_fare_lookups_total",
+    "FareProvider lookups by outcome (ok/empty/error/skipped); cache hits are not lookups",
+    ["provider", "outcome"],
+)
+FARE_LOOKUP_SECONDS = Histogram(
+    "xplor_fare_lookup_seconds",
+    "FareProvider.lowest_fare latency",
+    ["provider"], buckets=UPSTREAM_BUCKETS,
+)
+FARE_ALERT_CHECKS = Counter(
+    "xplor_fare_alert_checks_total",
+    "Fare alerts checked by outcome (triggered/above_target/no_price)",
+    ["outcome"],
+)
+FARE_ALERT_GROUP_SIZE = Histogram(
+    "xplor_fare_alert_group_size",
+    "Alerts served by one fare lookup (same route and date)",
+    buckets=COUNT_BUCKETS,
+)
+FARE_ALERT_RUN_SECONDS = Histogram(
+    "xplor_fare_alert_run_seconds",
+    "One fare alert run: claim, lookups, bulk update",
+    buckets=UPSTREAM_BUCKETS,
+)
+
+# ── Nudges ─────────────────────────────────────────────────────────────────────
+NUDGES_PLANNED = Counter(
+    "xplor_nudges_planned_total",
+    "Nudges queued by the planner, by type",
+    ["type"],
+)
+NUDGES_DELIVERED = Counter(
+    "xplor_nudges_delivered_total",
+    "Queued nudges that came due, by outcome (sent / dropped when later than NUDGE_DELIVER_GRACE_S)",
+    ["outcome"],
+)
+NUDGE_PLAN_SECONDS = Histogram(
+    "xplor_nudge_plan_seconds",
+    "One planning pass over upcoming trip days",
+    buckets=UPSTREAM_BUCKETS,
+)
+
+# ── Admission control ──────────────────────────────────────────────────────────
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "xplor_admission_queue_seconds",
+    "Time a request waited for an LLM slot",
+    ["tier"], buckets=(0, 0.05, 0.25, 1, 2.5, 5, 10, 20, 30),
+)
+ADMISSION_REJECTED = Counter(
+    "xplor_admission_rejected_total",
+    "Requests rejected with 429 by reason",
+    ["reason"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "xplor_admission_in_flight",
+    "Generations currently holding a slot",
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "xplor_admission_queue_depth",
+    "Requests currently waiting for a slot",
+    multiprocess_mode="livesum",
+)
+
+# ── Database ───────────────────────────────────────────────────────────────────
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "xplor_db_pool_acquire_seconds",
+    "Time spent waiting for a pooled Postgres connection",
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_IN_USE = Gauge(
+    "xplor_db_pool_in_use",
+    "Pooled connections currently checked out",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "xplor_db_pool_size",
+    "Open connections in the pool (idle + in use)",
+    multiprocess_mode="livesum",
+)
+DB_POOL_MAX_SIZE = Gauge(
+    "xplor_db_pool_max_size",
+    "Configured pool ceiling",
+    multiprocess_mode="livesum",
+)
+DB_QUERY_SECONDS = Histogram(
+    "xplor_db_query_seconds",
+    "Named query latency (app/db/queries.py)",
+    ["query"], buckets=UPSTREAM_BUCKETS,
+)
+
+
+def cache_hit(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render() -> tuple[bytes, str]:
+    """Serialise all metrics in the Prometheus text format."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
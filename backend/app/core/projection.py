@@ -0,0 +1,98 @@
+"""
+Sparse fieldsets: `?fields=summary,days.title,days.activities.title`.
+
+Dotted paths are validated against the Pydantic model (unknown names are a
+400, not silently empty output) and compiled once into a tree that can be
+applied two ways:
+
+  include_spec(tree, Model)   pydantic `include=` for model_dump_json — fields
+                              outside the projection are never serialised
+  project(data, tree)         the same cut on already-parsed JSON (cached bytes)
+
+Lists are transparent: `days.title` selects the title of every day.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import typing
+from typing import Any
+
+from pydantic import BaseModel
+
+FieldTree = dict[str, "FieldTree | bool"]
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def _nested_model(annotation: Any) -> tuple[type[BaseModel] | None, bool]:
+    """(model class inside an annotation like Optional[list[X]], whether a list is involved)."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    origin = typing.get_origin(annotation)
+    is_list = origin in (list, tuple, set)
+    for arg in typing.get_args(annotation):
+        model, inner_list = _nested_model(arg)
+        if model is not None:
+            return model, is_list or inner_list
+    return None, False
+
+
+def parse_fields(spec: str | None, model: type[BaseModel]) -> FieldTree | None:
+    """Compile a comma-separated list of dotted paths; None/blank means everything."""
+    if not spec or not spec.strip():
+        return None
+    tree: FieldTree = {}
+    for raw in spec.split(","):
+        path = [p.strip() for p in raw.strip().split(".")]
+        if not all(path):
+            raise InvalidFields(f"empty segment in {raw.strip()!r}")
+        node, current = tree, model
+        for depth, name in enumerate(path):
+            if current is None or name not in current.model_fields:
+                raise InvalidFields(f"unknown field {'.'.join(path[:depth + 1])!r}")
+            last = depth == len(path) - 1
+            if last:
+                node[name] = True
+                break
+            child = node.get(name)
+            if child is True:
+                break                       # parent already selected whole
+            node = node.setdefault(name, {})
+            current, _ = _nested_model(current.model_fields[name].annotation)
+    return tree
+
+
+def fields_key(tree: FieldTree | None) -> str:
+    """Short stable id of a projection, for cache keys and ETags ('' = full document)."""
+    if tree is None:
+        return ""
+
+    def canonical(t: FieldTree) -> str:
+        return ",".join(k if v is True else f"{k}({canonical(v)})" for k, v in sorted(t.items()))
+
+    return hashlib.blake2s(canonical(tree).encode(), digest_size=6).hexdigest()
+
+
+def include_spec(tree: FieldTree, model: type[BaseModel]) -> dict:
+    spec: dict = {}
+    for name, sub in tree.items():
+        if sub is True:
+            spec[name] = True
+            continue
+        nested, is_list = _nested_model(model.model_fields[name].annotation)
+        inner = include_spec(sub, nested)
+        spec[name] = {"__all__": inner} if is_list else inner
+    return spec
+
+
+def project(data: Any, tree: FieldTree) -> Any:
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {k: (v if sub is True else project(v, sub))
+            for k, sub in tree.items() if k in data for v in (data[k],)}
+
@@ -0,0 +1,64 @@
+"""
+Single-flight: concurrent callers asking for the same key share one in-flight call.
+
+    flights = SingleFlight("accommodation")
+    options = await flights.do(("manali", check_in, ...), lambda: provider_search(...))
+
+The first caller starts the work as its own task; later callers with the same
+key await that task instead of starting another. Each caller awaits through
+asyncio.shield, so one caller going away does not cancel the work the others
+are waiting on. With cancel_orphans=True the work is cancelled when its last
+caller has gone (a disconnected client's searches); leave it off when the
+result is cached on completion, so a build the next request wants is never
+thrown away (the skeleton cache). Nothing is cached here: once the call
+settles the key is free again. Pair it with a memo when results may be reused
+(see AccommodationService.share_searches).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from app.core import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self, name: str, cancel_orphans: bool = False):
+        self.name = name
+        self.cancel_orphans = cancel_orphans
+        self._calls: dict[Hashable, asyncio.Task[T]] = {}
+        self._waiters: dict[asyncio.Task[T], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _, key=key, task=task: self._forget(key, task))
+        metrics.SINGLEFLIGHT_CALLS.labels(self.name, "shared" if shared else "leader").inc()
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.cancel_orphans and self._waiters[task] == 1 and not task.done():
+                task.cancel()
+                metrics.CANCELLED_WORK.labels(self.name).inc()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()   # retrieved: no "exception was never retrieved" if every caller left
@@ -0,0 +1,344 @@
+"""
+Lightweight request tracing.
+
+Spans are plain dataclasses tracked in a ContextVar, so the current span follows
+the request through `await` and into tasks created by `asyncio.gather` (tasks
+copy the context at creation). A trip's waterfall therefore looks like:
+
+  HTTP POST /api/v1/itinerary/generate
+  └─ itinerary.generate
+     ├─ llm.complete                 model, tokens, ttft
+     ├─ itinerary.parse
+     └─ itinerary.enrich
+        ├─ accommodation.search      city=Kaza
+        │  ├─ accommodation.provider amadeus
+        │  │  └─ http GET test.api.amadeus.com
+        │  └─ accommodation.provider opentripmap
+        │     └─ http GET api.opentripmap.com  (×11)
+        └─ accommodation.search      city=Manali ...
+
+Usage:
+    with tracing.span("itinerary.parse", days=len(days)) as s:
+        ...
+        s.set("activities", n)
+
+Finished spans go to a pluggable exporter (TRACING_EXPORTER):
+  none     — spans are still created so trace IDs reach logs and headers
+  stdout   — one JSON line per span
+  jsonfile — append JSON lines to TRACING_FILE_PATH (batched, from a background thread)
+  otlp     — OTLP/HTTP JSON to TRACING_OTLP_ENDPOINT (Jaeger, Tempo, OTel collector)
+
+Incoming W3C `traceparent` headers are honoured, and every response carries
+X-Trace-Id so a client report can be matched to its waterfall.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from app.core.config import get_settings
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str                        # 32 hex chars
+    span_id: str                         # 16 hex chars
+    parent_id: str | None = None
+    sampled: bool = True
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"                   # 'ok' | 'error' | 'cancelled'
+    error: str | None = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+_current: ContextVar[Span | None] = ContextVar("xplor_current_span", default=None)
+
+
+def _new_id(hex_chars: int) -> str:
+    return f"{random.getrandbits(hex_chars * 4):0{hex_chars}x}"
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def current_trace_id() -> str | None:
+    s = _current.get()
+    return s.trace_id if s else None
+
+
+@contextmanager
+def span(name: str, *, parent: Span | None = None, **attributes: Any) -> Iterator[Span]:
+    """Open a child of the current span (or a new root) for the body of the block."""
+    parent = parent or _current.get()
+    if parent is not None:
+        s = Span(name, parent.trace_id, _new_id(16), parent.span_id, parent.sampled, attributes=attributes)
+    else:
+        sampled = random.random() < get_settings().tracing_sample_ratio
+        s = Span(name, _new_id(32), _new_id(16), sampled=sampled, attributes=attributes)
+
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current.reset(token)
+        if s.sampled:
+            get_exporter().export(s)
+
+
+# ── W3C trace context ──────────────────────────────────────────────────────────
+
+def parse_traceparent(header: str | None) -> Span | None:
+    """Build a remote parent from a `traceparent` header, or None if invalid."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return Span("remote", parts[1], parts[2], sampled=parts[3] == "01")
+
+
+def format_traceparent(s: Span) -> str:
+    return f"00-{s.trace_id}-{s.span_id}-{'01' if s.sampled else '00'}"
+
+
+# ── Exporters ──────────────────────────────────────────────────────────────────
+
+class SpanExporter:
+    """Receives each finished, sampled span. Must never raise or block for long."""
+
+    def export(self, s: Span) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class NoopExporter(SpanExporter):
+    pass
+
+
+class StdoutExporter(SpanExporter):
+    def export(self, s: Span) -> None:
+        sys.stdout.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+
+class BatchingExporter(SpanExporter, ABC):
+    """
+    Queues spans and writes them in batches from a background thread.
+
+    The event loop only does a put_nowait, so a slow disk or collector never
+    stalls requests. When the buffer is full new spans are dropped rather
+    than applying backpressure. Subclasses implement `_write_batch`, and may
+    open a resource for the thread's lifetime in `_session`.
+    """
+
+    thread_name = "span-exporter"
+
+    def __init__(self, batch_size: int = 256, flush_interval_s: float = 2.0, max_buffer: int = 8192):
+        self._batch_size = batch_size
+        self._flush_interval_s = flush_interval_s
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=max_buffer)
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def export(self, s: Span) -> None:
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            pass
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _session(self) -> AbstractContextManager:
+        return nullcontext()
+
+    @abstractmethod
+    def _write_batch(self, session: Any, batch: list[Span]) -> None: ...
+
+    def _run(self) -> None:
+        with self._session() as session:
+            stop = False
+            while not stop:
+                batch: list[Span] = []
+                deadline = time.monotonic() + self._flush_interval_s
+                while len(batch) < self._batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                if batch:
+                    try:
+                        self._write_batch(session, batch)
+                    except Exception as e:
+                        log.debug("%s failed: %s", self.thread_name, e)
+
+
+class JsonFileExporter(BatchingExporter):
+    """Appends one JSON line per span to `path`, a batch per write."""
+
+    thread_name = "jsonfile-exporter"
+
+    def __init__(self, path: str, **kwargs: Any):
+        self._path = path
+        super().__init__(**kwargs)
+
+    def _write_batch(self, session: Any, batch: list[Span]) -> None:
+        lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in batch)
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class OtlpHttpExporter(BatchingExporter):
+    """Batches spans on a background thread and POSTs OTLP/HTTP JSON."""
+
+    thread_name = "otlp-exporter"
+
+    def __init__(self, endpoint: str, service_name: str = "xplor360-api", **kwargs: Any):
+        self._endpoint = endpoint
+        self._service_name = service_name
+        super().__init__(**kwargs)
+
+    def _session(self) -> AbstractContextManager:
+        import httpx
+
+        return httpx.Client(timeout=5)
+
+    def _write_batch(self, session: Any, batch: list[Span]) -> None:
+        session.post(self._endpoint, json=self._encode(batch))
+
+    def _encode(self, batch: list[Span]) -> dict:
+        def attr(k: str, v: Any) -> dict:
+            if isinstance(v, bool):
+                value: dict = {"boolValue": v}
+            elif isinstance(v, int):
+                value = {"intValue": str(v)}
+            elif isinstance(v, float):
+                value = {"doubleValue": v}
+            else:
+                value = {"stringValue": str(v)}
+            return {"key": k, "value": value}
+
+        spans = [
+            {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [attr(k, v) for k, v in s.attributes.items()],
+                "status": {"code": 1 if s.status == "ok" else 2, "message": s.error or ""},
+            }
+            for s in batch
+        ]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [attr("service.name", self._service_name)]},
+                "scopeSpans": [{"scope": {"name": "xplor360"}, "spans": spans}],
+            }]
+        }
+
+
+@lru_cache
+def get_exporter() -> SpanExporter:
+    s = get_settings()
+    kind = s.tracing_exporter.lower()
+    if kind == "stdout":
+        return StdoutExporter()
+    if kind == "jsonfile":
+        return JsonFileExporter(s.tracing_file_path)
+    if kind == "otlp":
+        return OtlpHttpExporter(s.tracing_otlp_endpoint, service_name=os.environ.get("OTEL_SERVICE_NAME", "xplor360-api"))
+    return NoopExporter()
+
+
+# ── structlog integration ──────────────────────────────────────────────────────
+
+def add_trace_context(logger, method_name: str, event_dict: dict) -> dict:
+    """structlog processor: stamp trace_id/span_id on every log line inside a span."""
+    s = _current.get()
+    if s is not None:
+        event_dict.setdefault("trace_id", s.trace_id)
+        event_dict.setdefault("span_id", s.span_id)
+    return event_dict
+
+
+# ── ASGI middleware ────────────────────────────────────────────────────────────
+
+class TracingMiddleware:
+    """Opens the root span per HTTP request and returns X-Trace-Id / traceparent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        remote = parse_traceparent(headers.get(b"traceparent", b"").decode() or None)
+        with span(f"HTTP {scope['method']} {scope['path']}", parent=remote,
+                  **{"http.method": scope["method"], "http.path": scope["path"]}) as root:
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    root.set("http.status_code", message["status"])
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-trace-id", root.trace_id.encode()),
+                        (b"traceparent", format_traceparent(root).encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
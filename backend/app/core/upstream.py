@@ -0,0 +1,182 @@
+"""
+Per-host limits for outbound HTTP.
+
+One 8-stop itinerary fans out to ~90 OpenTripMap calls (1 radius + 10 detail
+requests per stop), so a few dozen concurrent users would burst thousands of
+requests and get throttled for everyone. Every request made through
+app.core.http.async_client therefore passes a HostLimiter for its host first:
+
+  request ──► host limiter ──► slot free and nobody ahead? ──► send
+                           └─► priority queue: interactive < batch < background
+                                 ──► slot freed ──► rate spacing ──► send
+
+Limits are per host for the whole deployment: each worker takes its share,
+1 / WEB_CONCURRENCY of the configured concurrency and rate (at least one).
+This needs no shared state between workers, at the cost of capacity a busy
+worker cannot borrow from an idle one. Within a priority, waiters are served
+first come, first served. A lower priority only waits while higher ones
+saturate the host, so interactive generation is never queued behind a batch
+or a background refresh.
+
+The priority comes from a ContextVar, like the request deadline:
+
+    with upstream_priority(Priority.BACKGROUND):
+        await refresh_pending_accommodation(...)
+
+Queue waits are bounded by UPSTREAM_QUEUE_TIMEOUT_S clamped to the deadline.
+A wait that runs out raises httpx.PoolTimeout, which providers already treat
+like any other upstream failure.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+from app.core import deadline, metrics
+from app.core.config import get_settings
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0     # a user is waiting on the response
+    BATCH = 1           # generate:batch items
+    BACKGROUND = 2      # refreshes and pre-warming nobody is waiting on
+
+
+_priority: ContextVar[Priority] = ContextVar("xplor_upstream_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def upstream_priority(priority: Priority) -> Iterator[None]:
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+class HostLimiter:
+    """Bounded concurrency with strict-priority queueing and optional rate spacing."""
+
+    def __init__(self, host: str, max_concurrency: int, rate_per_s: float | None = None):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.interval_s = 1 / rate_per_s if rate_per_s else 0.0
+        self._in_flight = 0
+        self._heap: list[_Waiter] = []
+        self._queued: dict[Priority, int] = {p: 0 for p in Priority}
+        self._seq = itertools.count()
+        self._next_send = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    async def acquire(self, priority: Priority, timeout_s: float) -> float:
+        """Wait for a slot (and the rate spacing); returns seconds waited."""
+        started = time.monotonic()
+        if self._in_flight < self.max_concurrency and not self._heap:
+            self._in_flight += 1
+        else:
+            waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future())
+            heapq.heappush(self._heap, waiter)
+            self._queued[priority] += 1
+            self._publish(priority)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout_s)
+            except asyncio.TimeoutError:
+                if not waiter.future.done():
+                    import httpx   # only ever reached from inside an httpx transport
+
+                    waiter.future.cancel()
+                    metrics.UPSTREAM_REJECTED.labels(self.host).inc()
+                    raise httpx.PoolTimeout(f"{self.host}: no upstream slot within {timeout_s:.1f}s") from None
+            except asyncio.CancelledError:
+                # Granted in the same tick we were cancelled: pass the slot on
+                if waiter.future.done() and not waiter.future.cancelled():
+                    self.release()
+                else:
+                    waiter.future.cancel()
+                raise
+            finally:
+                self._queued[priority] -= 1
+                self._publish(priority)
+
+        if self.interval_s:
+            now = time.monotonic()
+            send_at = max(now, self._next_send)
+            self._next_send = send_at + self.interval_s
+            if send_at > now:
+                try:
+                    await asyncio.sleep(send_at - now)
+                except asyncio.CancelledError:
+                    self.release()
+                    raise
+
+        waited = time.monotonic() - started
+        metrics.UPSTREAM_QUEUE_SECONDS.labels(self.host, priority.name.lower()).observe(waited)
+        metrics.UPSTREAM_IN_FLIGHT.labels(self.host).set(self._in_flight)
+        return waited
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        while self._heap and self._in_flight < self.max_concurrency:
+            waiter = heapq.heappop(self._heap)
+            if waiter.future.done():   # cancelled or timed out while queued
+                continue
+            self._in_flight += 1
+            waiter.future.set_result(None)
+        metrics.UPSTREAM_IN_FLIGHT.labels(self.host).set(self._in_flight)
+
+    @asynccontextmanager
+    async def slot(self, timeout_s: float) -> AsyncIterator[float]:
+        waited = await self.acquire(_priority.get(), timeout_s)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def _publish(self, priority: Priority) -> None:
+        metrics.UPSTREAM_QUEUE_DEPTH.labels(self.host, priority.name.lower()).set(self._queued[priority])
+
+
+_limiters: dict[str, HostLimiter] = {}
+
+
+def get_host_limiter(host: str) -> HostLimiter:
+    limiter = _limiters.get(host)
+    if limiter is None:
+        s = get_settings()
+        workers = max(1, s.web_concurrency)
+        concurrency = s.upstream_host_concurrency.get(host, s.upstream_max_concurrency)
+        rate = s.upstream_host_rate_per_s.get(host)
+        limiter = HostLimiter(
+            host,
+            max(1, math.floor(concurrency / workers)),
+            rate / workers if rate else None,
+        )
+        _limiters[host] = limiter
+    return limiter
+
+
+def queue_timeout() -> float:
+    return deadline.clamp(get_settings().upstream_queue_timeout_s)
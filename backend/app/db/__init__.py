@@ -0,0 +1,3 @@
+from app.db.pool import DatabaseNotConfigured, acquire, close_pool, get_pool, is_configured, user_scope
+
+__all__ = ["DatabaseNotConfigured", "acquire", "close_pool", "get_pool", "is_configured", "user_scope"]
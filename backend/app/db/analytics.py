@@ -0,0 +1,169 @@
+"""
+Post analytics (010_analytics_rollups.sql): raw snapshots in, rollups out.
+
+An ingest is one transaction. It locks the batch's published_posts rows in id
+order, reads each post's publish hour and latest snapshot, and hands them to
+`fold` (services/analytics.py). The snapshots and fold's deltas are then
+written with one unnest statement per table. Rollup columns only ever add
+deltas, so batches for the same user may interleave. Batches for the same
+post serialise on its row lock, so a snapshot is never counted twice.
+
+With a user_id the ingest runs under user_scope and RLS drops other users'
+posts. Without one it runs as the service role, for platform fetchers that
+act for every user.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+
+from app.db.pool import acquire, user_scope
+
+LATEST_COLUMNS = ("reach", "impressions", "engagement", "follower_delta", "video_views", "watch_time_sec")
+
+_POST_STATE = """
+select p.id, p.user_id, p.platform, p.post_type,
+       (extract(isodow from x.local)::int - 1) * 24 + extract(hour from x.local)::int as how,
+       l.fetched_at, l.reach, l.impressions, l.engagement, l.follower_delta, l.video_views, l.watch_time_sec
+from public.published_posts p
+cross join lateral (select coalesce(p.published_at, p.scheduled_for, p.created_at) at time zone $2 as local) x
+left join public.post_analytics_latest l on l.post_id = p.id
+where p.id = any($1::uuid[])
+order by p.id
+for update of p
+"""
+
+_INSERT_SNAPSHOTS = """
+insert into public.post_analytics (post_id, user_id, platform, fetched_at, reach, impressions, likes, comments,
+                                   shares, saves, follower_delta, video_views, watch_time_sec)
+select * from unnest($1::uuid[], $2::uuid[], $3::text[], $4::timestamptz[], $5::int[], $6::int[], $7::int[],
+                     $8::int[], $9::int[], $10::int[], $11::int[], $12::int[], $13::int[])
+"""
+
+_UPSERT_LATEST = """
+insert into public.post_analytics_latest (post_id, user_id, platform, post_type, how, fetched_at, reach,
+                                          impressions, engagement, follower_delta, video_views, watch_time_sec)
+select * from unnest($1::uuid[], $2::uuid[], $3::text[], $4::text[], $5::smallint[], $6::timestamptz[],
+                     $7::bigint[], $8::bigint[], $9::bigint[], $10::bigint[], $11::bigint[], $12::bigint[])
+on conflict (post_id) do update
+set fetched_at = excluded.fetched_at, reach = excluded.reach, impressions = excluded.impressions,
+    engagement = excluded.engagement, follower_delta = excluded.follower_delta,
+    video_views = excluded.video_views, watch_time_sec = excluded.watch_time_sec
+"""
+
+_ADD_HOURLY = """
+insert into public.analytics_hourly as h (user_id, platform, how, posts, reach, impressions, engagement)
+select * from unnest($1::uuid[], $2::text[], $3::smallint[], $4::int[], $5::bigint[], $6::bigint[], $7::bigint[])
+on conflict (user_id, platform, how) do update
+set posts = h.posts + excluded.posts, reach = h.reach + excluded.reach,
+    impressions = h.impressions + excluded.impressions, engagement = h.engagement + excluded.engagement
+"""
+
+_ADD_CONTENT_TYPES = """
+insert into public.analytics_content_types as c (user_id, platform, post_type, posts, reach, impressions,
+                                                 engagement, video_views, watch_time_sec)
+select * from unnest($1::uuid[], $2::text[], $3::text[], $4::int[], $5::bigint[], $6::bigint[], $7::bigint[],
+                     $8::bigint[], $9::bigint[])
+on conflict (user_id, platform, post_type) do update
+set posts = c.posts + excluded.posts, reach = c.reach + excluded.reach,
+    impressions = c.impressions + excluded.impressions, engagement = c.engagement + excluded.engagement,
+    video_views = c.video_views + excluded.video_views, watch_time_sec = c.watch_time_sec + excluded.watch_time_sec
+"""
+
+# persona_profiles' Dimension 7, from the rollups: the best hour of day per
+# platform and the best three content types, by average engagement per post,
+# among those with at least $2 posts. Users without a persona row are skipped.
+_REFRESH_PERSONA = """
+with hours as (
+    select user_id, platform, how % 24 as hour, sum(engagement)::float8 / sum(posts) as score
+    from public.analytics_hourly
+    where user_id = any($1::uuid[])
+    group by 1, 2, 3
+    having sum(posts) >= $2
+), peak as (
+    select distinct on (user_id, platform) user_id, platform, hour
+    from hours
+    order by user_id, platform, score desc
+), types as (
+    select user_id, post_type, sum(engagement)::float8 / sum(posts) as score
+    from public.analytics_content_types
+    where user_id = any($1::uuid[])
+    group by 1, 2
+    having sum(posts) >= $2
+)
+update public.persona_profiles p
+set peak_post_times = coalesce(
+        (select jsonb_object_agg(platform, lpad(hour::text, 2, '0') || ':00') from peak where peak.user_id = p.user_id),
+        p.peak_post_times),
+    best_content_types = coalesce(
+        (select (array_agg(post_type order by score desc))[1:3] from types where types.user_id = p.user_id),
+        p.best_content_types),
+    updated_at = now()
+where p.user_id = any($1::uuid[])
+"""
+
+
+@asynccontextmanager
+async def _transaction(user_id: str | None):
+    if user_id is not None:
+        async with user_scope(user_id) as conn:
+            yield conn
+    else:
+        async with acquire() as conn, conn.transaction():
+            yield conn
+
+
+def _columns(rows: list[tuple]) -> list[list]:
+    return [list(column) for column in zip(*rows)]
+
+
+async def ingest(
+    post_ids: list[str], timezone: str, fold: Callable[[dict[str, dict]], object],
+    user_id: str | None = None, persona_min_posts: int = 3,
+):
+    """
+    Load the posts' state, `fold(state)` (post id → {user_id, platform, post_type,
+    how, latest}), then write what it returns: an object with `snapshots`,
+    `latest`, `hourly` and `content_types` row lists. Returns fold's result.
+    """
+    async with _transaction(user_id) as conn:
+        rows = await conn.fetch(_POST_STATE, post_ids, timezone)
+        state = {
+            str(r["id"]): {
+                "user_id": str(r["user_id"]), "platform": r["platform"], "post_type": r["post_type"],
+                "how": r["how"],
+                "latest": {"fetched_at": r["fetched_at"], **{c: r[c] for c in LATEST_COLUMNS}}
+                if r["fetched_at"] else None,
+            }
+            for r in rows
+        }
+        result = fold(state)
+        for sql, batch in (
+            (_INSERT_SNAPSHOTS, result.snapshots),
+            (_UPSERT_LATEST, result.latest),
+            (_ADD_HOURLY, result.hourly),
+            (_ADD_CONTENT_TYPES, result.content_types),
+        ):
+            if batch:
+                await conn.execute(sql, *_columns(batch))
+        users = sorted({row[0] for row in result.hourly})
+        if users:
+            await conn.execute(_REFRESH_PERSONA, users, persona_min_posts)
+    return result
+
+
+async def rollups(user_id: str, platform: str | None = None) -> tuple[list[dict], list[dict]]:
+    """The caller's (hourly, content type) rollup rows, optionally for one platform."""
+    async with user_scope(user_id) as conn:
+        hourly = await conn.fetch(
+            "select platform, how, posts, reach, impressions, engagement from public.analytics_hourly "
+            "where ($1::text is null or platform = $1) and posts > 0",
+            platform,
+        )
+        types = await conn.fetch(
+            "select platform, post_type, posts, reach, impressions, engagement, video_views, watch_time_sec "
+            "from public.analytics_content_types where ($1::text is null or platform = $1) and posts > 0",
+            platform,
+        )
+    return [dict(r) for r in hourly], [dict(r) for r in types]
@@ -0,0 +1,38 @@
+"""Offline itinerary batches (004_itinerary_batches.sql) — the requests behind a Message Batches id."""
+
+from __future__ import annotations
+
+import json
+
+from app.db.pool import user_scope
+
+
+async def save_batch(batch_id: str, user_id: str, items: list[dict]) -> None:
+    async with user_scope(user_id) as conn:
+        await conn.execute(
+            "insert into public.itinerary_batches (id, user_id, items) values ($1, $2, $3::jsonb)",
+            batch_id, user_id, json.dumps(items),
+        )
+
+
+async def load_batch(batch_id: str, user_id: str) -> dict | None:
+    """{'items': [...], 'collected_at': …} or None when missing or not the caller's."""
+    async with user_scope(user_id) as conn:
+        row = await conn.fetchrow(
+            "select items, collected_at from public.itinerary_batches where id = $1", batch_id,
+        )
+    if row is None:
+        return None
+    items = row["items"]
+    return {"items": json.loads(items) if isinstance(items, str) else items, "collected_at": row["collected_at"]}
+
+
+async def claim_collection(batch_id: str, user_id: str) -> bool:
+    """Mark the batch collected; True only for the first caller, who persists the results."""
+    async with user_scope(user_id) as conn:
+        claimed = await conn.fetchval(
+            "update public.itinerary_batches set collected_at = now() "
+            "where id = $1 and collected_at is null returning id",
+            batch_id,
+        )
+    return claimed is not None
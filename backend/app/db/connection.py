@@ -0,0 +1,54 @@
+"""
+Pool connection class with a per-connection cache of prepared hot queries.
+
+asyncpg already caches statements by SQL text (an LRU of 100), but that cache
+is shared with every ad-hoc query on the connection. The queries in
+app/db/queries.py run on nearly every request, so each connection prepares them
+once, keyed by name, and keeps the PreparedStatement for its whole lifetime.
+
+Imported only from pool.get_pool(), after asyncpg itself.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
+from app.core.config import get_settings
+from app.db.queries import Query
+
+
+class XplorConnection(asyncpg.Connection):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._hot: dict[str, PreparedStatement] = {}
+
+    async def _statement(self, query: Query) -> PreparedStatement:
+        stmt = self._hot.get(query.name)
+        if stmt is None:
+            stmt = self._hot[query.name] = await self.prepare(query.sql)
+        return stmt
+
+    async def run_named(self, query: Query, method: str, *args: Any) -> Any:
+        """Execute `query` via its cached statement; method is fetch/fetchrow/fetchval."""
+        if not get_settings().db_prepared_statements:
+            return await getattr(self, method)(query.sql, *args)
+        try:
+            stmt = await self._statement(query)
+            return await getattr(stmt, method)(*args)
+        except asyncpg.InvalidCachedStatementError:
+            # A migration changed a table under the plans. Every hot statement
+            # on this connection may be stale, so they are all re-prepared on
+            # next use. Inside a transaction (user_scope) the failed statement
+            # has already aborted it, so a retry here could only fail again:
+            # the error goes up and the caller's next scope starts clean.
+            # Wrapping every hot query in a savepoint instead would cost two
+            # extra round trips per query, to cover an error seen once per
+            # migration.
+            self._hot.clear()
+            if self.is_in_transaction():
+                raise
+            stmt = await self._statement(query)
+            return await getattr(stmt, method)(*args)
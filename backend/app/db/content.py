@@ -0,0 +1,181 @@
+"""
+ContentPilot storage: media_assets transcripts in, content_drafts out.
+
+Captions (006_caption_queue.sql): runs from the background loop claim across
+all users (service role); runs a user starts are confined to their assets by
+user_id. Claims use `for update skip locked`, so concurrent workers never
+caption the same recording twice.
+
+Blogs (007_trip_day_summaries.sql): always user-scoped, so RLS applies. A
+new blog version locks its trip row first, so two regenerations of the same
+trip queue up and take consecutive versions.
+"""
+
+from __future__ import annotations
+
+import json
+
+from app.db.pool import acquire, user_scope
+
+# trip_id is nullable: a recording outside any trip is captioned without a destination
+_CLAIM_TRANSCRIBED = """
+update public.media_assets m
+set processing_status = 'drafting', processing_claimed_at = now()
+where m.id in (
+    select id from public.media_assets
+    where (processing_status = 'transcribed'
+           or (processing_status = 'drafting' and processing_claimed_at < now() - make_interval(secs => $2)))
+      and transcript is not null and transcript <> ''
+      and ($3::uuid is null or user_id = $3)
+      and ($4::uuid[] is null or id = any($4))
+    order by recorded_at
+    limit $1
+    for update skip locked
+)
+returning m.id, m.user_id, m.trip_id, m.recording_mode, m.context_tag, m.duration_sec,
+          m.transcript, m.recorded_at,
+          (select t.destination from public.trips t where t.id = m.trip_id) as destination
+"""
+
+_INSERT_DRAFTS = """
+insert into public.content_drafts (trip_id, user_id, source_asset_ids, draft_type, title, content, metadata)
+select d.trip_id, d.user_id, array[d.asset_id], d.draft_type, d.title, d.content, d.metadata::jsonb
+from unnest($1::uuid[], $2::uuid[], $3::uuid[], $4::text[], $5::text[], $6::text[], $7::text[])
+     as d(trip_id, user_id, asset_id, draft_type, title, content, metadata)
+returning id
+"""
+
+_SET_STATUS = """
+update public.media_assets
+set processing_status = $2, processing_claimed_at = null
+where id = any($1::uuid[])
+"""
+
+
+async def claim_transcribed(
+    limit: int, claim_ttl_s: float, user_id: str | None = None, asset_ids: list[str] | None = None,
+) -> list[dict]:
+    """Move up to `limit` transcribed recordings to 'drafting' and return them, oldest first."""
+    async with acquire() as conn:
+        rows = await conn.fetch(_CLAIM_TRANSCRIBED, limit, float(claim_ttl_s), user_id, asset_ids)
+    return [
+        {**dict(r), "id": str(r["id"]), "user_id": str(r["user_id"]),
+         "trip_id": str(r["trip_id"]) if r["trip_id"] else None}
+        for r in rows
+    ]
+
+
+async def save_caption_drafts(
+    drafts: list[dict], drafted: list[str], failed: list[str], released: list[str],
+) -> list[str]:
+    """
+    Insert the drafts and settle every claimed asset in one transaction:
+    drafted → 'drafted', failed → 'failed', released → back to 'transcribed'.
+    Returns the new content_drafts ids.
+    """
+    columns = ("trip_id", "user_id", "asset_id", "draft_type", "title", "content")
+    async with acquire() as conn:
+        async with conn.transaction():
+            ids = []
+            if drafts:
+                rows = await conn.fetch(
+                    _INSERT_DRAFTS,
+                    *([d[c] for d in drafts] for c in columns),
+                    [json.dumps(d["metadata"]) for d in drafts],
+                )
+                ids = [str(r["id"]) for r in rows]
+            for status, asset_ids in (("drafted", drafted), ("failed", failed), ("transcribed", released)):
+                if asset_ids:
+                    await conn.execute(_SET_STATUS, asset_ids, status)
+    return ids
+
+
+# ── Blog (map-reduce over a trip's transcripts) ────────────────────────────────
+
+_TRIP_TRANSCRIPTS = """
+select id, recorded_at, recording_mode, context_tag, duration_sec, ai_score, transcript
+from public.media_assets
+where trip_id = $1 and transcript is not null and transcript <> ''
+order by recorded_at
+"""
+
+_ITINERARY_DAYS = """
+select d.day_number, d.date, d.title
+from public.itinerary_days d
+join public.itineraries i on i.id = d.itinerary_id
+where i.trip_id = $1
+order by d.day_number
+"""
+
+_DAY_SUMMARIES = """
+select day_number, input_hash, summary from public.trip_day_summaries where trip_id = $1
+"""
+
+_LATEST_BLOG = """
+select id, version, title, metadata->>'input_hash' as input_hash
+from public.content_drafts
+where trip_id = $1 and draft_type = 'blog'
+order by version desc
+limit 1
+"""
+
+_SAVE_DAY_SUMMARY = """
+insert into public.trip_day_summaries (trip_id, day_number, user_id, input_hash, summary, model)
+values ($1, $2, $3, $4, $5::jsonb, $6)
+on conflict (trip_id, day_number)
+do update set input_hash = excluded.input_hash, summary = excluded.summary,
+              model = excluded.model, created_at = now()
+"""
+
+# Held until the insert commits: the second of two concurrent saves waits
+# here and then sees the first one's version
+_LOCK_TRIP = """
+select 1 from public.trips where id = $1 for update
+"""
+
+_INSERT_BLOG = """
+insert into public.content_drafts (trip_id, user_id, source_asset_ids, draft_type, title, content, metadata, version)
+values ($1, $2, $3::uuid[], 'blog', $4, $5, $6::jsonb,
+        coalesce((select max(version) from public.content_drafts where trip_id = $1 and draft_type = 'blog'), 0) + 1)
+returning id, version
+"""
+
+
+async def blog_inputs(user_id: str, trip_id: str) -> dict:
+    """The trip's transcripts, itinerary days, cached day summaries and latest blog, in one snapshot."""
+    async with user_scope(user_id) as conn:
+        assets = await conn.fetch(_TRIP_TRANSCRIPTS, trip_id)
+        days = await conn.fetch(_ITINERARY_DAYS, trip_id)
+        summaries = await conn.fetch(_DAY_SUMMARIES, trip_id)
+        latest = await conn.fetchrow(_LATEST_BLOG, trip_id)
+    return {
+        "assets": [{**dict(r), "id": str(r["id"])} for r in assets],
+        "days": {r["day_number"]: dict(r) for r in days},
+        "summaries": {
+            r["day_number"]: {
+                "input_hash": r["input_hash"],
+                "summary": json.loads(r["summary"]) if isinstance(r["summary"], str) else r["summary"],
+            }
+            for r in summaries
+        },
+        "latest": {**dict(latest), "id": str(latest["id"])} if latest else None,
+    }
+
+
+async def save_day_summaries(user_id: str, trip_id: str, rows: list[tuple[int, str, dict]], model: str) -> None:
+    """Upsert (day_number, input_hash, summary) rows."""
+    async with user_scope(user_id) as conn:
+        await conn.executemany(
+            _SAVE_DAY_SUMMARY,
+            [(trip_id, day, user_id, input_hash, json.dumps(summary), model) for day, input_hash, summary in rows],
+        )
+
+
+async def save_blog_draft(
+    user_id: str, trip_id: str, asset_ids: list[str], title: str, content: str, metadata: dict,
+) -> tuple[str, int]:
+    """Insert the next version of the trip's blog draft; returns (id, version)."""
+    async with user_scope(user_id) as conn:
+        await conn.execute(_LOCK_TRIP, trip_id)
+        row = await conn.fetchrow(_INSERT_BLOG, trip_id, user_id, asset_ids, title, content, json.dumps(metadata))
+    return str(row["id"]), row["version"]
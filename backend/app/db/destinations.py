@@ -0,0 +1,116 @@
+"""
+Destination data: the autocomplete index refresh, the shot guides packed into
+offline bundles, and itinerary skeletons with the catalogue facts that seed
+them. All of it is public, traveler-independent data (service role).
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+from app.db.pool import acquire
+
+# Watermarks are read with an overlap of $2 seconds: a row committed after a
+# refresh can carry an earlier created_at than one it already saw, and rows
+# can share the watermark's timestamp. The caller skips ids it already holds.
+_DESTINATIONS_SINCE = """
+select id, name, state, lat, lng, best_months, created_at
+from public.destinations
+where $1::timestamptz is null or created_at >= $1 - make_interval(secs => $2)
+order by created_at
+"""
+
+# trips.destination is free text ("Spiti Valley, Himachal Pradesh") — count by the place name.
+# Each group lists the ids (and created_at) a later read may return again: every row when
+# reading from a watermark, the last $2 seconds' on the first read.
+_TRIP_COUNTS_SINCE = """
+with recent as (
+    select id, lower(trim(split_part(destination, ',', 1))) as name, created_at
+    from public.trips
+    where $1::timestamptz is null or created_at >= $1 - make_interval(secs => $2)
+), edge as (
+    select max(created_at) - make_interval(secs => $2) as since from recent
+)
+select r.name,
+       count(*) as trips,
+       max(r.created_at) as latest,
+       coalesce(array_agg(r.id) filter (where $1::timestamptz is not null or r.created_at >= e.since), '{}') as ids,
+       coalesce(array_agg(r.created_at) filter (where $1::timestamptz is not null or r.created_at >= e.since), '{}')
+         as created
+from recent r cross join edge e
+group by r.name
+"""
+
+_SHOT_GUIDES_FOR = """
+select g.id, g.title, g.description, g.lat, g.lng, g.best_time, g.framing_tip,
+       g.shot_type, g.viral_count
+from public.shot_guides g
+join public.destinations d on d.id = g.destination_id
+where lower(d.name) = any($1::text[])
+order by g.viral_count desc nulls last, g.title
+limit $2
+"""
+
+_DESTINATION_FACTS = """
+select name, state, description, tags, best_months, avg_budget_low, avg_budget_high,
+       difficulty, permits_required, permit_info
+from public.destinations
+where lower(name) = lower($1)
+limit 1
+"""
+
+_LOAD_SKELETON = """
+select payload, model
+from public.destination_skeletons
+where destination = $1 and month = $2 and duration_bucket = $3 and version = $4
+  and created_at > now() - make_interval(secs => $5)
+"""
+
+_SAVE_SKELETON = """
+insert into public.destination_skeletons (destination, month, duration_bucket, version, payload, model)
+values ($1, $2, $3, $4, $5::jsonb, $6)
+on conflict (destination, month, duration_bucket, version)
+do update set payload = excluded.payload, model = excluded.model, created_at = now()
+"""
+
+
+def place_names(destination: str, *towns: str | None) -> list[str]:
+    """Lower-cased place names as destinations.name would hold them ("Spiti Valley, HP" → "spiti valley")."""
+    names = [destination.split(",")[0], *(t.split(",")[0] for t in towns if t)]
+    return sorted({n.strip().lower() for n in names if n.strip()})
+
+
+async def destinations_since(since: datetime | None, overlap_s: float) -> list:
+    async with acquire() as conn:
+        return await conn.fetch(_DESTINATIONS_SINCE, since, float(overlap_s))
+
+
+async def trip_counts_since(since: datetime | None, overlap_s: float) -> list:
+    async with acquire() as conn:
+        return await conn.fetch(_TRIP_COUNTS_SINCE, since, float(overlap_s))
+
+
+async def shot_guides_for(conn, places: list[str], limit: int = 200) -> list[dict]:
+    rows = await conn.fetch(_SHOT_GUIDES_FOR, places, limit)
+    return [{**dict(r), "id": str(r["id"])} for r in rows]
+
+
+async def destination_facts(name: str) -> dict | None:
+    async with acquire() as conn:
+        row = await conn.fetchrow(_DESTINATION_FACTS, name)
+    return dict(row) if row else None
+
+
+async def load_skeleton(destination: str, month: int, days: int, version: int, max_age_s: float) -> dict | None:
+    async with acquire() as conn:
+        row = await conn.fetchrow(_LOAD_SKELETON, destination, month, days, version, float(max_age_s))
+    if row is None:
+        return None
+    payload = row["payload"]
+    return {"payload": json.loads(payload) if isinstance(payload, str) else payload, "model": row["model"]}
+
+
+async def save_skeleton(destination: str, month: int, days: int, version: int, payload: dict, model: str) -> None:
+    async with acquire() as conn:
+        await conn.execute(_SAVE_SKELETON, destination, month, days, version, json.dumps(payload), model)
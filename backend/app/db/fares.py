@@ -0,0 +1,75 @@
+"""
+Fare alerts (011_fare_alert_schedule.sql): the alert engine's claims and bulk
+updates. Service role — the engine checks every user's alerts.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.db.pool import acquire
+
+# The claim is a lease: next_check_at moves past now, so other workers skip
+# these rows until the engine writes the real next check (or the lease runs out).
+_CLAIM_DUE = """
+update public.fare_alerts f
+set next_check_at = now() + make_interval(secs => $2)
+where f.id in (
+    select id from public.fare_alerts
+    where active and notified is not true and next_check_at <= now()
+      and travel_date >= current_date
+    order by next_check_at
+    limit $1
+    for update skip locked
+)
+returning f.id, f.user_id, f.route_type, f.origin, f.destination, f.travel_date, f.target_price_inr
+"""
+
+_EXPIRE = """
+update public.fare_alerts set active = false
+where active and travel_date < current_date
+"""
+
+_SETTLE = """
+update public.fare_alerts f
+set current_price_inr = coalesce(d.price, f.current_price_inr),
+    price_provider = coalesce(d.provider, f.price_provider),
+    last_checked_at = case when d.price is null then f.last_checked_at else now() end,
+    notified = d.hit,
+    notified_at = case when d.hit then now() end,
+    next_check_at = d.next_check_at
+from unnest($1::uuid[], $2::int[], $3::text[], $4::bool[], $5::timestamptz[])
+     as d(id, price, provider, hit, next_check_at)
+where f.id = d.id
+"""
+
+_NUDGE = """
+insert into public.nudge_log (user_id, nudge_type, message)
+select d.user_id, 'fare_alert', d.message
+from unnest($1::uuid[], $2::text[]) as d(user_id, message)
+"""
+
+
+async def claim_due_alerts(limit: int, lease_s: float) -> list[dict]:
+    """Lease up to `limit` due alerts, most overdue first; expired ones are switched off on the way."""
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(_EXPIRE)
+            rows = await conn.fetch(_CLAIM_DUE, limit, float(lease_s))
+    return [{**dict(r), "id": str(r["id"]), "user_id": str(r["user_id"])} for r in rows]
+
+
+async def settle_alerts(
+    rows: list[tuple[str, int | None, str | None, bool, datetime]],
+    nudges: list[tuple[str, str]],
+) -> None:
+    """
+    One statement for every checked alert — (id, price or None, provider,
+    hit, next check) — plus a nudge_log row per triggered alert, in one transaction.
+    """
+    async with acquire() as conn:
+        async with conn.transaction():
+            if rows:
+                await conn.execute(_SETTLE, *(list(column) for column in zip(*rows)))
+            if nudges:
+                await conn.execute(_NUDGE, *(list(column) for column in zip(*nudges)))
@@ -0,0 +1,333 @@
+"""
+Itinerary persistence — one generated ItineraryResponse, one transaction.
+
+  trips                  insert (or update when the request names a trip_id)
+  itineraries            insert … on conflict (trip_id) → version + 1
+  itinerary_days         executemany — one batched round trip, jsonb columns
+  itinerary_activities   COPY — every activity of every day in one stream
+  itinerary_versions     the served JSON for this version, for delta sync
+
+A 10-day trip with ~50 activities is five statements instead of ~60 REST calls
+through the synchronous Supabase client. Regenerating replaces the days
+(activities cascade) but keeps the itinerary id, so clients holding it keep
+working; `version` tells them the content changed.
+
+raw_llm_response is stored zlib-compressed inside a small jsonb envelope —
+Claude's output is ~20–40 KB of repetitive JSON and compresses ~5×.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import timezone
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import get_settings
+from app.db import queries
+from app.db.pool import acquire, user_scope
+from app.models.trip import (
+    AccommodationOption,
+    AccommodationSuggestion,
+    Activity,
+    ItineraryDay,
+    ItineraryRequest,
+    ItineraryResponse,
+    PackingItem,
+)
+
+if TYPE_CHECKING:
+    import asyncpg
+
+log = logging.getLogger(__name__)
+
+RAW_ENCODING = "zlib+base64"
+
+ACTIVITY_COLUMNS = [
+    "id", "day_id", "time", "title", "description", "location", "lat", "lng",
+    "duration_minutes", "cost_inr", "booking_url", "content_opportunity", "sort_order",
+]
+
+
+@dataclass
+class SavedItinerary:
+    trip_id: str
+    itinerary_id: str
+    version: int
+
+
+# ── raw_llm_response envelope ──────────────────────────────────────────────────
+
+def encode_raw_llm_response(raw: str | None) -> str | None:
+    """Compress raw LLM text into the jsonb envelope stored in itineraries.raw_llm_response."""
+    if raw is None:
+        return None
+    data = base64.b64encode(zlib.compress(raw.encode(), 6)).decode("ascii")
+    return json.dumps({"encoding": RAW_ENCODING, "data": data})
+
+
+def decode_raw_llm_response(value: Any) -> str | None:
+    """Inverse of encode_raw_llm_response; also accepts rows written before compression."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    if isinstance(value, dict) and value.get("encoding") == RAW_ENCODING:
+        return zlib.decompress(base64.b64decode(value["data"])).decode()
+    return json.dumps(value)
+
+
+# ── SQL ────────────────────────────────────────────────────────────────────────
+
+_INSERT_TRIP = """
+insert into public.trips
+  (user_id, title, destination, origin, start_date, end_date,
+   trip_type, travel_style, num_travelers, budget_inr)
+values ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+returning id
+"""
+
+_UPDATE_TRIP = """
+update public.trips set
+  destination = $3, origin = $4, start_date = $5, end_date = $6,
+  trip_type = $7, travel_style = $8, num_travelers = $9, budget_inr = $10
+where id = $1 and user_id = $2
+returning id
+"""
+
+_UPSERT_ITINERARY = """
+insert into public.itineraries as i
+  (id, trip_id, user_id, summary, total_estimated_cost_inr, packing_list,
+   key_tips, best_time_note, raw_llm_response, generated_at)
+values ($1, $2, $3, $4, $5, $6::jsonb, $7, $8, $9::jsonb, $10)
+on conflict (trip_id) do update set
+  summary                  = excluded.summary,
+  total_estimated_cost_inr = excluded.total_estimated_cost_inr,
+  packing_list             = excluded.packing_list,
+  key_tips                 = excluded.key_tips,
+  best_time_note           = excluded.best_time_note,
+  raw_llm_response         = excluded.raw_llm_response,
+  generated_at             = excluded.generated_at,
+  version                  = i.version + 1
+where i.user_id = excluded.user_id
+returning id, version
+"""
+
+_UPSERT_SNAPSHOT = """
+insert into public.itinerary_versions (itinerary_id, version, payload)
+values ($1, $2, $3)
+on conflict (itinerary_id, version) do update set payload = excluded.payload
+"""
+
+_PRUNE_SNAPSHOTS = """
+delete from public.itinerary_versions where itinerary_id = $1 and version <= $2
+"""
+
+_INSERT_DAY = """
+insert into public.itinerary_days
+  (id, itinerary_id, day_number, date, title, summary, transport_for_day,
+   accommodation, estimated_cost_inr, weather_note,
+   accommodation_suggestions, accommodation_options)
+values ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11::jsonb, $12::jsonb)
+"""
+
+
+def _dump_list(models: list) -> str:
+    return json.dumps([m.model_dump(mode="json") for m in models])
+
+
+# ── Writes ─────────────────────────────────────────────────────────────────────
+
+async def existing_itinerary_id(trip_id: str, user_id: str) -> str | None:
+    """The id a regeneration of this trip will keep, if it already has an itinerary."""
+    async with user_scope(user_id) as conn:
+        row = await queries.fetchrow(conn, queries.ITINERARY_BY_TRIP, trip_id)
+    return str(row["id"]) if row else None
+
+
+async def save_itinerary(
+    itinerary: ItineraryResponse,
+    req: ItineraryRequest,
+    user_id: str,
+    conn: asyncpg.Connection | None = None,
+) -> SavedItinerary:
+    """
+    Write the whole itinerary atomically. Creates the trip unless req.trip_id is
+    set; raises LookupError if that trip doesn't exist or belongs to someone else.
+    """
+    if conn is None:
+        # Service role, not user_scope(): COPY is refused on tables under RLS.
+        # Ownership is enforced by the user_id predicates in the SQL above.
+        async with acquire() as conn:
+            return await save_itinerary(itinerary, req, user_id, conn)
+
+    trip_fields = (
+        req.destination, req.origin, req.start_date, req.end_date,
+        req.trip_type.value, req.travel_style.value, req.num_travelers, req.budget_inr,
+    )
+    generated_at = itinerary.generated_at
+    if generated_at.tzinfo is None:
+        generated_at = generated_at.replace(tzinfo=timezone.utc)
+
+    async with conn.transaction():
+        if req.trip_id:
+            trip_id = await conn.fetchval(_UPDATE_TRIP, req.trip_id, user_id, *trip_fields)
+            if trip_id is None:
+                raise LookupError(f"trip {req.trip_id} not found for user")
+        else:
+            title = f"{req.destination} — {itinerary.duration_days} days"
+            trip_id = await conn.fetchval(_INSERT_TRIP, user_id, title, *trip_fields)
+
+        row = await conn.fetchrow(
+            _UPSERT_ITINERARY,
+            itinerary.itinerary_id,
+            trip_id,
+            user_id,
+            itinerary.summary,
+            itinerary.total_estimated_cost_inr,
+            _dump_list(itinerary.packing_list),
+            itinerary.key_tips,
+            itinerary.best_time_note,
+            encode_raw_llm_response(itinerary._raw_llm_response),
+            generated_at,
+        )
+        if row is None:
+            raise LookupError(f"itinerary for trip {trip_id} belongs to another user")
+        itinerary_id = row["id"]
+
+        # Regeneration: drop the previous days; activities go with them (on delete cascade)
+        if row["version"] > 1:
+            await conn.execute("delete from public.itinerary_days where itinerary_id = $1", itinerary_id)
+
+        day_rows, activity_rows = [], []
+        for day in itinerary.days:
+            day_id = uuid.uuid4()
+            day_rows.append((
+                day_id, itinerary_id, day.day_number, day.date, day.title, day.summary,
+                day.transport_for_day, day.overnight_location, day.estimated_cost_inr,
+                day.weather_note, _dump_list(day.accommodation_suggestions),
+                _dump_list(day.accommodation_options),
+            ))
+            for order, a in enumerate(day.activities):
+                activity_rows.append((
+                    uuid.uuid4(), day_id, a.time, a.title, a.description, a.location, a.lat, a.lng,
+                    a.duration_minutes, a.cost_inr, a.booking_url, a.content_opportunity, order,
+                ))
+
+        if day_rows:
+            await conn.executemany(_INSERT_DAY, day_rows)
+        if activity_rows:
+            await conn.copy_records_to_table(
+                "itinerary_activities", schema_name="public",
+                records=activity_rows, columns=ACTIVITY_COLUMNS,
+            )
+
+        # The exact JSON GET /itinerary/{id} serves for this version — delta sync diffs these
+        snapshot = itinerary.model_copy(update={"itinerary_id": str(itinerary_id), "generated_at": generated_at})
+        await conn.execute(_UPSERT_SNAPSHOT, itinerary_id, row["version"],
+                           zlib.compress(snapshot.model_dump_json().encode(), 6))
+        kept = get_settings().itinerary_versions_kept
+        if row["version"] > kept:
+            await conn.execute(_PRUNE_SNAPSHOTS, itinerary_id, row["version"] - kept)
+
+    return SavedItinerary(trip_id=str(trip_id), itinerary_id=str(itinerary_id), version=row["version"])
+
+
+async def persist_generated_itinerary(
+    itinerary: ItineraryResponse,
+    req: ItineraryRequest,
+    user_id: str,
+) -> SavedItinerary | None:
+    """Background-task entry point: save, log, never raise."""
+    try:
+        saved = await save_itinerary(itinerary, req, user_id)
+    except Exception as e:
+        log.warning("itinerary persistence failed for %s: %s", itinerary.itinerary_id, e)
+        return None
+    log.info("itinerary %s saved (trip %s, v%d, %d days)",
+             saved.itinerary_id, saved.trip_id, saved.version, len(itinerary.days))
+    return saved
+
+
+# ── Reads ──────────────────────────────────────────────────────────────────────
+
+def _jsonb(value: Any) -> Any:
+    # No jsonb codec is registered on the pool: values arrive as JSON text
+    return json.loads(value) if isinstance(value, str) else value
+
+
+async def load_itinerary(conn: asyncpg.Connection, itinerary_id: str) -> ItineraryResponse | None:
+    """
+    Rebuild the API model from its rows: three queries, whatever the trip length.
+    Run inside one snapshot (user_scope(..., isolation="repeatable_read")) so a
+    concurrent regeneration can't mix versions.
+    """
+    head = await queries.fetchrow(conn, queries.ITINERARY_BY_ID, itinerary_id)
+    if head is None:
+        return None
+    day_rows = await queries.fetch(conn, queries.ITINERARY_DAYS, itinerary_id)
+    activity_rows = await queries.fetch(conn, queries.ITINERARY_ACTIVITIES, itinerary_id)
+
+    activities: dict[Any, list[Activity]] = {}
+    for a in activity_rows:
+        activities.setdefault(a["day_id"], []).append(Activity(
+            time=a["time"] or "", title=a["title"], description=a["description"] or "",
+            location=a["location"], lat=a["lat"], lng=a["lng"],
+            duration_minutes=a["duration_minutes"], cost_inr=a["cost_inr"],
+            booking_url=a["booking_url"], content_opportunity=a["content_opportunity"],
+        ))
+
+    days = [
+        ItineraryDay(
+            day_number=d["day_number"],
+            date=d["date"],
+            title=d["title"],
+            summary=d["summary"] or "",
+            activities=activities.get(d["id"], []),
+            transport_for_day=d["transport_for_day"],
+            estimated_cost_inr=d["estimated_cost_inr"],
+            weather_note=d["weather_note"],
+            overnight_location=d["accommodation"],
+            accommodation_suggestions=[AccommodationSuggestion(**s) for s in _jsonb(d["accommodation_suggestions"])],
+            accommodation_options=[AccommodationOption(**o) for o in _jsonb(d["accommodation_options"])],
+        )
+        for d in day_rows
+    ]
+
+    start, end = head["start_date"], head["end_date"]
+    return ItineraryResponse(
+        itinerary_id=str(head["id"]),
+        destination=head["destination"],
+        origin=head["origin"] or "",
+        start_date=start,
+        end_date=end,
+        duration_days=(end - start).days + 1,
+        trip_type=head["trip_type"],
+        travel_style=head["travel_style"],
+        total_estimated_cost_inr=head["total_estimated_cost_inr"],
+        summary=head["summary"] or "",
+        days=days,
+        packing_list=[PackingItem(**p) for p in _jsonb(head["packing_list"]) or []],
+        key_tips=list(head["key_tips"] or []),
+        best_time_note=head["best_time_note"],
+        generated_at=head["generated_at"],
+    )
+
+
+async def load_snapshots(conn: asyncpg.Connection, itinerary_id: str, versions: list[int]) -> dict[int, bytes]:
+    """Serialized ItineraryResponse JSON per stored version (missing versions are absent)."""
+    rows = await queries.fetch(conn, queries.ITINERARY_SNAPSHOTS, itinerary_id, versions)
+    return {r["version"]: zlib.decompress(r["payload"]) for r in rows}
+
+
+async def load_itinerary_json(conn: asyncpg.Connection, itinerary_id: str, version: int) -> bytes | None:
+    """The JSON GET /itinerary/{id} serves for `version`: its snapshot, else rebuilt from rows."""
+    body = (await load_snapshots(conn, itinerary_id, [version])).get(version)
+    if body is None:
+        itinerary = await load_itinerary(conn, itinerary_id)
+        body = itinerary.model_dump_json().encode() if itinerary else None
+    return body
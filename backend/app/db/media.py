@@ -0,0 +1,120 @@
+"""Resumable media uploads (008_media_uploads.sql) and the media_assets rows they end in — user-scoped."""
+
+from __future__ import annotations
+
+import json
+
+from app.db.pool import user_scope
+
+_UPLOAD_COLUMNS = """
+id, user_id, object_key, store_upload_id, size_bytes, part_size, received_bytes, parts, asset
+"""
+
+_INSERT_ASSET = """
+insert into public.media_assets (trip_id, user_id, asset_type, recording_mode, storage_url, duration_sec,
+                                 file_size_bytes, context_tag, lat, lng, recorded_at, sha256)
+values ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, coalesce($11::text::timestamptz, now()), $12)
+returning id
+"""
+
+
+def _upload(row) -> dict:
+    out = dict(row)
+    for column in ("parts", "asset"):
+        if isinstance(out[column], str):
+            out[column] = json.loads(out[column])
+    return {**out, "id": str(out["id"]), "user_id": str(out["user_id"])}
+
+
+async def create_upload(
+    user_id: str, object_key: str, store_upload_id: str, size_bytes: int, part_size: int, asset: dict,
+) -> dict:
+    async with user_scope(user_id) as conn:
+        row = await conn.fetchrow(
+            "insert into public.media_uploads (user_id, object_key, store_upload_id, size_bytes, part_size, asset) "
+            f"values ($1, $2, $3, $4, $5, $6::jsonb) returning {_UPLOAD_COLUMNS}",
+            user_id, object_key, store_upload_id, size_bytes, part_size, json.dumps(asset),
+        )
+    return _upload(row)
+
+
+async def get_upload(user_id: str, upload_id: str) -> dict | None:
+    async with user_scope(user_id) as conn:
+        row = await conn.fetchrow(f"select {_UPLOAD_COLUMNS} from public.media_uploads where id = $1", upload_id)
+    return _upload(row) if row else None
+
+
+async def claim_upload(
+    user_id: str, upload_id: str, writer: str, ttl_s: float, offset: int | None = None, part: int | None = None,
+) -> bool:
+    """
+    Make `writer` the session's only uploader for the next `ttl_s` seconds (013_media_upload_writer.sql),
+    if nobody else holds it or their claim lapsed. `offset`: only while the session is at that byte;
+    `part`: only while that part is not committed yet. False means another request got there first.
+    """
+    async with user_scope(user_id) as conn:
+        claimed = await conn.fetchval(
+            "update public.media_uploads "
+            "set writer = $2, writer_until = now() + make_interval(secs => $3) "
+            "where id = $1 and (writer is null or writer = $2 or writer_until < now()) "
+            "  and ($4::bigint is null or received_bytes = $4) "
+            "  and ($5::int is null or jsonb_array_length(parts) < $5) returning id",
+            upload_id, writer, float(ttl_s), offset, part,
+        )
+    return claimed is not None
+
+
+async def release_upload(user_id: str, upload_id: str, writer: str) -> None:
+    async with user_scope(user_id) as conn:
+        await conn.execute(
+            "update public.media_uploads set writer = null, writer_until = null where id = $1 and writer = $2",
+            upload_id, writer,
+        )
+
+
+async def advance_upload(
+    user_id: str, upload_id: str, writer: str, expected_bytes: int, received_bytes: int, parts: list[dict],
+) -> bool:
+    """
+    Append committed parts, only if `writer` still holds the session and nobody moved it since
+    `expected_bytes` was read (compare-and-set). False means another request got there first.
+    """
+    async with user_scope(user_id) as conn:
+        updated = await conn.fetchval(
+            "update public.media_uploads "
+            "set received_bytes = $4, parts = parts || $5::jsonb, updated_at = now() "
+            "where id = $1 and writer = $2 and received_bytes = $3 returning id",
+            upload_id, writer, expected_bytes, received_bytes, json.dumps(parts),
+        )
+    return updated is not None
+
+
+async def finish_upload(user_id: str, upload_id: str, storage_url: str, sha256: str) -> str | None:
+    """Write the media_assets row and drop the session in one transaction; None if it was already finished."""
+    async with user_scope(user_id) as conn:
+        async with conn.transaction():
+            row = await conn.fetchrow(
+                "delete from public.media_uploads where id = $1 returning size_bytes, asset", upload_id,
+            )
+            if row is None:
+                return None
+            a = json.loads(row["asset"]) if isinstance(row["asset"], str) else row["asset"]
+            asset_id = await conn.fetchval(
+                _INSERT_ASSET,
+                a.get("trip_id"), user_id, a["asset_type"], a.get("recording_mode"), storage_url,
+                a.get("duration_sec"), row["size_bytes"], a.get("context_tag"), a.get("lat"), a.get("lng"),
+                a.get("recorded_at"), sha256,
+            )
+    return str(asset_id)
+
+
+async def asset_by_url(user_id: str, storage_url: str) -> str | None:
+    """The media_assets row a finished upload wrote, by its storage_url."""
+    async with user_scope(user_id) as conn:
+        asset_id = await conn.fetchval("select id from public.media_assets where storage_url = $1", storage_url)
+    return str(asset_id) if asset_id else None
+
+
+async def delete_upload(user_id: str, upload_id: str) -> None:
+    async with user_scope(user_id) as conn:
+        await conn.execute("delete from public.media_uploads where id = $1", upload_id)
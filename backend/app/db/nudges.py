@@ -0,0 +1,130 @@
+"""
+Nudges (012_nudge_queue.sql): the planner's trip-day reads, the queue upsert
+and due delivery into nudge_log. Service role — the planner works across
+every user's trips.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import date
+
+from app.db.pool import acquire
+
+# Any fixed key works; it only has to differ from other advisory locks in the app
+_PLANNER_LOCK = 0x6E756467
+
+_ACTIVE_TRIPS = """
+select id from public.trips
+where status not in ('cancelled', 'completed')
+  and start_date <= $2 and end_date >= $1
+  and ($3::uuid is null or id > $3)
+order by id
+limit $4
+"""
+
+# One row per trip day in [start, end]. Days without a date take it from
+# their position in the trip; the destination's coordinates are the
+# fallback for days whose activities carry none, and its country sets the
+# clock the day's times are in.
+_TRIP_DAYS = """
+select t.id as trip_id, t.user_id, t.destination,
+       coalesce(d.date, t.start_date + d.day_number - 1) as day,
+       dest.lat as destination_lat, dest.lng as destination_lng, dest.country as destination_country,
+       coalesce(
+         (select jsonb_agg(jsonb_build_object('title', a.title, 'time', a.time, 'lat', a.lat, 'lng', a.lng)
+                           order by a.sort_order)
+          from public.itinerary_activities a where a.day_id = d.id),
+         '[]'::jsonb
+       ) as activities
+from public.trips t
+join public.itineraries i on i.trip_id = t.id
+join public.itinerary_days d on d.itinerary_id = i.id
+left join lateral (
+    select lat, lng, country from public.destinations
+    where lower(name) = lower(t.destination) and lat is not null
+    limit 1
+) dest on true
+where t.id = any($1::uuid[])
+  and coalesce(d.date, t.start_date + d.day_number - 1) between $2 and $3
+order by t.id, day
+"""
+
+# A nudge already sent stays as it was; an unsent one follows the latest plan
+_ENQUEUE = """
+insert into public.nudge_queue (user_id, trip_id, nudge_type, for_date, send_at, message, payload)
+select * from unnest($1::uuid[], $2::uuid[], $3::text[], $4::date[], $5::timestamptz[], $6::text[], $7::jsonb[])
+on conflict (trip_id, nudge_type, for_date) do update
+set send_at = excluded.send_at, message = excluded.message, payload = excluded.payload
+where nudge_queue.sent_at is null
+"""
+
+# Due rows are marked sent in send_at order. Rows more than $2 s past their
+# send time (the app was down) are marked too but never reach the traveler:
+# a golden-hour nudge after sunset is noise.
+_DELIVER_DUE = """
+with due as (
+    select id from public.nudge_queue
+    where sent_at is null and send_at <= now()
+    order by send_at
+    limit $1
+    for update skip locked
+), sent as (
+    update public.nudge_queue q set sent_at = now()
+    from due where q.id = due.id
+    returning q.user_id, q.trip_id, q.nudge_type, q.message, q.send_at
+), logged as (
+    insert into public.nudge_log (user_id, trip_id, nudge_type, message)
+    select user_id, trip_id, nudge_type, message from sent
+    where send_at >= now() - make_interval(secs => $2)
+    returning 1
+)
+select (select count(*) from sent) as claimed, (select count(*) from logged) as delivered
+"""
+
+
+@asynccontextmanager
+async def planner_lock() -> AsyncIterator[bool]:
+    """True when this worker holds the planner lock for the block, False when another one does."""
+    async with acquire() as conn:
+        held = await conn.fetchval("select pg_try_advisory_lock($1)", _PLANNER_LOCK)
+        try:
+            yield held
+        finally:
+            if held:
+                await conn.execute("select pg_advisory_unlock($1)", _PLANNER_LOCK)
+
+
+async def active_trip_ids(start: date, end: date, after: str | None, limit: int) -> list[str]:
+    """One keyset page of trips that are on during [start, end], by id."""
+    async with acquire() as conn:
+        rows = await conn.fetch(_ACTIVE_TRIPS, start, end, after, limit)
+    return [str(r["id"]) for r in rows]
+
+
+async def trip_days(trip_ids: list[str], start: date, end: date) -> list[dict]:
+    """The trips' itinerary days in [start, end], with their activities in order."""
+    async with acquire() as conn:
+        rows = await conn.fetch(_TRIP_DAYS, trip_ids, start, end)
+    return [
+        {**dict(r), "trip_id": str(r["trip_id"]), "user_id": str(r["user_id"]),
+         "activities": json.loads(r["activities"])}
+        for r in rows
+    ]
+
+
+async def enqueue(rows: list[tuple]) -> None:
+    """Upsert (user_id, trip_id, nudge_type, for_date, send_at, message, payload json) rows."""
+    if not rows:
+        return
+    async with acquire() as conn:
+        await conn.execute(_ENQUEUE, *(list(column) for column in zip(*rows)))
+
+
+async def deliver_due(limit: int, grace_s: float) -> tuple[int, int]:
+    """Move up to `limit` due nudges into nudge_log: (claimed, delivered)."""
+    async with acquire() as conn:
+        row = await conn.fetchrow(_DELIVER_DUE, limit, float(grace_s))
+    return row["claimed"], row["delivered"]
@@ -0,0 +1,121 @@
+"""
+asyncpg connection pool — the async data-access layer.
+
+One pool per worker process, created on first use and closed by the lifespan.
+asyncpg is imported lazily so cold starts and tests that never touch the
+database don't pay for it.
+
+Two ways in:
+
+    async with acquire() as conn:            # service role — RLS bypassed
+        ...
+    async with user_scope(user_id) as conn:  # runs as `authenticated`, auth.uid() = user_id
+        ...
+
+user_scope() opens a transaction and sets the same role and JWT claims
+PostgREST would, so the RLS policies in 001_initial_schema.sql apply exactly as
+they do for the Supabase client — a bug in a WHERE clause can't leak another
+user's trips. Settings are transaction-local and vanish when the connection
+goes back to the pool.
+
+Pool saturation is exported as xplor_db_pool_* gauges plus an acquire-wait
+histogram: sustained in_use == max_size with rising acquire time means raise
+DB_POOL_MAX_SIZE (or fix a slow query holding connections).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+from app.core import metrics
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    import asyncpg
+
+_pool: asyncpg.Pool | None = None
+_lock = asyncio.Lock()
+
+_SET_USER_CONTEXT = """
+select set_config('role', 'authenticated', true),
+       set_config('request.jwt.claim.sub', $1, true),
+       set_config('request.jwt.claims', $2, true)
+"""
+
+
+class DatabaseNotConfigured(RuntimeError):
+    pass
+
+
+def is_configured() -> bool:
+    return bool(get_settings().database_url)
+
+
+async def get_pool() -> asyncpg.Pool:
+    global _pool
+    if _pool is not None:
+        return _pool
+    async with _lock:
+        if _pool is None:
+            import asyncpg
+
+            from app.db.connection import XplorConnection
+
+            s = get_settings()
+            if not s.database_url:
+                raise DatabaseNotConfigured("DATABASE_URL is not set")
+            _pool = await asyncpg.create_pool(
+                dsn=s.database_url,
+                min_size=s.db_pool_min_size,
+                max_size=s.db_pool_max_size,
+                command_timeout=s.db_command_timeout_s,
+                statement_cache_size=100 if s.db_prepared_statements else 0,
+                connection_class=XplorConnection,
+            )
+            metrics.DB_POOL_MAX_SIZE.set(s.db_pool_max_size)
+            _publish_gauges(_pool)
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+        metrics.DB_POOL_SIZE.set(0)
+        metrics.DB_POOL_IN_USE.set(0)
+
+
+def _publish_gauges(pool: asyncpg.Pool) -> None:
+    size = pool.get_size()
+    metrics.DB_POOL_SIZE.set(size)
+    metrics.DB_POOL_IN_USE.set(size - pool.get_idle_size())
+
+
+@asynccontextmanager
+async def acquire() -> AsyncIterator[asyncpg.Connection]:
+    """Check out a pooled connection, recording wait time and pool occupancy."""
+    pool = await get_pool()
+    started = time.perf_counter()
+    async with pool.acquire() as conn:
+        metrics.DB_POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - started)
+        _publish_gauges(pool)
+        yield conn
+    _publish_gauges(pool)
+
+
+@asynccontextmanager
+async def user_scope(user_id: str, isolation: str | None = None) -> AsyncIterator[asyncpg.Connection]:
+    """
+    A connection inside a transaction that row-level security sees as `user_id`.
+    Pass isolation="repeatable_read" when several reads must see one snapshot.
+    """
+    claims = json.dumps({"sub": user_id, "role": "authenticated"})
+    async with acquire() as conn, conn.transaction(isolation=isolation):
+        await conn.execute(_SET_USER_CONTEXT, user_id, claims)
+        yield conn
@@ -0,0 +1,114 @@
+"""
+Scheduled publishing (009_publishing_dispatch.sql): the dispatcher's window
+loads, claims and batched status updates. Service role — the dispatcher acts
+for every user.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+
+from app.core.config import get_settings
+from app.db import queries
+from app.db.pool import acquire
+
+CHANNEL = "published_posts"
+
+_POSTS_BY_ID = """
+select id, platform, coalesce(retry_at, scheduled_for) as due_at
+from public.published_posts
+where id = any($1::uuid[]) and status = 'scheduled'
+"""
+
+# Only posts that are still scheduled and actually due: a notification the
+# dispatcher missed cannot make it fire a rescheduled post early.
+_CLAIM = """
+update public.published_posts p
+set status = 'publishing', claimed_at = now()
+where p.id = any($1::uuid[]) and p.status = 'scheduled'
+  and coalesce(p.retry_at, p.scheduled_for) <= now() + make_interval(secs => $2)
+returning p.id, p.user_id, p.platform, p.post_type, p.caption, p.media_urls, p.hashtags,
+          p.publish_attempts, coalesce(p.retry_at, p.scheduled_for) as due_at,
+          (select a.access_token from public.social_accounts a
+           where a.user_id = p.user_id and a.platform = p.platform) as access_token
+"""
+
+_RELEASE_STALE = """
+update public.published_posts
+set status = 'scheduled', claimed_at = null
+where status = 'publishing' and claimed_at < now() - make_interval(secs => $1)
+"""
+
+_MARK_PUBLISHED = """
+update public.published_posts p
+set status = 'published', published_at = d.published_at, platform_post_id = d.platform_post_id,
+    publish_attempts = p.publish_attempts + 1, retry_at = null, last_error = null, claimed_at = null
+from unnest($1::uuid[], $2::timestamptz[], $3::text[]) as d(id, published_at, platform_post_id)
+where p.id = d.id
+"""
+
+_MARK_RETRY = """
+update public.published_posts p
+set status = 'scheduled', retry_at = d.retry_at, last_error = d.error,
+    publish_attempts = p.publish_attempts + 1, claimed_at = null
+from unnest($1::uuid[], $2::timestamptz[], $3::text[]) as d(id, retry_at, error)
+where p.id = d.id
+"""
+
+_MARK_FAILED = """
+update public.published_posts p
+set status = 'failed', last_error = d.error, publish_attempts = p.publish_attempts + 1, claimed_at = null
+from unnest($1::uuid[], $2::text[]) as d(id, error)
+where p.id = d.id
+"""
+
+
+async def posts_due(after: tuple[datetime, str], until: datetime, platforms: list[str], limit: int) -> list:
+    """One keyset page of scheduled posts due in (after, until], by (due_at, id)."""
+    async with acquire() as conn:
+        return await queries.fetch(conn, queries.POSTS_DUE, after[0], after[1], until, limit, platforms)
+
+
+async def posts_by_id(ids: list[str]) -> list:
+    async with acquire() as conn:
+        return await conn.fetch(_POSTS_BY_ID, ids)
+
+
+async def claim_posts(ids: list[str], lead_s: float) -> list[dict]:
+    async with acquire() as conn:
+        rows = await conn.fetch(_CLAIM, ids, lead_s)
+    return [{**dict(r), "id": str(r["id"]), "user_id": str(r["user_id"])} for r in rows]
+
+
+async def release_stale_claims(older_than_s: float) -> int:
+    async with acquire() as conn:
+        status = await conn.execute(_RELEASE_STALE, older_than_s)
+    return int(status.split()[-1])
+
+
+async def settle_posts(
+    published: list[tuple[str, datetime, str]],
+    retries: list[tuple[str, datetime, str]],
+    failed: list[tuple[str, str]],
+) -> None:
+    """Apply a batch of outcomes in one transaction: one statement per kind."""
+    async with acquire() as conn:
+        async with conn.transaction():
+            for sql, rows in ((_MARK_PUBLISHED, published), (_MARK_RETRY, retries), (_MARK_FAILED, failed)):
+                if rows:
+                    await conn.execute(sql, *(list(column) for column in zip(*rows)))
+
+
+async def listen(callback: Callable[[str], None], on_lost: Callable[[], None]):
+    """
+    A dedicated connection LISTENing on CHANNEL; `callback(post_id)` per
+    notification, `on_lost()` if the connection drops. Not pooled: it is held
+    for the dispatcher's lifetime. Returns the connection (close it to stop).
+    """
+    import asyncpg
+
+    conn = await asyncpg.connect(get_settings().database_url)
+    await conn.add_listener(CHANNEL, lambda _conn, _pid, _channel, payload: callback(payload))
+    conn.add_termination_listener(lambda _conn: on_lost())
+    return conn
@@ -0,0 +1,118 @@
+"""
+Hot queries — the reads that run on most requests.
+
+Each is a named Query so connections can keep it prepared (see connection.py)
+and its latency shows up per name in xplor_db_query_seconds. Column lists are
+explicit: a `select *` plan breaks the moment a migration adds a column.
+
+    async with user_scope(user_id) as conn:
+        trips = await queries.fetch(conn, queries.TRIPS_BY_USER, user_id, 20)
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from app.core import metrics
+
+
+@dataclass(frozen=True)
+class Query:
+    name: str
+    sql: str
+
+
+TRIPS_BY_USER = Query("trips_by_user", """
+select id, user_id, title, destination, origin, start_date, end_date, trip_type,
+       travel_style, status, num_travelers, budget_inr, created_at, updated_at
+from public.trips
+where user_id = $1
+order by start_date desc
+limit $2
+""")
+
+ITINERARY_BY_TRIP = Query("itinerary_by_trip", """
+select id, trip_id, user_id, summary, total_estimated_cost_inr, packing_list,
+       key_tips, best_time_note, version, created_at, generated_at
+from public.itineraries
+where trip_id = $1
+""")
+
+ITINERARY_VERSION = Query("itinerary_version", """
+select version from public.itineraries where id = $1
+""")
+
+ITINERARY_BY_ID = Query("itinerary_by_id", """
+select i.id, i.version, i.summary, i.total_estimated_cost_inr, i.packing_list,
+       i.key_tips, i.best_time_note, i.generated_at,
+       t.destination, t.origin, t.start_date, t.end_date, t.trip_type, t.travel_style
+from public.itineraries i
+join public.trips t on t.id = i.trip_id
+where i.id = $1
+""")
+
+ITINERARY_DAYS = Query("itinerary_days", """
+select id, day_number, date, title, summary, transport_for_day, accommodation,
+       estimated_cost_inr, weather_note, accommodation_suggestions, accommodation_options
+from public.itinerary_days
+where itinerary_id = $1
+order by day_number
+""")
+
+ITINERARY_ACTIVITIES = Query("itinerary_activities", """
+select a.day_id, a.time, a.title, a.description, a.location, a.lat, a.lng,
+       a.duration_minutes, a.cost_inr, a.booking_url, a.content_opportunity
+from public.itinerary_activities a
+join public.itinerary_days d on d.id = a.day_id
+where d.itinerary_id = $1
+order by d.day_number, a.sort_order
+""")
+
+ITINERARY_SNAPSHOTS = Query("itinerary_snapshots", """
+select version, payload
+from public.itinerary_versions
+where itinerary_id = $1 and version = any($2::int[])
+""")
+
+TRIP_BY_ID = Query("trip_by_id", """
+select t.id, t.user_id, t.title, t.destination, t.origin, t.start_date, t.end_date,
+       t.trip_type, t.travel_style, t.status, t.num_travelers, t.budget_inr,
+       t.created_at, t.updated_at, i.id as itinerary_id, i.version as itinerary_version
+from public.trips t
+left join public.itineraries i on i.trip_id = t.id
+where t.id = $1
+""")
+
+# Keyset pages of the dispatcher's window, (after, until] on the effective due time
+POSTS_DUE = Query("posts_due", """
+select id, platform, coalesce(retry_at, scheduled_for) as due_at
+from public.published_posts
+where status = 'scheduled'
+  and platform = any($5::text[])
+  and (coalesce(retry_at, scheduled_for), id) > ($1, $2)
+  and coalesce(retry_at, scheduled_for) <= $3
+order by coalesce(retry_at, scheduled_for), id
+limit $4
+""")
+
+
+async def _run(conn: Any, query: Query, method: str, *args: Any) -> Any:
+    started = time.perf_counter()
+    try:
+        return await conn.run_named(query, method, *args)
+    finally:
+        metrics.DB_QUERY_SECONDS.labels(query.name).observe(time.perf_counter() - started)
+
+
+async def fetch(conn: Any, query: Query, *args: Any) -> list:
+    return await _run(conn, query, "fetch", *args)
+
+
+async def fetchrow(conn: Any, query: Query, *args: Any):
+    return await _run(conn, query, "fetchrow", *args)
+
+
+async def fetchval(conn: Any, query: Query, *args: Any) -> Any:
+    return await _run(conn, query, "fetchval", *args)
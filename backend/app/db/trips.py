@@ -0,0 +1,19 @@
+"""Trip reads for the (upcoming) trips router — always user-scoped so RLS applies."""
+
+from __future__ import annotations
+
+from app.db import queries
+from app.db.pool import user_scope
+
+
+async def list_trips(user_id: str, limit: int = 50) -> list[dict]:
+    async with user_scope(user_id) as conn:
+        rows = await queries.fetch(conn, queries.TRIPS_BY_USER, user_id, limit)
+    return [dict(r) for r in rows]
+
+
+async def get_trip(user_id: str, trip_id: str) -> dict | None:
+    """The trip with its itinerary id/version, or None if missing or not the caller's."""
+    async with user_scope(user_id) as conn:
+        row = await queries.fetchrow(conn, queries.TRIP_BY_ID, trip_id)
+    return dict(row) if row else None
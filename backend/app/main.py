@@ -1,20 +1,87 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import structlog
 
+from app.core import background, tracing
+from app.core.admission import AdmissionMiddleware
 from app.core.config import get_settings
-from app.api.routes import health, itinerary
+from app.db import close_pool, is_configured
+from app.agents.caption_agent import caption_loop
+from app.agents.nudge_agent import nudge_loop
+from app.services.destinations import refresh_loop as destination_refresh_loop
+from app.services.fares import alert_loop as fare_alert_loop
+from app.services.publishing import dispatcher_loop
+from app.api.routes import analytics, content, destinations, health, itinerary, media, metrics, trips
 
+# Stamp trace_id/span_id on every structlog line emitted inside a request
+structlog.configure(
+    processors=[tracing.add_trace_context, *structlog.get_config()["processors"]],
+)
 log = structlog.get_logger()
 
 settings = get_settings()
 
+
+def _prewarm() -> None:
+    """
+    Build upstream clients off the request path (runs in a worker thread).
+    Requests may reach the same getters meanwhile; they are build-once under a
+    lock (core/lazy.py), so a client is never built twice.
+    """
+    from app.services.accommodation import get_accommodation_service
+    from app.services.llm import get_anthropic_client
+
+    get_accommodation_service().providers
+    get_anthropic_client()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log.info("xplor360_api_started", env=settings.app_env)
+    # Accept traffic immediately; heavy SDK imports finish in the background
+    prewarm = asyncio.create_task(asyncio.to_thread(_prewarm)) if settings.prewarm_clients else None
+    destination_index = asyncio.create_task(destination_refresh_loop())
+    captions = asyncio.create_task(caption_loop()) if settings.caption_poll_s > 0 and is_configured() else None
+    publishing = asyncio.create_task(dispatcher_loop()) if settings.publishing_dispatcher and is_configured() else None
+    fare_alerts = (
+        asyncio.create_task(fare_alert_loop()) if settings.fare_alert_poll_s > 0 and is_configured() else None
+    )
+    nudges = asyncio.create_task(nudge_loop()) if settings.nudge_poll_s > 0 and is_configured() else None
+    yield
+    if prewarm is not None and not prewarm.done():
+        prewarm.cancel()
+    destination_index.cancel()
+    if captions is not None:
+        captions.cancel()
+    if publishing is not None:
+        publishing.cancel()
+    if fare_alerts is not None:
+        fare_alerts.cancel()
+    if nudges is not None:
+        nudges.cancel()
+    await background.drain()
+    await close_pool()
+    tracing.get_exporter().shutdown()
+
+
 app = FastAPI(
     title="Xplor360 API",
     description="AI-powered travel planning and content creation platform for Indian travelers.",
     version="0.1.0",
     docs_url="/docs" if not settings.is_production else None,
     redoc_url="/redoc" if not settings.is_production else None,
+    lifespan=lifespan,
+)
+
+# ── Admission control ───────────────────────────────────────────────────────────
+# Added before CORS so CORS stays outermost and 429s still carry CORS headers.
+app.add_middleware(
+    AdmissionMiddleware,
+    path_prefix="/api/v1/itinerary",
+    exempt=("/api/v1/itinerary/generate:batch",),
 )
 
 # ── CORS ────────────────────────────────────────────────────────────────────────
@@ -27,22 +94,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "Retry-After", "ETag", "X-Itinerary-Version", "Upload-Offset"],
 )
 
+# ── Tracing ─────────────────────────────────────────────────────────────────────
+# Outermost: the root span covers CORS, admission queueing and the handler.
+app.add_middleware(tracing.TracingMiddleware)
+
 # ── Routes ──────────────────────────────────────────────────────────────────────
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(itinerary.router, prefix="/api/v1")
+app.include_router(destinations.router, prefix="/api/v1")
+app.include_router(trips.router, prefix="/api/v1")
+app.include_router(content.router, prefix="/api/v1")
+app.include_router(media.router, prefix="/api/v1")
+app.include_router(analytics.router, prefix="/api/v1")
 
 # Future routers (uncomment as modules are built):
-# app.include_router(trips.router, prefix="/api/v1")
 # app.include_router(bookings.router, prefix="/api/v1")
 # app.include_router(expeditions.router, prefix="/api/v1")
-# app.include_router(content.router, prefix="/api/v1")
 # app.include_router(publishing.router, prefix="/api/v1")
-# app.include_router(analytics.router, prefix="/api/v1")
 # app.include_router(users.router, prefix="/api/v1")
 
-
-@app.on_event("startup")
-async def startup():
-    log.info("xplor360_api_started", env=settings.app_env)
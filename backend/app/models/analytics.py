@@ -0,0 +1,63 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class PostSnapshot(BaseModel):
+    """One fetch of a published post's counters, as the platform reports them (cumulative)."""
+    post_id: str
+    fetched_at: Optional[datetime] = Field(None, description="When the platform was asked; now when omitted")
+    reach: int = Field(0, ge=0)
+    impressions: int = Field(0, ge=0)
+    likes: int = Field(0, ge=0)
+    comments: int = Field(0, ge=0)
+    shares: int = Field(0, ge=0)
+    saves: int = Field(0, ge=0)
+    follower_delta: int = 0
+    video_views: int = Field(0, ge=0)
+    watch_time_sec: int = Field(0, ge=0)
+
+
+class SnapshotBatch(BaseModel):
+    snapshots: list[PostSnapshot] = Field(..., min_length=1, max_length=5000)
+
+
+class IngestResponse(BaseModel):
+    received: int
+    stored: int = Field(..., description="Rows written to post_analytics")
+    unknown_posts: int = Field(..., description="Snapshots for posts that are not the caller's; dropped")
+    posts_updated: int = Field(..., description="Posts whose latest snapshot moved forward")
+    stale: int = Field(..., description="Posts whose newest snapshot here is older than the stored one")
+
+
+class HourStat(BaseModel):
+    day: str = Field(..., description="Mon … Sun, in the analytics timezone")
+    hour: int = Field(..., ge=0, le=23)
+    posts: int
+    avg_reach: float
+    avg_engagement: float
+
+
+class ContentTypeStat(BaseModel):
+    post_type: str
+    posts: int
+    avg_reach: float
+    avg_engagement: float
+    engagement_rate: float = Field(..., description="Engagement per unit of reach")
+    avg_watch_time_sec: float
+
+
+class PlatformAnalytics(BaseModel):
+    platform: str
+    posts: int
+    reach: int
+    impressions: int
+    engagement: int
+    engagement_rate: float
+    best_hours: list[HourStat] = Field(..., description="Hours of the week with the best average engagement")
+    content_types: list[ContentTypeStat] = Field(..., description="Best first")
+
+
+class AnalyticsOverview(BaseModel):
+    timezone: str
+    platforms: list[PlatformAnalytics]
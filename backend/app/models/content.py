@@ -0,0 +1,70 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+# ── Captions (prompts/caption_generator.txt) ───────────────────────────────────
+
+class InstagramCaption(BaseModel):
+    caption: str = Field(..., min_length=1)
+    hashtags_caption: list[str] = []
+    hashtags_first_comment: list[str] = []
+
+
+class CaptionSet(BaseModel):
+    """One recording's captions, as the model returns them; anything else is rejected."""
+    instagram: InstagramCaption
+    twitter_hook: str = Field(..., min_length=1, max_length=280)
+    whatsapp_summary: str = Field(..., min_length=1)
+    youtube_description: str = Field(..., min_length=1)
+
+
+class CaptionRunRequest(BaseModel):
+    asset_ids: Optional[list[str]] = Field(
+        None, max_length=100,
+        description="Transcribed media_assets to caption; all of the caller's when omitted",
+    )
+    limit: int = Field(50, ge=1, le=100)
+
+
+class CaptionRunResponse(BaseModel):
+    assets: int = Field(..., description="Transcribed recordings picked up")
+    drafted: int
+    failed: int = Field(..., description="Output still invalid after a retry; marked processing_status='failed'")
+    released: int = Field(..., description="LLM call failed; left 'transcribed' for the next run")
+    llm_calls: int
+    draft_ids: list[str]
+
+
+# ── Blog (prompts/blog_day_summary.txt → prompts/blog_writer.txt) ──────────────
+
+class DaySummary(BaseModel):
+    headline: str
+    summary: str
+    highlights: list[str] = []
+    quotes: list[str] = []
+    places: list[str] = []
+    practical: list[str] = []
+    mishaps: list[str] = []
+    mood: Optional[str] = None
+
+
+class BlogPost(BaseModel):
+    title: str = Field(..., min_length=1)
+    meta_description: str = ""
+    word_count_estimate: Optional[int] = None
+    body: str = Field(..., min_length=1)
+    key_takeaways: list[str] = []
+
+
+class BlogRunRequest(BaseModel):
+    force: bool = Field(False, description="Write a new version even when no day's clips have changed")
+
+
+class BlogRunResponse(BaseModel):
+    draft_id: str
+    version: int
+    title: Optional[str] = None
+    days: int
+    days_summarised: int = Field(..., description="Days whose clips changed since the last run")
+    days_cached: int
+    reused: bool = Field(False, description="Nothing changed: the latest blog draft is returned as is")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class DestinationSuggestion(BaseModel):
+    id: Optional[str] = Field(None, description="destinations.id; null for alias-table places not yet in the catalogue")
+    name: str = Field(..., examples=["Spiti Valley"])
+    state: Optional[str] = Field(None, examples=["Himachal Pradesh"])
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    in_season: bool = Field(False, description="Current month is in the destination's best_months")
+    match: str = Field(..., description="'prefix' or 'fuzzy' (typo-tolerant trigram match)")
+
+
+class DestinationSuggestResponse(BaseModel):
+    query: str
+    suggestions: list[DestinationSuggestion]
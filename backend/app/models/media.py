@@ -0,0 +1,32 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+
+class MediaUploadCreate(BaseModel):
+    size_bytes: int = Field(..., gt=0, description="Exact length of the file; the upload completes at this byte")
+    content_type: str = Field("application/octet-stream", max_length=100)
+    asset_type: Literal["audio", "video", "photo"]
+    trip_id: Optional[str] = None
+    recording_mode: Optional[str] = Field(None, max_length=40)
+    context_tag: Optional[str] = Field(None, max_length=40)
+    duration_sec: Optional[int] = Field(None, ge=0)
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    recorded_at: Optional[datetime] = None
+
+
+class MediaUploadSession(BaseModel):
+    upload_id: str
+    size_bytes: int
+    part_size: int = Field(..., description="Resume points fall on multiples of this")
+    received_bytes: int = Field(..., description="Send the next PUT with Upload-Offset set to this")
+
+
+class MediaUploadProgress(BaseModel):
+    received_bytes: int
+    size_bytes: int
+    complete: bool
+    asset_id: Optional[str] = Field(None, description="media_assets id, once complete")
+    storage_url: Optional[str] = None
+    sha256: Optional[str] = Field(None, description="Composite: sha256 of the parts' SHA-256 digests, '-<parts>'")
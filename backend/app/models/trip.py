@@ -1,7 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Literal, Optional
 from enum import Enum
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 import uuid
 
 
@@ -109,6 +109,10 @@ class ItineraryRequest(BaseModel):
         None,
         examples=[["crowded tourist spots"]],
     )
+    trip_id: Optional[str] = Field(
+        None,
+        description="Existing trip to (re)generate the itinerary for; a new trip is created when omitted",
+    )
 
 
 class Activity(BaseModel):
@@ -127,9 +131,13 @@ class Activity(BaseModel):
     )
 
 
+# ItineraryDay has a field called `date`, which shadows the type inside its class body
+DateType = date
+
+
 class ItineraryDay(BaseModel):
     day_number: int
-    date: Optional[date] = None
+    date: Optional[DateType] = None
     title: str = Field(..., examples=["Arrival in Kaza — First Glimpse of Spiti"])
     summary: str
     activities: list[Activity]
@@ -158,6 +166,11 @@ class ItineraryDay(BaseModel):
         default=[],
         description="Live / mock listings with real amenities and pricing",
     )
+    accommodation_status: Optional[Literal["pending"]] = Field(
+        None,
+        description="'pending' when the request deadline cut the live search short: options are "
+                    "placeholders, and a saved itinerary gets the live results in its next version",
+    )
 
 
 class PackingItem(BaseModel):
@@ -181,7 +194,57 @@ class ItineraryResponse(BaseModel):
     packing_list: list[PackingItem] = []
     key_tips: list[str] = []
     best_time_note: Optional[str] = None
-    generated_at: datetime = Field(default_factory=datetime.utcnow)
+    generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    # Raw Claude output, kept for persistence (itineraries.raw_llm_response) — never serialised
+    _raw_llm_response: Optional[str] = PrivateAttr(default=None)
+
+
+class ItineraryChanges(BaseModel):
+    """GET /itinerary/{id}/changes — exactly one of `patch` / `itinerary` is set."""
+    itinerary_id: str
+    from_version: int
+    to_version: int
+    patch: Optional[list[dict]] = Field(
+        None,
+        description="RFC 6902 operations (add/remove/replace) turning from_version into to_version",
+    )
+    itinerary: Optional[ItineraryResponse] = Field(
+        None,
+        description="Full payload, sent instead of a patch when that is smaller or from_version is unavailable",
+    )
+
+
+BATCH_MAX_ITEMS = 50
+
+
+class ItineraryBatchRequest(BaseModel):
+    items: list[ItineraryRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    mode: Literal["online", "offline"] = Field(
+        "online",
+        description="online: stream results as they complete; offline: submit to the "
+                    "Message Batches API (cheaper, results within 24 h) and collect later",
+    )
+
+
+class ItineraryBatchItem(BaseModel):
+    """One line of the NDJSON stream from POST /itinerary/generate:batch."""
+    index: int = Field(..., description="Position in the request's items")
+    status: Literal["ok", "error"]
+    itinerary: Optional[ItineraryResponse] = None
+    error: Optional[str] = None
+    duplicate_of: Optional[int] = Field(
+        None,
+        description="Set when this item repeated an earlier one and shares its generation",
+    )
+
+
+class ItineraryBatchStatus(BaseModel):
+    batch_id: str
+    status: str = Field(..., description="in_progress | canceling | ended")
+    items: int
+    unique_items: int
+    request_counts: dict[str, int] = {}
 
 
 class TripCreate(BaseModel):
@@ -203,3 +266,10 @@ class TripResponse(BaseModel):
     title: str
     status: str
     created_at: datetime
+    origin: Optional[str] = None
+    travel_style: Optional[TravelStyle] = None
+    num_travelers: int = 1
+    budget_inr: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    itinerary_id: Optional[str] = Field(None, description="GET /api/v1/itinerary/{itinerary_id} for the full plan")
+    itinerary_version: Optional[int] = None
@@ -1,4 +1,4 @@
-from app.services.accommodation.aggregator import AccommodationService, get_accommodation_service
+from app.services.accommodation.aggregator import AccommodationService, MultiSearchResult, get_accommodation_service
 from app.services.accommodation.base import (
     AccommodationOption,
     AccommodationProvider,
@@ -10,6 +10,7 @@ from app.services.accommodation.base import (
 __all__ = [
     "AccommodationService",
     "get_accommodation_service",
+    "MultiSearchResult",
     "AccommodationOption",
     "AccommodationProvider",
     "AccommodationSearchParams",
@@ -9,12 +9,17 @@ Provider order (highest to lowest priority):
 The service tries providers in order and returns the first non-empty result.
 If all providers return empty lists, it returns the mock result (guaranteed non-empty).
 
+Deadlines (app.core.deadline): provider HTTP timeouts are clamped to the
+request's deadline, and once it has passed only the final fallback is tried.
+search_multi returns at the deadline with what has completed; the locations
+still in flight are marked pending and get fallback options as placeholders.
+
 ──────────────────────────────────────────────────────────────────────────────
 To add a new provider (e.g. MakeMyTrip Affiliate, Expedia API):
 
   1. Create  app/services/accommodation/providers/mymmt.py
   2. Implement AccommodationProvider
-  3. Add it to PROVIDER_PRIORITY below (higher index = lower priority)
+  3. Add its "module:Class" path to PROVIDER_PRIORITY below (higher index = lower priority)
   4. Add its credentials to core/config.py and .env.example
   Nothing else needs to change.
 ──────────────────────────────────────────────────────────────────────────────
@@ -23,29 +28,72 @@ To add a new provider (e.g. MakeMyTrip Affiliate, Expedia API):
 from __future__ import annotations
 
 import asyncio
+import importlib
 import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import date
 
+from app.core import deadline, metrics, tracing
+from app.core.lazy import once
+from app.core.singleflight import SingleFlight
 from app.services.accommodation.base import (
     AccommodationOption,
     AccommodationProvider,
     AccommodationSearchParams,
     AccomType,
 )
-from app.services.accommodation.providers.amadeus import AmadeusHotelProvider
-from app.services.accommodation.providers.opentripmap import OpenTripMapProvider
-from app.services.accommodation.providers.mock import MockAccommodationProvider
 
 log = logging.getLogger(__name__)
 
 # ── Change this list to swap, add, or reorder providers ───────────────────────
-PROVIDER_PRIORITY: list[AccommodationProvider] = [
-    AmadeusHotelProvider(),
-    OpenTripMapProvider(),
-    MockAccommodationProvider(),     # Always last — guaranteed fallback
+# Import paths, not instances: provider modules (and httpx behind them) are only
+# imported when the first search runs, keeping `import app.main` cheap.
+PROVIDER_PRIORITY: list[str] = [
+    "app.services.accommodation.providers.amadeus:AmadeusHotelProvider",
+    "app.services.accommodation.providers.opentripmap:OpenTripMapProvider",
+    "app.services.accommodation.providers.mock:MockAccommodationProvider",  # Always last — guaranteed fallback
 ]
 
 
+def load_providers(paths: list[str] = PROVIDER_PRIORITY) -> list[AccommodationProvider]:
+    """Import and instantiate providers from "module:Class" paths, in order."""
+    providers: list[AccommodationProvider] = []
+    for path in paths:
+        module_name, _, class_name = path.partition(":")
+        providers.append(getattr(importlib.import_module(module_name), class_name)())
+    return providers
+
+
+# Set by share_searches(): results of identical searches reused for the rest of
+# the task (and tasks it starts) — batch generation, where many items stop in
+# the same towns on the same dates.
+_shared_searches: ContextVar[dict | None] = ContextVar("xplor_shared_accommodation_searches", default=None)
+
+
+def _search_key(params: AccommodationSearchParams) -> tuple:
+    return (
+        params.city_name.strip().lower(), params.check_in, params.check_out, params.num_guests,
+        params.budget_per_night_max_inr, tuple(sorted(t.value for t in params.preferred_types)),
+        params.lat, params.lng, params.city_code,
+    )
+
+
+@dataclass
+class MultiSearchResult:
+    """search_multi output: options per location; `pending` ones were cut off by the deadline."""
+
+    options: dict[str, list[AccommodationOption]]
+    pending: set[str] = field(default_factory=set)
+
+
+def _record_search(provider: str, outcome: str, started: float) -> None:
+    metrics.PROVIDER_SEARCH_SECONDS.labels(provider, outcome).observe(time.perf_counter() - started)
+    metrics.PROVIDER_SEARCHES.labels(provider, outcome).inc()
+
+
 class AccommodationService:
     """
     Searches accommodation across all available providers.
@@ -55,8 +103,28 @@ class AccommodationService:
         options = await service.search(params)
     """
 
-    def __init__(self, providers: list[AccommodationProvider] = PROVIDER_PRIORITY):
+    def __init__(self, providers: list[AccommodationProvider] | None = None):
         self._providers = providers
+        self._providers_lock = threading.Lock()   # the lifespan prewarm loads them from a worker thread
+        self._flights: SingleFlight[list[AccommodationOption]] = SingleFlight("accommodation_search", cancel_orphans=True)
+
+    @staticmethod
+    def share_searches(memo: dict) -> None:
+        """
+        Reuse results through `memo` for identical searches made by the current
+        task and the tasks it creates from here on. Give every batch its own
+        dict: the memo lives as long as the batch, not the process.
+        """
+        _shared_searches.set(memo)
+
+    @property
+    def providers(self) -> list[AccommodationProvider]:
+        """Providers in priority order; PROVIDER_PRIORITY is loaded on first use."""
+        if self._providers is None:
+            with self._providers_lock:
+                if self._providers is None:
+                    self._providers = load_providers()
+        return self._providers
 
     async def search(
         self, params: AccommodationSearchParams
@@ -65,22 +133,53 @@ class AccommodationService:
         Try each available provider in priority order.
         Returns results from the first provider that returns >= 1 option.
         Falls back to mock (always the last provider) if all others fail.
+
+        Identical searches already in flight are joined rather than repeated.
         """
-        for provider in self._providers:
-            if not provider.is_available:
-                log.debug("accommodation: skipping unavailable provider '%s'", provider.name)
-                continue
-            try:
-                results = await provider.search(params)
+        key = _search_key(params)
+        memo = _shared_searches.get()
+        if memo is not None:
+            hit = key in memo
+            metrics.cache_hit("accommodation_batch", hit)
+            if hit:
+                return list(memo[key])
+        results = await self._flights.do(key, lambda: self._search(params))
+        if memo is not None:
+            memo[key] = results
+        return list(results)
+
+    async def _search(self, params: AccommodationSearchParams) -> list[AccommodationOption]:
+        with tracing.span("accommodation.search", city=params.city_name):
+            fallback = self.providers[-1]
+            for provider in self.providers:
+                if not provider.is_available:
+                    log.debug("accommodation: skipping unavailable provider '%s'", provider.name)
+                    metrics.PROVIDER_SEARCHES.labels(provider.name, "skipped").inc()
+                    continue
+                if provider is not fallback and deadline.expired():
+                    metrics.PROVIDER_SEARCHES.labels(provider.name, "deadline").inc()
+                    continue
+                with tracing.span("accommodation.provider", provider=provider.name) as span:
+                    started = time.perf_counter()
+                    try:
+                        results = await provider.search(params)
+                    except Exception as e:
+                        log.warning("accommodation: provider '%s' raised: %s", provider.name, e)
+                        _record_search(provider.name, "error", started)
+                        span.set("outcome", "error")
+                        continue
+                    span.set("results", len(results))
+
                 if results:
+                    _record_search(provider.name, "ok", started)
+                    metrics.PROVIDER_RESULTS.labels(provider.name).observe(len(results))
                     log.info(
                         "accommodation: '%s' returned %d options for '%s'",
                         provider.name, len(results), params.city_name,
                     )
                     return results
+                _record_search(provider.name, "empty", started)
                 log.debug("accommodation: '%s' returned no results", provider.name)
-            except Exception as e:
-                log.warning("accommodation: provider '%s' raised: %s", provider.name, e)
 
         # Should never reach here (Mock always returns something), but be safe
         return []
@@ -93,46 +192,64 @@ class AccommodationService:
         num_guests: int = 1,
         budget_per_night_max_inr: int | None = None,
         preferred_types: list[AccomType] | None = None,
-    ) -> dict[str, list[AccommodationOption]]:
+    ) -> MultiSearchResult:
         """
         Search accommodation for multiple overnight locations in parallel.
-        Returns a mapping of {location_name: [options]}.
+        Returns the options per location.
 
         Used by ItineraryAgent to enrich multiple unique overnight stops in one call.
+        Under a deadline, returns when it passes: searches still running are
+        cancelled, and their locations are marked pending with fallback options.
         """
-        tasks = {
-            loc: self.search(
-                AccommodationSearchParams(
-                    city_name=loc,
-                    check_in=check_in,
-                    check_out=check_out,
-                    num_guests=num_guests,
-                    budget_per_night_max_inr=budget_per_night_max_inr,
-                    preferred_types=preferred_types or [],
-                )
+        metrics.SEARCH_MULTI_FANOUT.observe(len(locations))
+        params = {
+            loc: AccommodationSearchParams(
+                city_name=loc,
+                check_in=check_in,
+                check_out=check_out,
+                num_guests=num_guests,
+                budget_per_night_max_inr=budget_per_night_max_inr,
+                preferred_types=preferred_types or [],
             )
             for loc in locations
         }
-
-        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
-
-        output: dict[str, list[AccommodationOption]] = {}
-        for loc, result in zip(tasks.keys(), results):
-            if isinstance(result, Exception):
-                log.warning("search_multi failed for '%s': %s", loc, result)
-                output[loc] = []
+        tasks = {loc: asyncio.ensure_future(self.search(p)) for loc, p in params.items()}
+
+        # Cancelling this call cancels every search under it
+        running: set = set()
+        try:
+            if tasks:
+                _, running = await asyncio.wait(tasks.values(), timeout=deadline.remaining())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        result = MultiSearchResult(options={})
+        for loc, task in tasks.items():
+            if task in running:
+                result.pending.add(loc)
+                result.options[loc] = await self._placeholder(params[loc])
+            elif task.cancelled() or task.exception() is not None:
+                # A CancelledError here is a search cancelled from elsewhere: empty, like any failure
+                log.warning("search_multi failed for '%s': %s", loc, "cancelled" if task.cancelled() else task.exception())
+                result.options[loc] = []
             else:
-                output[loc] = result  # type: ignore[assignment]
+                result.options[loc] = task.result()
+        if result.pending:
+            metrics.SEARCH_MULTI_PENDING.inc(len(result.pending))
+            log.info("search_multi: deadline reached with %d/%d locations pending", len(result.pending), len(locations))
+        return result
 
-        return output
+    async def _placeholder(self, params: AccommodationSearchParams) -> list[AccommodationOption]:
+        fallback = self.providers[-1]
+        try:
+            return await asyncio.wait_for(fallback.search(params), timeout=deadline.MIN_TIMEOUT_S)
+        except Exception as e:
+            log.debug("accommodation: fallback '%s' failed for '%s': %s", fallback.name, params.city_name, e)
+            return []
 
 
 # ── Convenience singleton ──────────────────────────────────────────────────────
-_service: AccommodationService | None = None
-
-
+@once
 def get_accommodation_service() -> AccommodationService:
-    global _service
-    if _service is None:
-        _service = AccommodationService()
-    return _service
+    return AccommodationService()
@@ -4,7 +4,7 @@ Accommodation provider abstraction layer.
 To add a new provider:
   1. Create backend/app/services/accommodation/providers/yourprovider.py
   2. Implement AccommodationProvider (search + name + is_available)
-  3. Add it to PROVIDER_PRIORITY in aggregator.py
+  3. Add its "module:Class" path to PROVIDER_PRIORITY in aggregator.py
 
 No other file needs to change.
 """
@@ -22,8 +22,6 @@ import logging
 from dataclasses import dataclass
 from datetime import date
 
-import httpx
-
 from app.services.accommodation.base import (
     AccommodationOption,
     AccommodationProvider,
@@ -32,7 +30,9 @@ from app.services.accommodation.base import (
     PriceRange,
     _price_range_from_inr,
 )
+from app.core import metrics
 from app.core.config import get_settings
+from app.core.http import async_client
 
 log = logging.getLogger(__name__)
 
@@ -103,6 +103,31 @@ class _TokenCache:
 _token_cache = _TokenCache()
 
 
+async def get_token() -> str:
+    """OAuth2 client-credentials token, shared by every Amadeus API we call (hotels, flights)."""
+    if _token_cache.is_valid():
+        metrics.cache_hit("amadeus_token", True)
+        return _token_cache.token
+    metrics.cache_hit("amadeus_token", False)
+
+    s = get_settings()
+    async with async_client(timeout=10) as client:
+        resp = await client.post(
+            f"{s.amadeus_base_url}/v1/security/oauth2/token",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": s.amadeus_client_id,
+                "client_secret": s.amadeus_client_secret,
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        resp.raise_for_status()
+        body = resp.json()
+        _token_cache.token = body["access_token"]
+        _token_cache.expires_at = time.time() + body["expires_in"]
+        return _token_cache.token
+
+
 class AmadeusHotelProvider(AccommodationProvider):
     """
     Uses two Amadeus endpoints:
@@ -119,33 +144,12 @@ class AmadeusHotelProvider(AccommodationProvider):
         s = get_settings()
         return bool(s.amadeus_client_id and s.amadeus_client_secret)
 
-    async def _get_token(self) -> str:
-        if _token_cache.is_valid():
-            return _token_cache.token
-
-        s = get_settings()
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                f"{s.amadeus_base_url}/v1/security/oauth2/token",
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": s.amadeus_client_id,
-                    "client_secret": s.amadeus_client_secret,
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
-            resp.raise_for_status()
-            body = resp.json()
-            _token_cache.token = body["access_token"]
-            _token_cache.expires_at = time.time() + body["expires_in"]
-            return _token_cache.token
-
     async def _list_hotels(
         self, city_code: str, token: str, radius: int = 20
     ) -> list[str]:
         """Return up to 20 hotel IDs for the given IATA city code."""
         s = get_settings()
-        async with httpx.AsyncClient(timeout=15) as client:
+        async with async_client(timeout=15) as client:
             resp = await client.get(
                 f"{s.amadeus_base_url}/v1/reference-data/locations/hotels/by-city",
                 params={"cityCode": city_code, "radius": radius, "radiusUnit": "KM"},
@@ -166,7 +170,7 @@ class AmadeusHotelProvider(AccommodationProvider):
     ) -> list[dict]:
         """Fetch offers/pricing for given hotel IDs."""
         s = get_settings()
-        async with httpx.AsyncClient(timeout=20) as client:
+        async with async_client(timeout=20) as client:
             resp = await client.get(
                 f"{s.amadeus_base_url}/v3/shopping/hotel-offers",
                 params={
@@ -237,7 +241,7 @@ class AmadeusHotelProvider(AccommodationProvider):
                 log.debug("amadeus: no IATA code for '%s'", params.city_name)
                 return []
 
-            token = await self._get_token()
+            token = await get_token()
             hotel_ids = await self._list_hotels(city_code, token)
             if not hotel_ids:
                 return []
@@ -28,8 +28,6 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass
 
-import httpx
-
 from app.services.accommodation.base import (
     AccommodationOption,
     AccommodationProvider,
@@ -38,11 +36,10 @@ from app.services.accommodation.base import (
     PriceRange,
 )
 from app.core.config import get_settings
+from app.core.http import async_client
 
 log = logging.getLogger(__name__)
 
-BASE_URL = "https://api.opentripmap.com/0.1/en"
-
 # OpenTripMap kinds that correspond to lodging
 LODGING_KINDS = "accomodations"   # OTM uses this (intentional typo in their API)
 
@@ -134,10 +131,10 @@ class OpenTripMapProvider(AccommodationProvider):
     async def _fetch_places(
         self, lat: float, lng: float, radius_m: int = 5000
     ) -> list[dict]:
-        key = get_settings().opentripmap_api_key
-        async with httpx.AsyncClient(timeout=15) as client:
+        s = get_settings()
+        async with async_client(timeout=15) as client:
             resp = await client.get(
-                f"{BASE_URL}/places/radius",
+                f"{s.opentripmap_base_url}/places/radius",
                 params={
                     "radius": radius_m,
                     "lon": lng,
@@ -145,7 +142,7 @@ class OpenTripMapProvider(AccommodationProvider):
                     "kinds": LODGING_KINDS,
                     "limit": 20,
                     "format": "json",
-                    "apikey": key,
+                    "apikey": s.opentripmap_api_key,
                 },
             )
             if resp.status_code != 200:
@@ -154,11 +151,11 @@ class OpenTripMapProvider(AccommodationProvider):
             return resp.json() if isinstance(resp.json(), list) else []
 
     async def _fetch_detail(self, xid: str) -> dict:
-        key = get_settings().opentripmap_api_key
-        async with httpx.AsyncClient(timeout=10) as client:
+        s = get_settings()
+        async with async_client(timeout=10) as client:
             resp = await client.get(
-                f"{BASE_URL}/places/xid/{xid}",
-                params={"apikey": key},
+                f"{s.opentripmap_base_url}/places/xid/{xid}",
+                params={"apikey": s.opentripmap_api_key},
             )
             return resp.json() if resp.status_code == 200 else {}
 
@@ -179,7 +176,7 @@ class OpenTripMapProvider(AccommodationProvider):
             address_obj.get("city") or address_obj.get("town"),
             address_obj.get("state"),
         ])
-        address = ", ".join(address_parts) or params_city  # filled below
+        address = ", ".join(address_parts)  # blank → city name, patched in search()
 
         rate = place.get("rate", 0)
         stars = OTM_RATE_STARS.get(rate)
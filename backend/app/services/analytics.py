@@ -0,0 +1,223 @@
+"""
+Post analytics: batched snapshot ingestion with incremental rollups.
+
+  snapshots (≤ ANALYTICS_MAX_BATCH per transaction)
+        │
+        ▼
+  lock the batch's posts, read their latest snapshot ──► fold (NumPy, this batch only)
+                                                            │ newest snapshot per post
+                                                            │ delta = newest − stored latest
+                                                            ▼
+  post_analytics (raw rows) · post_analytics_latest · analytics_hourly · analytics_content_types
+                                                            │
+                                                            ▼
+                              persona_profiles.peak_post_times / best_content_types
+
+Counters from the platforms are cumulative. A post's contribution to a rollup
+is its latest snapshot, so each batch adds only what changed since the
+stored one. The work is proportional to the batch, never to post_analytics.
+A snapshot older than the stored latest (a late retry, a backfill) is kept
+as history but changes no rollup.
+
+Reads (`overview`) touch the rollups only: at most 168 hour rows plus a few
+content type rows per platform.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.models.analytics import AnalyticsOverview, ContentTypeStat, HourStat, PlatformAnalytics, PostSnapshot
+
+log = logging.getLogger(__name__)
+
+COUNTERS = ("reach", "impressions", "likes", "comments", "shares", "saves", "follower_delta", "video_views",
+            "watch_time_sec")
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+TOP_HOURS = 3
+
+
+@dataclass
+class Rollup:
+    """One batch, ready to write: rows for each table, in db/analytics.py column order."""
+
+    snapshots: list[tuple] = field(default_factory=list)
+    latest: list[tuple] = field(default_factory=list)
+    hourly: list[tuple] = field(default_factory=list)
+    content_types: list[tuple] = field(default_factory=list)
+    unknown_posts: int = 0
+    stale: int = 0
+
+
+def _aware(at: datetime) -> datetime:
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+
+
+def _canonical(snapshot: PostSnapshot) -> PostSnapshot | None:
+    """The snapshot with its post id in database form, or None when it cannot be a post id."""
+    try:
+        return snapshot.model_copy(update={"post_id": str(uuid.UUID(snapshot.post_id))})
+    except ValueError:
+        return None
+
+
+def _group(keys: list[tuple], values) -> list[tuple]:
+    """Sum `values` rows by key; keys whose sums are all zero are left out."""
+    import numpy as np
+
+    index: dict[tuple, int] = {}
+    codes = np.fromiter((index.setdefault(k, len(index)) for k in keys), dtype=np.int64, count=len(keys))
+    sums = np.zeros((len(index), values.shape[1]), dtype=np.int64)
+    np.add.at(sums, codes, values)
+    return [(*key, *row) for key, row in zip(index, sums.tolist()) if any(row)]
+
+
+def fold(snapshots: list[PostSnapshot], posts: dict[str, dict]) -> Rollup:
+    """
+    Turn a snapshot batch into table rows, given each post's state (see
+    db.analytics.ingest). Vectorised over the batch; Python only builds the
+    arrays and the row tuples.
+    """
+    import numpy as np
+
+    from app.db.analytics import LATEST_COLUMNS
+
+    known = [s for s in snapshots if s.post_id in posts]
+    rollup = Rollup(unknown_posts=len(snapshots) - len(known))
+    if not known:
+        return rollup
+
+    now = datetime.now(timezone.utc)
+    fetched_at = [_aware(s.fetched_at) if s.fetched_at else now for s in known]
+    rollup.snapshots = [
+        (s.post_id, posts[s.post_id]["user_id"], posts[s.post_id]["platform"], at, *(getattr(s, c) for c in COUNTERS))
+        for s, at in zip(known, fetched_at)
+    ]
+
+    # Newest snapshot per post: sort by (post, time), keep the last of each run
+    ids = np.array([s.post_id for s in known])
+    times = np.array([at.timestamp() for at in fetched_at])
+    raw = np.array([[getattr(s, c) for c in COUNTERS] for s in known], dtype=np.int64)
+    order = np.lexsort((times, ids))
+    last = order[np.r_[ids[order][1:] != ids[order][:-1], True]]
+
+    # The LATEST_COLUMNS view of the counters: engagement = likes + comments + shares + saves
+    current = np.column_stack([raw[last, 0], raw[last, 1], raw[last, 2:6].sum(axis=1), raw[last, 6:9]])
+
+    post_ids = ids[last].tolist()
+    stored = [posts[p]["latest"] for p in post_ids]
+    is_new = np.array([s is None for s in stored])
+    previous = np.array([[0] * len(LATEST_COLUMNS) if s is None else [s[c] for c in LATEST_COLUMNS] for s in stored],
+                        dtype=np.int64)
+    stored_at = np.array([-np.inf if s is None else s["fetched_at"].timestamp() for s in stored])
+
+    fresh = times[last] > stored_at
+    rollup.stale = int((~fresh).sum())
+    if not fresh.any():
+        return rollup
+
+    delta = (current - previous)[fresh]
+    counted = is_new[fresh].astype(np.int64)[:, None]
+    fresh_ids = [p for p, f in zip(post_ids, fresh.tolist()) if f]
+    fresh_at = [fetched_at[i] for i, f in zip(last.tolist(), fresh.tolist()) if f]
+    meta = [posts[p] for p in fresh_ids]
+
+    rollup.latest = [
+        (p, m["user_id"], m["platform"], m["post_type"], m["how"], at, *row)
+        for p, m, at, row in zip(fresh_ids, meta, fresh_at, current[fresh].tolist())
+    ]
+    # delta columns: 0 reach, 1 impressions, 2 engagement, 3 follower_delta, 4 video_views, 5 watch_time_sec
+    rollup.hourly = _group(
+        [(m["user_id"], m["platform"], m["how"]) for m in meta],
+        np.hstack([counted, delta[:, [0, 1, 2]]]),
+    )
+    rollup.content_types = _group(
+        [(m["user_id"], m["platform"], m["post_type"]) for m in meta],
+        np.hstack([counted, delta[:, [0, 1, 2, 4, 5]]]),
+    )
+    return rollup
+
+
+async def ingest_snapshots(snapshots: list[PostSnapshot], user_id: str | None = None) -> Rollup:
+    """
+    Store a batch of snapshots and fold it into the rollups. With a user_id,
+    snapshots for anyone else's posts are dropped (RLS). Batches over
+    ANALYTICS_MAX_BATCH are split; the returned counts cover all of them.
+    """
+    from app.db.analytics import ingest
+
+    s = get_settings()
+    valid = [c for c in map(_canonical, snapshots) if c is not None]
+    total = Rollup(unknown_posts=len(snapshots) - len(valid))
+    metrics.ANALYTICS_SNAPSHOTS.labels("unknown_post").inc(total.unknown_posts)
+    snapshots = valid
+    for start in range(0, len(snapshots), s.analytics_max_batch):
+        batch = snapshots[start:start + s.analytics_max_batch]
+        started = time.perf_counter()
+        result = await ingest(
+            sorted({snap.post_id for snap in batch}), s.analytics_timezone, lambda posts: fold(batch, posts),
+            user_id=user_id, persona_min_posts=s.analytics_min_posts,
+        )
+        metrics.ANALYTICS_INGEST_SECONDS.observe(time.perf_counter() - started)
+        metrics.ANALYTICS_SNAPSHOTS.labels("stored").inc(len(result.snapshots))
+        metrics.ANALYTICS_SNAPSHOTS.labels("unknown_post").inc(result.unknown_posts)
+        total.snapshots += result.snapshots
+        total.latest += result.latest
+        total.hourly += result.hourly
+        total.content_types += result.content_types
+        total.unknown_posts += result.unknown_posts
+        total.stale += result.stale
+    log.info("analytics: %d snapshots stored, %d posts updated, %d unknown",
+             len(total.snapshots), len(total.latest), total.unknown_posts)
+    return total
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def summarise(hourly: list[dict], types: list[dict], min_posts: int, tz: str) -> AnalyticsOverview:
+    """Rollup rows → per-platform totals, best hours of the week and content types, best first."""
+    platforms = sorted({r["platform"] for r in types} | {r["platform"] for r in hourly})
+    out = []
+    for platform in platforms:
+        type_rows = [r for r in types if r["platform"] == platform]
+        hour_rows = [r for r in hourly if r["platform"] == platform and r["posts"] >= min_posts]
+        posts = sum(r["posts"] for r in type_rows)
+        reach = sum(r["reach"] for r in type_rows)
+        engagement = sum(r["engagement"] for r in type_rows)
+        best = sorted(hour_rows, key=lambda r: r["engagement"] / r["posts"], reverse=True)[:TOP_HOURS]
+        content_types = [
+            ContentTypeStat(
+                post_type=r["post_type"], posts=r["posts"], avg_reach=_ratio(r["reach"], r["posts"]),
+                avg_engagement=_ratio(r["engagement"], r["posts"]), engagement_rate=_ratio(r["engagement"], r["reach"]),
+                avg_watch_time_sec=_ratio(r["watch_time_sec"], r["posts"]),
+            )
+            for r in type_rows
+        ]
+        content_types.sort(key=lambda c: (c.posts >= min_posts, c.avg_engagement), reverse=True)
+        out.append(PlatformAnalytics(
+            platform=platform, posts=posts, reach=reach, impressions=sum(r["impressions"] for r in type_rows),
+            engagement=engagement, engagement_rate=_ratio(engagement, reach),
+            best_hours=[
+                HourStat(day=DAYS[r["how"] // 24], hour=r["how"] % 24, posts=r["posts"],
+                         avg_reach=_ratio(r["reach"], r["posts"]), avg_engagement=_ratio(r["engagement"], r["posts"]))
+                for r in best
+            ],
+            content_types=content_types,
+        ))
+    return AnalyticsOverview(timezone=tz, platforms=out)
+
+
+async def overview(user_id: str, platform: str | None = None) -> AnalyticsOverview:
+    from app.db.analytics import rollups
+
+    s = get_settings()
+    hourly, types = await rollups(user_id, platform)
+    return summarise(hourly, types, s.analytics_min_posts, s.analytics_timezone)
@@ -0,0 +1,368 @@
+"""
+Destination autocomplete — an in-process index, so the "where to?" box never
+waits on Postgres.
+
+  q ──► normalise ──┬─► prefix trie ───────────┐
+                    │   names, words, aliases, ├─► rank ──► top N
+                    │   states                 │
+                    └─► trigram fallback ──────┘   match + popularity + in season
+                        typos: "rishikesj"
+
+Built at startup from the alias tables the accommodation providers already keep
+(CITY_TO_IATA, DESTINATION_COORDS), then filled from `destinations` and kept
+fresh incrementally: each refresh pulls only destination rows and trips created
+since the last watermark and merges them into the live index. Reads reach
+DESTINATIONS_REFRESH_OVERLAP_S behind the watermark, so a row that commits late
+or shares the watermark's timestamp is not lost; ids the index already merged
+inside that window are skipped.
+
+Every trie node keeps just its TRIE_NODE_CAP most popular entries, so "k" costs
+the same as "kaza"; in-season re-ranking happens among those candidates. A
+lookup is a dict walk plus a sort of ≤32 items — single-digit µs for prefixes,
+tens of µs when the trigram fallback runs.
+
+Single-threaded by design: refreshes mutate the index on the event loop between
+requests, and suggest() never awaits, so readers never see a half-applied merge.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from app.core.config import get_settings
+
+log = logging.getLogger(__name__)
+
+TRIE_NODE_CAP = 32
+TRIGRAM_THRESHOLD = 0.3     # same default as pg_trgm's similarity()
+MIN_FUZZY_CHARS = 3
+
+# Ranking weights: a match on the start of the display name beats a match on a
+# later word or alias, which beats a fuzzy match; popularity and season break ties.
+NAME_PREFIX_WEIGHT = 2.0
+TERM_PREFIX_WEIGHT = 1.5
+FUZZY_WEIGHT = 1.0
+POPULARITY_WEIGHT = 0.25
+SEASON_BOOST = 0.75
+
+# IATA codes that serve several distinct towns rather than one city under
+# several names — their CITY_TO_IATA keys are not aliases of each other.
+SHARED_AIRPORTS = {"IXB"}   # Bagdogra: Darjeeling, Siliguri
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalise(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(term: str) -> set[str]:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space."""
+    out: set[str] = set()
+    for word in term.split():
+        padded = f"  {word} "
+        out.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return out
+
+
+@dataclass
+class Destination:
+    name: str
+    state: str | None = None
+    destination_id: str | None = None
+    lat: float | None = None
+    lng: float | None = None
+    best_months: frozenset[int] = frozenset()
+    aliases: set[str] = field(default_factory=set)
+    trips: int = 0
+
+    @property
+    def popularity(self) -> float:
+        return math.log1p(self.trips)
+
+
+@dataclass
+class Suggestion:
+    destination: Destination
+    score: float
+    match: str          # 'prefix' | 'fuzzy'
+    in_season: bool
+
+
+class _Node:
+    __slots__ = ("children", "ranked")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.ranked: list[tuple[float, int]] = []   # (-popularity, entry id), best first
+
+
+class DestinationIndex:
+    def __init__(self) -> None:
+        self._entries: list[Destination] = []
+        self._by_key: dict[str, int] = {}                       # normalised name/alias → entry
+        self._by_coords: dict[tuple[float, float], int] = {}
+        self._names: list[str] = []                             # normalised display name per entry
+        self._paths: dict[int, dict[int, _Node]] = defaultdict(dict)  # entry → trie nodes listing it
+        self._root = _Node()
+        self._term_entry: list[int] = []                        # term id → entry id
+        self._term_trigram_count: list[int] = []
+        self._indexed_terms: set[tuple[str, int]] = set()
+        self._trigrams: dict[str, list[int]] = defaultdict(list)  # trigram → term ids
+        self.destinations_watermark: datetime | None = None
+        self.trips_watermark: datetime | None = None
+        self.destination_ids: dict[str, datetime] = {}          # merged ids a refresh may read again
+        self.trip_ids: dict[str, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, name: str) -> int | None:
+        return self._by_key.get(normalise(name))
+
+    def get(self, entry_id: int) -> Destination:
+        return self._entries[entry_id]
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+
+    def add(self, dest: Destination) -> int:
+        """Insert `dest`, or merge it into the entry that already owns its name, an alias or its coordinates."""
+        keys = [normalise(k) for k in (dest.name, *dest.aliases)]
+        keys = [k for k in keys if k]
+        existing = next((self._by_key[k] for k in keys if k in self._by_key), None)
+        if existing is None and dest.lat is not None and dest.lng is not None:
+            existing = self._by_coords.get((dest.lat, dest.lng))
+
+        if existing is None:
+            entry_id = len(self._entries)
+            self._entries.append(Destination(dest.name, dest.state, dest.destination_id, dest.lat, dest.lng,
+                                             dest.best_months, set(), dest.trips))
+            self._names.append(normalise(dest.name))
+        else:
+            entry_id = existing
+            self._merge(self._entries[entry_id], dest)
+            self._names[entry_id] = normalise(self._entries[entry_id].name)
+
+        entry = self._entries[entry_id]
+        for key in keys:
+            if key != self._names[entry_id]:
+                entry.aliases.add(key)
+            self._by_key.setdefault(key, entry_id)
+            self._index_term(key, entry_id)
+        # The state is a search term ("himachal" lists its destinations), not a name: find() never returns it
+        state = normalise(entry.state or "")
+        if state:
+            self._index_term(state, entry_id)
+        if entry.lat is not None and entry.lng is not None:
+            self._by_coords.setdefault((entry.lat, entry.lng), entry_id)
+        return entry_id
+
+    def _merge(self, entry: Destination, incoming: Destination) -> None:
+        # A catalogue row outranks an alias-table placeholder: adopt its display name
+        if incoming.destination_id and not entry.destination_id:
+            entry.aliases.add(normalise(entry.name))
+            entry.name = incoming.name
+            entry.destination_id = incoming.destination_id
+        entry.state = entry.state or incoming.state
+        if entry.lat is None:
+            entry.lat, entry.lng = incoming.lat, incoming.lng
+        entry.best_months = entry.best_months or incoming.best_months
+
+    def bump(self, entry_id: int, trips: int) -> None:
+        """Add `trips` to an entry's popularity and re-rank it wherever it appears."""
+        self._entries[entry_id].trips += trips
+        for node in self._paths[entry_id].values():
+            self._rank(node, entry_id)
+
+    def _index_term(self, term: str, entry_id: int) -> None:
+        if (term, entry_id) in self._indexed_terms:
+            return
+        self._indexed_terms.add((term, entry_id))
+
+        term_id = len(self._term_entry)
+        tris = trigrams(term)
+        self._term_entry.append(entry_id)
+        self._term_trigram_count.append(len(tris))
+        for tri in tris:
+            self._trigrams[tri].append(term_id)
+
+        # Index every word start so "kutch" finds "Rann of Kutch"
+        starts = [0] + [m.end() for m in re.finditer(" ", term)]
+        for start in starts:
+            node = self._root
+            for ch in term[start:]:
+                node = node.children.setdefault(ch, _Node())
+                self._paths[entry_id][id(node)] = node
+                self._rank(node, entry_id)
+
+    def _rank(self, node: _Node, entry_id: int) -> None:
+        ranked = node.ranked
+        for i, (_, eid) in enumerate(ranked):
+            if eid == entry_id:
+                del ranked[i]
+                break
+        bisect.insort(ranked, (-self._entries[entry_id].popularity, entry_id))
+        if len(ranked) > TRIE_NODE_CAP:
+            ranked.pop()
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    def suggest(self, query: str, limit: int = 8, month: int | None = None) -> list[Suggestion]:
+        q = normalise(query)
+        if not q:
+            return []
+        month = month or date.today().month
+
+        matches: dict[int, tuple[float, str]] = {}
+        node: _Node | None = self._root
+        for ch in q:
+            node = node.children.get(ch)
+            if node is None:
+                break
+        if node is not None:
+            for _, entry_id in node.ranked:
+                weight = NAME_PREFIX_WEIGHT if self._names[entry_id].startswith(q) else TERM_PREFIX_WEIGHT
+                matches[entry_id] = (weight, "prefix")
+
+        if len(matches) < limit and len(q) >= MIN_FUZZY_CHARS:
+            for entry_id, similarity in self._fuzzy(q).items():
+                if entry_id not in matches:
+                    matches[entry_id] = (FUZZY_WEIGHT * similarity, "fuzzy")
+
+        out = []
+        for entry_id, (weight, kind) in matches.items():
+            dest = self._entries[entry_id]
+            in_season = month in dest.best_months
+            score = weight + POPULARITY_WEIGHT * dest.popularity + (SEASON_BOOST if in_season else 0.0)
+            out.append(Suggestion(dest, score, kind, in_season))
+        out.sort(key=lambda s: s.score, reverse=True)
+        return out[:limit]
+
+    def _fuzzy(self, q: str) -> dict[int, float]:
+        q_tris = trigrams(q)
+        shared: Counter[int] = Counter()
+        for tri in q_tris:
+            for term_id in self._trigrams.get(tri, ()):
+                shared[term_id] += 1
+
+        best: dict[int, float] = {}
+        for term_id, n in shared.items():
+            similarity = n / (len(q_tris) + self._term_trigram_count[term_id] - n)
+            if similarity >= TRIGRAM_THRESHOLD:
+                entry_id = self._term_entry[term_id]
+                best[entry_id] = max(similarity, best.get(entry_id, 0.0))
+        return best
+
+
+# ── Sources ────────────────────────────────────────────────────────────────────
+
+def static_destinations() -> list[Destination]:
+    """Places the accommodation providers already know, with their alternate names."""
+    from app.services.accommodation.providers.amadeus import CITY_TO_IATA
+    from app.services.accommodation.providers.opentripmap import DESTINATION_COORDS
+
+    by_code: dict[str, list[str]] = defaultdict(list)
+    for city, code in CITY_TO_IATA.items():
+        by_code[code].append(city)
+
+    out: list[Destination] = []
+    for code, cities in by_code.items():
+        groups = [[c] for c in cities] if code in SHARED_AIRPORTS else [cities]
+        for names in groups:
+            lat, lng = DESTINATION_COORDS.get(names[0], (None, None))
+            out.append(Destination(names[0].title(), lat=lat, lng=lng, aliases=set(names[1:])))
+    for name, (lat, lng) in DESTINATION_COORDS.items():
+        out.append(Destination(name.title(), lat=lat, lng=lng))
+    return out
+
+
+async def refresh(index: DestinationIndex) -> None:
+    """Merge destination rows and trip counts created since the index's watermarks."""
+    from app.db import is_configured
+    from app.db.destinations import destinations_since, trip_counts_since
+
+    if not is_configured():
+        return
+    overlap_s = get_settings().destinations_refresh_overlap_s
+
+    added = 0
+    for r in await destinations_since(index.destinations_watermark, overlap_s):
+        destination_id = str(r["id"])
+        if destination_id in index.destination_ids:
+            continue
+        index.destination_ids[destination_id] = r["created_at"]
+        index.add(Destination(
+            name=r["name"], state=r["state"], destination_id=destination_id,
+            lat=r["lat"], lng=r["lng"], best_months=frozenset(r["best_months"] or ()),
+        ))
+        added += 1
+        if index.destinations_watermark is None or r["created_at"] > index.destinations_watermark:
+            index.destinations_watermark = r["created_at"]
+    _forget_before(index.destination_ids, index.destinations_watermark, overlap_s)
+
+    trips = 0
+    for r in await trip_counts_since(index.trips_watermark, overlap_s):
+        new = r["trips"]
+        for trip_id, created_at in zip(r["ids"], r["created"]):
+            if str(trip_id) in index.trip_ids:
+                new -= 1
+            else:
+                index.trip_ids[str(trip_id)] = created_at
+        entry_id = index.find(r["name"])
+        if entry_id is not None and new:
+            index.bump(entry_id, new)
+        trips += new
+        if index.trips_watermark is None or r["latest"] > index.trips_watermark:
+            index.trips_watermark = r["latest"]
+    _forget_before(index.trip_ids, index.trips_watermark, overlap_s)
+
+    if added or trips:
+        log.info("destination index refreshed: +%d destinations, +%d trips, %d entries", added, trips, len(index))
+
+
+def _forget_before(seen: dict[str, datetime], watermark: datetime | None, overlap_s: float) -> None:
+    """Drop ids older than the next read's overlap window: it can no longer return them."""
+    if watermark is None:
+        return
+    cutoff = watermark - timedelta(seconds=overlap_s)
+    for key in [k for k, created_at in seen.items() if created_at < cutoff]:
+        del seen[key]
+
+
+async def refresh_loop() -> None:
+    """Lifespan task: build off the event loop, then refresh every DESTINATIONS_REFRESH_S."""
+    index = await asyncio.to_thread(get_destination_index)
+    while True:
+        try:
+            await refresh(index)
+        except Exception as e:
+            log.warning("destination index refresh failed: %s", e)
+        await asyncio.sleep(get_settings().destinations_refresh_s)
+
+
+# ── Singleton ──────────────────────────────────────────────────────────────────
+
+_index: DestinationIndex | None = None
+_build_lock = threading.Lock()
+
+
+def get_destination_index() -> DestinationIndex:
+    global _index
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                index = DestinationIndex()
+                for dest in static_destinations():
+                    index.add(dest)
+                _index = index
+    return _index
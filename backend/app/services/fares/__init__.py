@@ -0,0 +1,14 @@
+from app.services.fares.alerts import AlertRun, alert_loop, run_due
+from app.services.fares.base import FareProvider, FareQuery, FareQuote
+from app.services.fares.service import FareService, get_fare_service
+
+__all__ = [
+    "FareService",
+    "get_fare_service",
+    "FareProvider",
+    "FareQuery",
+    "FareQuote",
+    "AlertRun",
+    "alert_loop",
+    "run_due",
+]
@@ -0,0 +1,169 @@
+"""
+Fare alerts: one fare lookup per route and day, however many alerts watch it.
+
+  fare_alerts (next_check_at ≤ now) ──► claim ≤ FARE_ALERT_CLAIM_LIMIT (lease)
+        │
+        ▼
+  group by (route type, origin, destination, travel date)
+        │                                   ≤ FARE_ALERT_LOOKUP_CONCURRENCY at once
+        ▼
+  FareService.lowest per group (cached FARE_CACHE_TTL_S, joined while in flight)
+        │
+        ▼
+  every alert at once (NumPy): price ≤ target? next check?
+        │
+        ▼
+  one bulk update of current_price_inr / notified / next_check_at
+  + a nudge_log row ('fare_alert') per alert that triggered
+
+Popular routes are watched by many users for the same dates. Looking each
+alert up on its own would spend the provider quota once per alert; grouped,
+it costs once per route and day.
+
+Re-checks are adaptive. The interval is FARE_ALERT_INTERVAL_PER_DAY_S per
+day left before travel, clamped to [FARE_ALERT_MIN_INTERVAL_S,
+FARE_ALERT_MAX_INTERVAL_S], with ±10% jitter so a route's alerts drift apart
+instead of bunching into one lookup storm. Fares move fastest close to
+departure, so that is when alerts are checked most. A lookup that found no
+price is retried after FARE_ALERT_RETRY_S. An alert that triggered is not
+checked again until the user re-arms it. Alerts whose date has passed are
+switched off.
+
+Lookups run at Priority.BACKGROUND, behind interactive requests at each
+provider host.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.upstream import Priority, upstream_priority
+from app.services.fares.base import FareQuery, FareQuote
+from app.services.fares.service import get_fare_service
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class AlertRun:
+    alerts: int = 0
+    lookups: int = 0
+    priced: int = 0
+    triggered: int = 0
+
+
+def group_alerts(alerts: list[dict]) -> tuple[list[FareQuery], list[int]]:
+    """The distinct queries, and for each alert the index of its query."""
+    index: dict[tuple, int] = {}
+    queries: list[FareQuery] = []
+    codes = []
+    for alert in alerts:
+        query = FareQuery(alert["route_type"], alert["origin"], alert["destination"], alert["travel_date"])
+        i = index.get(query.key())
+        if i is None:
+            i = index[query.key()] = len(queries)
+            queries.append(query)
+        codes.append(i)
+    return queries, codes
+
+
+def check_intervals_s(days_left, found):
+    """Seconds to each alert's next check (NumPy arrays in, array out)."""
+    import numpy as np
+
+    s = get_settings()
+    interval = np.clip(days_left * s.fare_alert_interval_per_day_s, s.fare_alert_min_interval_s,
+                       s.fare_alert_max_interval_s)
+    interval = np.where(found, interval, s.fare_alert_retry_s)
+    return interval * np.random.uniform(0.9, 1.1, size=interval.shape)
+
+
+def evaluate(
+    alerts: list[dict], codes: list[int], quotes: list[FareQuote | None], now: datetime,
+) -> tuple[list[tuple], list[tuple[str, str]]]:
+    """Settle rows for every alert and nudges for those that triggered, in one vectorised pass."""
+    import numpy as np
+
+    code = np.asarray(codes, dtype=np.int64)
+    group_price = np.array([q.price_inr if q else np.nan for q in quotes], dtype=np.float64)
+    price = group_price[code]
+    target = np.array([a["target_price_inr"] for a in alerts], dtype=np.float64)
+    found = ~np.isnan(price)
+    hit = found & (price <= target)
+
+    travel = np.array([a["travel_date"] for a in alerts], dtype="datetime64[D]")
+    days_left = (travel - np.datetime64(now.date(), "D")).astype(np.float64)
+    next_check = check_intervals_s(days_left, found)
+
+    rows, nudges = [], []
+    for i, alert in enumerate(alerts):
+        quote = quotes[codes[i]]
+        rows.append((
+            alert["id"], quote.price_inr if quote else None, quote.provider if quote else None, bool(hit[i]),
+            now + timedelta(seconds=float(next_check[i])),
+        ))
+        if hit[i]:
+            nudges.append((alert["user_id"], _message(alert, quote)))
+    return rows, nudges
+
+
+def _message(alert: dict, quote: FareQuote) -> str:
+    mode = "Flights" if alert["route_type"] == "flight" else "Trains"
+    return (f"{mode} {alert['origin']} → {alert['destination']} on {alert['travel_date']:%d %b} "
+            f"are down to ₹{quote.price_inr:,}, under your ₹{alert['target_price_inr']:,} target.")
+
+
+async def run_due(limit: int) -> AlertRun:
+    """Claim up to `limit` due alerts, look their routes up once each, settle them all."""
+    from app.db.fares import claim_due_alerts, settle_alerts
+
+    s = get_settings()
+    started = time.perf_counter()
+    alerts = await claim_due_alerts(limit, s.fare_alert_lease_s)
+    if not alerts:
+        return AlertRun()
+
+    queries, codes = group_alerts(alerts)
+    service = get_fare_service()
+    slots = asyncio.Semaphore(max(1, s.fare_alert_lookup_concurrency))
+
+    async def lookup(query: FareQuery) -> FareQuote | None:
+        async with slots:
+            return await service.lowest(query)
+
+    with upstream_priority(Priority.BACKGROUND):
+        quotes = await asyncio.gather(*(lookup(q) for q in queries))
+
+    rows, nudges = evaluate(alerts, codes, quotes, datetime.now(timezone.utc))
+    await settle_alerts(rows, nudges)
+
+    priced = sum(1 for row in rows if row[1] is not None)
+    for outcome, count in (("triggered", len(nudges)), ("above_target", priced - len(nudges)),
+                           ("no_price", len(rows) - priced)):
+        if count:
+            metrics.FARE_ALERT_CHECKS.labels(outcome).inc(count)
+    for size in Counter(codes).values():
+        metrics.FARE_ALERT_GROUP_SIZE.observe(size)
+    metrics.FARE_ALERT_RUN_SECONDS.observe(time.perf_counter() - started)
+    log.info("fare alerts: %d checked with %d lookups, %d priced, %d triggered",
+             len(alerts), len(queries), priced, len(nudges))
+    return AlertRun(len(alerts), len(queries), priced, len(nudges))
+
+
+async def alert_loop() -> None:
+    """Lifespan task: check due alerts every FARE_ALERT_POLL_S, again at once while claims come back full."""
+    s = get_settings()
+    while True:
+        await asyncio.sleep(s.fare_alert_poll_s)
+        try:
+            while (await run_due(s.fare_alert_claim_limit)).alerts == s.fare_alert_claim_limit:
+                pass
+        except Exception as e:
+            log.warning("fare alert run failed: %s", e)
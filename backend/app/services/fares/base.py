@@ -0,0 +1,72 @@
+"""
+Fare provider abstraction layer, modelled on accommodation/base.py.
+
+To add a new provider:
+  1. Create backend/app/services/fares/providers/yourprovider.py
+  2. Implement FareProvider (name + route_types + is_available + lowest_fare)
+  3. Add its "module:Class" path to PROVIDER_PRIORITY in service.py
+
+No other file needs to change.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class FareQuery:
+    """One route on one day: what a fare_alerts row asks about."""
+
+    route_type: str                         # 'flight' | 'train'
+    origin: str                             # city name or code, as the user entered it
+    destination: str
+    travel_date: date
+
+    def key(self) -> tuple:
+        return (self.route_type, self.origin.strip().lower(), self.destination.strip().lower(), self.travel_date)
+
+
+@dataclass
+class FareQuote:
+    """The lowest fare a provider found for a query. All monetary values are in INR."""
+
+    provider: str
+    price_inr: int
+    offers: int = 1                         # how many offers the lowest was picked from
+    carrier: Optional[str] = None
+    booking_url: Optional[str] = None
+
+
+class FareProvider(ABC):
+    """
+    Abstract base for every fare data source.
+
+    Implementing a new provider:
+      - Override `name`, `route_types`, `is_available`, and `lowest_fare`
+      - lowest_fare() must return None on any error or when nothing is on sale
+        (never raise to the service)
+      - Prices must be converted to INR before returning
+    """
+
+    @property
+    @abstractmethod
+    def name(self) -> str: ...
+
+    @property
+    @abstractmethod
+    def route_types(self) -> frozenset[str]:
+        """The fare_alerts.route_type values this provider can price."""
+        ...
+
+    @property
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Return False when required credentials are missing."""
+        ...
+
+    @abstractmethod
+    async def lowest_fare(self, query: FareQuery) -> Optional[FareQuote]: ...
@@ -0,0 +1,91 @@
+"""
+Amadeus flight fare provider.
+
+Free tier (sandbox): https://developers.amadeus.com/self-service/category/flights
+  - Flight Offers Search: GET /v2/shopping/flight-offers
+  - Quota               : a monthly free allowance, then billed per call
+  - Auth                : the same OAuth2 token as the hotel APIs
+
+One call returns up to MAX_OFFERS offers for one adult on one day. The lowest
+grandTotal is the route's fare. Cities resolve through the hotel provider's
+IATA table, and a three-letter code is used as is.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from app.core.config import get_settings
+from app.core.http import async_client
+from app.services.accommodation.providers.amadeus import CITY_TO_IATA, get_token
+from app.services.fares.base import FareProvider, FareQuery, FareQuote
+
+log = logging.getLogger(__name__)
+
+MAX_OFFERS = 20
+
+
+def resolve_airport(place: str) -> str | None:
+    key = place.strip()
+    if len(key) == 3 and key.isalpha():
+        return key.upper()
+    return CITY_TO_IATA.get(key.lower())
+
+
+class AmadeusFlightProvider(FareProvider):
+    @property
+    def name(self) -> str:
+        return "amadeus"
+
+    @property
+    def route_types(self) -> frozenset[str]:
+        return frozenset({"flight"})
+
+    @property
+    def is_available(self) -> bool:
+        s = get_settings()
+        return bool(s.amadeus_client_id and s.amadeus_client_secret)
+
+    async def lowest_fare(self, query: FareQuery) -> Optional[FareQuote]:
+        origin, destination = resolve_airport(query.origin), resolve_airport(query.destination)
+        if not origin or not destination:
+            log.debug("amadeus flights: no airport for %s → %s", query.origin, query.destination)
+            return None
+        s = get_settings()
+        try:
+            token = await get_token()
+            async with async_client(timeout=20) as client:
+                resp = await client.get(
+                    f"{s.amadeus_base_url}/v2/shopping/flight-offers",
+                    params={
+                        "originLocationCode": origin,
+                        "destinationLocationCode": destination,
+                        "departureDate": query.travel_date.isoformat(),
+                        "adults": 1,
+                        "currencyCode": "INR",
+                        "max": MAX_OFFERS,
+                    },
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+            if resp.status_code != 200:
+                log.warning("amadeus flights %s → %s: HTTP %d", origin, destination, resp.status_code)
+                return None
+            offers = resp.json().get("data", [])
+        except Exception as e:
+            log.warning("amadeus flights %s → %s failed: %s", origin, destination, e)
+            return None
+        return self._lowest(offers)
+
+    def _lowest(self, offers: list[dict]) -> Optional[FareQuote]:
+        priced = []
+        for offer in offers:
+            try:
+                priced.append((float(offer["price"]["grandTotal"]), offer))
+            except (KeyError, TypeError, ValueError):
+                continue
+        if not priced:
+            return None
+        price, best = min(priced, key=lambda p: p[0])
+        carriers = best.get("validatingAirlineCodes") or [None]
+        return FareQuote(provider=self.name, price_inr=round(price), offers=len(priced), carrier=carriers[0])
@@ -0,0 +1,54 @@
+"""
+Mock fare provider.
+
+No API key required. Prices flights and trains from a hash of the route, so
+the same route gets the same base fare every run. Fares rise in the last
+three weeks before travel, as they do on real routes, so alerts trigger and
+stop triggering as dates approach.
+
+Used when:
+  - Running locally without API credentials
+  - In CI/test environments
+
+Never used in production (`is_available` is False there): an invented fare
+must never reach a user as an alert.
+"""
+
+from __future__ import annotations
+
+import zlib
+from datetime import date
+from typing import Optional
+
+from app.core.config import get_settings
+from app.services.fares.base import FareProvider, FareQuery, FareQuote
+
+# Base one-way fare ranges, INR
+_BASE = {"flight": (3_000, 9_000), "train": (400, 2_500)}
+_LATE_BOOKING_DAYS = 21
+
+
+def mock_fare(query: FareQuery, today: date | None = None) -> int:
+    low, high = _BASE[query.route_type]
+    route = f"{query.route_type}:{query.key()[1]}:{query.key()[2]}"
+    base = low + zlib.crc32(route.encode()) % (high - low)
+    days_left = (query.travel_date - (today or date.today())).days
+    surge = 1 + max(0, _LATE_BOOKING_DAYS - days_left) * 0.03   # up to +63% on the day
+    return round(base * surge)
+
+
+class MockFareProvider(FareProvider):
+    @property
+    def name(self) -> str:
+        return "mock"
+
+    @property
+    def route_types(self) -> frozenset[str]:
+        return frozenset(_BASE)
+
+    @property
+    def is_available(self) -> bool:
+        return not get_settings().is_production
+
+    async def lowest_fare(self, query: FareQuery) -> Optional[FareQuote]:
+        return FareQuote(provider=self.name, price_inr=mock_fare(query))
@@ -0,0 +1,112 @@
+"""
+FareService — provider priority chain with a shared quote cache.
+
+Provider order (highest to lowest priority):
+  1. Amadeus — flight offers, requires credentials
+  2. Mock    — flights and trains, development only (never in production)
+
+For a query the service tries the providers that price its route type, in
+order, and returns the first quote. Quotes (and "nothing found") are cached
+for FARE_CACHE_TTL_S. Identical lookups in flight are joined, so a route that
+many alerts and users watch costs one upstream call per TTL.
+
+Train fares: no provider yet. RailYatri has no public fare API, so train
+alerts get no price in production and are rechecked after FARE_ALERT_RETRY_S.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core import metrics, tracing
+from app.core.config import get_settings
+from app.core.lazy import once
+from app.core.singleflight import SingleFlight
+from app.services.fares.base import FareProvider, FareQuery, FareQuote
+
+log = logging.getLogger(__name__)
+
+# Import paths, not instances: provider modules (and httpx behind them) load on the first lookup
+PROVIDER_PRIORITY: list[str] = [
+    "app.services.fares.providers.amadeus:AmadeusFlightProvider",
+    "app.services.fares.providers.mock:MockFareProvider",
+]
+
+MAX_CACHED_QUOTES = 10_000
+
+
+def load_providers(paths: list[str] = PROVIDER_PRIORITY) -> list[FareProvider]:
+    """Import and instantiate providers from "module:Class" paths, in order."""
+    providers: list[FareProvider] = []
+    for path in paths:
+        module_name, _, class_name = path.partition(":")
+        providers.append(getattr(importlib.import_module(module_name), class_name)())
+    return providers
+
+
+class FareService:
+    def __init__(self, providers: list[FareProvider] | None = None, ttl_s: float | None = None):
+        self._providers = providers
+        self._providers_lock = threading.Lock()   # first use may come from a worker thread and the loop at once
+        self._ttl_s = ttl_s
+        self._quotes: OrderedDict[tuple, tuple[float, Optional[FareQuote]]] = OrderedDict()
+        self._flights: SingleFlight[Optional[FareQuote]] = SingleFlight("fare_lookup")
+
+    @property
+    def providers(self) -> list[FareProvider]:
+        """Providers in priority order; PROVIDER_PRIORITY is loaded on first use."""
+        if self._providers is None:
+            with self._providers_lock:
+                if self._providers is None:
+                    self._providers = load_providers()
+        return self._providers
+
+    async def lowest(self, query: FareQuery) -> Optional[FareQuote]:
+        """The lowest fare for the query, from cache or the first provider that has one."""
+        key = query.key()
+        entry = self._quotes.get(key)
+        hit = entry is not None and entry[0] > time.monotonic()
+        metrics.cache_hit("fare_quote", hit)
+        if hit:
+            self._quotes.move_to_end(key)
+            return entry[1]
+        return await self._flights.do(key, lambda: self._lookup(query))
+
+    async def _lookup(self, query: FareQuery) -> Optional[FareQuote]:
+        quote = None
+        with tracing.span("fares.lookup", route_type=query.route_type):
+            for provider in self.providers:
+                if query.route_type not in provider.route_types:
+                    continue
+                if not provider.is_available:
+                    metrics.FARE_LOOKUPS.labels(provider.name, "skipped").inc()
+                    continue
+                started = time.perf_counter()
+                try:
+                    quote = await provider.lowest_fare(query)
+                except Exception as e:
+                    log.warning("fares: provider '%s' raised: %s", provider.name, e)
+                    quote, outcome = None, "error"
+                else:
+                    outcome = "ok" if quote is not None else "empty"
+                metrics.FARE_LOOKUPS.labels(provider.name, outcome).inc()
+                metrics.FARE_LOOKUP_SECONDS.labels(provider.name).observe(time.perf_counter() - started)
+                if quote is not None:
+                    break
+        ttl_s = self._ttl_s if self._ttl_s is not None else get_settings().fare_cache_ttl_s
+        self._quotes[query.key()] = (time.monotonic() + ttl_s, quote)
+        self._quotes.move_to_end(query.key())
+        while len(self._quotes) > MAX_CACHED_QUOTES:
+            self._quotes.popitem(last=False)
+        return quote
+
+
+# ── Convenience singleton ──────────────────────────────────────────────────────
+@once
+def get_fare_service() -> FareService:
+    return FareService()
@@ -1,12 +1,30 @@
-import anthropic
-from functools import lru_cache
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from app.core import metrics, tracing
 from app.core.config import get_settings
+from app.core.lazy import once
+
+if TYPE_CHECKING:
+    import anthropic
+
 
+@once
+def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    # Imported here: the SDK is ~100 ms of import time that cold starts
+    # shouldn't pay before the first LLM call (or the lifespan prewarm).
+    import anthropic
 
-@lru_cache
-def get_anthropic_client() -> anthropic.Anthropic:
     settings = get_settings()
-    return anthropic.Anthropic(api_key=settings.anthropic_api_key)
+    return anthropic.AsyncAnthropic(
+        api_key=settings.anthropic_api_key,
+        base_url=settings.anthropic_base_url or None,
+    )
 
 
 # Model IDs — change here to upgrade across the whole app
@@ -14,6 +32,18 @@ CLAUDE_PRIMARY = "claude-sonnet-4-6"      # Main reasoning tasks
 CLAUDE_FAST = "claude-haiku-4-5-20251001" # Short, cheap tasks (captions, summaries)
 
 
+def _record_usage(model: str, usage) -> None:
+    for kind, attr in (
+        ("input", "input_tokens"),
+        ("output", "output_tokens"),
+        ("cache_read", "cache_read_input_tokens"),
+        ("cache_write", "cache_creation_input_tokens"),
+    ):
+        count = getattr(usage, attr, None)
+        if count:
+            metrics.LLM_TOKENS.labels(model, kind).observe(count)
+
+
 async def complete(
     prompt: str,
     system: str = "",
@@ -21,18 +51,50 @@ async def complete(
     max_tokens: int = 4096,
     temperature: float = 0.7,
 ) -> str:
-    """Single-turn LLM call. Returns the text response."""
+    """
+    Single-turn LLM call. Returns the text response.
+
+    Streams the response so time-to-first-token can be measured; the caller
+    still receives the complete text.
+    """
     client = get_anthropic_client()
     messages = [{"role": "user", "content": prompt}]
 
-    response = client.messages.create(
-        model=model,
-        max_tokens=max_tokens,
-        temperature=temperature,
-        system=system,
-        messages=messages,
-    )
-    return response.content[0].text
+    with tracing.span("llm.complete", model=model, max_tokens=max_tokens) as span:
+        started = time.perf_counter()
+        first_token_at: float | None = None
+        chunks: list[str] = []
+        try:
+            async with client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system,
+                messages=messages,
+            ) as stream:
+                async for text in stream.text_stream:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    chunks.append(text)
+                final = await stream.get_final_message()
+        except asyncio.CancelledError:
+            # Leaving the stream context closes the connection: generation stops being billed here
+            metrics.CANCELLED_WORK.labels("llm").inc()
+            span.set("llm.output_chunks", len(chunks))
+            raise
+        except Exception:
+            metrics.LLM_ERRORS.labels(model).inc()
+            raise
+
+        finished = time.perf_counter()
+        metrics.LLM_DURATION_SECONDS.labels(model).observe(finished - started)
+        if first_token_at is not None:
+            metrics.LLM_TTFT_SECONDS.labels(model).observe(first_token_at - started)
+            span.set("llm.ttft_ms", round((first_token_at - started) * 1000, 1))
+        span.set("llm.input_tokens", final.usage.input_tokens)
+        span.set("llm.output_tokens", final.usage.output_tokens)
+        _record_usage(model, final.usage)
+        return "".join(chunks)
 
 
 async def complete_json(
@@ -42,8 +104,66 @@ async def complete_json(
     max_tokens: int = 4096,
 ) -> str:
     """LLM call that instructs the model to return valid JSON only."""
-    json_system = (
+    return await complete(prompt, system=_json_system(system), model=model, max_tokens=max_tokens, temperature=0)
+
+
+def _json_system(system: str) -> str:
+    return (
         (system + "\n\n" if system else "")
         + "You must respond with valid JSON only. No markdown code fences, no explanation — pure JSON."
     )
-    return await complete(prompt, system=json_system, model=model, max_tokens=max_tokens, temperature=0)
+
+
+# ── Message Batches ────────────────────────────────────────────────────────────
+# Offline path for bulk work nobody is waiting on (catalogue trips): half the
+# price of complete_json, no pressure on interactive concurrency, results within
+# 24 h. Still a beta namespace in the SDK version we pin.
+
+@dataclass
+class BatchResult:
+    custom_id: str
+    text: str | None = None
+    error: str | None = None
+
+
+async def submit_json_batch(
+    prompts: dict[str, str],
+    system: str = "",
+    model: str = CLAUDE_PRIMARY,
+    max_tokens: int = 4096,
+) -> str:
+    """Queue one complete_json-equivalent request per custom_id → prompt; returns the batch id."""
+    system = _json_system(system)
+    batch = await get_anthropic_client().beta.messages.batches.create(requests=[
+        {
+            "custom_id": custom_id,
+            "params": {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": 0,
+                "system": system,
+                "messages": [{"role": "user", "content": prompt}],
+            },
+        }
+        for custom_id, prompt in prompts.items()
+    ])
+    return batch.id
+
+
+async def batch_status(batch_id: str) -> tuple[str, dict[str, int]]:
+    """('in_progress' | 'canceling' | 'ended', request counts by state)."""
+    batch = await get_anthropic_client().beta.messages.batches.retrieve(batch_id)
+    return batch.processing_status, batch.request_counts.model_dump()
+
+
+async def batch_results(batch_id: str) -> AsyncIterator[BatchResult]:
+    """Results of an ended batch, in no particular order."""
+    async for entry in await get_anthropic_client().beta.messages.batches.results(batch_id):
+        result = entry.result
+        if result.type == "succeeded":
+            message = result.message
+            _record_usage(message.model, message.usage)
+            yield BatchResult(entry.custom_id, text="".join(b.text for b in message.content if b.type == "text"))
+        else:
+            detail = getattr(getattr(result, "error", None), "error", None)
+            yield BatchResult(entry.custom_id, error=getattr(detail, "message", None) or result.type)
@@ -0,0 +1,253 @@
+"""
+Resumable streaming uploads of recordings into R2.
+
+  POST   /media/uploads        size + metadata ──► multipart upload started, session row
+  PUT    /media/uploads/{id}   Upload-Offset: n, body = bytes n… ──► parts ──► R2
+  GET    /media/uploads/{id}   the committed offset to resume from
+  DELETE /media/uploads/{id}   abort
+
+A vlog can run to hundreds of MB, so the body is never read whole. Request
+chunks fill one part buffer at a time. A full part is handed to an upload task
+and the next one starts filling:
+
+  request.stream() ──► part buffer ──► ≤ MEDIA_UPLOAD_PARALLEL_PARTS uploads in flight
+                                           │ (reading waits for a free slot, so
+                                           │  TCP backpressure reaches the client)
+                                           ▼
+                        committed in part order ──► media_uploads (compare-and-set)
+
+Peak memory per upload is (MEDIA_UPLOAD_PARALLEL_PARTS + 1) × part size.
+
+Each part is hashed in a worker thread while the previous one uploads. The
+MD5 goes to R2 as Content-MD5, so a part corrupted in transit is rejected.
+The SHA-256 is kept for the composite checksum stored on the asset. A
+whole-file digest cannot outlive a dropped connection, so the composite
+(sha256 of the part digests, "-<parts>", like S3's multipart checksums) is
+what resumes.
+
+Resuming: only whole parts are committed. A connection that drops mid-part
+loses that partial part, and the client resends from `received_bytes`
+(always a multiple of the part size). The last part may be short. When
+the final byte is committed the object is assembled and the media_assets
+row written; a PUT at offset == size with an empty body retries just that
+step.
+
+One PUT at a time: a PUT claims the session before reading the body and
+renews the claim before every part it sends. Two PUTs of the same part
+would otherwise both reach the store. The part would keep whichever body
+landed last, while the session recorded the other one's ETag. A second PUT
+gets 409 until the first one ends or its claim lapses
+(MEDIA_UPLOAD_CLAIM_TTL_S).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.models.media import MediaUploadCreate
+from app.services.object_store import get_object_store
+
+log = logging.getLogger(__name__)
+
+
+class UploadConflict(Exception):
+    """Upload-Offset is not where the session is (or another request moved it)."""
+
+    def __init__(self, received_bytes: int):
+        super().__init__(f"upload is at byte {received_bytes}")
+        self.received_bytes = received_bytes
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+@dataclass
+class UploadProgress:
+    received_bytes: int
+    size_bytes: int
+    asset_id: str | None = None
+    storage_url: str | None = None
+    sha256: str | None = None
+
+    @property
+    def complete(self) -> bool:
+        return self.asset_id is not None
+
+
+def object_key(user_id: str, trip_id: str | None, content_type: str) -> str:
+    ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
+    return f"media/{user_id}/{trip_id or 'unsorted'}/{uuid.uuid4()}{ext}"
+
+
+def composite_sha256(parts: list[dict]) -> str:
+    digest = hashlib.sha256(b"".join(bytes.fromhex(p["sha256"]) for p in parts))
+    return f"{digest.hexdigest()}-{len(parts)}"
+
+
+def _digests(data: bytes) -> tuple[bytes, str]:
+    return hashlib.md5(data).digest(), hashlib.sha256(data).hexdigest()
+
+
+async def start_upload(user_id: str, body: MediaUploadCreate) -> dict:
+    from app.db.media import create_upload
+
+    s = get_settings()
+    if body.size_bytes > s.media_upload_max_bytes:
+        raise UploadTooLarge(f"{body.size_bytes} bytes is over the {s.media_upload_max_bytes} byte limit")
+    key = object_key(user_id, body.trip_id, body.content_type)
+    store_upload_id = await get_object_store().create_multipart(key, body.content_type)
+    asset = body.model_dump(mode="json", exclude={"size_bytes", "content_type"})
+    return await create_upload(user_id, key, store_upload_id, body.size_bytes, s.media_upload_part_bytes, asset)
+
+
+async def receive(session: dict, offset: int, chunks: AsyncIterator[bytes]) -> UploadProgress:
+    """
+    Stream `chunks` (the bytes from `offset` on) into parts. Commits every whole
+    part that reached the store, even when the stream fails part-way; then
+    re-raises. Completes the upload once the last byte is committed.
+    UploadConflict when another PUT holds the session.
+    """
+    from app.db.media import claim_upload, release_upload
+
+    if offset != session["received_bytes"]:
+        raise UploadConflict(session["received_bytes"])
+    writer = str(uuid.uuid4())
+    if not await claim_upload(session["user_id"], session["id"], writer, get_settings().media_upload_claim_ttl_s,
+                              offset=offset):
+        metrics.MEDIA_UPLOADS.labels("conflict").inc()
+        raise UploadConflict(session["received_bytes"])
+    try:
+        return await _receive(session, offset, chunks, writer)
+    finally:
+        await asyncio.shield(release_upload(session["user_id"], session["id"], writer))
+
+
+async def _receive(session: dict, offset: int, chunks: AsyncIterator[bytes], writer: str) -> UploadProgress:
+    from app.db.media import advance_upload, claim_upload
+
+    store = get_object_store()
+    claim_ttl_s = get_settings().media_upload_claim_ttl_s
+    size, part_size = session["size_bytes"], session["part_size"]
+    slots = asyncio.Semaphore(max(1, get_settings().media_upload_parallel_parts))
+    commit_lock = asyncio.Lock()
+    finished: dict[int, dict] = {}
+    tasks: list[asyncio.Task] = []
+    failure: list[BaseException] = []
+
+    async def commit() -> None:
+        async with commit_lock:
+            received, parts = session["received_bytes"], []
+            n = len(session["parts"]) + 1
+            while n in finished:
+                parts.append(finished.pop(n))
+                received += parts[-1]["size"]
+                n += 1
+            if not parts:
+                return
+            expected = session["received_bytes"]
+            if not await advance_upload(session["user_id"], session["id"], writer, expected, received, parts):
+                raise UploadConflict(expected)
+            session["received_bytes"] = received
+            session["parts"] = session["parts"] + parts
+            metrics.MEDIA_UPLOAD_BYTES.inc(sum(p["size"] for p in parts))
+
+    async def upload(number: int, data: bytes) -> None:
+        try:
+            started = time.perf_counter()
+            md5, sha256 = await asyncio.to_thread(_digests, data)
+            # Claim the part before sending it: once our claim lapsed, another PUT may own it
+            if not await claim_upload(session["user_id"], session["id"], writer, claim_ttl_s, part=number):
+                raise UploadConflict(session["received_bytes"])
+            etag = await store.upload_part(session["object_key"], session["store_upload_id"], number, data, md5)
+            metrics.MEDIA_UPLOAD_PART_SECONDS.observe(time.perf_counter() - started)
+            finished[number] = {"n": number, "etag": etag, "sha256": sha256, "size": len(data)}
+            await commit()
+        except BaseException as e:
+            failure.append(e)
+            raise
+        finally:
+            slots.release()
+
+    first_part = len(session["parts"]) + 1
+
+    async def dispatch(data: bytes) -> None:
+        await slots.acquire()   # bounded memory: stop reading until a part slot is free
+        if failure:
+            slots.release()
+            raise failure[0]
+        tasks.append(asyncio.create_task(upload(first_part + len(tasks), data)))
+
+    position = offset
+    buffer = bytearray()
+    try:
+        try:
+            async for chunk in chunks:
+                if position + len(chunk) > size:
+                    raise UploadTooLarge(f"body runs past the declared {size} bytes")
+                position += len(chunk)
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    with memoryview(buffer) as view:
+                        part = bytes(view[:part_size])
+                    del buffer[:part_size]
+                    await dispatch(part)
+                if failure:
+                    raise failure[0]
+            if buffer and position == size:   # the short last part
+                await dispatch(bytes(buffer))
+                buffer.clear()
+        finally:
+            # Whole parts already sent are kept even if the stream broke
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+    except UploadConflict:
+        metrics.MEDIA_UPLOADS.labels("conflict").inc()
+        raise
+    except Exception:
+        metrics.MEDIA_UPLOADS.labels("interrupted").inc()
+        raise
+
+    if session["received_bytes"] < size:
+        return UploadProgress(session["received_bytes"], size)
+    return await _complete(session)
+
+
+async def _complete(session: dict) -> UploadProgress:
+    from app.db.media import asset_by_url, finish_upload
+
+    store = get_object_store()
+    parts = session["parts"]
+    await store.complete_multipart(
+        session["object_key"], session["store_upload_id"], [(p["n"], p["etag"]) for p in parts],
+    )
+    url = store.public_url(session["object_key"])
+    sha256 = composite_sha256(parts)
+    asset_id = await finish_upload(session["user_id"], session["id"], url, sha256)
+    if asset_id is None:
+        # Another request finished the session first; the object is assembled either way
+        asset_id = await asset_by_url(session["user_id"], url)
+    metrics.MEDIA_UPLOADS.labels("completed").inc()
+    log.info("upload %s complete: %d bytes in %d parts", session["id"], session["size_bytes"], len(parts))
+    return UploadProgress(session["size_bytes"], session["size_bytes"], asset_id, url, sha256)
+
+
+async def abort_upload(session: dict) -> None:
+    from app.db.media import delete_upload
+
+    try:
+        await get_object_store().abort_multipart(session["object_key"], session["store_upload_id"])
+    finally:
+        await delete_upload(session["user_id"], session["id"])
+    metrics.MEDIA_UPLOADS.labels("aborted").inc()
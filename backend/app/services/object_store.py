@@ -0,0 +1,105 @@
+"""
+S3-compatible object storage: Cloudflare R2 in production, MinIO locally.
+
+Only the multipart calls the upload pipeline needs. boto3 is synchronous, so
+every call runs in a worker thread; the client is thread-safe and built on
+first use, keeping the SDK out of cold-start imports.
+
+R2_ENDPOINT_URL overrides the R2 endpoint derived from R2_ACCOUNT_ID:
+docker-compose's MinIO is http://localhost:9000.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+
+class ObjectStore(ABC):
+    @abstractmethod
+    async def create_multipart(self, key: str, content_type: str) -> str:
+        """Start a multipart upload; returns its upload id."""
+
+    @abstractmethod
+    async def upload_part(self, key: str, upload_id: str, number: int, data: bytes, md5: bytes) -> str:
+        """Upload one part (1-based number); the store verifies the MD5. Returns the part's ETag."""
+
+    @abstractmethod
+    async def complete_multipart(self, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+        """Assemble (number, etag) parts into the object."""
+
+    @abstractmethod
+    async def abort_multipart(self, key: str, upload_id: str) -> None: ...
+
+    @abstractmethod
+    def public_url(self, key: str) -> str: ...
+
+
+class R2Store(ObjectStore):
+    def __init__(self, bucket: str, public_base: str, max_connections: int):
+        self.bucket = bucket
+        self.public_base = public_base.rstrip("/")
+        self.max_connections = max_connections
+
+    @property
+    def client(self) -> BaseClient:
+        return _s3_client(self.max_connections)
+
+    async def create_multipart(self, key: str, content_type: str) -> str:
+        response = await asyncio.to_thread(
+            self.client.create_multipart_upload, Bucket=self.bucket, Key=key, ContentType=content_type,
+        )
+        return response["UploadId"]
+
+    async def upload_part(self, key: str, upload_id: str, number: int, data: bytes, md5: bytes) -> str:
+        response = await asyncio.to_thread(
+            self.client.upload_part,
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data,
+            ContentMD5=base64.b64encode(md5).decode(),
+        )
+        return response["ETag"]
+
+    async def complete_multipart(self, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+        await asyncio.to_thread(
+            self.client.complete_multipart_upload,
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in parts]},
+        )
+
+    async def abort_multipart(self, key: str, upload_id: str) -> None:
+        await asyncio.to_thread(self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def public_url(self, key: str) -> str:
+        return f"{self.public_base}/{key}" if self.public_base else f"r2://{self.bucket}/{key}"
+
+
+@lru_cache
+def _s3_client(max_connections: int) -> BaseClient:
+    import boto3
+    from botocore.config import Config
+
+    s = get_settings()
+    return boto3.client(
+        "s3",
+        endpoint_url=s.r2_endpoint_url or f"https://{s.r2_account_id}.r2.cloudflarestorage.com",
+        aws_access_key_id=s.r2_access_key_id,
+        aws_secret_access_key=s.r2_secret_access_key,
+        region_name="auto",
+        config=Config(signature_version="s3v4", max_pool_connections=max_connections,
+                      retries={"max_attempts": 3, "mode": "standard"}),
+    )
+
+
+@lru_cache
+def get_object_store() -> ObjectStore:
+    s = get_settings()
+    # Parts of every concurrent upload share the pool; a few spare for the control calls
+    return R2Store(s.r2_bucket_name, s.r2_public_url, 4 * s.media_upload_parallel_parts + 4)
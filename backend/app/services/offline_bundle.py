@@ -0,0 +1,271 @@
+"""
+Offline trip bundle: everything the app needs without signal, in one file.
+
+  ┌─ header, 16 B ─────────────────────────────────────────────────────────┐
+  │ "XPB1" │ u16 format │ u16 sections │ u32 itinerary version │ u32 0     │
+  ├─ directory: sections × 12 B ───────────────────────────────────────────┤
+  │ tag[4] │ u32 offset │ u32 length                                       │
+  ├─ STRS ─────────────────────────────────────────────────────────────────┤
+  │ u32 n │ u32 offsets[n + 1] │ UTF-8 blob                                │
+  ├─ META DAYS ACTS SUGG OPTS PACK TIPS SHOT ──────────────────────────────┤
+  │ u32 rows │ u16 cols │ u16 0 │ cols × (u32 name │ u8 type │ 3 × pad)    │
+  │ rows × cols × i32, row-major                                           │
+  └────────────────────────────────────────────────────────────────────────┘
+
+All integers are little-endian. Sections start on 8-byte boundaries and table
+data on 4-byte ones, so a memory-mapped file is read in place through
+Int32Array / DataView views (mobile/store/offlineBundle.ts). There is no parse
+step, and strings are decoded only when accessed. Tables are self-describing:
+column names live in the string table, so old apps skip columns they do not
+know.
+
+Strings are interned: every distinct string is stored once and referenced by
+index (towns, amenities and providers repeat across days). Coordinates are
+micro-degrees, delta-encoded down each column. The file itself is left
+uncompressed so it stays mappable; compression happens in transit through the
+negotiated br/gzip of app.core.encoding, which the small deltas and
+deduplicated strings help.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from datetime import date, timedelta
+from typing import Any, Iterable
+
+MAGIC = b"XPB1"
+FORMAT_VERSION = 1
+MEDIA_TYPE = "application/vnd.xplor360.bundle"
+
+NULL = -(2 ** 31)           # INT32_MIN: null for every numeric column type
+NO_STRING = -1
+LIST_SEPARATOR = "\x1f"     # ASCII unit separator, never present in display text
+
+# Column types
+STR, INT, BOOL, COORD, DATE, DECI, LIST = range(7)
+
+_EPOCH = date(1970, 1, 1)
+_HEADER = struct.Struct("<4sHHII")
+_DIRECTORY_ENTRY = struct.Struct("<4sII")
+_TABLE_HEAD = struct.Struct("<IHH")
+_COLUMN = struct.Struct("<IB3x")
+
+# name → columns; row dicts are read by column name
+TABLES: dict[str, tuple[tuple[str, int], ...]] = {
+    "META": (
+        ("itinerary_id", STR), ("trip_id", STR), ("trip_title", STR), ("destination", STR),
+        ("origin", STR), ("start_date", DATE), ("end_date", DATE), ("duration_days", INT),
+        ("trip_type", STR), ("travel_style", STR), ("total_estimated_cost_inr", INT),
+        ("summary", STR), ("best_time_note", STR), ("generated_at", STR),
+    ),
+    "DAYS": (
+        ("day_number", INT), ("date", DATE), ("title", STR), ("summary", STR),
+        ("transport_for_day", STR), ("estimated_cost_inr", INT), ("weather_note", STR),
+        ("overnight_location", STR),
+    ),
+    "ACTS": (
+        ("day", INT), ("time", STR), ("title", STR), ("description", STR), ("location", STR),
+        ("lat", COORD), ("lng", COORD), ("duration_minutes", INT), ("cost_inr", INT),
+        ("booking_url", STR), ("content_opportunity", STR),
+    ),
+    "SUGG": (
+        ("day", INT), ("tier", STR), ("name", STR), ("description", STR),
+        ("estimated_price_per_night_inr", INT), ("area", STR), ("notable_for", STR),
+    ),
+    "OPTS": (
+        ("day", INT), ("id", STR), ("name", STR), ("type", STR), ("provider", STR),
+        ("address", STR), ("price_range", STR), ("price_per_night_inr", INT), ("rating", DECI),
+        ("review_count", INT), ("lat", COORD), ("lng", COORD), ("amenities", LIST),
+        ("booking_url", STR), ("image_url", STR), ("distance_km", DECI),
+    ),
+    "PACK": (("category", STR), ("item", STR), ("essential", BOOL)),
+    "TIPS": (("tip", STR),),
+    "SHOT": (
+        ("id", STR), ("title", STR), ("description", STR), ("lat", COORD), ("lng", COORD),
+        ("best_time", STR), ("framing_tip", STR), ("shot_type", STR), ("viral_count", INT),
+    ),
+}
+
+
+class BundleError(ValueError):
+    pass
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":   # pragma: no cover
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pad(buf: bytearray, alignment: int) -> None:
+    buf.extend(b"\0" * (-len(buf) % alignment))
+
+
+class _Strings:
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+
+    def ref(self, value: str | None) -> int:
+        if value is None:
+            return NO_STRING
+        return self.index.setdefault(value, len(self.index))
+
+    def encode(self) -> bytes:
+        blobs = [s.encode() for s in self.index]      # dicts keep insertion (= index) order
+        offsets = array("I", [0])
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        return struct.pack("<I", len(blobs)) + _little_endian(offsets) + b"".join(blobs)
+
+
+def _table(columns: tuple[tuple[str, int], ...], rows: list[dict], strings: _Strings) -> bytes:
+    head = _TABLE_HEAD.pack(len(rows), len(columns), 0) + b"".join(
+        _COLUMN.pack(strings.ref(name), kind) for name, kind in columns
+    )
+    cells = array("i")
+    previous = {name: 0 for name, kind in columns if kind == COORD}
+    for row in rows:
+        for name, kind in columns:
+            value = row.get(name)
+            if kind in (STR, LIST):
+                if kind == LIST and value is not None:
+                    value = LIST_SEPARATOR.join(value)
+                cells.append(strings.ref(value))
+            elif value is None:
+                cells.append(NULL)
+            elif kind == COORD:
+                micro = round(value * 1_000_000)
+                cells.append(micro - previous[name])
+                previous[name] = micro
+            elif kind == DATE:
+                cells.append((date.fromisoformat(value) if isinstance(value, str) else value).toordinal()
+                             - _EPOCH.toordinal())
+            elif kind == DECI:
+                cells.append(round(value * 100))
+            else:
+                cells.append(int(value))
+    return head + _little_endian(cells)
+
+
+def _rows(itinerary: dict, trip: dict, shot_guides: Iterable[dict]) -> dict[str, list[dict]]:
+    days = itinerary.get("days") or []
+    children: dict[str, list[dict]] = {"ACTS": [], "SUGG": [], "OPTS": []}
+    for i, day in enumerate(days):
+        for table, field in (("ACTS", "activities"), ("SUGG", "accommodation_suggestions"),
+                             ("OPTS", "accommodation_options")):
+            children[table].extend({**item, "day": i} for item in day.get(field) or [])
+    return {
+        "META": [{**itinerary, "trip_id": trip.get("id"), "trip_title": trip.get("title")}],
+        "DAYS": days,
+        **children,
+        "PACK": itinerary.get("packing_list") or [],
+        "TIPS": [{"tip": tip} for tip in itinerary.get("key_tips") or []],
+        "SHOT": list(shot_guides),
+    }
+
+
+def encode_bundle(itinerary: dict, version: int, trip: dict | None = None,
+                  shot_guides: Iterable[dict] = ()) -> bytes:
+    """
+    Bundle for one itinerary version. `itinerary` is the ItineraryResponse JSON
+    (as served and snapshotted); `trip` supplies id and title.
+    """
+    strings = _Strings()
+    tables = {tag: _table(TABLES[tag], rows, strings)
+              for tag, rows in _rows(itinerary, trip or {}, shot_guides).items()}
+    sections = {"STRS": strings.encode(), **tables}
+
+    out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections), version, 0))
+    directory_at = len(out)
+    out.extend(b"\0" * (_DIRECTORY_ENTRY.size * len(sections)))
+    for i, (tag, payload) in enumerate(sections.items()):
+        _pad(out, 8)
+        _DIRECTORY_ENTRY.pack_into(out, directory_at + i * _DIRECTORY_ENTRY.size,
+                                   tag.encode(), len(out), len(payload))
+        out.extend(payload)
+    return bytes(out)
+
+
+# ── Reading ────────────────────────────────────────────────────────────────────
+# The app has its own reader; this one backs tests and tooling.
+
+def _read_table(data: memoryview, offset: int, strings: list[str]) -> list[dict]:
+    rows, ncols, _ = _TABLE_HEAD.unpack_from(data, offset)
+    offset += _TABLE_HEAD.size
+    columns = []
+    for _ in range(ncols):
+        name, kind = _COLUMN.unpack_from(data, offset)
+        columns.append((strings[name], kind))
+        offset += _COLUMN.size
+    cells = array("i")
+    cells.frombytes(data[offset:offset + 4 * rows * ncols])
+    if sys.byteorder == "big":   # pragma: no cover
+        cells.byteswap()
+
+    out = []
+    previous = {name: 0 for name, kind in columns if kind == COORD}
+    for r in range(rows):
+        row: dict[str, Any] = {}
+        for c, (name, kind) in enumerate(columns):
+            cell = cells[r * ncols + c]
+            if kind in (STR, LIST):
+                value = None if cell == NO_STRING else strings[cell]
+                if kind == LIST:
+                    value = value.split(LIST_SEPARATOR) if value else []
+                row[name] = value
+            elif cell == NULL:
+                row[name] = None
+            elif kind == COORD:
+                previous[name] += cell
+                row[name] = previous[name] / 1_000_000
+            elif kind == DATE:
+                row[name] = (_EPOCH + timedelta(days=cell)).isoformat()
+            elif kind == DECI:
+                row[name] = cell / 100
+            elif kind == BOOL:
+                row[name] = bool(cell)
+            else:
+                row[name] = cell
+        out.append(row)
+    return out
+
+
+def decode_bundle(data: bytes) -> dict:
+    """{'version', 'trip', 'itinerary', 'shot_guides'} from encode_bundle output."""
+    view = memoryview(data)
+    magic, fmt, nsections, version, _ = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise BundleError("not an offline bundle")
+    if fmt > FORMAT_VERSION:
+        raise BundleError(f"bundle format {fmt} is newer than {FORMAT_VERSION}")
+
+    sections = {}
+    for i in range(nsections):
+        tag, offset, length = _DIRECTORY_ENTRY.unpack_from(view, _HEADER.size + i * _DIRECTORY_ENTRY.size)
+        sections[tag.decode()] = (offset, length)
+
+    offset, _ = sections["STRS"]
+    (count,) = struct.unpack_from("<I", view, offset)
+    offsets = array("I")
+    offsets.frombytes(view[offset + 4:offset + 8 + 4 * count])
+    if sys.byteorder == "big":   # pragma: no cover
+        offsets.byteswap()
+    blob = offset + 8 + 4 * count
+    strings = [bytes(view[blob + offsets[i]:blob + offsets[i + 1]]).decode() for i in range(count)]
+
+    tables = {tag: _read_table(view, offset, strings) for tag, (offset, _) in sections.items() if tag != "STRS"}
+    meta = tables["META"][0]
+    days = [{**day, "activities": [], "accommodation_suggestions": [], "accommodation_options": []}
+            for day in tables["DAYS"]]
+    for table, field in (("ACTS", "activities"), ("SUGG", "accommodation_suggestions"),
+                         ("OPTS", "accommodation_options")):
+        for row in tables[table]:
+            days[row.pop("day")][field].append(row)
+
+    trip = {"id": meta.pop("trip_id"), "title": meta.pop("trip_title")}
+    itinerary = {**meta, "days": days, "packing_list": tables["PACK"],
+                 "key_tips": [row["tip"] for row in tables["TIPS"]]}
+    return {"version": version, "trip": trip, "itinerary": itinerary, "shot_guides": tables["SHOT"]}
@@ -0,0 +1,10 @@
+from app.services.publishing.base import OutgoingPost, PlatformPublisher, PublishError
+from app.services.publishing.dispatcher import PublishDispatcher, dispatcher_loop
+
+__all__ = [
+    "PublishDispatcher",
+    "dispatcher_loop",
+    "OutgoingPost",
+    "PlatformPublisher",
+    "PublishError",
+]
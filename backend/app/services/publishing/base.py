@@ -0,0 +1,68 @@
+"""
+Platform publisher abstraction for scheduled posts.
+
+To add a platform:
+  1. Create backend/app/services/publishing/providers/yourplatform.py
+  2. Implement PlatformPublisher (platform + publish)
+  3. Add its "module:Class" path to PUBLISHERS in dispatcher.py
+
+The dispatcher only loads posts for platforms with a publisher, so posts for
+platforms not wired up yet stay 'scheduled' rather than failing.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class OutgoingPost:
+    """A claimed published_posts row, with the author's token for the platform."""
+
+    id: str
+    user_id: str
+    platform: str
+    post_type: str
+    due_at: datetime
+    caption: Optional[str] = None
+    media_urls: list[str] = field(default_factory=list)
+    hashtags: list[str] = field(default_factory=list)
+    access_token: Optional[str] = None   # social_accounts.access_token; None when not connected
+    attempts: int = 0                    # publish attempts before this one
+
+    @classmethod
+    def from_row(cls, row: dict) -> OutgoingPost:
+        return cls(
+            id=row["id"], user_id=row["user_id"], platform=row["platform"], post_type=row["post_type"],
+            due_at=row["due_at"], caption=row.get("caption"), media_urls=list(row.get("media_urls") or []),
+            hashtags=list(row.get("hashtags") or []), access_token=row.get("access_token"),
+            attempts=row.get("publish_attempts") or 0,
+        )
+
+
+class PublishError(Exception):
+    """
+    A post the platform did not take. Retryable errors (rate limits, 5xx,
+    timeouts) are tried again with backoff; the rest fail the post.
+    """
+
+    def __init__(self, message: str, retryable: bool = True, retry_after_s: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after_s = retry_after_s
+
+
+class PlatformPublisher(ABC):
+    @property
+    @abstractmethod
+    def platform(self) -> str:
+        """social_accounts.platform / published_posts.platform value, e.g. 'twitter'."""
+        ...
+
+    @abstractmethod
+    async def publish(self, post: OutgoingPost) -> str:
+        """Publish the post; returns the platform's id for it. Raises PublishError."""
+        ...
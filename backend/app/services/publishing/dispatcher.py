@@ -0,0 +1,327 @@
+"""
+Scheduled publishing: fire published_posts at their time without polling.
+
+  published_posts ──► window load (keyset pages, next PUBLISHING_HORIZON_S) ──┐
+        │                                                                     ▼
+        └─ NOTIFY published_posts (insert / reschedule / retry) ──► min-heap by due time
+                                                                              │ sleep until the head is due
+                                                                              ▼
+                                     claim ('publishing', batched) ──► per-platform limiter ──► publisher
+                                                                              │
+                     status updates, batched every PUBLISHING_FLUSH_S ◄───────┘
+
+The heap only holds the window, so its size is what is due soon, not
+everything ever scheduled. A refill every PUBLISHING_REFILL_S extends the
+window from a (due_at, id) cursor, so each post is read once. A new or moved
+post inside the window arrives by notification within milliseconds.
+Rescheduling pushes a new heap entry; the old one is skipped when it surfaces
+(lazy deletion), so the heap never needs a search.
+
+The loop sleeps until the earliest of: the heap head, the next refill, a
+notification, or a pending status flush. Lag comes down to timer precision
+plus one claim round trip.
+
+Multi-worker safety is in the claim, not the heap. Every worker may hold the
+same posts; only the one whose `status = 'scheduled' → 'publishing'` update
+wins fires. The claim also re-checks the due time, so a missed notification
+cannot fire a post early. Claims older than PUBLISHING_CLAIM_TTL_S (a worker
+died mid-publish) go back to 'scheduled': every dispatcher sweeps for them
+every PUBLISHING_CLAIM_TTL_S / 2, and the release notifies like a reschedule.
+
+Each platform has its own HostLimiter (concurrency and rate spacing). A
+retryable failure is rescheduled through retry_at with exponential backoff
+and jitter. It comes back through the same notification path, up to
+PUBLISHING_MAX_ATTEMPTS.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import importlib
+import itertools
+import logging
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.upstream import HostLimiter
+from app.services.publishing.base import OutgoingPost, PlatformPublisher, PublishError
+
+log = logging.getLogger(__name__)
+
+# Import paths, not instances: publisher modules (and httpx behind them) load with the dispatcher
+PUBLISHERS: list[str] = [
+    "app.services.publishing.providers.x:XPublisher",
+]
+
+CLAIM_BATCH = 500
+CLOCK_SKEW_S = 1.0    # claim this far ahead of the database clock
+
+# Window cursor before the first row: (due_at, id) sorts after this for every post
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NO_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def load_publishers(paths: list[str] = PUBLISHERS) -> dict[str, PlatformPublisher]:
+    publishers = {}
+    for path in paths:
+        module_name, _, class_name = path.partition(":")
+        publisher = getattr(importlib.import_module(module_name), class_name)()
+        publishers[publisher.platform] = publisher
+    return publishers
+
+
+def backoff_s(attempts: int, base_s: float, max_s: float, retry_after_s: float | None = None) -> float:
+    delay = min(base_s * 2 ** attempts, max_s) * random.uniform(0.8, 1.2)
+    return max(delay, retry_after_s or 0.0)
+
+
+class PublishDispatcher:
+    def __init__(self, publishers: dict[str, PlatformPublisher], clock: Callable[[], float] = time.time):
+        s = get_settings()
+        self.publishers = publishers
+        self.clock = clock
+        self._heap: list[tuple[float, int, str]] = []
+        self._due: dict[str, float] = {}          # post id → due time of its live heap entry
+        self._platform: dict[str, str] = {}
+        self._seq = itertools.count()
+        self._cursor = (_EPOCH, _NO_ID)
+        self._loaded_until = 0.0                  # everything due up to here is in the heap
+        self._next_refill = 0.0
+        self._next_sweep = 0.0
+        self._wake = asyncio.Event()
+        self._notified: set[str] = set()
+        self._listener_lost = False
+        self._tasks: set[asyncio.Task] = set()
+        self._published: list[tuple[str, datetime, str]] = []
+        self._retries: list[tuple[str, datetime, str]] = []
+        self._failed: list[tuple[str, str]] = []
+        self._last_flush = clock()
+        self._limiters = {
+            platform: HostLimiter(
+                f"publish:{platform}",
+                s.publishing_platform_concurrency.get(platform, s.publishing_max_concurrency),
+                s.publishing_platform_rate_per_s.get(platform),
+            )
+            for platform in publishers
+        }
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    # ── Heap ───────────────────────────────────────────────────────────────────
+
+    def schedule(self, post_id: str, platform: str, due: float) -> None:
+        if self._due.get(post_id) == due:
+            return
+        self._due[post_id] = due
+        self._platform[post_id] = platform
+        heapq.heappush(self._heap, (due, next(self._seq), post_id))
+        if self._heap[0][2] == post_id:
+            self._wake.set()    # new head: the loop's sleep is now too long
+        metrics.PUBLISH_SCHEDULED.set(len(self._due))
+
+    def drop(self, post_id: str) -> None:
+        self._due.pop(post_id, None)
+        self._platform.pop(post_id, None)
+
+    def next_due(self) -> float | None:
+        while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)    # rescheduled or dropped since it was pushed
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[str]:
+        due = []
+        while (head := self.next_due()) is not None and head <= now:
+            _, _, post_id = heapq.heappop(self._heap)
+            due.append(post_id)
+            self._due.pop(post_id)
+        metrics.PUBLISH_SCHEDULED.set(len(self._due))
+        return due
+
+    # ── Loading ────────────────────────────────────────────────────────────────
+
+    async def refill(self) -> None:
+        """Extend the window to now + PUBLISHING_HORIZON_S, page by page from the cursor."""
+        from app.db.publishing import posts_due
+
+        s = get_settings()
+        until = self.clock() + s.publishing_horizon_s
+        until_dt = datetime.fromtimestamp(until, timezone.utc)
+        platforms = list(self.publishers)
+        while True:
+            rows = await posts_due(self._cursor, until_dt, platforms, s.publishing_page_size)
+            for row in rows:
+                self.schedule(str(row["id"]), row["platform"], row["due_at"].timestamp())
+            if rows:
+                self._cursor = (rows[-1]["due_at"], rows[-1]["id"])
+            if len(rows) < s.publishing_page_size:
+                break
+        self._loaded_until = until
+        self._next_refill = self.clock() + s.publishing_refill_s
+
+    def notify(self, post_id: str) -> None:
+        """NOTIFY callback (runs on the event loop): coalesced and handled by the loop."""
+        self._notified.add(post_id)
+        self._wake.set()
+
+    def listener_lost(self) -> None:
+        self._listener_lost = True
+        self._wake.set()
+
+    async def apply_notifications(self) -> None:
+        from app.db.publishing import posts_by_id
+
+        ids, self._notified = list(self._notified), set()
+        await self._reload(ids, posts_by_id)
+
+    async def _reload(self, ids: list[str], posts_by_id) -> None:
+        rows = {str(r["id"]): r for r in await posts_by_id(ids)} if ids else {}
+        for post_id in ids:
+            row = rows.get(post_id)
+            if row is None or row["platform"] not in self.publishers:
+                self.drop(post_id)          # published, cancelled or not ours
+                continue
+            due = row["due_at"].timestamp()
+            if due <= self._loaded_until:
+                self.schedule(post_id, row["platform"], due)
+            else:
+                self.drop(post_id)          # moved past the window: the refill cursor will reach it
+
+    # ── Firing ─────────────────────────────────────────────────────────────────
+
+    async def fire(self, ids: list[str]) -> None:
+        from app.db.publishing import claim_posts, posts_by_id
+
+        for start in range(0, len(ids), CLAIM_BATCH):
+            batch = ids[start:start + CLAIM_BATCH]
+            claimed = await claim_posts(batch, CLOCK_SKEW_S)
+            for row in claimed:
+                task = asyncio.create_task(self._publish(OutgoingPost.from_row(row)))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            missed = set(batch) - {r["id"] for r in claimed}
+            if missed:
+                # Another worker won, or the post moved: look again rather than lose a reschedule
+                await self._reload(list(missed), posts_by_id)
+
+    async def _publish(self, post: OutgoingPost) -> None:
+        s = get_settings()
+        publisher = self.publishers[post.platform]
+        outcome = "published"
+        try:
+            async with self._limiters[post.platform].slot(s.publishing_queue_timeout_s):
+                metrics.PUBLISH_LAG_SECONDS.labels(post.platform).observe(
+                    max(0.0, self.clock() - post.due_at.timestamp()),
+                )
+                platform_post_id = await publisher.publish(post)
+            self._published.append((post.id, datetime.now(timezone.utc), platform_post_id))
+        except Exception as e:
+            error = PublishError(str(e)) if not isinstance(e, PublishError) else e
+            attempts = post.attempts + 1
+            if error.retryable and attempts < s.publishing_max_attempts:
+                outcome = "retry"
+                delay = backoff_s(post.attempts, s.publishing_backoff_base_s, s.publishing_backoff_max_s,
+                                  error.retry_after_s)
+                self._retries.append((post.id, datetime.now(timezone.utc) + timedelta(seconds=delay), str(error)))
+            else:
+                outcome = "failed"
+                self._failed.append((post.id, str(error)))
+            log.warning("publishing %s to %s failed (%s, attempt %d): %s",
+                        post.id, post.platform, outcome, attempts, error)
+        metrics.PUBLISH_ATTEMPTS.labels(post.platform, outcome).inc()
+        self._wake.set()    # an outcome to flush
+
+    def _pending_outcomes(self) -> int:
+        return len(self._published) + len(self._retries) + len(self._failed)
+
+    async def flush(self) -> None:
+        from app.db.publishing import settle_posts
+
+        published, retries, failed = self._published, self._retries, self._failed
+        self._published, self._retries, self._failed = [], [], []
+        self._last_flush = self.clock()
+        try:
+            await settle_posts(published, retries, failed)
+        except Exception:
+            # Keep them for the next flush; the claims stay 'publishing' meanwhile
+            self._published[:0], self._retries[:0], self._failed[:0] = published, retries, failed
+            raise
+
+    # ── Loop ───────────────────────────────────────────────────────────────────
+
+    def _sleep_s(self) -> float:
+        s = get_settings()
+        now = self.clock()
+        wake_at = [self._next_refill, self._next_sweep]
+        head = self.next_due()
+        if head is not None:
+            wake_at.append(head)
+        if self._pending_outcomes():
+            wake_at.append(self._last_flush + s.publishing_flush_s)
+        return max(0.0, min(wake_at) - now)
+
+    async def step(self) -> None:
+        """One pass: stale claims, notifications, refill, fire what is due, flush outcomes."""
+        from app.db.publishing import release_stale_claims
+
+        s = get_settings()
+        if self.clock() >= self._next_sweep:
+            released = await release_stale_claims(s.publishing_claim_ttl_s)
+            if released:
+                log.warning("publishing: released %d claims older than %gs", released, s.publishing_claim_ttl_s)
+            self._next_sweep = self.clock() + s.publishing_claim_ttl_s / 2
+        if self._notified:
+            await self.apply_notifications()
+        if self.clock() >= self._next_refill:
+            await self.refill()
+        due = self.pop_due(self.clock())
+        if due:
+            await self.fire(due)
+        pending = self._pending_outcomes()
+        overdue = self.clock() - self._last_flush >= s.publishing_flush_s
+        if pending and (pending >= s.publishing_flush_batch or overdue):
+            await self.flush()
+
+    async def run(self) -> None:
+        from app.db.publishing import listen
+
+        s = get_settings()
+        conn = None
+        try:
+            while True:
+                try:
+                    if conn is None or self._listener_lost:
+                        if conn is not None:
+                            conn.terminate()
+                        self._listener_lost = False
+                        conn = await listen(self.notify, self.listener_lost)
+                        # Anything could have changed while nobody was listening
+                        self._cursor, self._next_refill, self._next_sweep = (_EPOCH, _NO_ID), 0.0, 0.0
+                    await self.step()
+                    timeout = self._sleep_s()
+                    if timeout > 0:
+                        try:
+                            await asyncio.wait_for(self._wake.wait(), timeout)
+                        except TimeoutError:
+                            pass
+                    self._wake.clear()
+                except Exception as e:
+                    log.warning("publishing dispatcher: %s", e)
+                    await asyncio.sleep(s.publishing_retry_s)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            if conn is not None:
+                conn.terminate()
+
+
+async def dispatcher_loop() -> None:
+    """Lifespan task: run a dispatcher for the platforms that have a publisher."""
+    publishers = await asyncio.to_thread(load_publishers)
+    if publishers:
+        await PublishDispatcher(publishers).run()
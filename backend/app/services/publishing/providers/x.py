@@ -0,0 +1,76 @@
+"""
+X (Twitter) publisher — text posts and threads through the v2 API.
+
+API: https://docs.x.com/x-api/posts/creation-of-a-post
+Auth: the author's OAuth 2.0 user token (social_accounts.access_token, scope
+tweet.write), sent as a bearer token.
+
+  feed / thread   caption + hashtags; a thread splits the caption on blank
+                  lines and chains each post as a reply to the previous one
+
+Media needs the separate chunked media upload flow and is not wired up yet:
+posts with media_urls fail rather than go out without their media.
+"""
+
+from __future__ import annotations
+
+import time
+
+from app.core.http import async_client
+from app.services.publishing.base import OutgoingPost, PlatformPublisher, PublishError
+
+API_URL = "https://api.twitter.com/2/tweets"
+MAX_CHARS = 280
+TIMEOUT_S = 15.0
+
+
+def compose(post: OutgoingPost) -> list[str]:
+    """The post's text, one entry per X post (a single one unless it is a thread)."""
+    caption = (post.caption or "").strip()
+    chunks = [c.strip() for c in caption.split("\n\n") if c.strip()] if post.post_type == "thread" else [caption]
+    tags = " ".join(t if t.startswith("#") else f"#{t}" for t in post.hashtags)
+    if tags and chunks and len(chunks[-1]) + 1 + len(tags) <= MAX_CHARS:
+        chunks[-1] = f"{chunks[-1]}\n{tags}".strip()
+    return [c[:MAX_CHARS - 1] + "…" if len(c) > MAX_CHARS else c for c in chunks if c]
+
+
+class XPublisher(PlatformPublisher):
+    platform = "twitter"
+
+    async def publish(self, post: OutgoingPost) -> str:
+        if not post.access_token:
+            raise PublishError("no connected X account", retryable=False)
+        if post.media_urls:
+            raise PublishError("media posts to X are not supported yet", retryable=False)
+        texts = compose(post)
+        if not texts:
+            raise PublishError("nothing to post", retryable=False)
+
+        first_id, reply_to = None, None
+        async with async_client(TIMEOUT_S, headers={"Authorization": f"Bearer {post.access_token}"}) as client:
+            for text in texts:
+                body: dict = {"text": text}
+                if reply_to:
+                    body["reply"] = {"in_reply_to_tweet_id": reply_to}
+                try:
+                    resp = await client.post(API_URL, json=body)
+                except Exception as e:   # network errors and upstream queue timeouts
+                    raise PublishError(f"X request failed: {e}") from e
+                _raise_for_status(resp)
+                reply_to = resp.json()["data"]["id"]
+                first_id = first_id or reply_to
+        return first_id
+
+
+def _raise_for_status(resp) -> None:
+    if resp.status_code < 300:
+        return
+    detail = resp.text[:200]
+    if resp.status_code == 429:
+        reset = resp.headers.get("x-rate-limit-reset")
+        retry_after = max(1.0, float(reset) - time.time()) if reset else None
+        raise PublishError(f"X rate limit: {detail}", retry_after_s=retry_after)
+    if resp.status_code >= 500:
+        raise PublishError(f"X {resp.status_code}: {detail}")
+    # 401/403: token revoked or missing scope; 400: rejected content. Retrying won't help.
+    raise PublishError(f"X {resp.status_code}: {detail}", retryable=False)
@@ -0,0 +1,141 @@
+"""
+Sun events for many places and days at once, with a per-cell table cache.
+
+  (lat, lng, day) points ──► geo cell (SOLAR_CELL_DEG) + day ──► packed int64 key
+        │
+        ▼
+  np.unique over the keys ──► cached rows ────────────────┐
+        │ misses                                          │
+        ▼                                                 ▼
+  sun_events (NOAA equations, every miss in one pass) ──► (n, 8) event table
+
+Events per day, as UTC epoch seconds (NaN when the sun never crosses that
+elevation, e.g. polar summer):
+
+  blue_am         −6°   rising     civil dawn, blue hour starts
+  golden_am       −4°   rising     blue hour ends, golden hour starts
+  sunrise         −0.833° rising
+  golden_am_end   +6°   rising
+  golden_pm       +6°   setting
+  sunset          −0.833° setting
+  blue_pm         −4°   setting    golden hour ends, blue hour starts
+  blue_pm_end     −6°   setting    civil dusk
+
+The equations are NOAA's general solar position approximation (fractional
+year → equation of time and declination, hour angle at the target
+elevation). They are good to about a minute at Indian latitudes. That is
+well inside what a nudge needs. Sun times change by well under a minute
+across a 0.1° cell, so every trip in the same town on the same day shares
+one computed row.
+
+`day` is a calendar date. The events returned are those of the local solar
+day around that date's noon, for any longitude in [-180, 180].
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+EVENTS = ("blue_am", "golden_am", "sunrise", "golden_am_end", "golden_pm", "sunset", "blue_pm", "blue_pm_end")
+BLUE_AM, GOLDEN_AM, SUNRISE, GOLDEN_AM_END, GOLDEN_PM, SUNSET, BLUE_PM, BLUE_PM_END = range(len(EVENTS))
+
+# Morning crossings in time order; the evening ones are the same elevations reversed
+_ELEVATIONS = np.radians([-6.0, -4.0, -0.833, 6.0])
+
+_DAY_BITS = 20   # days since 1970 fit until the year 4840
+
+
+def _days(day) -> np.ndarray:
+    """Dates (datetime64, date objects or days since 1970) → int64 days since 1970."""
+    day = np.asarray(day)
+    if day.dtype.kind in "iu":
+        return day.astype(np.int64)
+    return day.astype("datetime64[D]").astype(np.int64)
+
+
+def sun_events(lat, lng, day) -> np.ndarray:
+    """The (n, 8) EVENTS table for each (lat, lng, day); degrees north and east."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lng = np.asarray(lng, dtype=np.float64)
+    days = _days(day)
+
+    date = days.astype("datetime64[D]")
+    year = date.astype("datetime64[Y]")
+    doy = (date - year.astype("datetime64[D]")).astype(np.float64)
+    year_days = ((year + 1).astype("datetime64[D]") - year.astype("datetime64[D]")).astype(np.float64)
+    # Fractional year at local solar noon (12 − lng/15 h UTC)
+    gamma = 2 * math.pi / year_days * (doy + (-lng / 15.0) / 24.0)
+
+    eqtime = 229.18 * (0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+                       - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma))
+    decl = (0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma) - 0.006758 * np.cos(2 * gamma)
+            + 0.000907 * np.sin(2 * gamma) - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma))
+
+    cos_h = ((np.sin(_ELEVATIONS)[None, :] - (np.sin(lat) * np.sin(decl))[:, None])
+             / (np.cos(lat) * np.cos(decl))[:, None])
+    with np.errstate(invalid="ignore"):
+        hour_angle = np.degrees(np.arccos(np.where(np.abs(cos_h) <= 1.0, cos_h, np.nan)))
+
+    noon_min = 720.0 - 4.0 * lng - eqtime
+    rising = noon_min[:, None] - 4.0 * hour_angle
+    setting = noon_min[:, None] + 4.0 * hour_angle[:, ::-1]
+    return days[:, None] * 86400.0 + np.hstack([rising, setting]) * 60.0
+
+
+class SolarTable:
+    """
+    sun_events with a cache keyed by (geo cell, day). Cells are `cell_deg`
+    squares; each cached row is computed at its cell's centre. Past days
+    are dropped first when the table is full, then everything.
+    """
+
+    def __init__(self, cell_deg: float = 0.1, max_entries: int = 200_000):
+        self.cell_deg = cell_deg
+        self.max_entries = max_entries
+        self._lat_offset = math.ceil(90 / cell_deg)
+        self._lng_offset = math.ceil(180 / cell_deg)
+        self._lng_span = 2 * self._lng_offset + 1
+        self._rows: dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def events(self, lat, lng, day) -> np.ndarray:
+        """The (n, 8) EVENTS table for each point, computing only the (cell, day) pairs not cached yet."""
+        from app.core import metrics
+
+        days = np.broadcast_to(_days(day), np.shape(lat))
+        cell_lat = np.rint(np.asarray(lat, dtype=np.float64) / self.cell_deg).astype(np.int64)
+        cell_lng = np.rint(np.asarray(lng, dtype=np.float64) / self.cell_deg).astype(np.int64)
+        keys = ((((cell_lat + self._lat_offset) * self._lng_span + cell_lng + self._lng_offset) << _DAY_BITS)
+                | days)
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        rows = np.empty((len(unique), len(EVENTS)))
+        missing = []
+        for i, key in enumerate(unique.tolist()):
+            row = self._rows.get(key)
+            if row is None:
+                missing.append(i)
+            else:
+                rows[i] = row
+        if missing:
+            miss = first[missing]
+            rows[missing] = sun_events(cell_lat[miss] * self.cell_deg, cell_lng[miss] * self.cell_deg, days[miss])
+            self._make_room(len(missing))
+            self._rows.update(zip(unique[missing].tolist(), rows[missing]))
+
+        metrics.CACHE_REQUESTS.labels("solar_table", "hit").inc(len(unique) - len(missing))
+        metrics.CACHE_REQUESTS.labels("solar_table", "miss").inc(len(missing))
+        return rows[inverse.reshape(-1)]
+
+    def _make_room(self, incoming: int) -> None:
+        if len(self._rows) + incoming <= self.max_entries:
+            return
+        today = int(np.datetime64("today", "D").astype(np.int64))
+        mask = (1 << _DAY_BITS) - 1
+        self._rows = {k: v for k, v in self._rows.items() if (k & mask) >= today}
+        if len(self._rows) + incoming > self.max_entries:
+            self._rows.clear()
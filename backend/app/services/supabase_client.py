@@ -1,16 +1,26 @@
-from supabase import create_client, Client
-from functools import lru_cache
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from app.core.config import get_settings
+from app.core.lazy import once
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
-@lru_cache
+@once
 def get_supabase() -> Client:
+    from supabase import create_client
+
     settings = get_settings()
     return create_client(settings.supabase_url, settings.supabase_service_role_key)
 
 
-@lru_cache
+@once
 def get_supabase_anon() -> Client:
     """Use for user-facing requests — respects Row Level Security."""
+    from supabase import create_client
+
     settings = get_settings()
     return create_client(settings.supabase_url, settings.supabase_anon_key)
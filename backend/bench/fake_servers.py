@@ -0,0 +1,283 @@
+"""
+Fake upstreams for the load benchmark.
+
+One Starlette app, one port, every upstream the API talks to:
+
+  /anthropic/v1/messages          Claude Messages API (streaming SSE + plain JSON)
+  /amadeus/...                    OAuth token, hotel list, hotel offers
+  /otm/places/...                 OpenTripMap radius search + place detail
+  /supabase/rest/v1/profiles      PostgREST lookup used for admission tiers
+  /_stats  /_reset  /_config      call counters and runtime knobs
+
+Latency, token rate, time-to-first-token, error and 429 rates are configurable
+per run so the benchmark can reproduce a slow LLM or a throttling provider.
+
+Run standalone:
+    python -m bench.fake_servers --port 8900 --ttft 0.5 --tokens-per-s 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+# Overnight stops cycle through a mix of IATA cities (served by Amadeus) and
+# mountain towns (fall through to OpenTripMap), like real trips do.
+OVERNIGHT_CYCLE = ["Delhi", "Manali", "Kaza", "Leh", "Rishikesh", "Jaipur"]
+
+
+@dataclass
+class FakeConfig:
+    ttft_s: float = 0.4             # LLM time to first token
+    tokens_per_s: float = 400.0     # LLM output rate after the first token
+    provider_latency_s: float = 0.08
+    provider_error_rate: float = 0.0
+    provider_429_rate: float = 0.0
+    seed: int = 7
+
+    def update(self, data: dict) -> None:
+        for f in fields(self):
+            if f.name in data:
+                setattr(self, f.name, type(getattr(self, f.name))(data[f.name]))
+
+
+config = FakeConfig()
+calls: Counter[str] = Counter()
+_rng = random.Random(config.seed)
+
+
+# ── Anthropic ──────────────────────────────────────────────────────────────────
+
+def _fake_itinerary(prompt: str) -> str:
+    m = re.search(r"Plan a (\d+)-day trip from (.+?) to (.+?)\.", prompt)
+    days = min(int(m.group(1)), 30) if m else 5
+    destination = m.group(3) if m else "Manali"
+    out = {
+        "summary": f"A {days}-day journey to {destination} through mountains, monasteries and markets.",
+        "total_estimated_cost_inr": 4500 * days,
+        "best_time_note": "Clear skies and cool nights — carry layers for the evenings.",
+        "days": [
+            {
+                "day_number": i + 1,
+                "title": f"Day {i + 1} in {OVERNIGHT_CYCLE[i % len(OVERNIGHT_CYCLE)]}",
+                "summary": "A relaxed morning, a scenic drive and an evening at a local dhaba. " * 2,
+                "transport_for_day": "Shared cab (HRTC bus as backup)",
+                "overnight_location": OVERNIGHT_CYCLE[i % len(OVERNIGHT_CYCLE)],
+                "estimated_cost_inr": 4500,
+                "weather_note": "Sunny, 12–22°C",
+                "activities": [
+                    {
+                        "time": f"{8 + 3 * j:02d}:00",
+                        "title": f"Stop {j + 1}",
+                        "description": "Walk the old lanes, stop for chai and momos, and watch the light change over the ridge. " * 2,
+                        "location": OVERNIGHT_CYCLE[i % len(OVERNIGHT_CYCLE)],
+                        "lat": 32.2 + 0.01 * j,
+                        "lng": 77.1 + 0.01 * j,
+                        "duration_minutes": 90,
+                        "cost_inr": 200,
+                        "booking_url": None,
+                        "content_opportunity": "Record a 30-sec handheld walk-through at golden hour.",
+                    }
+                    for j in range(4)
+                ],
+                "accommodation_suggestions": [
+                    {"tier": tier, "name": f"{tier.title()} Stay", "description": "Clean rooms and a warm host.",
+                     "estimated_price_per_night_inr": price, "area": "Main Bazaar", "notable_for": "Rooftop views"}
+                    for tier, price in (("budget", 900), ("mid", 2800), ("premium", 7500))
+                ],
+            }
+            for i in range(days)
+        ],
+        "packing_list": [
+            {"category": "Clothing", "item": "Fleece jacket", "essential": True},
+            {"category": "Health", "item": "Diamox (consult a doctor)", "essential": False},
+        ],
+        "key_tips": ["Carry cash — ATMs are sparse beyond the valley.", "Acclimatise before going higher."],
+    }
+    return json.dumps(out)
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def anthropic_messages(request: Request) -> Response:
+    body = await request.json()
+    calls["anthropic.messages"] += 1
+    prompt = body["messages"][0]["content"]
+    if isinstance(prompt, list):
+        prompt = " ".join(part.get("text", "") for part in prompt)
+    text = _fake_itinerary(prompt)
+    input_tokens = (len(prompt) + len(str(body.get("system", "")))) // 4
+    output_tokens = len(text) // 4
+    message = {
+        "id": f"msg_fake_{calls['anthropic.messages']}",
+        "type": "message",
+        "role": "assistant",
+        "model": body["model"],
+        "content": [],
+        "stop_reason": None,
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+    }
+
+    if not body.get("stream"):
+        await asyncio.sleep(config.ttft_s + output_tokens / config.tokens_per_s)
+        message.update(
+            content=[{"type": "text", "text": text}],
+            stop_reason="end_turn",
+            usage={"input_tokens": input_tokens, "output_tokens": output_tokens},
+        )
+        return JSONResponse(message)
+
+    async def stream():
+        await asyncio.sleep(config.ttft_s)
+        yield _sse("message_start", {"type": "message_start", "message": message})
+        yield _sse("content_block_start", {"type": "content_block_start", "index": 0,
+                                           "content_block": {"type": "text", "text": ""}})
+        chunk_chars = 64   # ~16 tokens per event
+        delay = (chunk_chars / 4) / config.tokens_per_s
+        for i in range(0, len(text), chunk_chars):
+            yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                               "delta": {"type": "text_delta", "text": text[i:i + chunk_chars]}})
+            await asyncio.sleep(delay)
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _sse("message_delta", {"type": "message_delta",
+                                     "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                     "usage": {"output_tokens": output_tokens}})
+        yield _sse("message_stop", {"type": "message_stop"})
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+# ── Accommodation providers ────────────────────────────────────────────────────
+
+async def _provider_call(name: str) -> Response | None:
+    """Simulate upstream latency and failures; returns an error response or None."""
+    calls[name] += 1
+    await asyncio.sleep(config.provider_latency_s * (0.5 + _rng.random()))
+    roll = _rng.random()
+    if roll < config.provider_429_rate:
+        calls[f"{name}.429"] += 1
+        return JSONResponse({"errors": [{"title": "Too Many Requests"}]}, status_code=429)
+    if roll < config.provider_429_rate + config.provider_error_rate:
+        calls[f"{name}.5xx"] += 1
+        return JSONResponse({"errors": [{"title": "Internal Error"}]}, status_code=500)
+    return None
+
+
+async def amadeus_token(request: Request) -> Response:
+    return await _provider_call("amadeus.token") or JSONResponse(
+        {"access_token": "fake-token", "expires_in": 1799, "token_type": "Bearer"}
+    )
+
+
+async def amadeus_hotels_by_city(request: Request) -> Response:
+    city = request.query_params.get("cityCode", "XXX")
+    return await _provider_call("amadeus.hotel_list") or JSONResponse(
+        {"data": [{"hotelId": f"{city}{i:04d}", "name": f"Hotel {city} {i}"} for i in range(20)]}
+    )
+
+
+async def amadeus_offers(request: Request) -> Response:
+    hotel_ids = request.query_params.get("hotelIds", "").split(",")
+    check_in = request.query_params.get("checkInDate", "2025-01-01")
+    check_out = request.query_params.get("checkOutDate", "2025-01-02")
+    return await _provider_call("amadeus.offers") or JSONResponse({"data": [
+        {
+            "hotel": {"hotelId": hid, "name": f"Fake Hotel {hid}", "rating": 4,
+                      "latitude": 28.6, "longitude": 77.2, "amenities": ["WIFI", "RESTAURANT"],
+                      "address": {"lines": ["1 Fake Road"]}},
+            "offers": [{"checkInDate": check_in, "checkOutDate": check_out,
+                        "price": {"total": str(2500 + 150 * i)}}],
+        }
+        for i, hid in enumerate(h for h in hotel_ids if h)
+    ]})
+
+
+async def otm_radius(request: Request) -> Response:
+    return await _provider_call("opentripmap.radius") or JSONResponse([
+        {"xid": f"N{i:06d}", "name": f"Guesthouse {i}", "kinds": "accomodations,guest_houses",
+         "rate": i % 4, "point": {"lat": 32.24 + i * 0.001, "lon": 77.18 + i * 0.001}}
+        for i in range(20)
+    ])
+
+
+async def otm_detail(request: Request) -> Response:
+    xid = request.path_params["xid"]
+    return await _provider_call("opentripmap.detail") or JSONResponse(
+        {"xid": xid, "name": f"Guesthouse {xid}", "address": {"road": "Mall Road", "city": "Manali"}}
+    )
+
+
+# ── Supabase (admission tier lookup) ───────────────────────────────────────────
+
+async def supabase_profiles(request: Request) -> Response:
+    calls["supabase.profiles"] += 1
+    return JSONResponse([{"subscription": "free"}])
+
+
+# ── Control ────────────────────────────────────────────────────────────────────
+
+async def stats(request: Request) -> Response:
+    return JSONResponse({"calls": dict(calls), "config": asdict(config)})
+
+
+async def reset(request: Request) -> Response:
+    calls.clear()
+    return JSONResponse({"ok": True})
+
+
+async def set_config(request: Request) -> Response:
+    config.update(await request.json())
+    return JSONResponse(asdict(config))
+
+
+app = Starlette(routes=[
+    Route("/anthropic/v1/messages", anthropic_messages, methods=["POST"]),
+    Route("/amadeus/v1/security/oauth2/token", amadeus_token, methods=["POST"]),
+    Route("/amadeus/v1/reference-data/locations/hotels/by-city", amadeus_hotels_by_city),
+    Route("/amadeus/v3/shopping/hotel-offers", amadeus_offers),
+    Route("/otm/places/radius", otm_radius),
+    Route("/otm/places/xid/{xid}", otm_detail),
+    Route("/supabase/rest/v1/profiles", supabase_profiles),
+    Route("/_stats", stats),
+    Route("/_reset", reset, methods=["POST"]),
+    Route("/_config", set_config, methods=["POST"]),
+])
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft", type=float, default=config.ttft_s)
+    parser.add_argument("--tokens-per-s", type=float, default=config.tokens_per_s)
+    parser.add_argument("--provider-latency", type=float, default=config.provider_latency_s)
+    parser.add_argument("--provider-error-rate", type=float, default=config.provider_error_rate)
+    parser.add_argument("--provider-429-rate", type=float, default=config.provider_429_rate)
+    args = parser.parse_args()
+    config.update({
+        "ttft_s": args.ttft,
+        "tokens_per_s": args.tokens_per_s,
+        "provider_latency_s": args.provider_latency,
+        "provider_error_rate": args.provider_error_rate,
+        "provider_429_rate": args.provider_429_rate,
+    })
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
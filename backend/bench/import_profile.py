@@ -0,0 +1,77 @@
+"""
+Import-time profile of the API process.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+summarises where cold-start time goes, grouped by top-level package:
+
+    python -m bench.import_profile                # top 20 packages
+    python -m bench.import_profile --top 40 --module app.agents.itinerary_agent
+
+Self time is attributed to the package that owns each module, so `anthropic`
+includes everything under anthropic.* but not httpx it pulls in.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Settings are required at import of app.main — harmless placeholders suffice
+PLACEHOLDER_ENV = {
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_ANON_KEY": "profile",
+    "SUPABASE_SERVICE_ROLE_KEY": "profile",
+    "ANTHROPIC_API_KEY": "profile",
+}
+
+
+def profile(module: str) -> tuple[float, dict[str, int], list[str]]:
+    """Return (wall seconds, self-µs per top-level package, module names imported)."""
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - started
+
+    by_package: dict[str, int] = defaultdict(int)
+    modules: list[str] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, _cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+            self_time = int(self_us)
+        except ValueError:
+            continue   # header line
+        modules.append(name)
+        by_package[name.split(".")[0]] += self_time
+    return wall, dict(by_package), modules
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    wall, by_package, modules = profile(args.module)
+    total_ms = sum(by_package.values()) / 1000
+    print(f"import {args.module}: {wall * 1000:.0f} ms wall (interpreter incl.), "
+          f"{total_ms:.0f} ms in imports, {len(modules)} modules\n")
+    print(f"{'package':<28} {'self ms':>9} {'share':>7}")
+    for pkg, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"{pkg:<28} {us / 1000:>9.1f} {us / 1000 / total_ms:>7.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+End-to-end load benchmark for POST /api/v1/itinerary/generate.
+
+Boots the real FastAPI app under uvicorn, points every upstream (Claude,
+Amadeus, OpenTripMap, Supabase) at bench/fake_servers.py, then drives the
+generate endpoint at fixed concurrency levels and reports:
+
+  p50 / p95 / p99 latency, throughput, 429/5xx counts,
+  and upstream calls per request (LLM, Amadeus, OpenTripMap)
+
+Usage (from backend/):
+    python -m bench.run                               # c=1,4,16 × 40 requests
+    python -m bench.run -c 8 -n 100 --ttft 1.5 --tokens-per-s 200
+    python -m bench.run --provider-429-rate 0.2       # throttling upstream
+    python -m bench.run --save-baseline               # write bench/baselines.json
+    python -m bench.run --check                       # exit 1 on regression
+
+A scenario regresses when p95 grows or throughput drops by more than
+--tolerance (default 20%) against the stored baseline for the same
+concurrency level. Baselines are machine-specific — record them on the
+machine (or CI runner class) that runs --check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+import jwt
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines.json"
+
+# Signs each worker's access token, as Supabase would; passed to the app as SUPABASE_JWT_SECRET
+JWT_SECRET = "bench-jwt-secret-for-local-load-runs-only"
+
+DESTINATIONS = ["Manali", "Spiti Valley", "Leh", "Rishikesh", "Jaipur", "Goa"]
+
+
+@dataclass
+class ScenarioResult:
+    concurrency: int
+    requests: int
+    ok: int
+    rejected_429: int
+    errors: int
+    wall_s: float
+    throughput_rps: float
+    p50_s: float
+    p95_s: float
+    p99_s: float
+    upstream_per_request: dict[str, float] = field(default_factory=dict)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[idx]
+
+
+def _payload(i: int) -> dict:
+    start = date.today() + timedelta(days=30 + i % 60)
+    return {
+        "destination": DESTINATIONS[i % len(DESTINATIONS)],
+        "origin": "Delhi",
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=4 + i % 4)).isoformat(),
+        "budget_inr": 30000 + 1000 * (i % 20),
+        "travel_style": "adventure",
+        "num_travelers": 2,
+    }
+
+
+def _auth_header(worker_id: int) -> dict[str, str]:
+    """A bearer token for one bench user per worker, so admission keys and tiers behave as in production."""
+    sub = str(uuid.uuid5(uuid.NAMESPACE_URL, f"bench-user-{worker_id}"))
+    token = jwt.encode({"sub": sub, "aud": "authenticated", "exp": int(time.time()) + 3600}, JWT_SECRET,
+                       algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _wait_ready(url: str, timeout_s: float = 30) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout_s}s")
+
+
+# ── Processes ──────────────────────────────────────────────────────────────────
+
+def start_fakes(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "bench.fake_servers", "--port", str(port),
+        "--ttft", str(args.ttft), "--tokens-per-s", str(args.tokens_per_s),
+        "--provider-latency", str(args.provider_latency),
+        "--provider-error-rate", str(args.provider_error_rate),
+        "--provider-429-rate", str(args.provider_429_rate),
+    ]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR)
+    _wait_ready(f"http://127.0.0.1:{port}/_stats")
+    return proc
+
+
+def start_app(args: argparse.Namespace, port: int, fake_port: int) -> subprocess.Popen:
+    fake = f"http://127.0.0.1:{fake_port}"
+    env = {
+        **os.environ,
+        "APP_ENV": "bench",
+        "ANTHROPIC_API_KEY": "sk-ant-bench",
+        "ANTHROPIC_BASE_URL": f"{fake}/anthropic",
+        "AMADEUS_CLIENT_ID": "bench",
+        "AMADEUS_CLIENT_SECRET": "bench",
+        "AMADEUS_BASE_URL": f"{fake}/amadeus",
+        "OPENTRIPMAP_API_KEY": "bench",
+        "OPENTRIPMAP_BASE_URL": f"{fake}/otm",
+        "SUPABASE_URL": f"{fake}/supabase",
+        "SUPABASE_ANON_KEY": "bench.anon.key",
+        "SUPABASE_SERVICE_ROLE_KEY": "bench.service.key",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+    }
+    for kv in args.env:
+        key, _, value = kv.partition("=")
+        env[key] = value
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    _wait_ready(f"http://127.0.0.1:{port}/health")
+    return proc
+
+
+# ── Load driver ────────────────────────────────────────────────────────────────
+
+async def run_scenario(app_url: str, fake_url: str, concurrency: int, n_requests: int) -> ScenarioResult:
+    latencies: list[float] = []
+    statuses: list[int] = []
+    next_index = 0
+
+    async with httpx.AsyncClient(base_url=app_url, timeout=300) as client:
+        await client.post(f"{fake_url}/_reset")
+
+        async def worker(worker_id: int) -> None:
+            nonlocal next_index
+            headers = _auth_header(worker_id)
+            while next_index < n_requests:
+                i = next_index
+                next_index += 1
+                started = time.perf_counter()
+                try:
+                    res = await client.post(
+                        "/api/v1/itinerary/generate",
+                        json=_payload(i),
+                        headers=headers,
+                    )
+                    status = res.status_code
+                except httpx.HTTPError:
+                    status = 599
+                elapsed = time.perf_counter() - started
+                statuses.append(status)
+                if status < 400:
+                    latencies.append(elapsed)
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+        wall = time.perf_counter() - wall_start
+
+        upstream = (await client.get(f"{fake_url}/_stats")).json()["calls"]
+
+    latencies.sort()
+    ok = sum(1 for s in statuses if s < 400)
+    per_request = {k: round(v / max(ok, 1), 2) for k, v in sorted(upstream.items())}
+    return ScenarioResult(
+        concurrency=concurrency,
+        requests=n_requests,
+        ok=ok,
+        rejected_429=sum(1 for s in statuses if s == 429),
+        errors=sum(1 for s in statuses if s >= 400 and s != 429),
+        wall_s=round(wall, 3),
+        throughput_rps=round(ok / wall, 3) if wall else 0.0,
+        p50_s=round(_percentile(latencies, 50), 4),
+        p95_s=round(_percentile(latencies, 95), 4),
+        p99_s=round(_percentile(latencies, 99), 4),
+        upstream_per_request=per_request,
+    )
+
+
+# ── Reporting / baselines ──────────────────────────────────────────────────────
+
+def print_report(results: list[ScenarioResult]) -> None:
+    print(f"\n{'conc':>5} {'ok':>5} {'429':>5} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  upstream/request")
+    for r in results:
+        upstream = ", ".join(f"{k}={v}" for k, v in r.upstream_per_request.items())
+        print(
+            f"{r.concurrency:>5} {r.ok:>5} {r.rejected_429:>5} {r.errors:>5} {r.throughput_rps:>8.2f} "
+            f"{r.p50_s:>8.3f} {r.p95_s:>8.3f} {r.p99_s:>8.3f}  {upstream}"
+        )
+
+
+def compare(results: list[ScenarioResult], baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for r in results:
+        base = baseline.get(f"c{r.concurrency}")
+        if not base:
+            continue
+        if base["p95_s"] and r.p95_s > base["p95_s"] * (1 + tolerance):
+            regressions.append(f"c{r.concurrency}: p95 {r.p95_s:.3f}s vs baseline {base['p95_s']:.3f}s")
+        if base["throughput_rps"] and r.throughput_rps < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"c{r.concurrency}: throughput {r.throughput_rps:.2f} rps vs baseline {base['throughput_rps']:.2f} rps"
+            )
+    return regressions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("-c", "--concurrency", default="1,4,16", help="comma-separated levels")
+    p.add_argument("-n", "--requests", type=int, default=40, help="requests per level")
+    p.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    p.add_argument("--ttft", type=float, default=0.4)
+    p.add_argument("--tokens-per-s", type=float, default=400.0)
+    p.add_argument("--provider-latency", type=float, default=0.08)
+    p.add_argument("--provider-error-rate", type=float, default=0.0)
+    p.add_argument("--provider-429-rate", type=float, default=0.0)
+    p.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                   help="extra environment for the app (e.g. ADMISSION_MAX_CONCURRENCY=16)")
+    p.add_argument("--output", type=Path, help="write results JSON here")
+    p.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--check", action="store_true", help="exit 1 if any scenario regressed")
+    p.add_argument("--tolerance", type=float, default=0.2)
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    fake_port, app_port = _free_port(), _free_port()
+
+    fakes = start_fakes(args, fake_port)
+    app = None
+    try:
+        app = start_app(args, app_port, fake_port)
+        app_url, fake_url = f"http://127.0.0.1:{app_port}", f"http://127.0.0.1:{fake_port}"
+        results = [asyncio.run(run_scenario(app_url, fake_url, c, args.requests)) for c in levels]
+    finally:
+        for proc in (app, fakes):
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    print_report(results)
+    payload = {f"c{r.concurrency}": asdict(r) for r in results}
+    if args.output:
+        args.output.write_text(json.dumps(payload, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"\nbaseline written to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"\nno baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import asyncio
+import time
+import uuid
+
+import jwt
+import pytest
+
+from app.core import admission
+from app.core.admission import AdmissionController, AdmissionRejected, resolve_caller
+from app.core.auth import user_id_from_authorization
+from app.core.config import get_settings
+
+SECRET = "test-jwt-secret-at-least-32-bytes-long"
+
+
+def _controller(**overrides) -> AdmissionController:
+    kwargs = dict(max_concurrency=1, max_queue=10, max_queue_per_user=10, queue_timeout_s=5)
+    kwargs.update(overrides)
+    return AdmissionController(**kwargs)
+
+
+def test_rejects_fast_when_user_queue_full():
+    async def scenario():
+        ctrl = _controller(max_queue_per_user=1)
+        await ctrl.acquire("abuser")                       # holds the only slot
+        waiter = asyncio.create_task(ctrl.acquire("abuser"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc:
+            await ctrl.acquire("abuser")
+        assert exc.value.reason == "user_queue_full"
+        assert exc.value.retry_after_s >= 1
+        ctrl.release()
+        await waiter
+        assert ctrl.stats.rejected == {"user_queue_full": 1}
+
+    asyncio.run(scenario())
+
+
+def test_weighted_fair_order_under_abuse():
+    async def scenario():
+        ctrl = _controller()
+        order: list[str] = []
+
+        async def request(key: str, tier: str = "free"):
+            async with ctrl.slot(key, tier):
+                order.append(key)
+                await asyncio.sleep(0)
+
+        await ctrl.acquire("warmup")
+        tasks = [asyncio.create_task(request("abuser")) for _ in range(6)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("polite")))
+        await asyncio.sleep(0)
+        ctrl.release()
+        await asyncio.gather(*tasks)
+
+        # The late, well-behaved caller jumps ahead of most of the abuser's backlog
+        assert order.index("polite") <= 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def scenario():
+        ctrl = _controller()
+        await ctrl.acquire("a")
+        waiter = asyncio.create_task(ctrl.acquire("b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        ctrl.release()
+        assert ctrl.in_flight == 0
+        assert ctrl.queue_depth == 0
+        assert await ctrl.acquire("c") == 0.0
+
+    asyncio.run(scenario())
+
+
+def _token(sub: str, secret: str = SECRET, **claims) -> str:
+    payload = {"sub": sub, "aud": "authenticated", "exp": int(time.time()) + 60, **claims}
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def test_only_verified_tokens_identify_a_caller(monkeypatch):
+    monkeypatch.setattr(get_settings(), "supabase_jwt_secret", SECRET)
+    user = str(uuid.uuid4())
+    assert user_id_from_authorization(f"Bearer {_token(user)}") == user
+    assert user_id_from_authorization(f"Bearer {_token(user, secret='forged-' + SECRET)}") is None
+    assert user_id_from_authorization(f"Bearer {_token(user, exp=int(time.time()) - 60)}") is None
+    assert user_id_from_authorization(f"Bearer {_token(user, aud='anon')}") is None
+    assert user_id_from_authorization(user) is None                     # a bare id is not a credential
+
+    monkeypatch.setattr(get_settings(), "supabase_jwt_secret", "")
+    assert user_id_from_authorization(f"Bearer {_token(user)}") is None
+
+
+def test_tier_lookup_never_blocks_and_the_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(get_settings(), "admission_tier_cache_max", 2)
+    monkeypatch.setattr(admission, "_tier_cache", admission.OrderedDict())
+    monkeypatch.setattr(admission, "_fetch_subscription", lambda user_id: "pro")
+
+    async def scenario():
+        assert resolve_caller("u1", "10.0.0.1") == ("u1", "free")     # unknown: default tier, lookup queued
+        await asyncio.sleep(0.05)
+        assert resolve_caller("u1", "10.0.0.1") == ("u1", "pro")
+        for user in ("u2", "u3"):
+            resolve_caller(user, None)
+        await asyncio.sleep(0.05)
+        assert list(admission._tier_cache) == ["u2", "u3"]
+        assert resolve_caller(None, "10.0.0.1") == ("ip:10.0.0.1", "free")
+
+    asyncio.run(scenario())
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import get_settings
+from app.models.analytics import PostSnapshot
+from app.services import analytics
+from app.services.analytics import fold, ingest_snapshots, summarise
+
+P1, P2, P3 = (f"00000000-0000-0000-0000-00000000000{n}" for n in (1, 2, 3))
+T0 = datetime(2026, 6, 1, 12, tzinfo=timezone.utc)
+
+
+def _post(user="u1", platform="instagram", post_type="reel", how=19, latest=None) -> dict:
+    return {"user_id": user, "platform": platform, "post_type": post_type, "how": how, "latest": latest}
+
+
+def _snap(post_id: str, minutes: int, reach: int, likes: int, **counters) -> PostSnapshot:
+    return PostSnapshot(post_id=post_id, fetched_at=T0 + timedelta(minutes=minutes), reach=reach, likes=likes,
+                        **counters)
+
+
+def test_new_posts_count_once_with_their_newest_snapshot():
+    posts = {P1: _post(), P2: _post(post_type="carousel", how=20)}
+    batch = [_snap(P1, 10, 100, 5), _snap(P1, 20, 300, 12, comments=3), _snap(P1, 15, 200, 8), _snap(P2, 5, 50, 1)]
+
+    rollup = fold(batch, posts)
+
+    assert len(rollup.snapshots) == 4   # every fetch is history
+    latest = {row[0]: row for row in rollup.latest}
+    assert latest[P1][5] == T0 + timedelta(minutes=20) and latest[P1][6:9] == (300, 0, 15)
+    assert sorted(rollup.hourly) == [("u1", "instagram", 19, 1, 300, 0, 15), ("u1", "instagram", 20, 1, 50, 0, 1)]
+    assert ("u1", "instagram", "reel", 1, 300, 0, 15, 0, 0) in rollup.content_types
+
+
+def test_known_posts_add_only_the_change_and_stale_snapshots_are_ignored():
+    stored = {"fetched_at": T0, "reach": 200, "impressions": 0, "engagement": 10, "follower_delta": 0,
+              "video_views": 0, "watch_time_sec": 0}
+    posts = {P1: _post(latest=stored), P2: _post(latest={**stored, "fetched_at": T0 + timedelta(hours=1)})}
+    batch = [_snap(P1, 30, 260, 14), _snap(P2, 30, 999, 99), _snap(P3, 30, 1, 1)]
+
+    rollup = fold(batch, posts)
+
+    assert rollup.unknown_posts == 1 and rollup.stale == 1
+    assert [row[0] for row in rollup.latest] == [P1]
+    assert rollup.hourly == [("u1", "instagram", 19, 0, 60, 0, 4)]
+    assert len(rollup.snapshots) == 2
+
+
+def test_rollups_sum_per_user_platform_and_hour():
+    posts = {P1: _post(), P2: _post(), P3: _post(user="u2")}
+    rollup = fold([_snap(P1, 1, 10, 1), _snap(P2, 1, 20, 2), _snap(P3, 1, 40, 4)], posts)
+    assert sorted(rollup.hourly) == [("u1", "instagram", 19, 2, 30, 0, 3), ("u2", "instagram", 19, 1, 40, 0, 4)]
+
+
+def test_ingest_splits_batches_and_drops_bad_ids(monkeypatch):
+    from app.db import analytics as db
+
+    monkeypatch.setattr(get_settings(), "analytics_max_batch", 2)
+    calls = []
+
+    async def ingest(post_ids, tz, fold_batch, user_id=None, persona_min_posts=3):
+        calls.append(post_ids)
+        return fold_batch({p: _post() for p in post_ids})
+
+    monkeypatch.setattr(db, "ingest", ingest)
+    batch = [_snap(P1, 1, 10, 1), _snap(P2.upper(), 1, 10, 1), _snap("not-a-post", 1, 0, 0), _snap(P3, 1, 5, 0)]
+
+    result = asyncio.run(ingest_snapshots(batch, user_id="u1"))
+
+    assert calls == [[P1, P2], [P3]]
+    assert result.unknown_posts == 1 and len(result.snapshots) == 3 and len(result.latest) == 3
+
+
+def test_overview_ranks_hours_and_content_types():
+    hourly = [
+        {"platform": "instagram", "how": 19, "posts": 4, "reach": 4000, "impressions": 0, "engagement": 400},
+        {"platform": "instagram", "how": 24 * 5 + 9, "posts": 3, "reach": 900, "impressions": 0, "engagement": 600},
+        {"platform": "instagram", "how": 2, "posts": 1, "reach": 10, "impressions": 0, "engagement": 900},
+    ]
+    types = [
+        {"platform": "instagram", "post_type": "feed", "posts": 5, "reach": 3000, "impressions": 0,
+         "engagement": 300, "video_views": 0, "watch_time_sec": 0},
+        {"platform": "instagram", "post_type": "reel", "posts": 3, "reach": 1900, "impressions": 0,
+         "engagement": 1600, "video_views": 0, "watch_time_sec": 90},
+    ]
+
+    result = summarise(hourly, types, min_posts=3, tz="Asia/Kolkata")
+
+    (insta,) = result.platforms
+    assert (insta.posts, insta.reach, insta.engagement) == (8, 4900, 1900)
+    assert [(h.day, h.hour) for h in insta.best_hours] == [("Sat", 9), ("Mon", 19)]   # 1-post hour left out
+    assert [c.post_type for c in insta.content_types] == ["reel", "feed"]
+    assert insta.content_types[0].avg_watch_time_sec == 30.0
+    assert analytics.DAYS[0] == "Mon"
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.agents import itinerary_batch
+from app.core.config import get_settings
+from app.core.singleflight import SingleFlight
+from app.main import app
+from app.models.trip import ItineraryRequest
+from app.services.accommodation import AccommodationSearchParams, AccommodationService
+from tests.test_itinerary_store import _itinerary
+
+
+def _request(origin: str = "Delhi", trip_id: str | None = None) -> ItineraryRequest:
+    return ItineraryRequest(destination="Spiti Valley", origin=origin, start_date=date(2026, 6, 1),
+                            end_date=date(2026, 6, 3), trip_id=trip_id)
+
+
+def test_groups_identical_requests_ignoring_trip_id():
+    items = [_request(), _request("Chandigarh"), _request(trip_id="t-2"), _request("Chandigarh")]
+    assert itinerary_batch.group_items(items) == [[0, 2], [1, 3]]
+
+
+def test_batch_generates_each_unique_item_once_within_concurrency(monkeypatch):
+    monkeypatch.setattr(get_settings(), "itinerary_batch_concurrency", 2)
+    calls, running, peak = [], 0, 0
+
+    async def fake_generate(req, user_id=None):
+        nonlocal running, peak
+        calls.append(req.origin)
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if req.origin == "Nowhere":
+            raise RuntimeError("no route")
+        return _itinerary()[1]
+
+    monkeypatch.setattr(itinerary_batch, "generate_itinerary", fake_generate)
+    items = [_request(o) for o in ("Delhi", "Chandigarh", "Shimla", "Manali", "Delhi", "Nowhere")]
+
+    async def scenario():
+        return [r async for r in itinerary_batch.generate_batch(items, key="ip:test")]
+
+    results = sorted(asyncio.run(scenario()), key=lambda r: r.index)
+    assert sorted(calls) == sorted(["Delhi", "Chandigarh", "Shimla", "Manali", "Nowhere"])
+    assert peak == 2
+    assert [r.index for r in results] == list(range(6))
+    assert results[4].duplicate_of == 0 and results[4].itinerary.itinerary_id != results[0].itinerary.itinerary_id
+    assert results[5].itinerary is None and results[5].error == "no route"
+
+
+def test_singleflight_shares_and_survives_a_caller_leaving():
+    async def scenario():
+        flights = SingleFlight("test")
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "done"
+
+        first = asyncio.create_task(flights.do("k", work))
+        second = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+        assert runs == 1 and len(flights) == 0
+
+    asyncio.run(scenario())
+
+
+def test_shared_searches_reuse_results_across_tasks():
+    class CountingProvider:
+        name, is_available, calls = "counting", True, 0
+
+        async def search(self, params):
+            CountingProvider.calls += 1
+            return ["option"]
+
+    service = AccommodationService([CountingProvider()])
+    params = AccommodationSearchParams(city_name="Kaza", check_in=date(2026, 6, 1), check_out=date(2026, 6, 3))
+
+    async def item(memo):
+        service.share_searches(memo)
+        return await service.search(params)
+
+    async def scenario():
+        memo: dict = {}
+        await asyncio.gather(asyncio.create_task(item(memo)), asyncio.create_task(item(memo)))
+        await asyncio.create_task(item(memo))
+        await service.search(params)   # outside the batch: no memo
+
+    asyncio.run(scenario())
+    assert CountingProvider.calls == 2
+
+
+def test_batch_route_streams_ndjson(monkeypatch):
+    async def fake_generate(req, user_id=None):
+        return _itinerary()[1]
+
+    monkeypatch.setattr(itinerary_batch, "generate_itinerary", fake_generate)
+    body = {"items": [json.loads(_request(o).model_dump_json()) for o in ("Delhi", "Shimla", "Delhi")]}
+    res = TestClient(app).post("/api/v1/itinerary/generate:batch", json=body)
+    assert res.status_code == 200 and res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert all(line["status"] == "ok" for line in lines)
+    assert [line.get("duplicate_of") for line in lines if line["index"] == 2] == [0]
+
+    res = TestClient(app).post("/api/v1/itinerary/generate:batch", json={"items": []})
+    assert res.status_code == 422
+
+
+def test_offline_batches_need_a_verified_caller(monkeypatch):
+    from app.api import deps
+
+    monkeypatch.setattr(deps, "is_configured", lambda: True)
+    monkeypatch.setattr(itinerary_batch, "submit_offline", lambda items: pytest.fail("submitted without a token"))
+    body = {"mode": "offline", "items": [json.loads(_request("Delhi").model_dump_json())]}
+    res = TestClient(app).post("/api/v1/itinerary/generate:batch", json=body,
+                               headers={"X-User-Id": "00000000-0000-0000-0000-000000000001"})
+    assert res.status_code == 401
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.agents import blog_agent
+from app.agents.blog_agent import NothingToWrite, group_days, select_clips, write_blog
+
+IST = ZoneInfo("Asia/Kolkata")
+
+TRIP = {"id": "t1", "title": "Spiti loop", "destination": "Spiti Valley", "origin": "Delhi",
+        "start_date": date(2026, 6, 1), "end_date": date(2026, 6, 3), "travel_style": "adventure",
+        "trip_type": "solo", "num_travelers": 1}
+
+
+def _clip(n: int, day: int, hour: int = 10, score: int | None = None, text: str = "Chai at the dhaba") -> dict:
+    # 20:00 UTC on the 1st is 01:30 IST on the 2nd
+    return {"id": f"c{n}", "recorded_at": datetime(2026, 6, day, hour, tzinfo=timezone.utc), "context_tag": "tip",
+            "recording_mode": "quick_impression", "duration_sec": 30, "ai_score": score, "transcript": text}
+
+
+SUMMARY = {"headline": "Kaza", "summary": "Drove up.", "highlights": ["Key monastery"], "mood": "tired"}
+POST = {"title": "Spiti on a shoestring", "meta_description": "Ten days in the high desert.",
+        "body": "# Day 1\nWe drove up.", "key_takeaways": ["Carry cash"]}
+
+
+def test_days_follow_local_dates_and_trip_bounds():
+    clips = [_clip(1, 1), _clip(2, 1, hour=20), _clip(3, 5), _clip(4, 1, hour=3)]
+    days = group_days(clips, TRIP["start_date"], TRIP["end_date"], IST, {1: "Into Kaza"})
+    assert [(d.number, [c["id"] for c in d.clips]) for d in days] == [(1, ["c4", "c1"]), (2, ["c2"]), (3, ["c3"])]
+    assert days[0].title == "Into Kaza"
+
+
+def test_only_the_edited_day_changes_hash():
+    clips = [_clip(1, 1), _clip(2, 2)]
+    before = [d.input_hash() for d in group_days(clips, TRIP["start_date"], TRIP["end_date"], IST, {})]
+    clips[1] = {**clips[1], "transcript": "Actually it was butter tea"}
+    after = [d.input_hash() for d in group_days(clips, TRIP["start_date"], TRIP["end_date"], IST, {})]
+    assert before[0] == after[0] and before[1] != after[1]
+
+
+def test_over_budget_days_keep_best_clips_in_order():
+    clips = [_clip(1, 1, score=2, text="a " * 40), _clip(2, 1, hour=11, score=9, text="b " * 40),
+             _clip(3, 1, hour=12, score=7, text="c " * 40)]
+    assert [c["id"] for c in select_clips(clips, budget_tokens=45)] == ["c2", "c3"]
+
+
+def _fake_db(monkeypatch, inputs: dict, saved: dict) -> None:
+    from app.db import content
+
+    async def blog_inputs(user_id, trip_id):
+        return inputs
+
+    async def save_day_summaries(user_id, trip_id, rows, model):
+        saved.setdefault("days", []).extend(rows)
+
+    async def save_blog_draft(user_id, trip_id, asset_ids, title, body, metadata):
+        saved["blog"] = metadata
+        return "d1", 2
+
+    monkeypatch.setattr(content, "blog_inputs", blog_inputs)
+    monkeypatch.setattr(content, "save_day_summaries", save_day_summaries)
+    monkeypatch.setattr(content, "save_blog_draft", save_blog_draft)
+
+
+def _fake_llm(monkeypatch, calls: list[str]) -> None:
+    async def complete_json(prompt, system="", model="", max_tokens=0):
+        calls.append(model)
+        return json.dumps(POST if model == blog_agent.llm.CLAUDE_PRIMARY else SUMMARY)
+
+    monkeypatch.setattr(blog_agent.llm, "complete_json", complete_json)
+
+
+def test_rerun_maps_only_changed_days(monkeypatch):
+    clips = [_clip(1, 1), _clip(2, 2), _clip(3, 3)]
+    days = group_days(clips, TRIP["start_date"], TRIP["end_date"], IST, {})
+    cached = {d.number: {"input_hash": d.input_hash(), "summary": SUMMARY} for d in days}
+    cached[2]["input_hash"] = "stale"
+    saved: dict = {}
+    calls: list[str] = []
+    _fake_db(monkeypatch, {"assets": clips, "days": {}, "summaries": cached, "latest": None}, saved)
+    _fake_llm(monkeypatch, calls)
+
+    run = asyncio.run(write_blog("u1", TRIP))
+
+    assert calls == [blog_agent.llm.CLAUDE_FAST, blog_agent.llm.CLAUDE_PRIMARY]
+    assert [row[0] for row in saved["days"]] == [2]
+    assert (run.days, run.days_summarised, run.days_cached, run.reused) == (3, 1, 2, False)
+    assert saved["blog"]["days"] == 3
+
+
+def test_unchanged_trip_reuses_latest_blog(monkeypatch):
+    clips = [_clip(1, 1)]
+    days = group_days(clips, TRIP["start_date"], TRIP["end_date"], IST, {})
+    hashes = {d.number: d.input_hash() for d in days}
+    latest = {"id": "d0", "version": 1, "title": "Old", "input_hash": blog_agent.reduce_hash(TRIP, days, hashes)}
+    inputs = {"assets": clips, "days": {}, "latest": latest,
+              "summaries": {1: {"input_hash": hashes[1], "summary": SUMMARY}}}
+    calls: list[str] = []
+    _fake_db(monkeypatch, inputs, {})
+    _fake_llm(monkeypatch, calls)
+
+    run = asyncio.run(write_blog("u1", TRIP))
+    assert run.reused and run.draft_id == "d0" and calls == []
+
+    forced = asyncio.run(write_blog("u1", TRIP, force=True))
+    assert not forced.reused and calls == [blog_agent.llm.CLAUDE_PRIMARY]
+
+
+def test_trip_without_transcripts(monkeypatch):
+    _fake_db(monkeypatch, {"assets": [], "days": {}, "summaries": {}, "latest": None}, {})
+    with pytest.raises(NothingToWrite):
+        asyncio.run(write_blog("u1", TRIP))
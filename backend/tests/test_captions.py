@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+from app.agents import caption_agent
+from app.agents.caption_agent import build_batch_prompt, caption_assets, draft_rows, pack, parse_batch
+from app.core.config import get_settings
+from app.models.content import CaptionSet
+
+
+def _asset(n: int, user: str = "u1", words: int = 50) -> dict:
+    return {"id": f"a{n}", "user_id": user, "trip_id": "t1", "recording_mode": "quick_impression",
+            "context_tag": "food_review", "duration_sec": 40, "destination": "Kaza",
+            "transcript": " ".join(["momo"] * words)}
+
+
+def _captions(item_id, hook: str = "Momos at 3,800 m") -> dict:
+    return {
+        "id": item_id,
+        "instagram": {"caption": "Best momos in Spiti", "hashtags_caption": ["#Spiti"],
+                      "hashtags_first_comment": ["#IncredibleIndia"]},
+        "twitter_hook": hook,
+        "whatsapp_summary": "Had momos in Kaza.",
+        "youtube_description": "Street food in Kaza.",
+    }
+
+
+def test_packs_respect_budget_items_and_users():
+    assets = [_asset(1), _asset(2, "u2"), _asset(3), _asset(4), _asset(5, words=400)]
+    packs = pack(assets, input_budget=300, max_items=2, max_transcript_tokens=1500)
+    assert [[a["id"] for a in p] for p in packs] == [["a1", "a3"], ["a4"], ["a5"], ["a2"]]
+
+
+def test_long_transcripts_are_cut():
+    prompt = build_batch_prompt([_asset(1, words=2000)], max_transcript_tokens=100)
+    assert '<item id="1">' in prompt and prompt.count("momo") <= 100
+    assert "…" in prompt
+
+
+def test_parse_batch_keeps_valid_items_only():
+    raw = json.dumps({"items": [
+        _captions("1"),
+        _captions("2", hook="x" * 300),            # over 280
+        {"id": "3", "twitter_hook": "no instagram"},
+        _captions("4"), _captions("4"),            # answered twice
+        _captions("9"),                            # not asked for
+    ]})
+    parsed = parse_batch(raw, 4)
+    assert list(parsed) == [0]
+    assert parse_batch("not json", 2) == {}
+
+
+def test_invalid_items_are_retried_alone(monkeypatch):
+    calls: list[int] = []
+
+    async def fake_complete_json(prompt, system="", model="", max_tokens=0):
+        count = prompt.count("<item ")
+        calls.append(count)
+        if count == 1:
+            return json.dumps({"items": [_captions("1")]})
+        return json.dumps({"items": [_captions("1"), _captions("2", hook="")]})
+
+    monkeypatch.setattr(caption_agent.llm, "complete_json", fake_complete_json)
+    monkeypatch.setattr(get_settings(), "caption_pack_max_items", 8)
+
+    results = asyncio.run(caption_assets([_asset(1), _asset(2)]))
+
+    assert calls == [2, 1]
+    assert set(results.captions) == {"a1", "a2"}
+    assert results.failed == [] and results.released == [] and results.llm_calls == 2
+
+
+def test_failed_calls_release_their_assets(monkeypatch):
+    async def failing(prompt, system="", model="", max_tokens=0):
+        raise RuntimeError("overloaded")
+
+    monkeypatch.setattr(caption_agent.llm, "complete_json", failing)
+    results = asyncio.run(caption_assets([_asset(1), _asset(2, "u2")]))
+    assert sorted(results.released) == ["a1", "a2"] and not results.captions
+
+
+def test_loop_waits_for_the_next_poll_after_a_failed_call(monkeypatch):
+    events = []
+    runs = iter([caption_agent.CaptionRun(assets=2, drafted=2), caption_agent.CaptionRun(assets=2, released=2),
+                 caption_agent.CaptionRun(assets=2, released=2)])
+
+    async def fake_sleep(seconds):
+        events.append("sleep")
+
+    async def fake_run_pending(limit):
+        events.append("run")
+        run = next(runs, None)
+        if run is None:
+            raise asyncio.CancelledError
+        return run
+
+    monkeypatch.setattr(get_settings(), "caption_claim_limit", 2)
+    monkeypatch.setattr(caption_agent, "run_pending", fake_run_pending)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    try:
+        asyncio.run(caption_agent.caption_loop())
+    except asyncio.CancelledError:
+        pass
+    assert events == ["sleep", "run", "run", "sleep", "run", "sleep", "run"]
+
+
+def test_draft_rows_cover_every_platform():
+    rows = draft_rows(_asset(1), CaptionSet.model_validate(_captions("1")))
+    assert [r["draft_type"] for r in rows] == [
+        "caption_instagram", "caption_twitter", "whatsapp_summary", "youtube_description",
+    ]
+    assert rows[0]["metadata"]["hashtags_caption"] == ["#Spiti"]
+    assert all(r["asset_id"] == "a1" and r["user_id"] == "u1" for r in rows)
@@ -0,0 +1,171 @@
+"""
+Data-access layer against the docker-compose Postgres (see test_itinerary_store.py).
+Rows are committed — user_scope() uses its own pooled connection — and removed
+in the finally block.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import date
+
+import jwt
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.core import jsonpatch
+from app.core.config import get_settings
+from app.db import close_pool, queries, user_scope
+from app.db.itineraries import save_itinerary
+from app.db.trips import list_trips
+from app.main import app
+from app.services import offline_bundle
+from tests.test_itinerary_store import _itinerary
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+JWT_SECRET = "test-jwt-secret-at-least-32-bytes-long"
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+def _bearer(user: str) -> str:
+    claims = {"sub": user, "aud": "authenticated", "exp": int(time.time()) + 300}
+    return f"Bearer {jwt.encode(claims, JWT_SECRET, algorithm='HS256')}"
+
+
+def test_user_scope_enforces_rls(monkeypatch):
+    import asyncpg
+
+    monkeypatch.setattr(get_settings(), "database_url", TEST_DATABASE_URL)
+    alice, bob = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def scenario():
+        admin = await asyncpg.connect(TEST_DATABASE_URL)
+        try:
+            for user in (alice, bob):
+                await admin.execute("insert into auth.users (id) values ($1)", user)
+                await admin.execute("insert into public.profiles (id) values ($1)", user)
+                await admin.execute(
+                    """insert into public.trips (user_id, title, destination, start_date, end_date)
+                       values ($1, 'Spiti', 'Spiti Valley', $2, $3)""",
+                    user, date(2026, 6, 1), date(2026, 6, 5),
+                )
+
+            trips = await list_trips(alice)
+            assert [str(t["user_id"]) for t in trips] == [alice]
+
+            # Even asking for Bob's trips explicitly returns nothing under Alice's scope
+            async with user_scope(alice) as conn:
+                assert await queries.fetch(conn, queries.TRIPS_BY_USER, bob, 10) == []
+                # Second run hits the connection's prepared statement
+                assert len(await queries.fetch(conn, queries.TRIPS_BY_USER, alice, 10)) == 1
+        finally:
+            await admin.execute("delete from auth.users where id = any($1::uuid[])", [alice, bob])
+            await admin.close()
+            await close_pool()
+
+    asyncio.run(scenario())
+
+
+def test_conditional_get(monkeypatch):
+    import asyncpg
+
+    monkeypatch.setattr(get_settings(), "database_url", TEST_DATABASE_URL)
+    monkeypatch.setattr(get_settings(), "supabase_jwt_secret", JWT_SECRET)
+    user = str(uuid.uuid4())
+    req, itinerary = _itinerary()
+
+    async def setup():
+        admin = await asyncpg.connect(TEST_DATABASE_URL)
+        await admin.execute("insert into auth.users (id) values ($1)", user)
+        await admin.execute("insert into public.profiles (id) values ($1)", user)
+        saved = await save_itinerary(itinerary, req, user, admin)
+        await admin.close()
+        return saved
+
+    async def teardown():
+        admin = await asyncpg.connect(TEST_DATABASE_URL)
+        await admin.execute("delete from auth.users where id = $1", user)
+        await admin.close()
+
+    async def _save(itinerary, req, user):
+        admin = await asyncpg.connect(TEST_DATABASE_URL)
+        await save_itinerary(itinerary, req, user, admin)
+        await admin.close()
+
+    saved = asyncio.run(setup())
+    try:
+        with TestClient(app) as client:
+            headers = {"Authorization": _bearer(user), "Accept-Encoding": "identity"}
+            res = client.get(f"/api/v1/itinerary/{saved.itinerary_id}", headers=headers)
+            assert res.status_code == 200
+            assert res.headers["etag"] == f'"itin-{saved.itinerary_id}-v1"'
+            assert len(res.json()["days"]) == 3
+
+            res = client.get(f"/api/v1/itinerary/{saved.itinerary_id}",
+                             headers={**headers, "If-None-Match": res.headers["etag"]})
+            assert res.status_code == 304 and res.content == b""
+
+            slim = client.get(f"/api/v1/itinerary/{saved.itinerary_id}",
+                              params={"fields": "summary,days.title"}, headers=headers)
+            assert set(slim.json()) == {"summary", "days"} and set(slim.json()["days"][0]) == {"title"}
+            assert slim.headers["etag"] != res.headers["etag"]
+            packed = client.get(f"/api/v1/itinerary/{saved.itinerary_id}", headers={**headers, "Accept-Encoding": "br"})
+            assert packed.headers["content-encoding"] == "br" and packed.headers["etag"].startswith("W/")
+
+            res_v1 = client.get(f"/api/v1/itinerary/{saved.itinerary_id}", headers=headers).json()
+            req.trip_id = saved.trip_id
+            _, regenerated = _itinerary()
+            regenerated.days[0].title = "Kaza, slowly"
+            asyncio.run(_save(regenerated, req, user))
+
+            changes = client.get(f"/api/v1/itinerary/{saved.itinerary_id}/changes",
+                                 params={"since_version": 1}, headers=headers).json()
+            assert (changes["from_version"], changes["to_version"]) == (1, 2)
+            v2 = client.get(f"/api/v1/itinerary/{saved.itinerary_id}", headers=headers).json()
+            assert jsonpatch.apply(res_v1, changes["patch"]) == v2
+            assert res_v1["days"][0]["title"] != v2["days"][0]["title"]
+
+            trip = client.get(f"/api/v1/trips/{saved.trip_id}", headers=headers)
+            assert trip.json()["itinerary_version"] == 2
+            bundle = client.get(f"/api/v1/trips/{saved.trip_id}/offline-bundle", headers=headers)
+            assert bundle.headers["content-type"] == offline_bundle.MEDIA_TYPE
+            assert offline_bundle.decode_bundle(bundle.content)["itinerary"]["days"][0]["title"] == "Kaza, slowly"
+            stranger = {"Authorization": _bearer(str(uuid.uuid4()))}
+            other = client.get(f"/api/v1/trips/{saved.trip_id}", headers=stranger)
+            assert other.status_code == 404
+            spoofed = client.get(f"/api/v1/trips/{saved.trip_id}", headers={"X-User-Id": user})
+            assert spoofed.status_code == 401
+    finally:
+        asyncio.run(teardown())
+
+
+def test_concurrent_blog_saves_take_consecutive_versions(monkeypatch):
+    import asyncpg
+
+    from app.db.content import save_blog_draft
+
+    monkeypatch.setattr(get_settings(), "database_url", TEST_DATABASE_URL)
+    user = str(uuid.uuid4())
+
+    async def scenario():
+        admin = await asyncpg.connect(TEST_DATABASE_URL)
+        try:
+            await admin.execute("insert into auth.users (id) values ($1)", user)
+            await admin.execute("insert into public.profiles (id) values ($1)", user)
+            trip = await admin.fetchval(
+                """insert into public.trips (user_id, title, destination, start_date, end_date)
+                   values ($1, 'Spiti', 'Spiti Valley', $2, $3) returning id""",
+                user, date(2026, 6, 1), date(2026, 6, 5),
+            )
+            saved = await asyncio.gather(*(save_blog_draft(user, str(trip), [], "Spiti", "…", {}) for _ in range(4)))
+            assert sorted(version for _, version in saved) == [1, 2, 3, 4]
+        finally:
+            await admin.execute("delete from auth.users where id = $1", user)
+            await admin.close()
+            await close_pool()
+
+    asyncio.run(scenario())
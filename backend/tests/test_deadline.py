@@ -0,0 +1,88 @@
+import asyncio
+import time
+from datetime import date
+
+from app.agents import itinerary_agent
+from app.core import deadline
+from app.core.http import async_client
+from app.services.accommodation import AccommodationService
+from app.services.accommodation.providers.mock import MockAccommodationProvider
+from tests.test_itinerary_store import _itinerary
+
+
+class SlowIn:
+    """Answers instantly except for `slow` cities; records every search."""
+
+    is_available = True
+
+    def __init__(self, name: str, slow: set[str] = frozenset()):
+        self.name, self.slow, self.calls = name, slow, []
+
+    async def search(self, params):
+        self.calls.append(params.city_name)
+        if params.city_name in self.slow:
+            await asyncio.sleep(10)
+        return [f"{self.name}:{params.city_name}"]
+
+
+def test_scopes_only_tighten_and_none_lifts():
+    assert deadline.remaining() is None and deadline.clamp(15) == 15
+    with deadline.deadline_scope(10):
+        with deadline.deadline_scope(60):
+            assert 9 < deadline.remaining() <= 10
+        with deadline.deadline_scope(1):
+            assert deadline.clamp(15) <= 1
+            assert async_client(timeout=15).timeout.read <= 1
+            with deadline.deadline_scope(None):
+                assert deadline.remaining() is None
+    with deadline.deadline_scope(0):
+        assert deadline.expired() and deadline.clamp(15) == deadline.MIN_TIMEOUT_S
+
+
+def test_header_parsing():
+    assert deadline.from_header("20000", 60, 120) == 20
+    assert deadline.from_header("999999", 60, 120) == 120
+    assert deadline.from_header("soon", 60, 120) == 60
+    assert deadline.from_header("-5", 60, 120) == 60
+    assert deadline.from_header(None, 60, 120) == 60
+
+
+def test_search_multi_returns_pending_locations_at_the_deadline():
+    live, fallback = SlowIn("live", slow={"Tabo"}), SlowIn("fallback")
+    service = AccommodationService([live, fallback])
+
+    async def scenario():
+        with deadline.deadline_scope(0.05):
+            started = time.perf_counter()
+            result = await service.search_multi(["Kaza", "Tabo"], date(2026, 6, 1), date(2026, 6, 3))
+            return result, time.perf_counter() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.5
+    assert result.pending == {"Tabo"}
+    assert result.options == {"Kaza": ["live:Kaza"], "Tabo": ["fallback:Tabo"]}
+    assert fallback.calls == ["Tabo"]          # fallback only where the live search was cut off
+
+
+def test_expired_deadline_goes_straight_to_the_fallback():
+    live, fallback = SlowIn("live"), SlowIn("fallback")
+    service = AccommodationService([live, fallback])
+
+    async def scenario():
+        with deadline.deadline_scope(0):
+            return await service.search_multi(["Kaza"], date(2026, 6, 1), date(2026, 6, 3))
+
+    result = asyncio.run(scenario())
+    assert live.calls == [] and result.options["Kaza"] == ["fallback:Kaza"]
+
+
+def test_refresh_fills_pending_days(monkeypatch):
+    req, itinerary = _itinerary()
+    for day in itinerary.days:
+        day.accommodation_options, day.accommodation_status = [], "pending"
+    monkeypatch.setattr(itinerary_agent, "get_accommodation_service",
+                        lambda: AccommodationService([MockAccommodationProvider()]))
+
+    assert asyncio.run(itinerary_agent.refresh_pending_accommodation(itinerary, req))
+    stays = [day for day in itinerary.days if day.overnight_location]
+    assert stays and all(day.accommodation_options and day.accommodation_status is None for day in stays)
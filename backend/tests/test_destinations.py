@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.destinations import Destination, DestinationIndex, refresh, static_destinations
+
+# Generous for shared CI runners; typical p99 is tens of µs
+SUGGEST_P99_BUDGET_MS = float(os.environ.get("SUGGEST_P99_BUDGET_MS", "1.0"))
+
+client = TestClient(app)
+
+
+def _index() -> DestinationIndex:
+    index = DestinationIndex()
+    for dest in static_destinations():
+        index.add(dest)
+    # Catalogue rows merge into the alias-table entries by name or coordinates
+    index.add(Destination("Spiti Valley", "Himachal Pradesh", "d-spiti", 32.2464, 78.0337, frozenset({6, 7, 8, 9})))
+    index.add(Destination("Manali", "Himachal Pradesh", "d-manali", 32.2396, 77.1887, frozenset({1, 2, 3})))
+    index.add(Destination("Jim Corbett National Park", "Uttarakhand", "d-corbett", 29.5300, 78.7747))
+    return index
+
+
+def _names(suggestions) -> list[str]:
+    return [s.destination.name for s in suggestions]
+
+
+def test_prefix_alias_and_fuzzy():
+    index = _index()
+    assert _names(index.suggest("spi"))[0] == "Spiti Valley"
+    assert _names(index.suggest("kutch")) == ["Rann Of Kutch"]
+    assert _names(index.suggest("bombay")) == ["Mumbai"]
+    assert _names(index.suggest("jim corbett")) == ["Jim Corbett National Park"]
+
+    typo = index.suggest("rishikesj")
+    assert _names(typo) == ["Rishikesh"] and typo[0].match == "fuzzy"
+    assert index.suggest("   ") == []
+
+
+def test_states_are_search_terms():
+    index = _index()
+    assert set(_names(index.suggest("himachal"))) == {"Spiti Valley", "Manali"}
+    assert _names(index.suggest("uttara")) == ["Jim Corbett National Park"]
+    assert index.find("himachal pradesh") is None   # a state never stands in for a destination
+
+
+def test_refresh_rereads_the_overlap_without_double_counting(monkeypatch):
+    import app.db
+    from app.db import destinations
+
+    t0 = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    reads = iter([
+        [{"name": "manali", "trips": 2, "latest": t0, "ids": ["t1", "t2"], "created": [t0, t0]}],
+        # t2 again, and t3 that committed late with the watermark's timestamp
+        [{"name": "manali", "trips": 3, "latest": t0 + timedelta(seconds=5), "ids": ["t2", "t3", "t4"],
+          "created": [t0, t0, t0 + timedelta(seconds=5)]}],
+    ])
+    since = []
+
+    async def trip_counts_since(watermark, overlap_s):
+        since.append(watermark)
+        return next(reads)
+
+    async def destinations_since(watermark, overlap_s):
+        return []
+
+    monkeypatch.setattr(app.db, "is_configured", lambda: True)
+    monkeypatch.setattr(destinations, "trip_counts_since", trip_counts_since)
+    monkeypatch.setattr(destinations, "destinations_since", destinations_since)
+    index = _index()
+    manali = index.get(index.find("Manali"))
+    before = manali.trips
+
+    asyncio.run(refresh(index))
+    asyncio.run(refresh(index))
+    assert manali.trips - before == 4 and since == [None, t0]
+    assert set(index.trip_ids) == {"t1", "t2", "t3", "t4"}   # all still inside the overlap window
+
+
+def test_popularity_and_season_ranking():
+    index = _index()
+    index.bump(index.find("majuli"), 3)
+    assert _names(index.suggest("ma", month=12))[0] == "Majuli"
+
+    # In season beats a handful of extra trips
+    assert _names(index.suggest("ma", month=2))[0] == "Manali"
+    assert index.suggest("spiti", month=7)[0].in_season
+
+    index.bump(index.find("manali"), 200)
+    assert _names(index.suggest("ma", month=12))[0] == "Manali"
+
+
+def test_suggest_latency_budget():
+    index = _index()
+    queries = [name[:k] for name in _names(index.suggest("a", limit=20)) + ["Spiti Valley", "Rishikesj"]
+               for k in range(1, len(name) + 1)]
+    timings = []
+    for _ in range(20):
+        for q in queries:
+            started = time.perf_counter()
+            index.suggest(q)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    p99_ms = timings[int(len(timings) * 0.99)] * 1000
+    assert p99_ms < SUGGEST_P99_BUDGET_MS, f"suggest p99 {p99_ms:.3f} ms"
+
+
+def test_suggest_endpoint():
+    res = client.get("/api/v1/destinations/suggest", params={"q": "rishi", "limit": 3})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["query"] == "rishi"
+    assert body["suggestions"][0]["name"] == "Rishikesh"
+    assert client.get("/api/v1/destinations/suggest").status_code == 422
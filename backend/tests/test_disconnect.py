@@ -0,0 +1,105 @@
+import asyncio
+from datetime import date
+
+import pytest
+from starlette.requests import Request
+
+from app.core.disconnect import ClientDisconnected, cancel_on_disconnect
+from app.core.singleflight import SingleFlight
+from app.services.accommodation import AccommodationService
+
+
+def _request(gone: asyncio.Event) -> Request:
+    async def receive():
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": []}, receive)
+
+
+def test_disconnect_cancels_the_work():
+    async def scenario():
+        gone = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        asyncio.get_running_loop().call_later(0.01, gone.set)
+        with pytest.raises(ClientDisconnected):
+            await cancel_on_disconnect(_request(gone), work())
+        assert cancelled.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_finished_work_is_returned():
+    async def scenario():
+        async def work():
+            return "itinerary"
+
+        assert await cancel_on_disconnect(_request(asyncio.Event()), work()) == "itinerary"
+
+    asyncio.run(scenario())
+
+
+def test_singleflight_cancels_only_orphaned_work():
+    async def scenario():
+        runs: list[str] = []
+
+        async def work():
+            try:
+                await asyncio.sleep(0.05)
+                runs.append("done")
+            except asyncio.CancelledError:
+                runs.append("cancelled")
+                raise
+
+        orphans = SingleFlight("test", cancel_orphans=True)
+        first = asyncio.create_task(orphans.do("k", work))
+        second = asyncio.create_task(orphans.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await second                      # still shared with `second`: not cancelled
+        assert runs == ["done"]
+
+        alone = asyncio.create_task(orphans.do("k", work))
+        await asyncio.sleep(0)
+        alone.cancel()
+        await asyncio.gather(alone, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert runs == ["done", "cancelled"] and len(orphans) == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_search_multi_reaches_the_providers():
+    events: list[str] = []
+
+    class SlowProvider:
+        name, is_available = "slow", True
+
+        async def search(self, params):
+            events.append(f"start {params.city_name}")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append(f"cancelled {params.city_name}")
+                raise
+            return []
+
+    async def scenario():
+        service = AccommodationService([SlowProvider()])
+        task = asyncio.create_task(service.search_multi(["Kaza", "Tabo"], date(2026, 6, 1), date(2026, 6, 3)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert sorted(events) == ["cancelled Kaza", "cancelled Tabo", "start Kaza", "start Tabo"]
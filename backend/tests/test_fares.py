@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from app.core.config import get_settings
+from app.services.fares import alerts
+from app.services.fares.alerts import evaluate, group_alerts, run_due
+from app.services.fares.base import FareProvider, FareQuery, FareQuote
+from app.services.fares.providers.amadeus import AmadeusFlightProvider, resolve_airport
+from app.services.fares.providers.mock import mock_fare
+from app.services.fares import service as fare_service
+from app.services.fares.service import FareService
+
+NOW = datetime(2026, 10, 1, 6, tzinfo=timezone.utc)
+
+
+class CountingProvider(FareProvider):
+    def __init__(self, prices: dict[tuple, int], route_types=("flight",), available=True):
+        self.prices = prices
+        self._route_types = frozenset(route_types)
+        self.available = available
+        self.calls: list[FareQuery] = []
+
+    @property
+    def name(self) -> str:
+        return "counting"
+
+    @property
+    def route_types(self) -> frozenset[str]:
+        return self._route_types
+
+    @property
+    def is_available(self) -> bool:
+        return self.available
+
+    async def lowest_fare(self, query):
+        self.calls.append(query)
+        await asyncio.sleep(0.01)
+        price = self.prices.get((query.key()[1], query.key()[2]))
+        return FareQuote(self.name, price) if price else None
+
+
+def _alert(n: int, origin="Delhi", destination="Goa", target=5000, days=10, route_type="flight") -> dict:
+    return {"id": f"a{n}", "user_id": f"u{n}", "route_type": route_type, "origin": origin,
+            "destination": destination, "travel_date": NOW.date() + timedelta(days=days), "target_price_inr": target}
+
+
+def test_alerts_on_one_route_and_day_share_a_query():
+    batch = [_alert(1), _alert(2, origin=" delhi "), _alert(3, days=11), _alert(4, destination="Leh")]
+    queries, codes = group_alerts(batch)
+    assert len(queries) == 3 and codes == [0, 0, 1, 2]
+
+
+def test_thresholds_and_next_checks_are_evaluated_together():
+    batch = [_alert(1, target=5000, days=2), _alert(2, target=4000, days=2), _alert(3, days=60),
+             _alert(4, destination="Leh")]
+    codes = [0, 0, 1, 2]
+    quotes = [FareQuote("p", 4500), FareQuote("p", 4500), None]
+
+    rows, nudges = evaluate(batch, codes, quotes, NOW)
+
+    assert [(r[1], r[3]) for r in rows] == [(4500, True), (4500, False), (4500, True), (None, False)]
+    assert [n[0] for n in nudges] == ["u1", "u3"] and "₹4,500" in nudges[0][1]
+    wait_h = [(r[4] - NOW).total_seconds() / 3600 for r in rows]
+    s = get_settings()
+    assert 0.9 <= wait_h[0] <= 1.1                                # 2 days out: the 1 h floor
+    assert 21.6 <= wait_h[2] <= 26.4                              # 60 days out: the 24 h ceiling
+    assert abs(wait_h[3] * 3600 - s.fare_alert_retry_s) <= 0.1 * s.fare_alert_retry_s   # no price
+
+
+def test_concurrent_and_repeat_lookups_hit_the_provider_once():
+    provider = CountingProvider({("delhi", "goa"): 4200})
+    trains = CountingProvider({}, route_types=("train",))
+    service = FareService([trains, provider], ttl_s=60)
+    query = FareQuery("flight", "Delhi", "Goa", date(2026, 10, 20))
+
+    async def scenario():
+        first = await asyncio.gather(*(service.lowest(query) for _ in range(5)))
+        again = await service.lowest(FareQuery("flight", "DELHI", "goa", date(2026, 10, 20)))
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert [q.price_inr for q in first] == [4200] * 5 and again.price_inr == 4200
+    assert len(provider.calls) == 1 and trains.calls == []
+
+
+def test_unavailable_providers_fall_through():
+    down = CountingProvider({("delhi", "goa"): 1}, available=False)
+    up = CountingProvider({("delhi", "goa"): 4200})
+    quote = asyncio.run(FareService([down, up], ttl_s=60).lowest(FareQuery("flight", "Delhi", "Goa", NOW.date())))
+    assert quote.price_inr == 4200 and down.calls == []
+
+
+def test_run_due_settles_every_claimed_alert(monkeypatch):
+    from app.db import fares
+
+    provider = CountingProvider({("delhi", "goa"): 4500})
+    monkeypatch.setattr(alerts, "get_fare_service", lambda: FareService([provider], ttl_s=60))
+    claimed = [_alert(n, target=5000 if n % 2 else 4000) for n in range(6)] + [_alert(9, destination="Leh")]
+    settled = {}
+
+    async def claim_due_alerts(limit, lease_s):
+        return claimed[:limit]
+
+    async def settle_alerts(rows, nudges):
+        settled["rows"], settled["nudges"] = rows, nudges
+
+    monkeypatch.setattr(fares, "claim_due_alerts", claim_due_alerts)
+    monkeypatch.setattr(fares, "settle_alerts", settle_alerts)
+
+    run = asyncio.run(run_due(100))
+
+    assert (run.alerts, run.lookups, run.priced, run.triggered) == (7, 2, 6, 3)
+    assert len(provider.calls) == 2 and len(settled["rows"]) == 7
+    assert sorted(n[0] for n in settled["nudges"]) == ["u1", "u3", "u5"]
+
+
+def test_amadeus_lowest_offer_and_airports():
+    offers = [{"price": {"grandTotal": "6120.50"}, "validatingAirlineCodes": ["AI"]},
+              {"price": {"grandTotal": "4899.00"}, "validatingAirlineCodes": ["6E"]},
+              {"price": {}}]
+    quote = AmadeusFlightProvider()._lowest(offers)
+    assert (quote.price_inr, quote.carrier, quote.offers) == (4899, "6E", 2)
+    assert resolve_airport("Bengaluru") == "BLR" and resolve_airport("ixl") == "IXL"
+    assert resolve_airport("Spiti Valley") is None
+
+
+def test_mock_fares_are_stable_and_rise_near_travel():
+    query = FareQuery("train", "Delhi", "Kalka", date(2026, 12, 1))
+    early, late = mock_fare(query, today=date(2026, 10, 1)), mock_fare(query, today=date(2026, 11, 30))
+    assert early == mock_fare(query, today=date(2026, 10, 1)) and late > early
+
+
+def test_providers_load_once_across_threads(monkeypatch):
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.05)
+        return []
+
+    monkeypatch.setattr(fare_service, "load_providers", slow_load)
+    fares = FareService()
+    threads = [threading.Thread(target=lambda: fares.providers) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    assert fare_service.get_fare_service() is fare_service.get_fare_service()
@@ -10,3 +10,19 @@ def test_health():
     data = res.json()
     assert data["status"] == "ok"
     assert "timestamp" in data
+
+
+def test_metrics():
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert "xplor_admission_queue_seconds" in res.text
+
+
+def test_trace_id_header():
+    res = client.get("/health")
+    assert len(res.headers["x-trace-id"]) == 32
+
+    parent = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    res = client.get("/health", headers={"traceparent": parent})
+    assert res.headers["x-trace-id"] == "a" * 32
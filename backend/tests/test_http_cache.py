@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import BytesLRU, etag_matches, make_etag
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_etag_matching():
+    etag = make_etag("itin", "abc", "v3")
+    assert etag == '"itin-abc-v3"'
+    assert etag_matches('"itin-abc-v3"', etag)
+    assert etag_matches('W/"itin-abc-v3"', etag)
+    assert etag_matches('"other", "itin-abc-v3"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"itin-abc-v2"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_bytes_lru_evicts_by_size():
+    cache = BytesLRU("test", max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"       # a is now most recent
+    cache.put("c", b"123")
+    assert cache.get("b") is None
+    assert cache.size_bytes == 8
+    cache.put("huge", b"x" * 11)             # larger than the whole cache: ignored
+    assert cache.get("huge") is None and len(cache) == 2
+
+
+def test_reads_require_storage_and_user():
+    # No DATABASE_URL in the test environment
+    res = client.get("/api/v1/itinerary/00000000-0000-0000-0000-000000000001")
+    assert res.status_code == 503
+
+
+def test_encoding_negotiation():
+    import gzip
+
+    from app.core import encoding
+
+    big = encoding.MIN_COMPRESS_BYTES
+    assert encoding.negotiate(None, "gzip, br", big) == (encoding.JSON, "br")
+    assert encoding.negotiate(None, "br;q=0, gzip", big) == (encoding.JSON, "gzip")
+    assert encoding.negotiate(None, "gzip, br", big - 1) == (encoding.JSON, "identity")
+    assert encoding.negotiate(None, "identity", big) == (encoding.JSON, "identity")
+    assert encoding.negotiate("application/msgpack", None, big) == (encoding.MSGPACK, "identity")
+    assert encoding.negotiate("application/json, application/msgpack;q=0.5", None, 10)[0] == encoding.JSON
+
+    body = encoding.dumps({"days": [{"title": "Kaza"}] * 100})
+    assert gzip.decompress(encoding.encode(body, encoding.JSON, "gzip")) == body
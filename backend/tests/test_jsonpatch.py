@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from app.core.jsonpatch import PatchError, apply, diff
+
+
+def test_diff_round_trips():
+    old = {
+        "summary": "Five days",
+        "days": [
+            {"day_number": 1, "activities": [{"title": "Hadimba"}, {"title": "Mall Road"}]},
+            {"day_number": 2, "activities": [{"title": "Solang"}], "weather_note": "Snow"},
+            {"day_number": 3, "activities": []},
+        ],
+        "key_tips": ["a/b", "c~d"],
+        "packing_list": None,
+    }
+    new = json.loads(json.dumps(old))
+    new["days"][1]["activities"][0]["title"] = "Rohtang"
+    del new["days"][1]["weather_note"]
+    new["days"].pop()
+    new["key_tips"].append("Carry cash")
+    new["packing_list"] = [{"item": "Fleece"}]
+    new["a/b~c"] = 1
+
+    patch = diff(old, new)
+    assert apply(old, patch) == new
+    assert {"op": "replace", "path": "/days/1/activities/0/title", "value": "Rohtang"} in patch
+    assert {"op": "add", "path": "/a~1b~0c", "value": 1} in patch
+    assert diff(new, new) == []
+
+
+def test_shrinking_lists_remove_from_the_end():
+    patch = diff({"xs": [1, 2, 3, 4]}, {"xs": [1]})
+    assert [op["path"] for op in patch] == ["/xs/3", "/xs/2", "/xs/1"]
+    assert apply({"xs": [1, 2, 3, 4]}, patch) == {"xs": [1]}
+
+
+def test_apply_rejects_bad_paths():
+    with pytest.raises(PatchError):
+        apply({"a": 1}, [{"op": "replace", "path": "/b", "value": 2}])
+    with pytest.raises(PatchError):
+        apply({"a": [1]}, [{"op": "remove", "path": "/a/5"}])
+    for index in ("-1", "+1", "01", " 1", "1.0"):
+        with pytest.raises(PatchError):
+            apply({"a": [1, 2, 3]}, [{"op": "remove", "path": f"/a/{index}"}])
+        with pytest.raises(PatchError):
+            apply({"a": [[1], [2]]}, [{"op": "replace", "path": f"/a/{index}/0", "value": 0}])
+    assert apply({"a": [1, 2, 3]}, [{"op": "remove", "path": "/a/0"}]) == {"a": [2, 3]}
@@ -0,0 +1,220 @@
+"""
+Streaming uploads against an in-memory object store, and against the
+docker-compose MinIO when TEST_S3_ENDPOINT is set (http://localhost:9000).
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import media_upload
+from app.services.media_upload import UploadConflict, UploadTooLarge, composite_sha256, receive
+from app.services.object_store import ObjectStore
+
+TEST_S3_ENDPOINT = os.environ.get("TEST_S3_ENDPOINT")
+
+
+class MemoryStore(ObjectStore):
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.parts: dict[int, bytes] = {}
+        self.objects: dict[str, bytes] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def create_multipart(self, key, content_type):
+        return "mp-1"
+
+    async def upload_part(self, key, upload_id, number, data, md5):
+        assert hashlib.md5(data).digest() == md5
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay_s)
+        finally:
+            self.in_flight -= 1
+        self.parts[number] = data
+        return f'"etag-{number}"'
+
+    async def complete_multipart(self, key, upload_id, parts):
+        assert [n for n, _ in parts] == list(range(1, len(parts) + 1))
+        self.objects[key] = b"".join(self.parts[n] for n, _ in parts)
+
+    async def abort_multipart(self, key, upload_id):
+        self.parts.clear()
+
+    def public_url(self, key):
+        return f"https://media.test/{key}"
+
+
+class Disconnected(Exception):
+    pass
+
+
+async def _chunks(data: bytes, size: int, fail_after: int | None = None):
+    for start in range(0, len(data), size):
+        if fail_after is not None and start >= fail_after:
+            raise Disconnected
+        yield data[start:start + size]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    from app.db import media
+
+    store = MemoryStore()
+    rows: dict[str, dict] = {}
+    monkeypatch.setattr(media_upload, "get_object_store", lambda: store)
+
+    async def claim_upload(user_id, upload_id, writer, ttl_s, offset=None, part=None):
+        row = rows.get(upload_id)
+        if row is None or row.get("writer") not in (None, writer):
+            return False
+        if (offset is not None and row["received_bytes"] != offset) or (part is not None and len(row["parts"]) >= part):
+            return False
+        row["writer"] = writer
+        return True
+
+    async def release_upload(user_id, upload_id, writer):
+        if upload_id in rows and rows[upload_id].get("writer") == writer:
+            rows[upload_id]["writer"] = None
+
+    async def advance_upload(user_id, upload_id, writer, expected, received, parts):
+        row = rows.get(upload_id)
+        if row is None or row.get("writer") != writer or row["received_bytes"] != expected:
+            return False
+        row["received_bytes"], row["parts"] = received, row["parts"] + parts
+        return True
+
+    async def finish_upload(user_id, upload_id, url, sha256):
+        if rows.pop(upload_id, None) is None:
+            return None
+        store.finished = {"url": url, "sha256": sha256}
+        return "asset-1"
+
+    async def asset_by_url(user_id, url):
+        return "asset-1" if store.finished.get("url") == url else None
+
+    store.finished = {}
+    monkeypatch.setattr(media, "claim_upload", claim_upload)
+    monkeypatch.setattr(media, "release_upload", release_upload)
+    monkeypatch.setattr(media, "advance_upload", advance_upload)
+    monkeypatch.setattr(media, "finish_upload", finish_upload)
+    monkeypatch.setattr(media, "asset_by_url", asset_by_url)
+    store.rows = rows
+    return store
+
+
+def _session(store: MemoryStore, size: int, part_size: int = 1024) -> dict:
+    row = {"id": "up-1", "user_id": "u1", "object_key": "media/u1/clip.mp4", "store_upload_id": "mp-1",
+           "size_bytes": size, "part_size": part_size, "received_bytes": 0, "parts": []}
+    store.rows["up-1"] = dict(row)
+    return row
+
+
+def test_streams_in_parts_and_completes(store):
+    data = os.urandom(5000)
+    progress = asyncio.run(receive(_session(store, len(data)), 0, _chunks(data, 333)))
+
+    assert progress.complete and progress.asset_id == "asset-1"
+    assert store.objects["media/u1/clip.mp4"] == data
+    assert [len(store.parts[n]) for n in sorted(store.parts)] == [1024, 1024, 1024, 1024, 904]
+    parts = [{"sha256": hashlib.sha256(store.parts[n]).hexdigest()} for n in sorted(store.parts)]
+    assert progress.sha256 == composite_sha256(parts) and progress.sha256.endswith("-5")
+
+
+def test_resumes_from_last_whole_part(store):
+    data = os.urandom(5000)
+    session = _session(store, len(data))
+    with pytest.raises(Disconnected):
+        asyncio.run(receive(session, 0, _chunks(data, 500, fail_after=2500)))
+    assert session["received_bytes"] == 2048   # the half-filled third part is dropped
+
+    with pytest.raises(UploadConflict) as conflict:
+        asyncio.run(receive(session, 2500, _chunks(data[2500:], 500)))
+    assert conflict.value.received_bytes == 2048
+
+    progress = asyncio.run(receive(session, 2048, _chunks(data[2048:], 700)))
+    assert progress.complete and store.objects["media/u1/clip.mp4"] == data
+
+
+def test_parallel_parts_are_bounded(store, monkeypatch):
+    monkeypatch.setattr(get_settings(), "media_upload_parallel_parts", 3)
+    store.delay_s = 0.01
+    data = os.urandom(20 * 1024)
+    asyncio.run(receive(_session(store, len(data)), 0, _chunks(data, 4096)))
+    assert store.peak_in_flight == 3
+
+
+def test_a_second_put_waits_for_the_first(store):
+    store.delay_s = 0.01
+    data = os.urandom(5000)
+    session = _session(store, len(data))
+    uploads = []
+    upload_part = store.upload_part
+
+    async def counting_upload_part(key, upload_id, number, part, md5):
+        uploads.append(number)
+        return await upload_part(key, upload_id, number, part, md5)
+
+    store.upload_part = counting_upload_part
+
+    async def scenario():
+        first = asyncio.create_task(receive(session, 0, _chunks(data, 1024)))
+        await asyncio.sleep(0)   # the first PUT holds the session
+        with pytest.raises(UploadConflict):
+            await receive(dict(session), 0, _chunks(data, 1024))
+        return await first
+
+    progress = asyncio.run(scenario())
+    assert progress.complete and store.objects["media/u1/clip.mp4"] == data
+    assert uploads == [1, 2, 3, 4, 5] and store.rows == {}
+
+
+def test_completing_a_session_finished_elsewhere_reports_the_asset(store):
+    data = os.urandom(1000)
+    session = _session(store, len(data))
+    asyncio.run(receive(session, 0, _chunks(data, 1000)))
+
+    # A retried final PUT whose session row another request already turned into the asset
+    progress = asyncio.run(media_upload._complete(session))
+    assert progress.complete and progress.asset_id == "asset-1"
+
+
+def test_body_past_declared_size_is_rejected(store):
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(receive(_session(store, 1000), 0, _chunks(os.urandom(1500), 500)))
+
+
+@pytest.mark.skipif(not TEST_S3_ENDPOINT, reason="TEST_S3_ENDPOINT not set")
+def test_multipart_against_s3_compatible_store(monkeypatch):
+    pytest.importorskip("boto3")
+    from app.services.object_store import R2Store, _s3_client
+
+    s = get_settings()
+    monkeypatch.setattr(s, "r2_endpoint_url", TEST_S3_ENDPOINT)
+    monkeypatch.setattr(s, "r2_access_key_id", os.environ.get("TEST_S3_ACCESS_KEY", "xplor360"))
+    monkeypatch.setattr(s, "r2_secret_access_key", os.environ.get("TEST_S3_SECRET_KEY", "xplor360dev"))
+    _s3_client.cache_clear()
+    bucket = os.environ.get("TEST_S3_BUCKET", "xplor360-media")
+    store = R2Store(bucket, "", 8)
+    key = f"test/{uuid.uuid4()}.bin"
+    first, last = os.urandom(5 * 1024 * 1024), os.urandom(1000)   # S3 minimum for non-final parts
+
+    async def scenario():
+        upload_id = await store.create_multipart(key, "application/octet-stream")
+        etags = [await store.upload_part(key, upload_id, n, part, hashlib.md5(part).digest())
+                 for n, part in ((1, first), (2, last))]
+        await store.complete_multipart(key, upload_id, [(1, etags[0]), (2, etags[1])])
+
+    try:
+        asyncio.run(scenario())
+        body = store.client.get_object(Bucket=bucket, Key=key)["Body"].read()
+        assert body == first + last
+    finally:
+        store.client.delete_object(Bucket=bucket, Key=key)
+        _s3_client.cache_clear()
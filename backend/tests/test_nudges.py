@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from app.agents.nudge_agent import _minutes, build_nudges, deliver, plan
+from app.core.config import get_settings
+from app.services.solar import EVENTS, GOLDEN_PM, SUNRISE, SUNSET, SolarTable, sun_events
+
+IST = timezone(timedelta(hours=5, minutes=30))
+DELHI = (28.6139, 77.2090)
+SOLSTICE = date(2026, 6, 21)
+NOW = datetime(2026, 6, 20, tzinfo=timezone.utc)
+
+
+def _ist(epoch_s: float) -> str:
+    return datetime.fromtimestamp(float(epoch_s), IST).strftime("%H:%M")
+
+
+def _day(n: int, activities=(), lat=DELHI[0], lng=DELHI[1], day=SOLSTICE, country="India") -> dict:
+    return {"trip_id": f"t{n}", "user_id": f"u{n}", "destination": "Delhi", "day": day, "destination_lat": lat,
+            "destination_lng": lng, "destination_country": country, "activities": list(activities)}
+
+
+def test_sun_events_match_published_times():
+    # Delhi: sunrise 05:23 / sunset 19:22 on the June solstice, 07:10 / 17:29 on the December one
+    events = sun_events([DELHI[0]] * 2, [DELHI[1]] * 2, np.array(["2026-06-21", "2026-12-21"], dtype="datetime64[D]"))
+    for row, (sunrise, sunset) in zip(events, (("05:23", "19:22"), ("07:10", "17:29"))):
+        for got, want in ((row[SUNRISE], sunrise), (row[SUNSET], sunset)):
+            got_min = int(_ist(got)[:2]) * 60 + int(_ist(got)[3:])
+            assert abs(got_min - (int(want[:2]) * 60 + int(want[3:]))) <= 2
+        assert (np.diff(row) > 0).all() and len(row) == len(EVENTS)
+    assert np.isnan(sun_events([78.2], [15.6], [date(2026, 6, 21)])).all()   # Svalbard midnight sun
+
+
+def test_solar_table_computes_each_cell_and_day_once():
+    table = SolarTable(cell_deg=0.1)
+    day = np.array(["2026-06-21"] * 3, dtype="datetime64[D]")
+    first = table.events(np.array([28.61, 28.62, 12.97]), np.array([77.20, 77.21, 77.59]), day)
+    assert len(table) == 2 and (first[0] == first[1]).all()
+    again = table.events(np.array([12.97]), np.array([77.59]), day[:1])
+    assert len(table) == 2 and (again[0] == first[2]).all()
+
+
+def test_activity_times_parse():
+    assert [_minutes(t) for t in ("18:30", "6:30 pm", "12:05 AM", "09.15", "sunset", None, "25:00")] == \
+        [1110, 1110, 5, 555, None, None, None]
+
+
+def test_golden_hour_nudge_points_at_the_nearest_activity():
+    activities = [
+        {"title": "Chandni Chowk food walk", "time": "13:00", "lat": 28.65, "lng": 77.23},
+        {"title": "Sunset at India Gate", "time": "18:30", "lat": 28.6129, "lng": 77.2295},
+        {"title": "Dinner in Hauz Khas", "time": "20:30", "lat": 28.5494, "lng": 77.2001},
+    ]
+    rows, result = build_nudges([_day(1, activities)], SolarTable(), NOW)
+
+    assert (result.days, result.golden_hour, result.crowd_window) == (1, 1, 1)
+    golden = next(r for r in rows if r[2] == "golden_hour")
+    payload = json.loads(golden[6])
+    assert payload["place"] == "Sunset at India Gate" and payload["lng"] == 77.2295
+    assert "India Gate" in golden[5] and "18:4" in golden[5]
+    start = datetime.fromisoformat(payload["start"])
+    assert golden[4] == start - timedelta(seconds=get_settings().nudge_golden_lead_s)
+
+    crowd = next(r for r in rows if r[2] == "crowd_window")
+    assert json.loads(crowd[6])["lat"] == 28.5494   # no night before in the trip: where the day ends
+    assert crowd[4] < datetime.fromisoformat(json.loads(crowd[6])["start"]) and "Sun 21 Jun" in crowd[5]
+
+
+def test_dawn_is_where_the_previous_night_was_spent():
+    delhi = _day(1, [{"title": "Dinner in Hauz Khas", "time": "20:30", "lat": 28.5494, "lng": 77.2001}])
+    agra = _day(1, [{"title": "Taj Mahal at sunset", "time": "18:30", "lat": 27.1751, "lng": 78.0421}],
+                day=SOLSTICE + timedelta(days=1))
+    rows, result = build_nudges([delhi, agra], SolarTable(), NOW)
+
+    crowd = [json.loads(r[6]) for r in rows if r[2] == "crowd_window"]
+    golden = [json.loads(r[6]) for r in rows if r[2] == "golden_hour"]
+    assert [c["lat"] for c in crowd] == [28.5494, 28.5494] and golden[1]["lat"] == 27.1751
+
+    # Planning from the Agra day: the Delhi day is fetched only for its night
+    rows, result = build_nudges([delhi, agra], SolarTable(), NOW, first_day=agra["day"])
+    assert result.days == 1 and {r[3] for r in rows} == {agra["day"]}
+    assert json.loads(next(r for r in rows if r[2] == "crowd_window")[6])["lat"] == 28.5494
+
+
+def test_times_are_on_the_destination_countrys_clock():
+    kathmandu = _day(1, lat=27.7172, lng=85.3240, country="Nepal")
+    rows, result = build_nudges([kathmandu, _day(2, country="Italy")], SolarTable(), NOW)
+    assert result.days == 1 and {r[1] for r in rows} == {"t1"}   # no clock for Italy: no nudges
+
+    golden = json.loads(next(r for r in rows if r[2] == "golden_hour")[6])
+    npt = timezone(timedelta(hours=5, minutes=45))
+    assert datetime.fromisoformat(golden["start"]).astimezone(npt).strftime("%H:%M") in rows[0][5]
+
+
+def test_days_without_a_place_or_a_future_window_are_skipped():
+    nowhere = _day(1, lat=None, lng=None)
+    rows, result = build_nudges([nowhere, _day(2)], SolarTable(), NOW)
+    assert result.days == 1 and {r[1] for r in rows} == {"t2"}
+    assert "Delhi" in next(r for r in rows if r[2] == "golden_hour")[5]
+
+    evening = datetime(2026, 6, 21, 12, tzinfo=timezone.utc)   # 17:30 IST: dawn is gone, golden hour is not
+    rows, result = build_nudges([_day(2)], SolarTable(), evening)
+    assert [r[2] for r in rows] == ["golden_hour"] and result.crowd_window == 0
+
+
+def test_planning_a_large_page_is_vectorised():
+    rng = np.random.default_rng(7)
+    lat, lng = rng.uniform(8, 34, 50_000), rng.uniform(68, 97, 50_000)
+    days = [_day(i, [{"title": "Fort", "time": "18:00", "lat": a, "lng": b}], day=SOLSTICE + timedelta(days=i % 3))
+            for i, (a, b) in enumerate(zip(lat.tolist(), lng.tolist()))]
+
+    started = time.perf_counter()
+    rows, result = build_nudges(days, SolarTable(), NOW)
+    assert time.perf_counter() - started < 10
+    assert result.days == 50_000 and len(rows) == result.golden_hour + result.crowd_window == 100_000
+    table = sun_events(lat[:1], lng[:1], [SOLSTICE])
+    assert abs(datetime.fromisoformat(json.loads(rows[0][6])["start"]).timestamp() - table[0, GOLDEN_PM]) < 120
+
+
+def test_plan_pages_trips_and_deliver_counts(monkeypatch):
+    from app.db import nudges
+
+    monkeypatch.setattr(get_settings(), "nudge_plan_page_size", 2)
+    trips = ["t1", "t2", "t3"]
+    soon = date.today() + timedelta(days=2)   # both of its windows are still ahead
+    queued = []
+
+    async def active_trip_ids(start, end, after, limit):
+        rest = [t for t in trips if after is None or t > after]
+        return rest[:limit]
+
+    async def trip_days(ids, start, end):
+        return [_day(int(t[1:]), day=soon) for t in ids]
+
+    async def enqueue(rows):
+        queued.extend(rows)
+
+    async def deliver_due(limit, grace_s):
+        return min(limit, 3), 2
+
+    monkeypatch.setattr(nudges, "active_trip_ids", active_trip_ids)
+    monkeypatch.setattr(nudges, "trip_days", trip_days)
+    monkeypatch.setattr(nudges, "enqueue", enqueue)
+    monkeypatch.setattr(nudges, "deliver_due", deliver_due)
+
+    result = asyncio.run(plan(soon, soon))
+
+    assert (result.trips, result.days, result.golden_hour, result.crowd_window) == (3, 3, 3, 3)
+    assert sorted({r[1] for r in queued}) == trips
+    assert asyncio.run(deliver(10)) == 3
@@ -0,0 +1,58 @@
+import json
+import struct
+
+import pytest
+
+from app.services.offline_bundle import MAGIC, BundleError, decode_bundle, encode_bundle
+from tests.test_itinerary_store import _itinerary
+
+SHOT_GUIDES = [
+    {"id": "g1", "title": "Key Monastery from the ridge", "description": None, "lat": 32.2977, "lng": 78.0119,
+     "best_time": "golden_hour", "framing_tip": "Rule of thirds", "shot_type": "wide", "viral_count": 12},
+    {"id": "g2", "title": "Chicham bridge", "description": "Asia's highest", "lat": None, "lng": None,
+     "best_time": "midday", "framing_tip": None, "shot_type": "aerial", "viral_count": None},
+]
+
+
+def _document():
+    _, itinerary = _itinerary()
+    itinerary.days[0].activities[0].lat, itinerary.days[0].activities[0].lng = 32.2276, 78.0710
+    return json.loads(itinerary.model_dump_json())
+
+
+def test_bundle_round_trip():
+    doc = _document()
+    data = encode_bundle(doc, 7, trip={"id": "t1", "title": "Spiti in June"}, shot_guides=SHOT_GUIDES)
+
+    assert data[:4] == MAGIC
+    _, _, sections, version, _ = struct.unpack_from("<4sHHII", data)
+    assert version == 7
+    for i in range(sections):
+        _, offset, _ = struct.unpack_from("<4sII", data, 16 + 12 * i)
+        assert offset % 8 == 0          # mappable: typed-array views need aligned sections
+
+    out = decode_bundle(data)
+    assert out["version"] == 7 and out["trip"] == {"id": "t1", "title": "Spiti in June"}
+    assert out["shot_guides"] == SHOT_GUIDES
+    decoded = out["itinerary"]
+    for key in ("itinerary_id", "summary", "start_date", "end_date", "key_tips", "packing_list", "generated_at"):
+        assert decoded[key] == doc[key]
+    for day, original in zip(decoded["days"], doc["days"], strict=True):
+        assert day["title"] == original["title"] and day["date"] == original["date"]
+        assert [a["title"] for a in day["activities"]] == [a["title"] for a in original["activities"]]
+    first = decoded["days"][0]["activities"][0]
+    assert (first["lat"], first["lng"]) == (32.2276, 78.071)
+
+
+def test_bundle_interns_strings():
+    doc = _document()
+    for day in doc["days"]:
+        day["overnight_location"] = "Kaza (Spiti)"
+    data = encode_bundle(doc, 1)
+    assert len(doc["days"]) > 1 and data.count(b"Kaza (Spiti)") == 1
+    assert {d["overnight_location"] for d in decode_bundle(data)["itinerary"]["days"]} == {"Kaza (Spiti)"}
+
+
+def test_rejects_other_files():
+    with pytest.raises(BundleError):
+        decode_bundle(b"PK\x03\x04" + b"\0" * 32)
@@ -0,0 +1,55 @@
+import json
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import itinerary as itinerary_routes
+from app.core.projection import InvalidFields, fields_key, include_spec, parse_fields, project
+from app.main import app
+from app.models.trip import ItineraryResponse
+from tests.test_itinerary_store import _itinerary
+
+
+def test_parse_fields_validates_against_model():
+    tree = parse_fields("summary, days.title,days.activities.title", ItineraryResponse)
+    assert tree == {"summary": True, "days": {"title": True, "activities": {"title": True}}}
+    assert parse_fields("", ItineraryResponse) is None
+    assert parse_fields("days,days.title", ItineraryResponse) == {"days": True}
+    for bad in ("nope", "days.nope", "summary.title", "days..title"):
+        with pytest.raises(InvalidFields):
+            parse_fields(bad, ItineraryResponse)
+
+
+def test_projection_matches_pydantic_include():
+    _, itinerary = _itinerary()
+    tree = parse_fields("summary,days.title,days.activities.title", ItineraryResponse)
+    via_include = json.loads(itinerary.model_dump_json(include=include_spec(tree, ItineraryResponse)))
+    via_project = project(json.loads(itinerary.model_dump_json()), tree)
+    assert via_include == via_project
+    assert set(via_project["days"][0]) == {"title", "activities"}
+    assert fields_key(tree) == fields_key(parse_fields("days.activities.title,days.title,summary", ItineraryResponse))
+    assert fields_key(None) == ""
+
+
+def test_generate_projection_and_encodings(monkeypatch):
+    _, itinerary = _itinerary()
+
+    async def fake_generate(req, user_id=None):
+        return itinerary.model_copy(deep=True)
+
+    monkeypatch.setattr(itinerary_routes, "generate_itinerary", fake_generate)
+    client = TestClient(app)
+    body = {"destination": "Spiti Valley", "origin": "Delhi", "start_date": "2026-06-01", "end_date": "2026-06-03"}
+
+    res = client.post("/api/v1/itinerary/generate", params={"fields": "summary,days.title"}, json=body)
+    assert res.status_code == 201
+    assert res.json() == {"summary": itinerary.summary, "days": [{"title": d.title} for d in itinerary.days]}
+
+    assert client.post("/api/v1/itinerary/generate", params={"fields": "days.bogus"}, json=body).status_code == 400
+
+    res = client.post("/api/v1/itinerary/generate", json=body,
+                      headers={"Accept": "application/msgpack", "Accept-Encoding": "br"})
+    assert res.headers["content-type"] == "application/msgpack"
+    assert res.headers["content-encoding"] == "br"
+    assert msgpack.unpackb(res.content)["summary"] == itinerary.summary
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.publishing.base import OutgoingPost, PlatformPublisher, PublishError
+from app.services.publishing.dispatcher import PublishDispatcher, backoff_s
+from app.services.publishing.providers.x import MAX_CHARS, compose
+
+
+class FakePublisher(PlatformPublisher):
+    platform = "twitter"
+
+    def __init__(self, fail: dict[str, PublishError] | None = None):
+        self.fail = fail or {}
+        self.sent: list[tuple[str, float]] = []
+
+    async def publish(self, post: OutgoingPost) -> str:
+        self.sent.append((post.id, time.time()))
+        if post.id in self.fail:
+            raise self.fail[post.id]
+        return f"x-{post.id}"
+
+
+def _ts(t: float) -> datetime:
+    return datetime.fromtimestamp(t, timezone.utc)
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    """An in-memory published_posts: id → (platform, due unix time); claims remove rows."""
+    from app.db import publishing
+
+    rows: dict[str, tuple[str, float]] = {}
+    state: dict = {"settled": [], "listener": None, "claimed": {}}   # claimed: id → (platform, due, claimed at)
+
+    def _row(post_id):
+        platform, due = rows[post_id]
+        return {"id": post_id, "platform": platform, "due_at": _ts(due)}
+
+    async def posts_due(after, until, platforms, limit):
+        keyed = sorted((_ts(due), post_id) for post_id, (platform, due) in rows.items() if platform in platforms)
+        return [_row(i) for due, i in keyed if (due, i) > (after[0], str(after[1])) and due <= until][:limit]
+
+    async def posts_by_id(ids):
+        return [_row(i) for i in ids if i in rows]
+
+    async def claim_posts(ids, lead_s):
+        claimed = []
+        for post_id in ids:
+            if post_id in rows and rows[post_id][1] <= time.time() + lead_s:
+                platform, due = rows.pop(post_id)
+                claimed.append({"id": post_id, "user_id": "u1", "platform": platform, "post_type": "feed",
+                                "due_at": _ts(due), "caption": "hi", "publish_attempts": 0, "access_token": "t"})
+        return claimed
+
+    async def settle_posts(published, retries, failed):
+        state["settled"].append((list(published), list(retries), list(failed)))
+
+    async def release_stale_claims(older_than_s):
+        stale = [i for i, (_, _, at) in state["claimed"].items() if at < time.time() - older_than_s]
+        for post_id in stale:
+            platform, due, _ = state["claimed"].pop(post_id)
+            rows[post_id] = (platform, due)
+            state["listener"](post_id)   # the status trigger notifies
+        return len(stale)
+
+    class Conn:
+        def terminate(self):
+            pass
+
+    async def listen(callback, on_lost):
+        state["listener"] = callback
+        return Conn()
+
+    for fn in (posts_due, posts_by_id, claim_posts, settle_posts, release_stale_claims, listen):
+        monkeypatch.setattr(publishing, fn.__name__, fn)
+    monkeypatch.setattr(get_settings(), "publishing_flush_s", 0.05)
+    monkeypatch.setattr(get_settings(), "publishing_platform_rate_per_s", {})
+    state["rows"] = rows
+    return state
+
+
+async def _run_for(dispatcher: PublishDispatcher, seconds: float, during=None) -> None:
+    task = asyncio.create_task(dispatcher.run())
+    if during is not None:
+        await asyncio.sleep(0.05)
+        await during()
+    await asyncio.sleep(seconds)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def test_heap_pops_in_due_order_and_skips_rescheduled():
+    d = PublishDispatcher({"twitter": FakePublisher()})
+    d.schedule("a", "twitter", 30.0)
+    d.schedule("b", "twitter", 10.0)
+    d.schedule("c", "twitter", 20.0)
+    d.schedule("b", "twitter", 40.0)   # moved later: the old entry is stale
+    d.drop("c")
+
+    assert d.next_due() == 30.0
+    assert d.pop_due(35.0) == ["a"]
+    assert d.pop_due(100.0) == ["b"]
+    assert len(d) == 0 and d.next_due() is None
+
+
+def test_posts_fire_on_time_and_outcomes_are_batched(posts):
+    now = time.time()
+    for i in range(5):
+        posts["rows"][f"p{i}"] = ("twitter", now + 0.1 + i * 0.02)
+    posts["rows"]["later"] = ("twitter", now + 3600)    # past the horizon
+    posts["rows"]["li"] = ("linkedin", now)             # no publisher
+    publisher = FakePublisher()
+
+    asyncio.run(_run_for(PublishDispatcher({"twitter": publisher}), 0.5))
+
+    due = {f"p{i}": now + 0.1 + i * 0.02 for i in range(5)}
+    assert [post_id for post_id, _ in publisher.sent] == list(due)
+    assert all(0 <= sent - due[post_id] < 0.5 for post_id, sent in publisher.sent)
+    published = [row[0] for batch in posts["settled"] for row in batch[0]]
+    assert sorted(published) == sorted(due)
+    assert len(posts["settled"]) < len(due)
+    assert "later" in posts["rows"] and "li" in posts["rows"]
+
+
+def test_notified_post_fires_and_failures_are_sorted(posts):
+    publisher = FakePublisher(fail={
+        "flaky": PublishError("503", retry_after_s=120),
+        "bad": PublishError("403", retryable=False),
+    })
+
+    async def add_posts():
+        for post_id in ("new", "flaky", "bad"):
+            posts["rows"][post_id] = ("twitter", time.time() + 0.05)
+            posts["listener"](post_id)
+
+    asyncio.run(_run_for(PublishDispatcher({"twitter": publisher}), 0.4, during=add_posts))
+
+    published, retries, failed = (sum((batch[k] for batch in posts["settled"]), []) for k in range(3))
+    assert [row[0] for row in published] == ["new"]
+    assert [row[0] for row in retries] == ["flaky"]
+    assert (retries[0][1] - datetime.now(timezone.utc)).total_seconds() > 100
+    assert [row[0] for row in failed] == ["bad"]
+
+
+def test_claims_of_a_dead_worker_are_released_while_running(posts, monkeypatch):
+    monkeypatch.setattr(get_settings(), "publishing_claim_ttl_s", 0.2)
+    now = time.time()
+    posts["claimed"]["orphan"] = ("twitter", now - 60, now)   # claimed just now by a worker that then died
+    publisher = FakePublisher()
+
+    asyncio.run(_run_for(PublishDispatcher({"twitter": publisher}), 0.6))
+
+    assert [post_id for post_id, _ in publisher.sent] == ["orphan"]
+    assert 0.2 <= publisher.sent[0][1] - now < 0.45   # within one sweep interval of expiring
+
+
+def test_platform_rate_spaces_publishes(posts, monkeypatch):
+    monkeypatch.setattr(get_settings(), "publishing_platform_rate_per_s", {"twitter": 20.0})
+    now = time.time()
+    for i in range(4):
+        posts["rows"][f"p{i}"] = ("twitter", now)
+    publisher = FakePublisher()
+
+    asyncio.run(_run_for(PublishDispatcher({"twitter": publisher}), 0.4))
+
+    times = [sent for _, sent in publisher.sent]
+    assert len(times) == 4
+    assert all(b - a >= 0.04 for a, b in zip(times, times[1:]))
+
+
+def test_backoff_grows_and_honours_retry_after():
+    assert 24 <= backoff_s(0, 30, 3600) <= 36
+    assert backoff_s(10, 30, 3600) <= 3600 * 1.2
+    assert backoff_s(0, 30, 3600, retry_after_s=900) == 900
+
+
+def test_x_thread_splits_and_tags_fit():
+    post = OutgoingPost("p1", "u1", "twitter", "thread", _ts(0), caption="One.\n\nTwo.\n\n" + "x" * 400,
+                        hashtags=["spiti", "#roadtrip"])
+    texts = compose(post)
+    assert texts[:2] == ["One.", "Two."]
+    assert len(texts[2]) == MAX_CHARS and texts[2].endswith("…")
+
+    single = compose(OutgoingPost("p2", "u1", "twitter", "feed", _ts(0), caption="Chai", hashtags=["spiti"]))
+    assert single == ["Chai\n#spiti"]
@@ -0,0 +1,100 @@
+import asyncio
+import json
+from datetime import date
+
+from app.agents import itinerary_agent
+from app.agents.itinerary_recall import INITIAL_CAPACITY, RecallIndex
+from app.core.config import get_settings
+from app.models.trip import ItineraryRequest, TravelStyle, TripType
+from tests.test_itinerary_store import RAW, _itinerary
+
+THRESHOLD = 0.9
+USER = "7d2c1f3e-4b5a-4c6d-8e9f-0a1b2c3d4e5f"
+OTHER_USER = "0f9e8d7c-6b5a-4e3d-9c1b-2a3f4e5d6c7b"
+
+
+def _request(budget: int | None = 40000, **overrides) -> ItineraryRequest:
+    fields = dict(destination="Spiti Valley", origin="Delhi", start_date=date(2026, 6, 1),
+                  end_date=date(2026, 6, 3), budget_inr=budget, trip_type=TripType.couple,
+                  num_travelers=2, interests=["photography", "monasteries"])
+    return ItineraryRequest(**{**fields, **overrides})
+
+
+def test_near_duplicates_score_above_the_threshold():
+    index = RecallIndex(max_entries=100)
+    index.insert(_request(), _itinerary()[1], USER)
+
+    def score(req):
+        return float(index.scores(req, USER)[1][0])
+
+    assert score(_request()) > 0.999
+    assert score(_request(45000)) >= THRESHOLD
+    assert score(_request(origin="Chandigarh", start_date=date(2026, 6, 8), end_date=date(2026, 6, 10))) >= THRESHOLD
+    assert score(_request(90000)) < THRESHOLD
+    assert score(_request(travel_style=TravelStyle.luxury)) < THRESHOLD
+    assert score(_request(interests=["nightlife", "cafes"])) < THRESHOLD
+    assert index.nearest(_request(end_date=date(2026, 6, 4)), THRESHOLD, USER) is None     # trip length differs
+    assert index.nearest(_request(destination="Ladakh"), THRESHOLD, USER) is None
+    assert index.nearest(_request(), THRESHOLD, OTHER_USER) is None
+
+
+def test_a_plan_is_not_recalled_for_another_season():
+    index = RecallIndex(max_entries=100)
+    index.insert(_request(start_date=date(2026, 1, 5), end_date=date(2026, 1, 7)), _itinerary()[1], USER)
+
+    def nearest(month, year=2026):
+        return index.nearest(_request(start_date=date(year, month, 5), end_date=date(year, month, 7)), THRESHOLD, USER)
+
+    assert nearest(7) is None and nearest(4) is None
+    assert nearest(2) is not None and nearest(12, 2025) is not None     # one month either side, across the year
+
+
+def test_index_grows_then_overwrites_the_oldest():
+    index = RecallIndex(max_entries=INITIAL_CAPACITY + 10)
+    itinerary = _itinerary()[1]
+    for i in range(INITIAL_CAPACITY + 10):
+        index.insert(_request(1000 * (i + 10)), itinerary, USER)
+    assert len(index) == INITIAL_CAPACITY + 10
+    assert int(index._df.max()) == INITIAL_CAPACITY + 10
+
+    index.insert(_request(budget=None, interests=None), itinerary, USER)     # replaces slot 0
+    assert len(index) == INITIAL_CAPACITY + 10
+    assert int(index._df.max()) == INITIAL_CAPACITY + 9
+    recalled = index.nearest(_request(budget=None, interests=None), THRESHOLD, USER)
+    assert recalled is not None and recalled.similarity > 0.999
+
+
+def test_generate_itinerary_adapts_a_recalled_plan(monkeypatch):
+    from app.agents import itinerary_recall
+
+    calls = []
+
+    async def fake_complete_json(prompt, system, model, max_tokens):
+        calls.append(model)
+        if model == itinerary_agent.CLAUDE_FAST:
+            return json.dumps({"summary": "Retuned for you", "days": [{"day_number": 1, "transport_for_day": "Bus"}]})
+        return RAW
+
+    async def no_enrichment(itinerary, req):
+        return itinerary
+
+    monkeypatch.setattr(get_settings(), "itinerary_recall", True)
+    monkeypatch.setattr(get_settings(), "itinerary_two_stage", False)
+    monkeypatch.setattr(itinerary_agent, "complete_json", fake_complete_json)
+    monkeypatch.setattr(itinerary_agent, "_enrich_with_live_options", no_enrichment)
+    monkeypatch.setattr(itinerary_recall, "get_recall_index", lambda index=RecallIndex(16): index)
+
+    async def scenario():
+        first = await itinerary_agent.generate_itinerary(_request(), USER)
+        second = await itinerary_agent.generate_itinerary(
+            _request(45000, start_date=date(2026, 6, 8), end_date=date(2026, 6, 10)), USER)
+        await itinerary_agent.generate_itinerary(_request())     # anonymous: always generated, never indexed
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert calls == [itinerary_agent.CLAUDE_PRIMARY, itinerary_agent.CLAUDE_FAST, itinerary_agent.CLAUDE_PRIMARY]
+    assert second.itinerary_id != first.itinerary_id
+    assert second.start_date == date(2026, 6, 8) and second.days[2].date == date(2026, 6, 10)
+    assert second.summary == "Retuned for you" and second.days[0].transport_for_day == "Bus"
+    assert [d.title for d in second.days] == [d.title for d in first.days]
+    assert len(itinerary_recall.get_recall_index()) == 1        # the adapted copy is not indexed
@@ -0,0 +1,172 @@
+import asyncio
+import json
+from datetime import date
+
+from app.agents import itinerary_agent
+from app.agents.itinerary_skeleton import Skeleton, SkeletonCache, SkeletonKey, duration_bucket, skeleton_key
+from app.core.config import get_settings
+from app.models.trip import ItineraryRequest, TravelStyle
+
+KEY = SkeletonKey("Spiti Valley", 6, 5)
+
+SKELETON = {
+    "overview": "High-desert loop through Kaza.",
+    "best_time_note": "June opens the Kunzum road.",
+    "days": [
+        {"day_number": 1, "title": "Into Kaza", "summary": "Drive up the Spiti river.", "overnight_location": "Kaza",
+         "transport_for_day": "Taxi from Reckong Peo", "weather_note": "Cold nights", "estimated_cost_inr": 4000,
+         "activities": [
+             {"time": "09:00", "title": "Tabo Monastery", "description": "Thousand-year-old murals.",
+              "location": "Tabo", "duration_minutes": 90, "cost_inr": 0},
+             {"time": "15:00", "title": "Dhankar Fort", "description": "Cliff-top fort.", "location": "Dhankar",
+              "duration_minutes": 60, "cost_inr": 50},
+         ]},
+        {"day_number": 2, "title": "Key and Kibber", "summary": "Villages above Kaza.", "overnight_location": "Kaza",
+         "activities": [
+             {"time": "08:00", "title": "Key Monastery", "description": "Spiti's largest gompa.", "location": "Key",
+              "duration_minutes": 120, "cost_inr": 0},
+         ]},
+    ],
+    "stays": {"Kaza": [
+        {"tier": "budget", "name": "Zostel Kaza", "description": "Dorms", "estimated_price_per_night_inr": 900},
+        {"tier": "mid", "name": "Hotel Deyzor", "description": "Heated rooms", "estimated_price_per_night_inr": 3500},
+        {"tier": "luxury", "name": "Spiti Tented Camp", "description": "Tents", "estimated_price_per_night_inr": 9000},
+    ]},
+    "packing_list": [{"category": "Clothing", "item": "Down jacket", "essential": True}],
+    "key_tips": ["Carry cash", "Acclimatise in Kalpa", "Fuel up at Kaza", "Get an inner line permit",
+                 "Pack snacks", "Respect monastery timings"],
+}
+
+PERSONAL = {
+    "summary": "A slow family trip.",
+    "total_estimated_cost_inr": 30000,
+    "best_time_note": None,
+    "days": [
+        {"from_day": 1, "title": "Gentle start", "summary": "Short hops only.",
+         "activities": [{"ref": "a1", "time": "10:00"}, {"ref": "a9"},
+                        {"time": "17:00", "title": "Chai at Tabo", "description": "Rest.", "location": "Tabo"}]},
+        {"from_day": 2, "title": "Key", "summary": "One monastery.", "activities": [{"ref": "a3", "cost_inr": 100}]},
+    ],
+    "packing_extra": [{"category": "Clothing", "item": "down jacket", "essential": True},
+                      {"category": "Health", "item": "Kids' ORS", "essential": True}],
+    "key_tips": [],
+}
+
+
+def _request(days: int = 2, style: TravelStyle = TravelStyle.leisure) -> ItineraryRequest:
+    return ItineraryRequest(destination="Spiti Valley", origin="Delhi", start_date=date(2026, 6, 1),
+                            end_date=date(2026, 6, days), travel_style=style)
+
+
+def test_duration_buckets_and_key():
+    assert [duration_bucket(d) for d in (1, 3, 4, 7, 14, 15)] == [3, 3, 5, 7, 14, None]
+    key = skeleton_key(_request(4))
+    assert (key.month, key.days) == (6, 5)
+    assert skeleton_key(_request(20)) is None
+
+
+def test_skeleton_assigns_refs_and_compacts():
+    skeleton = Skeleton(KEY, json.loads(json.dumps(SKELETON)))
+    assert list(skeleton.activities) == ["a1", "a2", "a3"]
+    compact = skeleton.compact()
+    assert "a2 15:00 Dhankar Fort @ Dhankar · 60 min · INR 50" in compact
+    assert "Thousand-year-old" not in compact          # prose stays out of the fast model's prompt
+    assert skeleton.stays(" kaza ")[0]["name"] == "Zostel Kaza"
+
+
+def test_model_refs_are_replaced():
+    data = json.loads(json.dumps(SKELETON))
+    for activity in (a for day in data["days"] for a in day["activities"]):
+        activity["ref"] = "a1"                          # colliding refs from the model
+    skeleton = Skeleton(KEY, data)
+    assert list(skeleton.activities) == ["a1", "a2", "a3"]
+    assert len({id(a) for a in skeleton.activities.values()}) == 3
+
+
+def test_assemble_expands_refs_against_the_skeleton():
+    skeleton = Skeleton(KEY, json.loads(json.dumps(SKELETON)))
+    data = itinerary_agent._assemble(skeleton, PERSONAL, _request())
+    day1, day2 = data["days"]
+    assert [a["title"] for a in day1["activities"]] == ["Tabo Monastery", "Chai at Tabo"]   # unknown ref dropped
+    assert day1["activities"][0]["time"] == "10:00"
+    assert day1["activities"][0]["description"] == "Thousand-year-old murals."
+    assert "ref" not in day1["activities"][0]
+    assert day1["overnight_location"] == "Kaza" and day1["weather_note"] == "Cold nights"
+    assert [s["tier"] for s in day1["accommodation_suggestions"]] == ["budget", "mid"]
+    assert day2["activities"][0]["cost_inr"] == 100
+    assert [p["item"] for p in data["packing_list"]] == ["Down jacket", "Kids' ORS"]
+    assert data["key_tips"] == SKELETON["key_tips"][:5]
+    assert data["best_time_note"] == SKELETON["best_time_note"]
+
+    luxury = itinerary_agent._assemble(skeleton, PERSONAL, _request(style=TravelStyle.luxury))
+    assert [s["tier"] for s in luxury["days"][0]["accommodation_suggestions"]] == ["mid", "luxury"]
+
+
+def test_cache_builds_each_key_once():
+    async def scenario():
+        cache = SkeletonCache(max_entries=1, ttl_s=60)
+        builds = 0
+
+        async def build(key):
+            nonlocal builds
+            builds += 1
+            await asyncio.sleep(0.01)
+            return Skeleton(key, json.loads(json.dumps(SKELETON)))
+
+        first = await asyncio.gather(*(cache.get(KEY, build) for _ in range(5)))
+        assert builds == 1 and all(s is first[0] for s in first)
+        await cache.get(SkeletonKey("Ladakh", 6, 5), build)
+        assert builds == 2 and len(cache) == 1 and cache.peek(KEY) is None   # evicted
+
+    asyncio.run(scenario())
+
+
+def test_generate_itinerary_runs_two_stages(monkeypatch):
+    calls = []
+
+    async def fake_complete_json(prompt, system, model, max_tokens):
+        calls.append(model)
+        return json.dumps(SKELETON if model == itinerary_agent.CLAUDE_PRIMARY else PERSONAL)
+
+    async def no_enrichment(itinerary, req):
+        return itinerary
+
+    monkeypatch.setattr(get_settings(), "itinerary_two_stage", True)
+    monkeypatch.setattr(get_settings(), "itinerary_recall", False)
+    monkeypatch.setattr(itinerary_agent, "complete_json", fake_complete_json)
+    monkeypatch.setattr(itinerary_agent, "_enrich_with_live_options", no_enrichment)
+    monkeypatch.setattr(itinerary_agent, "get_skeleton_cache", lambda cache=SkeletonCache(4, 60): cache)
+
+    async def scenario():
+        first = await itinerary_agent.generate_itinerary(_request())
+        second = await itinerary_agent.generate_itinerary(_request())
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert calls == [itinerary_agent.CLAUDE_PRIMARY, itinerary_agent.CLAUDE_FAST, itinerary_agent.CLAUDE_FAST]
+    assert first.summary == "A slow family trip." and len(first.days) == 2
+    assert first.days[0].accommodation_suggestions[0].name == "Zostel Kaza"
+
+
+def test_generate_itinerary_falls_back_to_one_call(monkeypatch):
+    calls = []
+
+    async def fake_complete_json(prompt, system, model, max_tokens):
+        calls.append(model)
+        if model == itinerary_agent.CLAUDE_FAST:
+            return "not json"
+        if "Return the destination skeleton JSON." in prompt:
+            return json.dumps(SKELETON)
+        return json.dumps({**SKELETON, "summary": "From scratch"})
+
+    async def no_enrichment(itinerary, req):
+        return itinerary
+
+    monkeypatch.setattr(get_settings(), "itinerary_recall", False)
+    monkeypatch.setattr(itinerary_agent, "complete_json", fake_complete_json)
+    monkeypatch.setattr(itinerary_agent, "_enrich_with_live_options", no_enrichment)
+    monkeypatch.setattr(itinerary_agent, "get_skeleton_cache", lambda cache=SkeletonCache(4, 60): cache)
+
+    itinerary = asyncio.run(itinerary_agent.generate_itinerary(_request()))
+    assert itinerary.summary == "From scratch"
+    assert calls == [itinerary_agent.CLAUDE_PRIMARY, itinerary_agent.CLAUDE_FAST, itinerary_agent.CLAUDE_PRIMARY]
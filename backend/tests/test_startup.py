@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Generous for shared CI runners; a regression that eagerly imports the SDKs
+# or provider stack again shows up in the module check below long before this.
+COLD_START_BUDGET_S = float(os.environ.get("COLD_START_BUDGET_S", "4.0"))
+
+LAZY_MODULES = [
+    "anthropic",
+    "asyncpg",
+    "httpx",
+    "numpy",
+    "supabase",
+    "app.services.accommodation.providers.amadeus",
+    "app.services.accommodation.providers.opentripmap",
+]
+
+
+def _cold_import() -> tuple[float, list[str]]:
+    code = (
+        "import json, sys; import app.main; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    env = {
+        "SUPABASE_URL": "http://localhost",
+        "SUPABASE_ANON_KEY": "test",
+        "SUPABASE_SERVICE_ROLE_KEY": "test",
+        "ANTHROPIC_API_KEY": "test",
+        **os.environ,
+    }
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - started, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_import_does_not_load_heavy_clients():
+    _, loaded = _cold_import()
+    assert loaded == []
+
+
+def test_cold_start_budget():
+    elapsed, _ = _cold_import()
+    assert elapsed < COLD_START_BUDGET_S, f"import app.main took {elapsed:.2f}s"
+
+
+def test_lazy_getters_build_once_across_threads():
+    from app.core.lazy import once
+
+    calls = []
+
+    @once
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(build())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len({id(r) for r in results}) == 1
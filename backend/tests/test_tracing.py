@@ -0,0 +1,33 @@
+import json
+import threading
+
+import pytest
+
+from app.core import tracing
+from app.core.tracing import BatchingExporter, JsonFileExporter
+
+
+def test_jsonfile_exporter_writes_batches_off_the_caller(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonFileExporter(str(path), flush_interval_s=60)
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **k: opened.append(a[0]) or real_open(*a, **k))
+
+    for n in range(3):
+        with tracing.span("work", n=n) as s:
+            pass
+        exporter.export(s)
+    assert not path.exists()   # export only queues
+
+    exporter.shutdown()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["attributes"]["n"] for line in lines] == [0, 1, 2]
+    assert opened == [str(path)]   # one write for the batch
+
+
+def test_batching_exporter_needs_a_writer():
+    threads = threading.active_count()
+    with pytest.raises(TypeError):
+        BatchingExporter()
+    assert threading.active_count() == threads   # failed before starting its thread
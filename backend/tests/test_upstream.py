@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core import upstream
+from app.core.config import get_settings
+from app.core.http import TracingTransport
+from app.core.upstream import HostLimiter, Priority, upstream_priority
+
+
+def test_interactive_requests_jump_the_queue():
+    async def scenario():
+        limiter = HostLimiter("example.test", max_concurrency=1)
+        order = []
+
+        async def call(name, priority):
+            with upstream_priority(priority):
+                async with limiter.slot(timeout_s=5):
+                    order.append(name)
+                    await asyncio.sleep(0.01)
+
+        first = asyncio.create_task(call("first", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        rest = [asyncio.create_task(call(name, p)) for name, p in (
+            ("refresh", Priority.BACKGROUND), ("batch", Priority.BATCH), ("user", Priority.INTERACTIVE))]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 3
+        await asyncio.gather(first, *rest)
+        assert order == ["first", "user", "batch", "refresh"]
+        assert limiter.in_flight == 0 and limiter.queue_depth == 0
+
+    asyncio.run(scenario())
+
+
+def test_rate_spacing_and_queue_timeout():
+    async def scenario():
+        limiter = HostLimiter("example.test", max_concurrency=1, rate_per_s=50)
+        started = time.perf_counter()
+        for _ in range(3):
+            async with limiter.slot(timeout_s=5):
+                pass
+        assert time.perf_counter() - started >= 0.035
+
+        await limiter.acquire(Priority.INTERACTIVE, timeout_s=5)
+        with pytest.raises(httpx.PoolTimeout):
+            await limiter.acquire(Priority.INTERACTIVE, timeout_s=0.01)
+        assert limiter.queue_depth == 0
+
+    asyncio.run(scenario())
+
+
+def test_workers_split_the_host_limits(monkeypatch):
+    monkeypatch.setattr(get_settings(), "web_concurrency", 4)
+    monkeypatch.setattr(get_settings(), "upstream_host_concurrency", {"a.test": 8})
+    monkeypatch.setattr(get_settings(), "upstream_host_rate_per_s", {"a.test": 10.0})
+    monkeypatch.setattr(upstream, "_limiters", {})
+    assert upstream.get_host_limiter("a.test").max_concurrency == 2
+    assert upstream.get_host_limiter("a.test").interval_s == pytest.approx(0.4)
+    assert upstream.get_host_limiter("b.test").max_concurrency == get_settings().upstream_max_concurrency // 4
+
+
+def test_transport_bounds_concurrent_requests(monkeypatch):
+    monkeypatch.setattr(upstream, "_limiters", {"example.test": HostLimiter("example.test", max_concurrency=2)})
+    running = peak = 0
+
+    async def handler(request):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return httpx.Response(200)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=TracingTransport(httpx.MockTransport(handler))) as client:
+            responses = await asyncio.gather(*(client.get("https://example.test/x") for _ in range(6)))
+        assert all(r.status_code == 200 for r in responses)
+
+    asyncio.run(scenario())
+    assert peak == 2
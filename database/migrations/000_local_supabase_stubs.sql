@@ -0,0 +1,44 @@
+-- =============================================================================
+-- Xplor360 — Local Supabase stand-ins
+-- Lets the migrations run on the plain Postgres in docker-compose.yml, which has
+-- no auth schema or Supabase roles. Every statement is guarded, so running this
+-- against a real Supabase project is a no-op. Do NOT rely on it for security.
+-- =============================================================================
+
+create schema if not exists auth;
+
+create table if not exists auth.users (
+  id              uuid primary key,
+  email           text,
+  created_at      timestamptz not null default now()
+);
+
+do $$
+begin
+  -- Same semantics as Supabase's auth.uid(): the `sub` claim of the request JWT
+  if not exists (
+    select 1 from pg_proc p join pg_namespace n on n.oid = p.pronamespace
+    where n.nspname = 'auth' and p.proname = 'uid'
+  ) then
+    execute $fn$
+      create function auth.uid() returns uuid language sql stable as $body$
+        select nullif(coalesce(
+          current_setting('request.jwt.claim.sub', true),
+          current_setting('request.jwt.claims', true)::jsonb ->> 'sub'
+        ), '')::uuid
+      $body$
+    $fn$;
+  end if;
+
+  if not exists (select 1 from pg_roles where rolname = 'anon') then
+    create role anon nologin;
+  end if;
+  if not exists (select 1 from pg_roles where rolname = 'authenticated') then
+    create role authenticated nologin;
+  end if;
+end
+$$;
+
+grant usage on schema public, auth to anon, authenticated;
+alter default privileges in schema public grant select on tables to anon;
+alter default privileges in schema public grant select, insert, update, delete on tables to authenticated;
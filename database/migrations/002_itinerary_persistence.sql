@@ -0,0 +1,23 @@
+-- =============================================================================
+-- Xplor360 — Itinerary persistence
+-- Columns the API writes when saving a generated ItineraryResponse
+-- (backend/app/db/itineraries.py).
+-- =============================================================================
+
+-- When the itinerary was generated (created_at is when the row first appeared;
+-- regenerations keep created_at and bump version + generated_at)
+alter table public.itineraries
+  add column if not exists generated_at timestamptz not null default now();
+
+-- raw_llm_response now holds {"encoding": "zlib+base64", "data": "..."} —
+-- decode with app.db.itineraries.decode_raw_llm_response()
+comment on column public.itineraries.raw_llm_response is
+  'Raw Claude output, zlib-compressed and base64-encoded: {"encoding", "data"}';
+
+-- LLM tier suggestions and live provider options, as returned by the API
+alter table public.itinerary_days
+  add column if not exists accommodation_suggestions jsonb not null default '[]',
+  add column if not exists accommodation_options     jsonb not null default '[]';
+
+-- Cascading deletes on regeneration look activities up by day
+create index if not exists idx_itinerary_activities_day on public.itinerary_activities(day_id);
@@ -0,0 +1,19 @@
+-- =============================================================================
+-- Xplor360 — Itinerary version snapshots
+-- One row per saved itinerary version: the exact ItineraryResponse JSON the API
+-- serves, zlib-compressed. GET /api/v1/itinerary/{id}/changes diffs two of
+-- these into an RFC 6902 patch. The API keeps the last ITINERARY_VERSIONS_KEPT.
+-- =============================================================================
+
+create table if not exists public.itinerary_versions (
+  itinerary_id    uuid not null references public.itineraries(id) on delete cascade,
+  version         integer not null,
+  payload         bytea not null,     -- zlib(ItineraryResponse JSON)
+  created_at      timestamptz not null default now(),
+  primary key (itinerary_id, version)
+);
+
+alter table public.itinerary_versions enable row level security;
+
+create policy "access_via_itinerary" on public.itinerary_versions
+  using (itinerary_id in (select id from public.itineraries where user_id = auth.uid()));
@@ -0,0 +1,22 @@
+-- =============================================================================
+-- Xplor360 — Offline itinerary batches
+-- POST /api/v1/itinerary/generate:batch with mode=offline submits the prompts to
+-- the Anthropic Message Batches API; this table keeps the original requests
+-- (needed to parse and enrich the results) until they are collected through
+-- GET /api/v1/itinerary/batches/{id}.
+-- =============================================================================
+
+create table if not exists public.itinerary_batches (
+  id              text primary key,    -- Message Batches id (msgbatch_…)
+  user_id         uuid not null references public.profiles(id) on delete cascade,
+  items           jsonb not null,      -- [ItineraryRequest, …] in submission order
+  created_at      timestamptz not null default now(),
+  collected_at    timestamptz          -- first full collection; results persisted then
+);
+
+create index if not exists idx_itinerary_batches_user on public.itinerary_batches(user_id);
+
+alter table public.itinerary_batches enable row level security;
+
+create policy "own_batches" on public.itinerary_batches
+  using (user_id = auth.uid());
@@ -0,0 +1,23 @@
+-- =============================================================================
+-- Xplor360 — Destination skeletons
+-- The traveler-independent part of an itinerary (sights, overnight stops,
+-- stays, seasonal notes) per destination, month and trip-length bucket,
+-- generated once with the primary model and personalised per request with the
+-- fast one (backend/app/agents/itinerary_skeleton.py). Rows older than
+-- SKELETON_TTL_DAYS, or of an older skeleton version, are regenerated.
+-- =============================================================================
+
+create table if not exists public.destination_skeletons (
+  destination     text not null,       -- canonical display name from the autocomplete index
+  month           smallint not null check (month between 1 and 12),
+  duration_bucket smallint not null,   -- days the skeleton covers (3, 5, 7, 10, 14)
+  version         smallint not null,   -- SKELETON_VERSION
+  payload         jsonb not null,
+  model           text not null,
+  created_at      timestamptz not null default now(),
+  primary key (destination, month, duration_bucket, version)
+);
+
+alter table public.destination_skeletons enable row level security;
+
+create policy "public_read" on public.destination_skeletons for select using (true);
@@ -0,0 +1,16 @@
+-- =============================================================================
+-- Xplor360 — Caption queue
+-- Transcribed recordings are captioned in packed batches by the fast model
+-- (backend/app/agents/caption_agent.py). A run claims its rows by moving them
+-- to 'drafting'; a claim older than CAPTION_CLAIM_TTL_S (a worker that died
+-- mid-run) is picked up again by the next run.
+-- processing_status: 'pending' | 'transcribed' | 'drafting' | 'drafted' | 'failed'
+-- =============================================================================
+
+alter table public.media_assets add column if not exists processing_claimed_at timestamptz;
+
+create index if not exists idx_media_assets_caption_queue
+  on public.media_assets(recorded_at)
+  where processing_status in ('transcribed', 'drafting');
+
+create index if not exists idx_content_drafts_trip on public.content_drafts(trip_id);
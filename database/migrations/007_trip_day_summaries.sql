@@ -0,0 +1,25 @@
+-- =============================================================================
+-- Xplor360 — Trip day summaries
+-- The map step of blog generation (backend/app/agents/blog_agent.py): one
+-- fast-model summary per trip day of that day's recording transcripts, kept
+-- with a hash of its inputs. A blog re-run only re-summarises the days whose
+-- clips changed; the others are read from here.
+-- =============================================================================
+
+create table if not exists public.trip_day_summaries (
+  trip_id         uuid not null references public.trips(id) on delete cascade,
+  day_number      integer not null,
+  user_id         uuid not null references public.profiles(id) on delete cascade,
+  input_hash      text not null,       -- sha256 of the day's clips and the map prompt version
+  summary         jsonb not null,
+  model           text not null,
+  created_at      timestamptz not null default now(),
+  primary key (trip_id, day_number)
+);
+
+alter table public.trip_day_summaries enable row level security;
+
+create policy "users_own_rows" on public.trip_day_summaries
+  using (user_id = auth.uid());
+
+create index if not exists idx_media_assets_trip_recorded on public.media_assets(trip_id, recorded_at);
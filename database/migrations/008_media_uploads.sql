@@ -0,0 +1,36 @@
+-- =============================================================================
+-- Xplor360 — Resumable media uploads
+-- Recordings stream through the API into an R2 multipart upload
+-- (backend/app/services/media_upload.py). A session row tracks the parts
+-- committed so far, so a dropped connection resumes from the last full part
+-- on any worker. The media_assets row is written when the final part lands
+-- and the session row is deleted in the same transaction.
+--
+-- Abandoned sessions: give the bucket an AbortIncompleteMultipartUpload
+-- lifecycle rule (1 day) so R2 drops their parts; rows older than that can
+-- be deleted.
+-- =============================================================================
+
+create table if not exists public.media_uploads (
+  id              uuid primary key default uuid_generate_v4(),
+  user_id         uuid not null references public.profiles(id) on delete cascade,
+  object_key      text not null,
+  store_upload_id text not null,       -- S3 UploadId
+  size_bytes      bigint not null,     -- declared up front, like tus Upload-Length
+  part_size       integer not null,
+  received_bytes  bigint not null default 0,
+  parts           jsonb not null default '[]',   -- [{"n", "etag", "sha256", "size"}] in part order
+  asset           jsonb not null,      -- media_assets fields for the row written on completion
+  created_at      timestamptz not null default now(),
+  updated_at      timestamptz not null default now()
+);
+
+create index if not exists idx_media_uploads_user on public.media_uploads(user_id);
+
+alter table public.media_uploads enable row level security;
+
+create policy "users_own_rows" on public.media_uploads
+  using (user_id = auth.uid());
+
+-- Composite SHA-256 ("<hex of the part digests' sha256>-<parts>"), computed while streaming
+alter table public.media_assets add column if not exists sha256 text;
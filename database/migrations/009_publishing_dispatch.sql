@@ -0,0 +1,35 @@
+-- =============================================================================
+-- Xplor360 — Scheduled publishing
+-- The dispatcher (backend/app/services/publishing/dispatcher.py) keeps the
+-- next PUBLISHING_HORIZON_S of scheduled posts in an in-memory heap and learns
+-- about new or moved posts through NOTIFY instead of polling. A post is claimed
+-- ('publishing') just before it fires, so several workers can run dispatchers
+-- without double-posting. A retryable failure sets retry_at and puts the post
+-- back to 'scheduled'; the user's scheduled_for is left alone.
+-- status: 'scheduled' | 'publishing' | 'published' | 'failed'
+-- =============================================================================
+
+alter table public.published_posts
+  add column if not exists retry_at         timestamptz,
+  add column if not exists publish_attempts integer not null default 0,
+  add column if not exists last_error       text,
+  add column if not exists claimed_at       timestamptz;
+
+create index if not exists idx_published_posts_due
+  on public.published_posts ((coalesce(retry_at, scheduled_for)), id)
+  where status = 'scheduled';
+
+create or replace function public.notify_published_posts() returns trigger
+language plpgsql as $$
+begin
+  if new.status = 'scheduled' then
+    perform pg_notify('published_posts', new.id::text);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists published_posts_notify on public.published_posts;
+create trigger published_posts_notify
+  after insert or update of status, scheduled_for, retry_at on public.published_posts
+  for each row execute function public.notify_published_posts();
@@ -0,0 +1,62 @@
+-- =============================================================================
+-- Xplor360 — Post analytics rollups
+-- post_analytics keeps one row per fetch per post, so it grows without bound.
+-- Ingestion (backend/app/services/analytics.py) writes a batch of snapshots and,
+-- in the same transaction, folds the change each post's latest snapshot made
+-- into the rollups below. Dashboards and persona_profiles read rollups only.
+--
+-- Snapshot counters are cumulative, so a post contributes its latest values:
+-- a new snapshot adds (new − previous latest) and a post counts once.
+-- how = hour of week of the post's publish time in ANALYTICS_TIMEZONE,
+-- 0 = Monday 00:00 … 167 = Sunday 23:00.
+-- engagement = likes + comments + shares + saves.
+-- =============================================================================
+
+create table if not exists public.post_analytics_latest (
+  post_id         uuid primary key references public.published_posts(id) on delete cascade,
+  user_id         uuid not null references public.profiles(id) on delete cascade,
+  platform        text not null,
+  post_type       text not null,
+  how             smallint not null,
+  fetched_at      timestamptz not null,
+  reach           bigint not null default 0,
+  impressions     bigint not null default 0,
+  engagement      bigint not null default 0,
+  follower_delta  bigint not null default 0,
+  video_views     bigint not null default 0,
+  watch_time_sec  bigint not null default 0
+);
+
+create table if not exists public.analytics_hourly (
+  user_id         uuid not null references public.profiles(id) on delete cascade,
+  platform        text not null,
+  how             smallint not null check (how between 0 and 167),
+  posts           integer not null default 0,
+  reach           bigint not null default 0,
+  impressions     bigint not null default 0,
+  engagement      bigint not null default 0,
+  primary key (user_id, platform, how)
+);
+
+create table if not exists public.analytics_content_types (
+  user_id         uuid not null references public.profiles(id) on delete cascade,
+  platform        text not null,
+  post_type       text not null,
+  posts           integer not null default 0,
+  reach           bigint not null default 0,
+  impressions     bigint not null default 0,
+  engagement      bigint not null default 0,
+  video_views     bigint not null default 0,
+  watch_time_sec  bigint not null default 0,
+  primary key (user_id, platform, post_type)
+);
+
+alter table public.post_analytics_latest   enable row level security;
+alter table public.analytics_hourly        enable row level security;
+alter table public.analytics_content_types enable row level security;
+
+create policy "users_own_rows" on public.post_analytics_latest   using (user_id = auth.uid());
+create policy "users_own_rows" on public.analytics_hourly        using (user_id = auth.uid());
+create policy "users_own_rows" on public.analytics_content_types using (user_id = auth.uid());
+
+create index if not exists idx_post_analytics_latest_user on public.post_analytics_latest(user_id, platform);
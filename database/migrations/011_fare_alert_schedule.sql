@@ -0,0 +1,18 @@
+-- =============================================================================
+-- Xplor360 — Fare alert schedule
+-- The fare alert engine (backend/app/services/fares/alerts.py) claims alerts
+-- whose next_check_at has passed. It makes one fare lookup per (route, date)
+-- and writes every alert's price and next check back in one statement.
+-- Checks come closer together as travel_date nears. A claim pushes
+-- next_check_at out by a lease, so concurrent workers skip claimed alerts and
+-- an alert whose worker died comes back when the lease runs out.
+-- =============================================================================
+
+alter table public.fare_alerts
+  add column if not exists next_check_at   timestamptz not null default now(),
+  add column if not exists last_checked_at timestamptz,     -- last lookup that returned a price
+  add column if not exists price_provider  text,            -- source of current_price_inr
+  add column if not exists notified_at     timestamptz;
+
+create index if not exists idx_fare_alerts_due
+  on public.fare_alerts(next_check_at) where active and notified is not true;
@@ -0,0 +1,34 @@
+-- =============================================================================
+-- Xplor360 — Nudge queue
+-- The nudge scheduler (backend/app/agents/nudge_agent.py) plans golden-hour
+-- and crowd-window nudges for upcoming trip days from precomputed sun-event
+-- tables. It queues each nudge with the time it should go out. A delivery
+-- pass moves due rows into nudge_log in send_at order.
+-- Planning is idempotent. A trip day has at most one queued nudge per type,
+-- and re-planning updates an unsent nudge in place (for example after the
+-- itinerary changed).
+-- =============================================================================
+
+create table if not exists public.nudge_queue (
+  id              uuid primary key default uuid_generate_v4(),
+  user_id         uuid not null references public.profiles(id) on delete cascade,
+  trip_id         uuid not null references public.trips(id) on delete cascade,
+  nudge_type      text not null,       -- 'golden_hour' | 'crowd_window'
+  for_date        date not null,       -- the trip day the nudge is about
+  send_at         timestamptz not null,
+  message         text not null,
+  payload         jsonb not null default '{}',   -- place, coordinates, window times (UTC ISO 8601)
+  sent_at         timestamptz,
+  created_at      timestamptz not null default now(),
+  constraint unique_nudge_per_day unique (trip_id, nudge_type, for_date)
+);
+
+alter table public.nudge_queue enable row level security;
+
+create policy "users_own_rows" on public.nudge_queue
+  using (user_id = auth.uid());
+
+create index if not exists idx_nudge_queue_due on public.nudge_queue(send_at) where sent_at is null;
+
+-- Planning looks trip destinations up by name for days without mapped activities
+create index if not exists idx_destinations_lower_name on public.destinations(lower(name));
@@ -0,0 +1,13 @@
+-- =============================================================================
+-- Xplor360 — One writer per media upload
+-- Two PUTs of the same part could both reach R2. The part kept the body that
+-- landed last, while the session recorded the other one's ETag. A PUT now
+-- claims the session first (backend/app/services/media_upload.py) and renews
+-- the claim before every part it uploads. A claim that is not renewed within
+-- MEDIA_UPLOAD_CLAIM_TTL_S lapses, so a worker that died mid-upload does not
+-- block the resume.
+-- =============================================================================
+
+alter table public.media_uploads
+  add column if not exists writer       uuid,          -- the PUT holding the session
+  add column if not exists writer_until timestamptz;   -- its claim lapses after this
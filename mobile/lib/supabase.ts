@@ -0,0 +1,13 @@
+import { createClient } from "@supabase/supabase-js";
+
+export const supabase = createClient(
+  process.env.EXPO_PUBLIC_SUPABASE_URL!,
+  process.env.EXPO_PUBLIC_SUPABASE_ANON_KEY!
+);
+
+// The API identifies callers by their Supabase access token, never by a client-sent id
+export async function authHeaders(): Promise<Record<string, string>> {
+  const { data } = await supabase.auth.getSession();
+  if (!data.session) throw new Error("not signed in");
+  return { Authorization: `Bearer ${data.session.access_token}` };
+}
@@ -0,0 +1,197 @@
+// Reader for the offline trip bundle served by GET /api/v1/trips/{id}/offline-bundle
+// (layout documented in backend/app/services/offline_bundle.py).
+//
+// Works on the file's bytes in place: table cells are Int32Array views over the
+// buffer (sections are 8-byte aligned, and every platform the app ships on is
+// little-endian), and strings are decoded on first access. Opening a bundle
+// costs a directory walk, not a parse.
+
+export const BUNDLE_FORMAT = 1;
+const MAGIC = "XPB1";
+const NULL = -2147483648;
+const NO_STRING = -1;
+const LIST_SEPARATOR = "\x1f";
+
+const enum Col {
+  Str,
+  Int,
+  Bool,
+  Coord,
+  Date,
+  Deci,
+  List,
+}
+
+const DAY_MS = 86_400_000;
+
+function utf8(bytes: Uint8Array): string {
+  if (typeof TextDecoder !== "undefined") return new TextDecoder().decode(bytes);
+  let out = "";
+  for (let i = 0; i < bytes.length; ) {
+    const b = bytes[i++];
+    let cp = b;
+    if (b >= 0xf0) cp = ((b & 0x07) << 18) | ((bytes[i++] & 0x3f) << 12) | ((bytes[i++] & 0x3f) << 6) | (bytes[i++] & 0x3f);
+    else if (b >= 0xe0) cp = ((b & 0x0f) << 12) | ((bytes[i++] & 0x3f) << 6) | (bytes[i++] & 0x3f);
+    else if (b >= 0xc0) cp = ((b & 0x1f) << 6) | (bytes[i++] & 0x3f);
+    out += String.fromCodePoint(cp);
+  }
+  return out;
+}
+
+export class BundleTable {
+  private coords = new Map<number, Float64Array>();
+
+  constructor(
+    private bundle: OfflineBundle,
+    readonly rows: number,
+    readonly columns: string[],
+    private types: Col[],
+    private cells: Int32Array,
+  ) {}
+
+  // Coordinates are deltas down the column: prefix-summed once, on first use
+  private coordColumn(c: number): Float64Array {
+    let col = this.coords.get(c);
+    if (!col) {
+      col = new Float64Array(this.rows);
+      let micro = 0;
+      for (let r = 0; r < this.rows; r++) {
+        const cell = this.cells[r * this.columns.length + c];
+        if (cell === NULL) col[r] = NaN;
+        else col[r] = (micro += cell) / 1e6;
+      }
+      this.coords.set(c, col);
+    }
+    return col;
+  }
+
+  get(row: number, name: string): unknown {
+    const c = this.columns.indexOf(name);
+    if (c < 0) return undefined;
+    const cell = this.cells[row * this.columns.length + c];
+    switch (this.types[c]) {
+      case Col.Str:
+        return cell === NO_STRING ? null : this.bundle.string(cell);
+      case Col.List:
+        return cell === NO_STRING || this.bundle.string(cell) === "" ? [] : this.bundle.string(cell).split(LIST_SEPARATOR);
+      case Col.Coord: {
+        const value = this.coordColumn(c)[row];
+        return Number.isNaN(value) ? null : value;
+      }
+    }
+    if (cell === NULL) return null;
+    switch (this.types[c]) {
+      case Col.Bool:
+        return cell !== 0;
+      case Col.Date:
+        return new Date(cell * DAY_MS).toISOString().slice(0, 10);
+      case Col.Deci:
+        return cell / 100;
+      default:
+        return cell;
+    }
+  }
+
+  row(row: number): Record<string, unknown> {
+    const out: Record<string, unknown> = {};
+    for (const name of this.columns) out[name] = this.get(row, name);
+    return out;
+  }
+
+  all(): Record<string, unknown>[] {
+    return Array.from({ length: this.rows }, (_, r) => this.row(r));
+  }
+}
+
+export class OfflineBundle {
+  readonly format: number;
+  readonly version: number;
+  private bytes: Uint8Array;
+  private sections = new Map<string, [number, number]>();
+  private stringCount: number;
+  private stringOffsets: Uint32Array;
+  private stringBlob: number;
+  private strings: (string | undefined)[];
+  private tables = new Map<string, BundleTable>();
+
+  constructor(private buffer: ArrayBuffer) {
+    const view = new DataView(buffer);
+    this.bytes = new Uint8Array(buffer);
+    if (utf8(this.bytes.subarray(0, 4)) !== MAGIC) throw new Error("not an offline bundle");
+    this.format = view.getUint16(4, true);
+    if (this.format > BUNDLE_FORMAT) throw new Error(`bundle format ${this.format} needs an app update`);
+    const count = view.getUint16(6, true);
+    this.version = view.getUint32(8, true);
+    for (let i = 0; i < count; i++) {
+      const at = 16 + 12 * i;
+      const tag = utf8(this.bytes.subarray(at, at + 4));
+      this.sections.set(tag, [view.getUint32(at + 4, true), view.getUint32(at + 8, true)]);
+    }
+
+    const [strs] = this.sections.get("STRS")!;
+    this.stringCount = view.getUint32(strs, true);
+    this.stringOffsets = new Uint32Array(buffer, strs + 4, this.stringCount + 1);
+    this.stringBlob = strs + 8 + 4 * this.stringCount;
+    this.strings = new Array(this.stringCount);
+  }
+
+  string(index: number): string {
+    let s = this.strings[index];
+    if (s === undefined) {
+      const start = this.stringBlob + this.stringOffsets[index];
+      s = this.strings[index] = utf8(this.bytes.subarray(start, this.stringBlob + this.stringOffsets[index + 1]));
+    }
+    return s;
+  }
+
+  table(tag: string): BundleTable | undefined {
+    let table = this.tables.get(tag);
+    const section = this.sections.get(tag);
+    if (!table && section && tag !== "STRS") {
+      const view = new DataView(this.buffer);
+      let at = section[0];
+      const rows = view.getUint32(at, true);
+      const ncols = view.getUint16(at + 4, true);
+      at += 8;
+      const columns: string[] = [];
+      const types: Col[] = [];
+      for (let c = 0; c < ncols; c++, at += 8) {
+        columns.push(this.string(view.getUint32(at, true)));
+        types.push(view.getUint8(at + 4) as Col);
+      }
+      table = new BundleTable(this, rows, columns, types, new Int32Array(this.buffer, at, rows * ncols));
+      this.tables.set(tag, table);
+    }
+    return table;
+  }
+
+  // ItineraryResponse-shaped object, for screens that already render the online payload
+  itinerary(): Record<string, unknown> {
+    const meta = this.table("META")!.row(0);
+    const days = this.table("DAYS")!.all().map((day) => ({
+      ...day,
+      activities: [] as unknown[],
+      accommodation_suggestions: [] as unknown[],
+      accommodation_options: [] as unknown[],
+    }));
+    const children: [string, "activities" | "accommodation_suggestions" | "accommodation_options"][] = [
+      ["ACTS", "activities"],
+      ["SUGG", "accommodation_suggestions"],
+      ["OPTS", "accommodation_options"],
+    ];
+    for (const [tag, field] of children) {
+      for (const { day, ...item } of this.table(tag)?.all() ?? []) days[day as number][field].push(item);
+    }
+    const { trip_id: _trip, trip_title: _title, ...itinerary } = meta;
+    return {
+      ...itinerary,
+      days,
+      packing_list: this.table("PACK")?.all() ?? [],
+      key_tips: (this.table("TIPS")?.all() ?? []).map((row) => row.tip),
+    };
+  }
+
+  shotGuides(): Record<string, unknown>[] {
+    return this.table("SHOT")?.all() ?? [];
+  }
+}
@@ -1,5 +1,11 @@
+import * as FileSystem from "expo-file-system";
 import { create } from "zustand";
 
+import { authHeaders } from "../lib/supabase";
+import { OfflineBundle } from "./offlineBundle";
+
+const API_URL = process.env.EXPO_PUBLIC_API_URL ?? "http://localhost:8000";
+
 interface Trip {
   id: string;
   destination: string;
@@ -8,16 +14,168 @@ interface Trip {
   status: "planning" | "booked" | "active" | "completed";
 }
 
+// Full ItineraryResponse JSON as served by GET /api/v1/itinerary/{id}
+type Itinerary = Record<string, unknown> & { itinerary_id: string };
+
+interface CachedItinerary {
+  version: number;
+  data: Itinerary;
+}
+
+// RFC 6902 subset emitted by GET /itinerary/{id}/changes
+type PatchOp =
+  | { op: "add" | "replace"; path: string; value: unknown }
+  | { op: "remove"; path: string };
+
+interface ItineraryChanges {
+  from_version: number;
+  to_version: number;
+  patch?: PatchOp[] | null;
+  itinerary?: Itinerary | null;
+}
+
+// RFC 6901 array index (no sign, no leading zeros), in range — what the server's apply accepts
+function arrayIndex(token: string, length: number, op: PatchOp["op"] | null): number {
+  if (token === "-" && op === "add") return length;
+  if (!/^(0|[1-9][0-9]*)$/.test(token)) throw new Error(`bad index ${token}`);
+  const index = Number(token);
+  if (index > length || (index === length && op !== "add")) throw new Error(`bad index ${token}`);
+  return index;
+}
+
+// Copies only the containers along each patched path — untouched days keep
+// their identity, so memoised day components don't re-render.
+export function applyPatch<T>(doc: T, patch: PatchOp[]): T {
+  let root: any = doc;
+  for (const op of patch) {
+    const tokens = op.path.split("/").slice(1).map((t) => t.replace(/~1/g, "/").replace(/~0/g, "~"));
+    if (tokens.length === 0) {
+      root = op.op === "remove" ? undefined : op.value;
+      continue;
+    }
+    root = Array.isArray(root) ? [...root] : { ...root };
+    let parent: any = root;
+    for (const token of tokens.slice(0, -1)) {
+      if (Array.isArray(parent)) arrayIndex(token, parent.length, null);
+      const child = parent[token];
+      parent[token] = Array.isArray(child) ? [...child] : { ...child };
+      parent = parent[token];
+    }
+    const last = tokens[tokens.length - 1];
+    if (Array.isArray(parent)) {
+      const index = arrayIndex(last, parent.length, op.op);
+      if (op.op === "add") parent.splice(index, 0, op.value);
+      else if (op.op === "remove") parent.splice(index, 1);
+      else parent[index] = op.value;
+    } else if (op.op === "remove") {
+      delete parent[last];
+    } else {
+      parent[last] = op.value;
+    }
+  }
+  return root as T;
+}
+
+// A bundle saved under documentDirectory/bundles for use without signal
+interface OfflineBundleFile {
+  version: number;
+  etag: string;
+  uri: string;
+}
+
+const BUNDLE_DIR = `${FileSystem.documentDirectory}bundles/`;
+
+function header(headers: Record<string, string>, name: string): string | undefined {
+  const key = Object.keys(headers).find((k) => k.toLowerCase() === name.toLowerCase());
+  return key ? headers[key] : undefined;
+}
+
+function base64ToBuffer(b64: string): ArrayBuffer {
+  const binary = atob(b64);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  return bytes.buffer;
+}
+
 interface TripStore {
   trips: Trip[];
   activeTrip: Trip | null;
+  itineraries: Record<string, CachedItinerary>;
   addTrip: (trip: Trip) => void;
   setActiveTrip: (trip: Trip | null) => void;
+  offlineBundles: Record<string, OfflineBundleFile>;
+  fetchItinerary: (id: string) => Promise<Itinerary>;
+  downloadOfflineBundle: (tripId: string) => Promise<OfflineBundleFile>;
+  openOfflineBundle: (tripId: string) => Promise<OfflineBundle | null>;
 }
 
-export const useTripStore = create<TripStore>((set) => ({
+export const useTripStore = create<TripStore>((set, get) => ({
   trips: [],
   activeTrip: null,
+  itineraries: {},
+  offlineBundles: {},
   addTrip: (trip) => set((s) => ({ trips: [...s.trips, trip] })),
   setActiveTrip: (trip) => set({ activeTrip: trip }),
+
+  // First load fetches the whole itinerary; afterwards only a JSON Patch since
+  // the held version crosses the network (an empty patch when nothing changed).
+  fetchItinerary: async (id) => {
+    const cached = get().itineraries[id];
+    const headers = await authHeaders();
+    const url = cached
+      ? `${API_URL}/api/v1/itinerary/${id}/changes?since_version=${cached.version}`
+      : `${API_URL}/api/v1/itinerary/${id}`;
+
+    const res = await fetch(url, { headers });
+    if (!res.ok) throw new Error(`itinerary ${id}: HTTP ${res.status}`);
+
+    const version = Number(res.headers.get("X-Itinerary-Version"));
+    let data: Itinerary;
+    if (cached) {
+      const changes: ItineraryChanges = await res.json();
+      data = changes.patch ? applyPatch(cached.data, changes.patch) : changes.itinerary!;
+    } else {
+      data = await res.json();
+    }
+    set((s) => ({ itineraries: { ...s.itineraries, [id]: { version, data } } }));
+    return data;
+  },
+
+  // Re-downloads only when the itinerary or trip changed (If-None-Match → 304).
+  // The native HTTP stack negotiates gzip/br and stores the file decompressed,
+  // so it can be read in place by OfflineBundle.
+  downloadOfflineBundle: async (tripId) => {
+    const held = get().offlineBundles[tripId];
+    const headers = await authHeaders();
+    if (held) headers["If-None-Match"] = held.etag;
+
+    await FileSystem.makeDirectoryAsync(BUNDLE_DIR, { intermediates: true });
+    const uri = `${BUNDLE_DIR}${tripId}.xpb`;
+    const partial = `${uri}.part`;
+    const res = await FileSystem.downloadAsync(`${API_URL}/api/v1/trips/${tripId}/offline-bundle`, partial, { headers });
+    if (res.status === 304 && held) {
+      await FileSystem.deleteAsync(partial, { idempotent: true });
+      return held;
+    }
+    if (res.status !== 200) {
+      await FileSystem.deleteAsync(partial, { idempotent: true });
+      throw new Error(`offline bundle ${tripId}: HTTP ${res.status}`);
+    }
+    await FileSystem.moveAsync({ from: partial, to: uri });
+
+    const entry: OfflineBundleFile = {
+      version: Number(header(res.headers, "X-Itinerary-Version")),
+      etag: header(res.headers, "ETag") ?? "",
+      uri,
+    };
+    set((s) => ({ offlineBundles: { ...s.offlineBundles, [tripId]: entry } }));
+    return entry;
+  },
+
+  openOfflineBundle: async (tripId) => {
+    const held = get().offlineBundles[tripId];
+    if (!held) return null;
+    const b64 = await FileSystem.readAsStringAsync(held.uri, { encoding: FileSystem.EncodingType.Base64 });
+    return new OfflineBundle(base64ToBuffer(b64));
+  },
 }));
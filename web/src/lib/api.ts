@@ -13,6 +13,15 @@ export async function generateItinerary(payload: ItineraryRequest): Promise<Itin
   return res.json();
 }
 
+// Called per keystroke — pass the previous call's AbortSignal so stale requests are dropped
+export async function suggestDestinations(q: string, signal?: AbortSignal, limit = 8): Promise<DestinationSuggestion[]> {
+  const params = new URLSearchParams({ q, limit: String(limit) });
+  const res = await fetch(`${API_URL}/api/v1/destinations/suggest?${params}`, { signal });
+  if (!res.ok) return [];
+  const body: { query: string; suggestions: DestinationSuggestion[] } = await res.json();
+  return body.suggestions;
+}
+
 // ── Types mirrored from backend Pydantic models ────────────────────────────────
 export interface ItineraryRequest {
   destination: string;
@@ -29,6 +38,16 @@ export interface ItineraryRequest {
   avoid?: string[];
 }
 
+export interface DestinationSuggestion {
+  id?: string;
+  name: string;
+  state?: string;
+  lat?: number;
+  lng?: number;
+  in_season: boolean;
+  match: "prefix" | "fuzzy";
+}
+
 export interface Activity {
   time: string;
   title: string;